@@ -1,7 +1,7 @@
 from uuid import UUID
 
 import structlog
-from fastapi import Depends
+from fastapi import Depends, Request, Response
 
 from polar.auth.dependencies import WebUser
 from polar.authz.service import AccessType, Authz
@@ -18,6 +18,7 @@ from polar.models.advertisement_campaign import (
     AdvertisementCampaign as AdvertisementCampaignModel,
 )
 from polar.models.user import User
+from polar.organization.cache import benefit_alias, organization_response_cache
 from polar.postgres import AsyncSession, get_db_session
 from polar.subscription.service.subscription import (
     subscription as subscription_service,
@@ -118,12 +119,19 @@ async def search_campaigns(
     status_code=200,
 )
 async def search_display(
+    request: Request,
     benefit_id: UUID,
     session: AsyncSession = Depends(get_db_session),
-) -> ListResource[AdvertisementDisplay]:
+) -> ListResource[AdvertisementDisplay] | Response:
     if benefit_id is None:
         raise BadRequest("No search criteria specified")
 
+    cache_lookup = await organization_response_cache.lookup(
+        request, None, alias=benefit_alias(benefit_id)
+    )
+    if cache_lookup.response is not None:
+        return cache_lookup.response
+
     ads = await advertisement_campaign_service.search(
         session,
         benefit_id=benefit_id,
@@ -140,16 +148,20 @@ async def search_display(
         a.width = w if isinstance(w, int) else 100
         return a
 
-    return ListResource(
-        items=[
-            withDimensions(
-                AdvertisementDisplay.model_validate(
-                    ad,
+    return await organization_response_cache.store(
+        cache_lookup,
+        benefit.organization_id,
+        ListResource(
+            items=[
+                withDimensions(
+                    AdvertisementDisplay.model_validate(
+                        ad,
+                    )
                 )
-            )
-            for ad in ads
-        ],
-        pagination=Pagination(total_count=len(ads), max_page=1),
+                for ad in ads
+            ],
+            pagination=Pagination(total_count=len(ads), max_page=1),
+        ),
     )
 
 
@@ -212,7 +224,7 @@ async def track_view(
     if not ad:
         raise ResourceNotFound()
 
-    await advertisement_campaign_service.track_view(session, ad)
+    await advertisement_campaign_service.track_view(ad)
 
     return ad
 
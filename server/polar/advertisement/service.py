@@ -1,10 +1,13 @@
 import uuid
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 
 from sqlalchemy import (
+    Integer,
     and_,
+    column,
     select,
     update,
+    values,
 )
 
 from polar.advertisement.schemas import (
@@ -12,8 +15,11 @@ from polar.advertisement.schemas import (
     EditAdvertisementCampaign,
 )
 from polar.kit.db.postgres import AsyncSession
+from polar.kit.extensions.sqlalchemy import PostgresUUID
 from polar.kit.utils import utc_now
-from polar.models import AdvertisementCampaign, BenefitGrant
+from polar.models import AdvertisementCampaign, Benefit, BenefitGrant
+from polar.organization.cache import organization_response_cache
+from polar.traffic.buffer import view_buffer
 
 
 class AdvertisementCampaignService:
@@ -46,6 +52,7 @@ class AdvertisementCampaignService:
             link_url=str(create.link_url),
         )
         session.add(campaign)
+        await self._after_campaign_updated(session, campaign)
         return campaign
 
     async def edit(
@@ -61,19 +68,26 @@ class AdvertisementCampaignService:
         campaign.link_url = str(edit.link_url)
         campaign.text = edit.text
         session.add(campaign)
+        await self._after_campaign_updated(session, campaign)
         return campaign
 
-    async def track_view(
-        self,
-        session: AsyncSession,
-        campaign: AdvertisementCampaign,
+    async def track_view(self, campaign: AdvertisementCampaign) -> None:
+        await view_buffer.track_advertisement_campaign_view(campaign.id)
+
+    async def add_views(
+        self, session: AsyncSession, views: Mapping[uuid.UUID, int]
     ) -> None:
+        """Add views counted by the view buffer, in a single UPDATE."""
+        if not views:
+            return
+        counts = values(
+            column("id", PostgresUUID), column("count", Integer), name="counts"
+        ).data(sorted(views.items()))
         stmt = (
             update(AdvertisementCampaign)
-            .where(AdvertisementCampaign.id == campaign.id)
-            .values({"views": AdvertisementCampaign.views + 1})
+            .where(AdvertisementCampaign.id == counts.c.id)
+            .values({"views": AdvertisementCampaign.views + counts.c.count})
         )
-
         await session.execute(stmt)
 
     async def delete(
@@ -83,8 +97,20 @@ class AdvertisementCampaignService:
     ) -> AdvertisementCampaign:
         campaign.deleted_at = utc_now()
         session.add(campaign)
+        await self._after_campaign_updated(session, campaign)
         return campaign
 
+    async def _after_campaign_updated(
+        self, session: AsyncSession, campaign: AdvertisementCampaign
+    ) -> None:
+        organization_id = await session.scalar(
+            select(Benefit.organization_id).where(Benefit.id == campaign.benefit_id)
+        )
+        if organization_id is not None:
+            await organization_response_cache.invalidate_after_commit(
+                session, organization_id
+            )
+
     async def search(
         self,
         session: AsyncSession,
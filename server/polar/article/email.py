@@ -0,0 +1,136 @@
+import html
+from typing import NamedTuple
+
+import httpx
+import structlog
+
+from polar.auth.service import AuthService
+from polar.config import settings
+from polar.exceptions import PolarError
+from polar.locker import Locker
+from polar.logging import Logger
+from polar.models import ArticlesSubscription, User
+from polar.models.article import Article
+from polar.redis import Redis
+from polar.redis import redis as redis_client
+
+log: Logger = structlog.get_logger()
+
+UNSUBSCRIBE_LINK_PLACEHOLDER = "POLAR_UNSUBSCRIBE_LINK_PLACEHOLDER"
+
+
+class ArticleEmailRenderError(PolarError): ...
+
+
+class AudienceVariant(NamedTuple):
+    """
+    What changes the rendered article from one recipient to another,
+    besides the unsubscribe link.
+    """
+
+    paid_subscriber: bool
+    organization_member: bool
+    unsubscribable: bool
+
+    @classmethod
+    def from_recipient(
+        cls, subscription: ArticlesSubscription | None, organization_member: bool
+    ) -> "AudienceVariant":
+        return cls(
+            paid_subscriber=subscription is not None and subscription.paid_subscriber,
+            organization_member=organization_member,
+            unsubscribable=subscription is not None,
+        )
+
+    def to_key(self) -> str:
+        return "".join(str(int(flag)) for flag in self)
+
+
+def get_unsubscribe_link(article: Article, subscription: ArticlesSubscription) -> str:
+    return f"https://polar.sh/unsubscribe?org={article.organization.name}&id={subscription.id}"
+
+
+def personalize(body: str, unsubscribe_link: str | None) -> str:
+    if unsubscribe_link is None:
+        return body
+    return body.replace(UNSUBSCRIBE_LINK_PLACEHOLDER, html.escape(unsubscribe_link))
+
+
+class ArticleEmailRenderer:
+    """
+    Render articles to email HTML through the frontend renderer, once per
+    audience variant.
+
+    The unsubscribe link is rendered as a placeholder, to be replaced for each
+    recipient with `personalize`. Renders are cached in Redis, keyed by the
+    last modification of the article, and concurrent renders of the same
+    variant wait for the first one.
+    """
+
+    def __init__(self, redis: Redis, *, ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.locker = Locker(redis)
+
+    async def render(
+        self, article: Article, variant: AudienceVariant, as_user: User
+    ) -> str:
+        """
+        Render the article for an audience variant,
+        authenticated as `as_user`, who must belong to it.
+        """
+        key = self._key(article, variant)
+        cached = await self.redis.get(key)
+        if cached is not None:
+            return cached
+
+        lock_timeout = settings.ARTICLE_EMAIL_RENDER_TIMEOUT_SECONDS * 2
+        async with self.locker.lock(
+            key, timeout=lock_timeout, blocking_timeout=lock_timeout
+        ):
+            cached = await self.redis.get(key)
+            if cached is not None:
+                return cached
+
+            body = await self._render(article, variant, as_user)
+            await self.redis.set(key, body, ex=self.ttl)
+            return body
+
+    async def _render(
+        self, article: Article, variant: AudienceVariant, as_user: User
+    ) -> str:
+        render_data: dict[str, str] = {}
+        if variant.unsubscribable:
+            render_data["unsubscribe_link"] = UNSUBSCRIBE_LINK_PLACEHOLDER
+
+        (jwt, _) = AuthService.generate_token(as_user)
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{settings.FRONTEND_BASE_URL}/email/article/{article.id}",
+                json=render_data,
+                # Authenticating to the renderer as a user of the audience variant
+                headers={"Cookie": f"polar_session={jwt};"},
+                # Increase the default timeout because it can be slow to render
+                timeout=settings.ARTICLE_EMAIL_RENDER_TIMEOUT_SECONDS,
+            )
+
+        if not response.is_success:
+            raise ArticleEmailRenderError(
+                f"failed to get rendered article: code={response.status_code}"
+            )
+
+        log.info(
+            "article.email.rendered",
+            article_id=str(article.id),
+            variant=variant.to_key(),
+        )
+        return response.text
+
+    def _key(self, article: Article, variant: AudienceVariant) -> str:
+        version = (article.modified_at or article.created_at).timestamp()
+        return f"polar:article_email:{article.id}:{version}:{variant.to_key()}"
+
+
+article_email_renderer = ArticleEmailRenderer(
+    redis_client, ttl=settings.ARTICLE_EMAIL_RENDER_CACHE_TTL_SECONDS
+)
@@ -1,7 +1,7 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from polar.auth.dependencies import Authenticator, WebUser, WebUserOrAnonymous
 from polar.auth.models import Anonymous, AuthSubject, User
@@ -10,6 +10,7 @@ from polar.authz.service import AccessType, Authz
 from polar.exceptions import ResourceNotFound, Unauthorized
 from polar.kit.pagination import ListResource, PaginationParamsQuery
 from polar.kit.utils import utc_now
+from polar.organization.cache import name_alias, organization_response_cache
 from polar.organization.dependencies import OrganizationNamePlatform
 from polar.organization.service import organization as organization_service
 from polar.postgres import (
@@ -108,6 +109,7 @@ async def list(
     responses={404: {}},
 )
 async def search(
+    request: Request,
     organization_name_platform: OrganizationNamePlatform,
     pagination: PaginationParamsQuery,
     auth_subject: ArticlesReadOrAnonymous,
@@ -121,8 +123,14 @@ async def search(
     ),
     session: AsyncSession = Depends(get_db_session),
     authz: Authz = Depends(Authz.authz),
-) -> ListResource[ArticleSchema]:
+) -> ListResource[ArticleSchema] | Response:
     (organization_name, platform) = organization_name_platform
+    cache_lookup = await organization_response_cache.lookup(
+        request, auth_subject, alias=name_alias(platform, organization_name)
+    )
+    if cache_lookup.response is not None:
+        return cache_lookup.response
+
     org = await organization_service.get_by_name(session, platform, organization_name)
     if not org:
         raise ResourceNotFound()
@@ -136,19 +144,23 @@ async def search(
         is_pinned=is_pinned,
     )
 
-    return ListResource.from_paginated_results(
-        [
-            ArticleSchema.from_db(
-                art,
-                include_admin_fields=await authz.can(
-                    auth_subject.subject, AccessType.write, art
-                ),
-                is_paid_subscriber=is_paid_subscriber,
-            )
-            for art, is_paid_subscriber in results
-        ],
-        count,
-        pagination,
+    return await organization_response_cache.store(
+        cache_lookup,
+        org.id,
+        ListResource.from_paginated_results(
+            [
+                ArticleSchema.from_db(
+                    art,
+                    include_admin_fields=await authz.can(
+                        auth_subject.subject, AccessType.write, art
+                    ),
+                    is_paid_subscriber=is_paid_subscriber,
+                )
+                for art, is_paid_subscriber in results
+            ],
+            count,
+            pagination,
+        ),
     )
 
 
@@ -320,10 +332,7 @@ async def viewed(
 
     # Track view
     # TODO: very simplistic for now, might need some improvements later :-)
-    await article_service.track_view(
-        session,
-        id,
-    )
+    await article_service.track_view(id)
 
     return ArticleViewedResponse(ok=True)
 
@@ -485,6 +494,9 @@ async def delete(
 
     art.deleted_at = utc_now()
     session.add(art)
+    await organization_response_cache.invalidate_after_commit(
+        session, art.organization_id
+    )
 
     posthog.auth_subject_event(
         auth_subject, "articles", "api", "delete", {"article_id": art.id}
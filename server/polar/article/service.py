@@ -1,19 +1,31 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
-from datetime import datetime
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
 from operator import and_, or_
 from uuid import UUID
 
 import structlog
 from discord_webhook import AsyncDiscordWebhook, DiscordEmbed
 from slugify import slugify
-from sqlalchemy import Select, desc, false, func, nullsfirst, select, update
+from sqlalchemy import (
+    Integer,
+    Select,
+    column,
+    desc,
+    false,
+    func,
+    nullsfirst,
+    select,
+    update,
+    values,
+)
 from sqlalchemy.orm import contains_eager, joinedload
 
 from polar.auth.models import Subject
 from polar.config import settings
 from polar.exceptions import BadRequest
+from polar.kit.extensions.sqlalchemy import PostgresUUID
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.utils import utc_now
 from polar.models import ArticlesSubscription
@@ -21,7 +33,9 @@ from polar.models.article import Article
 from polar.models.organization import Organization
 from polar.models.user import User
 from polar.models.user_organization import UserOrganization
+from polar.organization.cache import organization_response_cache
 from polar.postgres import AsyncSession, sql
+from polar.traffic.buffer import view_buffer
 from polar.worker import enqueue_job
 
 from .schemas import ArticleCreate, ArticleUpdate, Visibility
@@ -93,6 +107,10 @@ class ArticleService:
         session.add(article)
         await session.flush()
 
+        await organization_response_cache.invalidate_after_commit(
+            session, article.organization_id
+        )
+
         return article
 
     async def get_loaded(
@@ -291,6 +309,10 @@ class ArticleService:
         session.add(article)
         await session.flush()
 
+        await organization_response_cache.invalidate_after_commit(
+            session, article.organization_id
+        )
+
         if should_notify_on_discord:
             await self.article_published_discord_notification(article)
 
@@ -305,18 +327,24 @@ class ArticleService:
             case "public":
                 return Article.Visibility.public
 
-    async def track_view(
-        self,
-        session: AsyncSession,
-        id: UUID,
+    async def track_view(self, id: UUID) -> None:
+        await view_buffer.track_article_view(id)
+
+    async def add_web_views(
+        self, session: AsyncSession, views: Mapping[UUID, int]
     ) -> None:
+        """Add web views counted by the view buffer, in a single UPDATE."""
+        if not views:
+            return
+        counts = values(
+            column("id", PostgresUUID), column("count", Integer), name="counts"
+        ).data(sorted(views.items()))
         statement = (
             sql.update(Article)
-            .where(Article.id == id)
-            .values({"web_view_count": Article.web_view_count + 1})
+            .where(Article.id == counts.c.id)
+            .values({"web_view_count": Article.web_view_count + counts.c.count})
         )
         await session.execute(statement)
-        await session.commit()
 
     async def list_scheduled_unsent_posts(
         self, session: AsyncSession
@@ -334,57 +362,50 @@ class ArticleService:
     async def list_receivers(
         self, session: AsyncSession, organization_id: UUID, paid_subscribers_only: bool
     ) -> Sequence[tuple[UUID, bool, bool]]:
-        user_subscription_clause = (
-            ArticlesSubscription.organization_id == organization_id
-        )
-        if paid_subscribers_only:
-            user_subscription_clause &= ArticlesSubscription.paid_subscriber.is_(True)
-
-        statement = (
-            select(
-                User.id,
-                func.coalesce(ArticlesSubscription.paid_subscriber, False),
-                UserOrganization.user_id.is_not(None),
-            )
-            .join(
-                UserOrganization,
-                onclause=(UserOrganization.user_id == User.id)
-                & (UserOrganization.organization_id == organization_id),
-                isouter=True,
-            )
-            .join(
-                ArticlesSubscription,
-                onclause=(ArticlesSubscription.user_id == User.id)
-                & (ArticlesSubscription.organization_id == organization_id)
-                & (ArticlesSubscription.emails_unsubscribed_at.is_(None)),
-                isouter=True,
-            )
-        ).where(
-            or_(
-                user_subscription_clause,
-                UserOrganization.organization_id == organization_id,
-            )
+        statement = self._get_receivers_statement(
+            organization_id, paid_subscribers_only
         )
-
         result = await session.execute(statement)
         return result.tuples().all()
 
+    async def list_receiver_ids(
+        self,
+        session: AsyncSession,
+        organization_id: UUID,
+        paid_subscribers_only: bool,
+        *,
+        after: UUID | None,
+        limit: int,
+    ) -> Sequence[UUID]:
+        """Return a page of receivers IDs, paginated by ID."""
+        receivers = self._get_receivers_statement(
+            organization_id, paid_subscribers_only
+        ).subquery()
+        statement = select(receivers.c.id).order_by(receivers.c.id).limit(limit)
+        if after is not None:
+            statement = statement.where(receivers.c.id > after)
+        result = await session.execute(statement)
+        return result.scalars().all()
+
     async def count_receivers(
         self, session: AsyncSession, organization_id: UUID, paid_subscribers_only: bool
     ) -> tuple[int, int, int]:
-        receivers = await self.list_receivers(
-            session, organization_id, paid_subscribers_only
+        receivers = self._get_receivers_statement(
+            organization_id, paid_subscribers_only
+        ).subquery()
+        statement = select(
+            func.count().filter(
+                receivers.c.paid_subscriber.is_(False),
+                receivers.c.organization_member.is_(False),
+            ),
+            func.count().filter(receivers.c.paid_subscriber.is_(True)),
+            func.count().filter(
+                receivers.c.paid_subscriber.is_(False),
+                receivers.c.organization_member.is_(True),
+            ),
         )
-        free_subscribers = 0
-        premium_subscribers = 0
-        organization_members = 0
-        for _, is_paid_subscriber, is_organization_member in receivers:
-            if is_paid_subscriber:
-                premium_subscribers += 1
-            elif is_organization_member:
-                organization_members += 1
-            else:
-                free_subscribers += 1
+        result = await session.execute(statement)
+        free_subscribers, premium_subscribers, organization_members = result.one()
         return free_subscribers, premium_subscribers, organization_members
 
     async def send_to_subscribers(
@@ -405,24 +426,70 @@ class ArticleService:
             raise BadRequest("article is scheduled to be published in the future")
 
         article.notifications_sent_at = utc_now()
+        article.email_sent_to_count = 0
         session.add(article)
+        await session.flush()
+
+        self.enqueue_fan_out(article)
+
+    async def fan_out_page(self, session: AsyncSession, article: Article) -> bool:
+        """
+        Enqueue the emails of the next page of receivers, from the article's
+        cursor, and move the cursor forward.
+
+        Chunk jobs have deterministic IDs, so resuming from a cursor that
+        wasn't saved after its jobs were enqueued doesn't send emails twice.
 
-        receivers = await article_service.list_receivers(
-            session, article.organization_id, article.paid_subscribers_only
+        Returns `False` once every receiver has been enqueued.
+        """
+        chunk_size = settings.ARTICLE_EMAIL_CHUNK_SIZE
+        user_ids = await self.list_receiver_ids(
+            session,
+            article.organization_id,
+            article.paid_subscribers_only,
+            after=article.email_fanout_cursor,
+            limit=chunk_size * settings.ARTICLE_EMAIL_FANOUT_CHUNKS_PER_PAGE,
         )
 
-        for receiver_user_id, _, _ in receivers:
+        if not user_ids:
+            article.email_fanout_completed_at = utc_now()
+            session.add(article)
+            return False
+
+        for i in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[i : i + chunk_size]
             enqueue_job(
-                "articles.send_to_user",
+                "articles.send_to_users",
                 article_id=article.id,
-                user_id=receiver_user_id,
-                is_test=False,
+                user_ids=chunk,
+                _job_id=f"articles.send_to_users:{article.id}-{chunk[0]}",
             )
 
-        # after scheduling is complete
-        article.email_sent_to_count = len(receivers)
+        article.email_fanout_cursor = user_ids[-1]
+        article.email_sent_to_count = (article.email_sent_to_count or 0) + len(user_ids)
         session.add(article)
-        await session.flush()
+        return True
+
+    async def list_unfinished_fan_outs(
+        self, session: AsyncSession
+    ) -> Sequence[Article]:
+        """List articles whose fan-out didn't complete in a timely manner."""
+        statement = sql.select(Article).where(
+            Article.deleted_at.is_(None),
+            Article.notifications_sent_at
+            < utc_now()
+            - timedelta(seconds=settings.ARTICLE_EMAIL_FANOUT_STALE_SECONDS),
+            Article.email_fanout_completed_at.is_(None),
+        )
+        res = await session.execute(statement)
+        return res.scalars().unique().all()
+
+    def enqueue_fan_out(self, article: Article) -> None:
+        enqueue_job(
+            "articles.fan_out",
+            article_id=article.id,
+            _job_id=f"articles.fan_out:{article.id}",
+        )
 
     async def release_paid_subscribers_only(self, session: AsyncSession) -> None:
         statement = (
@@ -435,6 +502,43 @@ class ArticleService:
         )
         await session.execute(statement)
 
+    def _get_receivers_statement(
+        self, organization_id: UUID, paid_subscribers_only: bool
+    ) -> Select[tuple[UUID, bool, bool]]:
+        user_subscription_clause = (
+            ArticlesSubscription.organization_id == organization_id
+        )
+        if paid_subscribers_only:
+            user_subscription_clause &= ArticlesSubscription.paid_subscriber.is_(True)
+
+        return (
+            select(
+                User.id,
+                func.coalesce(ArticlesSubscription.paid_subscriber, False).label(
+                    "paid_subscriber"
+                ),
+                UserOrganization.user_id.is_not(None).label("organization_member"),
+            )
+            .join(
+                UserOrganization,
+                onclause=(UserOrganization.user_id == User.id)
+                & (UserOrganization.organization_id == organization_id),
+                isouter=True,
+            )
+            .join(
+                ArticlesSubscription,
+                onclause=(ArticlesSubscription.user_id == User.id)
+                & (ArticlesSubscription.organization_id == organization_id)
+                & (ArticlesSubscription.emails_unsubscribed_at.is_(None)),
+                isouter=True,
+            )
+        ).where(
+            or_(
+                user_subscription_clause,
+                UserOrganization.organization_id == organization_id,
+            )
+        )
+
     def _get_readable_articles_statement(
         self, auth_subject: Subject
     ) -> Select[tuple[Article, bool]]:
@@ -511,6 +615,33 @@ class ArticleService:
 
         return statement
 
+    async def list_recipients(
+        self, session: AsyncSession, organization_id: UUID, user_ids: Sequence[UUID]
+    ) -> Sequence[tuple[User, ArticlesSubscription | None, bool]]:
+        """
+        Load users to email an article to, along with their subscription to the
+        organization, if any, and whether they're a member of it.
+        """
+        statement = (
+            select(User, ArticlesSubscription, UserOrganization.user_id.is_not(None))
+            .join(
+                UserOrganization,
+                onclause=(UserOrganization.user_id == User.id)
+                & (UserOrganization.organization_id == organization_id),
+                isouter=True,
+            )
+            .join(
+                ArticlesSubscription,
+                onclause=(ArticlesSubscription.user_id == User.id)
+                & (ArticlesSubscription.organization_id == organization_id),
+                isouter=True,
+            )
+            .where(User.id.in_(user_ids))
+            .order_by(User.id)
+        )
+        result = await session.execute(statement)
+        return result.unique().tuples().all()
+
     async def get_subscriber(
         self,
         session: AsyncSession,
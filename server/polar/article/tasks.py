@@ -1,22 +1,27 @@
+from collections.abc import Sequence
 from uuid import UUID
 
-import httpx
 import structlog
 
-from polar.auth.service import AuthService
-from polar.config import settings
-from polar.email.sender import get_email_sender
+from polar.email.sender import Email, get_email_sender
 from polar.logging import Logger
 from polar.models.article import Article
-from polar.user.service import user as user_service
+from polar.postgres import AsyncSession
 from polar.worker import (
     AsyncSessionMaker,
     JobContext,
     PolarWorkerContext,
+    flush_enqueued_jobs,
     interval,
     task,
 )
 
+from .email import (
+    AudienceVariant,
+    article_email_renderer,
+    get_unsubscribe_link,
+    personalize,
+)
 from .service import article_service
 
 log: Logger = structlog.get_logger()
@@ -31,81 +36,108 @@ async def articles_send_to_user(
     polar_context: PolarWorkerContext,
 ) -> None:
     async with AsyncSessionMaker(ctx) as session:
-        user = await user_service.get(session, user_id)
-        if not user:
-            # err?
-            return
+        await send_article(session, article_id, [user_id], is_test=is_test)
 
-        article = await article_service.get_loaded(session, article_id)
-        if not article:
-            return
 
-        subject = "[TEST] " if is_test else ""
-        subject += article.title
+@task("articles.send_to_users")
+async def articles_send_to_users(
+    ctx: JobContext,
+    article_id: UUID,
+    user_ids: list[UUID],
+    polar_context: PolarWorkerContext,
+) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await send_article(session, article_id, user_ids)
 
-        (jwt, _) = AuthService.generate_token(user)
 
-        # _, magic_link_token = await magic_link_service.request(
-        #     session,
-        #     user.email,
-        #     source="article_links",
-        #     expires_at=utc_now() + timedelta(hours=24),
-        # )
+async def send_article(
+    session: AsyncSession,
+    article_id: UUID,
+    user_ids: Sequence[UUID],
+    *,
+    is_test: bool = False,
+) -> None:
+    article = await article_service.get_loaded(session, article_id)
+    if not article:
+        return
+
+    recipients = await article_service.list_recipients(
+        session, article.organization_id, user_ids
+    )
+
+    # Render each audience variant once, before sending anything,
+    # so a failed render can be retried without duplicate emails
+    variants: dict[AudienceVariant, str] = {}
+    for user, subscription, is_organization_member in recipients:
+        variant = AudienceVariant.from_recipient(subscription, is_organization_member)
+        if variant not in variants:
+            variants[variant] = await article_email_renderer.render(
+                article, variant, user
+            )
 
-        email_headers: dict[str, str] = {}
+    subject = "[TEST] " if is_test else ""
+    subject += article.title
+
+    email_headers: dict[str, str] = {}
+    from_name = ""
+    if article.byline == Article.Byline.organization:
+        from_name = article.organization.pretty_name or article.organization.name
+        if article.organization.email:
+            email_headers["Reply-To"] = f"{from_name} <{article.organization.email}>"
+    else:
+        from_name = article.created_by_user.public_name
+        if article.created_by_user.email:
+            email_headers["Reply-To"] = f"{from_name} <{article.created_by_user.email}>"
+
+    emails: list[Email] = []
+    for user, subscription, is_organization_member in recipients:
+        variant = AudienceVariant.from_recipient(subscription, is_organization_member)
+        headers = email_headers
+        unsubscribe_link: str | None = None
+        if subscription is not None:
+            unsubscribe_link = get_unsubscribe_link(article, subscription)
+            headers = {**email_headers, "List-Unsubscribe": f"<{unsubscribe_link}>"}
+        emails.append(
+            Email(
+                to_email_addr=user.email,
+                subject=subject,
+                html_content=personalize(variants[variant], unsubscribe_link),
+                from_name=from_name,
+                from_email_addr=f"{article.organization.name}@posts.polar.sh",
+                email_headers=headers,
+            )
+        )
 
-        render_data = {
-            # Add pre-authenticated tokens to the end of all links in the email
-            # "inject_magic_link_token": magic_link_token,
-        }
+    await get_email_sender("article").send_batch(emails)
+    log.info(
+        "article.email.sent",
+        article_id=str(article.id),
+        recipients=len(emails),
+        variants=len(variants),
+    )
 
-        # Get subscriber ID (if exists)
-        subscriber = await article_service.get_subscriber(
-            session, user_id, article.organization_id
-        )
-        if subscriber:
-            unsubscribe_link = f"https://polar.sh/unsubscribe?org={article.organization.name}&id={subscriber.id}"
-            render_data["unsubscribe_link"] = unsubscribe_link
-            email_headers["List-Unsubscribe"] = f"<{unsubscribe_link}>"
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.FRONTEND_BASE_URL}/email/article/{article.id}",
-                json=render_data,
-                # Authenticating to the renderer as the user we're sending the email to
-                headers={"Cookie": f"polar_session={jwt};"},
-                # Increase the default timeout because it can be slow to render
-                timeout=60,
-            )
 
-        if not response.is_success:
-            log.error(f"failed to get rendered article: code={response.status_code}")
-            return None
-
-        from_name = ""
-        if article.byline == Article.Byline.organization:
-            from_name = article.organization.pretty_name or article.organization.name
-            if article.organization.email:
-                email_headers["Reply-To"] = (
-                    f"{from_name} <{article.organization.email}>"
-                )
-        else:
-            from_name = article.created_by_user.public_name
-            if article.created_by_user.email:
-                email_headers["Reply-To"] = (
-                    f"{from_name} <{article.created_by_user.email}>"
-                )
-
-        email_sender = get_email_sender("article")
-
-        email_sender.send_to_user(
-            to_email_addr=user.email,
-            subject=subject,
-            html_content=response.text,
-            from_name=from_name,
-            from_email_addr=f"{article.organization.name}@posts.polar.sh",
-            email_headers=email_headers,
-        )
+@task("articles.fan_out")
+async def articles_fan_out(
+    ctx: JobContext,
+    article_id: UUID,
+    polar_context: PolarWorkerContext,
+) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        article = await article_service.get_loaded(session, article_id)
+        if article is None or article.email_fanout_completed_at is not None:
+            return
+
+        while await article_service.fan_out_page(session, article):
+            # Push the chunk jobs before saving the cursor past them
+            await flush_enqueued_jobs(ctx["redis"])
+            await session.commit()
+            log.info(
+                "article.fan_out.progress",
+                article_id=str(article.id),
+                email_sent_to_count=article.email_sent_to_count,
+            )
+        await session.commit()
 
 
 @interval(second=0)
@@ -117,6 +149,11 @@ async def articles_send_scheduled(
         for article in articles:
             await article_service.send_to_subscribers(session, article)
 
+        # Fan-outs which couldn't complete, e.g. because their job ran out of
+        # tries. Their job ID is fixed, so they're only enqueued once at a time.
+        for article in await article_service.list_unfinished_fan_outs(session):
+            article_service.enqueue_fan_out(article)
+
 
 @interval(second=0)
 async def articles_release_paid_subscribers_only(ctx: JobContext) -> None:
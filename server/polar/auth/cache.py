@@ -0,0 +1,308 @@
+import datetime
+import itertools
+import json
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from enum import Enum
+from typing import Any, NamedTuple, cast
+
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.base import NO_VALUE
+
+from polar.config import settings
+from polar.kit.crypto import get_token_hash
+from polar.kit.db.models import Model
+from polar.kit.db.postgres import AfterCommit
+from polar.kit.extensions.sqlalchemy.types import EnumType
+from polar.models import (
+    OAuth2Token,
+    OAuthAccount,
+    Organization,
+    PersonalAccessToken,
+    User,
+)
+from polar.postgres import AsyncSession
+from polar.redis import Redis
+from polar.redis import redis as redis_client
+
+from .scope import Scope
+
+_KEY_PREFIX = "polar:auth_subject"
+
+CachedSubject = User | Organization
+
+_SUBJECT_TYPES: dict[str, type[CachedSubject]] = {
+    "user": User,
+    "organization": Organization,
+}
+
+
+class CacheHit(NamedTuple):
+    subject: CachedSubject
+    scopes: set[Scope]
+
+
+class _LocalEntry(NamedTuple):
+    expires_at: float
+    payload: dict[str, Any]
+    ids: frozenset[str]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _dump(instance: Model) -> dict[str, Any]:
+    """
+    Snapshot the columns of a loaded instance, and of its eagerly loaded
+    relationships, so it can be rebuilt without hitting the database.
+    """
+    mapper = sa_inspect(instance).mapper
+    data: dict[str, Any] = {
+        "columns": {
+            attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs
+        },
+        "relationships": {},
+    }
+    for relationship in mapper.relationships:
+        if relationship.lazy != "joined":
+            continue
+        value = getattr(instance, relationship.key)
+        if relationship.uselist:
+            data["relationships"][relationship.key] = [_dump(v) for v in value]
+        else:
+            data["relationships"][relationship.key] = (
+                _dump(value) if value is not None else None
+            )
+    return data
+
+
+def _load_value(column: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(column.type, EnumType):
+        return column.type.enum_klass(value)
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+def _load(model: type[Model], data: dict[str, Any]) -> Model:
+    """
+    Rebuild a detached instance from a snapshot, as if it was just loaded.
+    """
+    mapper = sa_inspect(model)
+    instance = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(
+            instance, attr.key, _load_value(attr.columns[0], data["columns"][attr.key])
+        )
+    for key, value in data["relationships"].items():
+        relationship = mapper.relationships[key]
+        target = relationship.mapper.class_
+        if relationship.uselist:
+            set_committed_value(instance, key, [_load(target, v) for v in value])
+        else:
+            set_committed_value(
+                instance, key, _load(target, value) if value is not None else None
+            )
+    make_transient_to_detached(instance)
+    return instance
+
+
+class AuthSubjectCache:
+    """
+    Two-tier cache of the subjects behind authentication tokens.
+
+    Entries are keyed by the token hash and hold a snapshot of the subject,
+    first in a small in-process LRU, then in Redis. A hit is attached to the
+    session without any query.
+
+    Entries are indexed by the IDs they depend on (subject, personal access
+    token, OAuth2 token), so they can be invalidated when one of those changes.
+    The in-process tier of other processes isn't reachable: it's only kept for
+    a few seconds.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        ttl: int,
+        local_ttl: int,
+        local_maxsize: int,
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_maxsize = local_maxsize
+        self._local: OrderedDict[str, _LocalEntry] = OrderedDict()
+
+    async def get(self, session: AsyncSession, token: str) -> CacheHit | None:
+        token_hash = self._hash(token)
+        now = time.time()
+
+        payload: dict[str, Any]
+        local_entry = self._local.get(token_hash)
+        if local_entry is not None and local_entry.expires_at > now:
+            self._local.move_to_end(token_hash)
+            payload = local_entry.payload
+        else:
+            self._local.pop(token_hash, None)
+            raw = await self.redis.get(self._key(token_hash))
+            if raw is None:
+                return None
+            payload = json.loads(raw)
+            if payload["expires_at"] is not None and payload["expires_at"] <= now:
+                return None
+            self._set_local(token_hash, payload, now)
+
+        subject = _load(_SUBJECT_TYPES[payload["subject_type"]], payload["subject"])
+        subject = await session.merge(subject, load=False)
+        return CacheHit(
+            cast(CachedSubject, subject), {Scope(s) for s in payload["scopes"]}
+        )
+
+    async def set(
+        self,
+        token: str,
+        subject: CachedSubject,
+        scopes: set[Scope] | None = None,
+        *,
+        ids: Iterable[uuid.UUID] = (),
+        expires_at: int | None = None,
+    ) -> None:
+        """
+        Cache the subject of a token.
+
+        `ids` are the IDs of the objects, besides the subject itself,
+        which invalidate the entry when they change.
+        `expires_at` is the expiration timestamp of the token, if any.
+        """
+        token_hash = self._hash(token)
+        now = time.time()
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - now))
+            if ttl <= 0:
+                return
+
+        subject_type = "user" if isinstance(subject, User) else "organization"
+        str_ids = sorted({str(subject.id), *(str(id) for id in ids)})
+        payload = {
+            "subject_type": subject_type,
+            "subject": _dump(subject),
+            "scopes": sorted(scopes or ()),
+            "ids": str_ids,
+            "expires_at": expires_at,
+        }
+
+        raw = json.dumps(payload, default=_json_default)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(token_hash), raw, ex=ttl)
+            for id in str_ids:
+                pipe.sadd(self._index_key(id), token_hash)
+                pipe.expire(self._index_key(id), self.ttl)
+            await pipe.execute()
+        self._set_local(token_hash, json.loads(raw), now)
+
+    async def invalidate_token(self, token: str) -> None:
+        token_hash = self._hash(token)
+        self._local.pop(token_hash, None)
+        await self.redis.delete(self._key(token_hash))
+
+    async def invalidate(self, *ids: uuid.UUID) -> None:
+        """Drop the entries depending on any of the given IDs."""
+        index_keys = self._invalidate_local(ids)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for index_key in index_keys:
+                pipe.smembers(index_key)
+            members: list[set[str]] = await pipe.execute()
+        keys = [self._key(h) for h in itertools.chain.from_iterable(members)]
+        await self.redis.delete(*keys, *index_keys)
+
+    def _invalidate_local(self, ids: Iterable[uuid.UUID]) -> list[str]:
+        str_ids = {str(id) for id in ids}
+        for token_hash, entry in list(self._local.items()):
+            if entry.ids & str_ids:
+                del self._local[token_hash]
+        return [self._index_key(id) for id in sorted(str_ids)]
+
+    def _set_local(self, token_hash: str, payload: dict[str, Any], now: float) -> None:
+        expires_at = now + self.local_ttl
+        if payload["expires_at"] is not None:
+            expires_at = min(expires_at, payload["expires_at"])
+        self._local[token_hash] = _LocalEntry(
+            expires_at, payload, frozenset(payload["ids"])
+        )
+        self._local.move_to_end(token_hash)
+        while len(self._local) > self.local_maxsize:
+            self._local.popitem(last=False)
+
+    def _hash(self, token: str) -> str:
+        return get_token_hash(token, secret=settings.SECRET)
+
+    def _key(self, token_hash: str) -> str:
+        return f"{_KEY_PREFIX}:{token_hash}"
+
+    def _index_key(self, id: str) -> str:
+        return f"{_KEY_PREFIX}:index:{id}"
+
+
+auth_subject_cache = AuthSubjectCache(
+    redis_client,
+    ttl=settings.AUTH_SUBJECT_CACHE_TTL_SECONDS,
+    local_ttl=settings.AUTH_SUBJECT_CACHE_LOCAL_TTL_SECONDS,
+    local_maxsize=settings.AUTH_SUBJECT_CACHE_LOCAL_MAXSIZE,
+)
+
+
+async def _invalidate_committed_subjects(ids: set[uuid.UUID]) -> None:
+    await auth_subject_cache.invalidate(*ids)
+
+
+_invalidate_after_commit = AfterCommit(
+    "auth_subject_cache_invalidate", _invalidate_committed_subjects
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_subjects(session: Session, flush_context: Any) -> None:
+    """
+    Collect the cached subjects whose data was just written, to invalidate them
+    once committed: before, a concurrent request would cache them again from
+    the old rows.
+    """
+    ids: set[uuid.UUID] = set()
+    for instance in itertools.chain(session.dirty, session.deleted):
+        if isinstance(
+            instance, User | Organization | PersonalAccessToken | OAuth2Token
+        ):
+            identity = sa_inspect(instance).identity  # type: ignore[attr-defined]
+            if identity is not None:
+                ids.add(identity[0])
+        elif isinstance(instance, OAuthAccount):
+            user_id = sa_inspect(instance).attrs.user_id.loaded_value
+            if user_id is not NO_VALUE:
+                ids.add(user_id)
+    if ids:
+        _invalidate_after_commit.add(session, *ids)
@@ -3,13 +3,13 @@ from typing import Annotated
 
 from fastapi import Depends, Request, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.security.utils import get_authorization_scheme_param
 from makefun import with_signature
 
 from polar.auth.scope import RESERVED_SCOPES, Scope
 from polar.config import settings
 from polar.exceptions import NotPermitted, PolarError, Unauthorized
-from polar.models import OAuth2Token
-from polar.oauth2.dependencies import get_optional_token
+from polar.oauth2.dependencies import openid_scheme
 from polar.postgres import AsyncSession, get_db_session
 
 from .exceptions import MissingScope
@@ -44,7 +44,7 @@ async def _get_cookie_token(request: Request) -> str | None:
 
 async def get_auth_subject(
     cookie_token: str | None = Depends(_get_cookie_token),
-    oauth2_token: OAuth2Token | None = Depends(get_optional_token),
+    authorization: str | None = Depends(openid_scheme),
     auth_header: HTTPAuthorizationCredentials | None = Depends(auth_header_scheme),
     session: AsyncSession = Depends(get_db_session),
 ) -> AuthSubject[Subject]:
@@ -60,10 +60,14 @@ async def get_auth_subject(
                 scopes.add(Scope.admin)
             return AuthSubject(user, scopes, AuthMethod.COOKIE)
 
-    if oauth2_token:
-        return AuthSubject(
-            oauth2_token.sub, oauth2_token.get_scopes(), AuthMethod.OAUTH2_ACCESS_TOKEN
+    scheme, access_token = get_authorization_scheme_param(authorization)
+    if authorization and scheme.lower() == "bearer":
+        subject_scopes = await AuthService.get_subject_from_oauth2_token(
+            session, token=access_token
         )
+        if subject_scopes:
+            subject, scopes = subject_scopes
+            return AuthSubject(subject, scopes, AuthMethod.OAUTH2_ACCESS_TOKEN)
 
     # Authorization header.
     # Can contain both a PAT and a forwarded cookie value (via Next/Vercel)
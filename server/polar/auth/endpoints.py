@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
 
 from polar.auth.dependencies import WebUser
@@ -85,9 +85,12 @@ async def custom_domain_exchange(
     "/auth/logout",
 )
 async def logout(
+    request: Request,
     organization_id: UUID | None = None,
     session: AsyncSession = Depends(get_db_session),
 ) -> RedirectResponse:
+    await AuthService.invalidate_auth_cookie(request)
+
     redirect_to = settings.FRONTEND_BASE_URL
 
     # redirect to custom domain to logout there as well
@@ -5,13 +5,16 @@ import structlog
 from fastapi import Request, Response
 from fastapi.responses import RedirectResponse
 
+from polar.auth.cache import auth_subject_cache
 from polar.auth.scope import Scope
 from polar.config import settings
 from polar.exceptions import BadRequest
 from polar.kit import jwt
 from polar.kit.http import get_safe_return_url
 from polar.kit.schemas import Schema
-from polar.models import User
+from polar.models import Organization, User
+from polar.oauth2.constants import ACCESS_TOKEN_PREFIX
+from polar.oauth2.service.oauth2_token import oauth2_token as oauth2_token_service
 from polar.personal_access_token.service import personal_access_token_service
 from polar.postgres import AsyncSession
 from polar.user.service import user as user_service
@@ -101,8 +104,10 @@ class AuthService:
             if decoded.get("type", "auth") != "auth":
                 raise BadRequest("unexpected jwt type")
 
-            return await user_service.get(session, id=decoded["user_id"])
-        except (KeyError, jwt.DecodeError, jwt.ExpiredSignatureError):
+            return await cls._get_user_from_token(
+                session, token=cookie, user_id=UUID(decoded["user_id"])
+            )
+        except (KeyError, ValueError, jwt.DecodeError, jwt.ExpiredSignatureError):
             return None
 
     @classmethod
@@ -119,32 +124,91 @@ class AuthService:
             # Authorization headers as when forwarded by NextJS serverside and edge.
             # We're passing Cookie contents in the Authorization header.
             if "user_id" in decoded:
-                user = await user_service.get(session, id=decoded["user_id"])
+                user = await cls._get_user_from_token(
+                    session, token=token, user_id=UUID(decoded["user_id"])
+                )
                 if user:
                     # cookie based auth, has full admin scope
                     return user, {Scope.web_default}
 
             # Personal Access Token in the Authorization header.
             if "pat_id" in decoded:
-                pat = await personal_access_token_service.get(
-                    session, id=decoded["pat_id"], load_user=True
-                )
-                if pat is None:
-                    return None
+                pat_id = UUID(decoded["pat_id"])
+                cached = await auth_subject_cache.get(session, token)
+                if cached is not None and isinstance(cached.subject, User):
+                    user = cached.subject
+                else:
+                    pat = await personal_access_token_service.get(
+                        session, id=pat_id, load_user=True
+                    )
+                    if pat is None:
+                        return None
+                    user = pat.user
+                    await auth_subject_cache.set(
+                        token,
+                        user,
+                        ids=[pat.id],
+                        expires_at=int(pat.expires_at.timestamp()),
+                    )
 
                 if "scopes" in decoded:
                     scopes = {Scope(x) for x in decoded["scopes"].split(",")}
                 else:
                     scopes = {Scope.web_default}
 
-                await personal_access_token_service.record_usage(session, id=pat.id)
+                await personal_access_token_service.record_usage(pat_id)
 
-                return pat.user, scopes
+                return user, scopes
 
             raise Exception("failed to decode token")
-        except (KeyError, jwt.DecodeError, jwt.ExpiredSignatureError):
+        except (KeyError, ValueError, jwt.DecodeError, jwt.ExpiredSignatureError):
+            return None
+
+    @classmethod
+    async def get_subject_from_oauth2_token(
+        cls, session: AsyncSession, *, token: str
+    ) -> tuple[User | Organization, set[Scope]] | None:
+        # Don't bother looking up tokens we didn't issue, like PATs
+        if not token.startswith(tuple(ACCESS_TOKEN_PREFIX.values())):
+            return None
+
+        cached = await auth_subject_cache.get(session, token)
+        if cached is not None:
+            return cached
+
+        oauth2_token = await oauth2_token_service.get_by_access_token(session, token)
+        if oauth2_token is None:
             return None
 
+        subject, scopes = oauth2_token.sub, oauth2_token.get_scopes()
+        await auth_subject_cache.set(
+            token,
+            subject,
+            scopes,
+            ids=[oauth2_token.id],
+            expires_at=oauth2_token.get_expires_at(),
+        )
+        return subject, scopes
+
+    @classmethod
+    async def _get_user_from_token(
+        cls, session: AsyncSession, *, token: str, user_id: UUID
+    ) -> User | None:
+        cached = await auth_subject_cache.get(session, token)
+        if cached is not None and isinstance(cached.subject, User):
+            return cached.subject
+
+        user = await user_service.get(session, id=user_id)
+        if user is not None:
+            await auth_subject_cache.set(token, user)
+        return user
+
+    @classmethod
+    async def invalidate_auth_cookie(cls, request: Request) -> None:
+        cookie = request.cookies.get(settings.AUTH_COOKIE_KEY)
+        if cookie:
+            await auth_subject_cache.invalidate_token(cookie)
+
     @classmethod
     def generate_logout_response(cls, *, response: Response) -> LogoutResponse:
         cls.set_auth_cookie(response=response, value="", expires=0)
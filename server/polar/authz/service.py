@@ -1,8 +1,10 @@
+from collections.abc import Sequence
 from enum import StrEnum
-from typing import Self
+from typing import Self, TypeVar
 from uuid import UUID
 
 from fastapi import Depends
+from sqlalchemy import ColumnElement, false, or_
 
 from polar.auth.models import Anonymous, Subject
 from polar.issue.service import issue as issue_service
@@ -18,7 +20,7 @@ from polar.models.repository import Repository
 from polar.models.subscription import Subscription
 from polar.models.user import User
 from polar.models.webhook_endpoint import WebhookEndpoint
-from polar.postgres import AsyncSession, get_db_session
+from polar.postgres import AsyncSession, get_db_session, sql
 from polar.repository.service import repository as repository_service
 from polar.user_organization.service import (
     user_organization as user_organization_service,
@@ -46,19 +48,24 @@ Object = (
 )
 
 
+ObjectT = TypeVar("ObjectT", bound=Object)
+
+ReadableModel = type[Repository] | type[Issue] | type[Pledge]
+
+
 class Authz:
     session: AsyncSession
 
     # request scoped caches
     _cache_can_user_read_repository_id: dict[tuple[UUID, UUID], bool]
-    _cache_is_member: dict[tuple[UUID, UUID], bool]
-    _cache_is_member_and_admin: dict[tuple[UUID, UUID], bool]
+    _cache_memberships: dict[UUID, dict[UUID, bool]]
+    _cache_repositories: dict[UUID, Repository | None]
 
     def __init__(self, session: AsyncSession):
         self.session = session
         self._cache_can_user_read_repository_id = {}
-        self._cache_is_member = {}
-        self._cache_is_member_and_admin = {}
+        self._cache_memberships = {}
+        self._cache_repositories = {}
 
     @classmethod
     async def authz(cls, session: AsyncSession = Depends(get_db_session)) -> Self:
@@ -257,6 +264,72 @@ class Authz:
             f"Unknown subject/action/object combination. subject={type(subject)} access={accessType} object={type(object)}"  # noqa: E501
         )
 
+    async def can_many(
+        self, subject: Subject, accessType: AccessType, objects: Sequence[Object]
+    ) -> list[bool]:
+        """
+        Same as `can`, for several objects at once.
+
+        The memberships of the subject and the repositories of the issues
+        are loaded upfront, so the number of queries doesn't grow with
+        the number of objects.
+        """
+        if isinstance(subject, User):
+            await self._get_memberships(subject.id)
+
+        await self._prefetch_repositories(
+            {o.repository_id for o in objects if isinstance(o, Issue)}
+        )
+
+        return [await self.can(subject, accessType, o) for o in objects]
+
+    async def filter_readable(
+        self, subject: Subject, accessType: AccessType, objects: Sequence[ObjectT]
+    ) -> list[ObjectT]:
+        """Objects on which the subject has the given access, in the same order."""
+        allowed = await self.can_many(subject, accessType, objects)
+        return [o for o, can in zip(objects, allowed) if can]
+
+    async def readable_clause(
+        self, subject: Subject, model: ReadableModel
+    ) -> ColumnElement[bool]:
+        """
+        SQL predicate matching the rows of `model` the subject can read.
+
+        It follows the same rules as `can`, so listings can be filtered and
+        counted by the database instead of checking each row afterwards.
+        The memberships of the subject are resolved in a single query.
+        """
+        blocked_at = getattr(subject, "blocked_at", None)
+        if blocked_at is not None:
+            return false()
+
+        if model is Repository:
+            return await self._repository_readable_clause(subject)
+
+        if model is Issue and isinstance(subject, Anonymous | User):
+            return Issue.repository_id.in_(
+                sql.select(Repository.id).where(
+                    Repository.deleted_at.is_(None),
+                    await self._repository_readable_clause(subject),
+                )
+            )
+
+        if model is Pledge and isinstance(subject, Anonymous):
+            return false()
+
+        if model is Pledge and isinstance(subject, User):
+            organization_ids = list(await self._get_memberships(subject.id))
+            return or_(
+                Pledge.by_user_id == subject.id,
+                Pledge.by_organization_id.in_(organization_ids),
+                Pledge.organization_id.in_(organization_ids),
+            )
+
+        raise Exception(
+            f"Unknown subject/model combination. subject={type(subject)} model={model}"
+        )
+
     #
     # Repository
     #
@@ -279,6 +352,26 @@ class Authz:
 
         return False
 
+    async def _repository_readable_clause(
+        self, subject: Subject
+    ) -> ColumnElement[bool]:
+        if isinstance(subject, Anonymous):
+            return Repository.is_private.is_(False)
+
+        if isinstance(subject, User):
+            organization_ids = list(await self._get_memberships(subject.id))
+            return or_(
+                Repository.is_private.is_(False),
+                Repository.organization_id.in_(organization_ids),
+            )
+
+        if isinstance(subject, Organization):
+            return Repository.organization_id == subject.id
+
+        raise Exception(
+            f"Unknown subject/model combination. subject={type(subject)} model=Repository"  # noqa: E501
+        )
+
     async def _can_user_read_repository_id(
         self, subject: User, repository_id: UUID
     ) -> bool:
@@ -287,7 +380,7 @@ class Authz:
         if key in self._cache_can_user_read_repository_id:
             return self._cache_can_user_read_repository_id[key]
 
-        repo = await repository_service.get(self.session, repository_id)
+        repo = await self._get_repository(repository_id)
         if not repo:
             self._cache_can_user_read_repository_id[key] = False
             return False
@@ -316,39 +409,50 @@ class Authz:
             return True
         return False
 
-    async def _is_member(self, user_id: UUID, organization_id: UUID) -> bool:
-        key = (user_id, organization_id)
-        if key in self._cache_is_member:
-            return self._cache_is_member[key]
-
-        memberships = await user_organization_service.list_by_user_id(
-            self.session, user_id
-        )
-
-        for m in memberships:
-            if m.organization_id == organization_id:
-                self._cache_is_member[key] = True
-                return True
+    async def _get_memberships(self, user_id: UUID) -> dict[UUID, bool]:
+        """Organizations the user is a member of, and if they're admin of it."""
+        if user_id not in self._cache_memberships:
+            memberships = await user_organization_service.list_by_user_id(
+                self.session, user_id
+            )
+            self._cache_memberships[user_id] = {
+                m.organization_id: m.is_admin for m in memberships
+            }
+        return self._cache_memberships[user_id]
 
-        self._cache_is_member[key] = False
-        return False
+    async def _is_member(self, user_id: UUID, organization_id: UUID) -> bool:
+        memberships = await self._get_memberships(user_id)
+        return organization_id in memberships
 
     async def _is_member_and_admin(self, user_id: UUID, organization_id: UUID) -> bool:
-        key = (user_id, organization_id)
-        if key in self._cache_is_member_and_admin:
-            return self._cache_is_member_and_admin[key]
-
-        memberships = await user_organization_service.list_by_user_id(
-            self.session, user_id
-        )
+        memberships = await self._get_memberships(user_id)
+        return memberships.get(organization_id, False)
 
-        for m in memberships:
-            if m.organization_id == organization_id and m.is_admin:
-                self._cache_is_member_and_admin[key] = True
-                return True
+    #
+    # Repository lookups
+    #
 
-        self._cache_is_member_and_admin[key] = False
-        return False
+    async def _get_repository(self, repository_id: UUID) -> Repository | None:
+        if repository_id not in self._cache_repositories:
+            self._cache_repositories[repository_id] = await repository_service.get(
+                self.session, repository_id
+            )
+        return self._cache_repositories[repository_id]
+
+    async def _prefetch_repositories(self, repository_ids: set[UUID]) -> None:
+        repository_ids = repository_ids - self._cache_repositories.keys()
+        if not repository_ids:
+            return
+
+        res = await self.session.execute(
+            sql.select(Repository).where(
+                Repository.id.in_(repository_ids),
+                Repository.deleted_at.is_(None),
+            )
+        )
+        repositories = {r.id: r for r in res.scalars().unique()}
+        for repository_id in repository_ids:
+            self._cache_repositories[repository_id] = repositories.get(repository_id)
 
     #
     # Account
@@ -370,7 +474,7 @@ class Authz:
     # Issue
     #
     async def _can_anonymous_read_issue(self, object: Issue) -> bool:
-        repo = await repository_service.get(self.session, object.repository_id)
+        repo = await self._get_repository(object.repository_id)
         if not repo:
             return False
 
@@ -389,7 +493,7 @@ class Authz:
         return False
 
     async def _can_user_write_issue(self, subject: User, object: Issue) -> bool:
-        repo = await repository_service.get(self.session, object.repository_id)
+        repo = await self._get_repository(object.repository_id)
         if not repo:
             return False
 
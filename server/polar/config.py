@@ -59,6 +59,10 @@ class Settings(BaseSettings):
     AUTH_COOKIE_KEY: str = "polar_session"
     AUTH_COOKIE_TTL_SECONDS: int = 60 * 60 * 24 * 31  # 31 days
     AUTH_COOKIE_DOMAIN: str = "127.0.0.1"
+    # Cache of the authenticated subjects, to avoid loading them on each request
+    AUTH_SUBJECT_CACHE_TTL_SECONDS: int = 60
+    AUTH_SUBJECT_CACHE_LOCAL_TTL_SECONDS: int = 5
+    AUTH_SUBJECT_CACHE_LOCAL_MAXSIZE: int = 10_000
 
     # Magic link
     MAGIC_LINK_TTL_SECONDS: int = 60 * 30  # 30 minutes
@@ -85,6 +89,13 @@ class Settings(BaseSettings):
     GITHUB_CLIENT_ID: str = ""
     GITHUB_CLIENT_SECRET: str = ""
     GITHUB_POLAR_USER_ACCESS_TOKEN: str | None = None
+    GITHUB_RESPONSE_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    # Requests per installation and hour the crawl leaves for webhooks and users
+    GITHUB_CRAWL_RATE_LIMIT_RESERVE: int = 1000
+    GITHUB_CRAWL_BURST: int = 10
+    # Longer waits for budget defer the crawl job instead of holding a worker
+    GITHUB_CRAWL_MAX_WAIT_SECONDS: float = 10.0
+    GITHUB_CRAWL_MAX_BATCH_SIZE: int = 1000
 
     # GitHub App for repository benefits
     GITHUB_REPOSITORY_BENEFITS_APP_NAMESPACE: str = ""
@@ -106,6 +117,8 @@ class Settings(BaseSettings):
     # Stripe webhook secrets
     STRIPE_WEBHOOK_SECRET: str = ""
     STRIPE_CONNECT_WEBHOOK_SECRET: str = ""
+    # Maximum number of concurrent connections to the Stripe API, per process
+    STRIPE_MAX_CONNECTIONS: int = 100
 
     # Open Collective
     OPEN_COLLECTIVE_PERSONAL_TOKEN: str | None = None
@@ -141,6 +154,22 @@ class Settings(BaseSettings):
 
     EMAIL_SENDER: EmailSender = EmailSender.logger
     RESEND_API_KEY: str = ""
+    RESEND_API_BASE_URL: str = "https://api.resend.com"
+    # Maximum number of concurrent requests to the Resend API, per process
+    RESEND_MAX_CONCURRENCY: int = 4
+    # Emails are grouped by sender and subject, then sent in batches once full
+    # or after the linger delay, whichever comes first
+    EMAIL_BATCH_MAX_SIZE: int = 100
+    EMAIL_BATCH_LINGER_SECONDS: float = 0.2
+
+    # Articles are emailed to subscribers in chunks of recipients
+    ARTICLE_EMAIL_CHUNK_SIZE: int = 100
+    # Number of chunks enqueued at once, i.e. between two cursor updates
+    ARTICLE_EMAIL_FANOUT_CHUNKS_PER_PAGE: int = 10
+    # Delay after which an unfinished fan-out is considered stalled and resumed
+    ARTICLE_EMAIL_FANOUT_STALE_SECONDS: int = 60 * 15
+    ARTICLE_EMAIL_RENDER_TIMEOUT_SECONDS: int = 60
+    ARTICLE_EMAIL_RENDER_CACHE_TTL_SECONDS: int = 60 * 60 * 24
 
     ACCOUNT_PAYOUT_REVIEW_THRESHOLDS: list[int] = [0, 10000]
     ACCOUNT_PAYOUT_DELAY: timedelta = timedelta(days=1)
@@ -151,6 +180,34 @@ class Settings(BaseSettings):
     # Default organization setting for minimum pledge amount ($20)
     MINIMUM_ORG_PLEDGE_AMOUNT: int = 2000
 
+    # Outgoing webhooks delivery
+    WEBHOOK_TIMEOUT_SECONDS: float = 20.0
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    WEBHOOK_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    WEBHOOK_MAX_CONCURRENCY_PER_ENDPOINT: int = 4
+    WEBHOOK_DNS_CACHE_TTL_SECONDS: float = 60.0
+    # Circuit breaker: open when at least FAILURE_RATE_THRESHOLD of the last
+    # WINDOW_SIZE deliveries failed, once MIN_DELIVERIES were recorded.
+    WEBHOOK_CIRCUIT_WINDOW_SIZE: int = 20
+    WEBHOOK_CIRCUIT_MIN_DELIVERIES: int = 5
+    WEBHOOK_CIRCUIT_FAILURE_RATE_THRESHOLD: float = 0.8
+    WEBHOOK_CIRCUIT_OPEN_SECONDS: int = 60 * 5  # 5 minutes
+    WEBHOOK_PARKED_MAX_EVENTS: int = 10_000
+    WEBHOOK_PARKED_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    WEBHOOK_DRAIN_BATCH_SIZE: int = 50
+    WEBHOOK_DRAIN_INTERVAL_SECONDS: int = 10
+
+    # Maximum number of messages buffered for each event stream client
+    EVENTSTREAM_CLIENT_BUFFER_SIZE: int = 100
+
+    # Cache of organization members user IDs, invalidated on membership changes
+    USER_ORGANIZATION_MEMBERS_CACHE_TTL_SECONDS: int = 60 * 60  # 1 hour
+
+    # Cache of the public organization pages served to anonymous users
+    ORGANIZATION_RESPONSE_CACHE_TTL_SECONDS: int = 60 * 5  # 5 minutes
+    ORGANIZATION_RESPONSE_CACHE_ALIAS_TTL_SECONDS: int = 60 * 60  # 1 hour
+
     model_config = SettingsConfigDict(
         env_prefix="polar_",
         env_file_encoding="utf-8",
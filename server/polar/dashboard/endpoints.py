@@ -24,7 +24,7 @@ from polar.models.repository import Repository
 from polar.models.user import User
 from polar.models.user_organization import UserOrganization
 from polar.organization.service import organization as organization_service
-from polar.pledge.endpoints import to_schema as pledge_to_schema
+from polar.pledge.endpoints import to_schemas as pledges_to_schemas
 from polar.pledge.schemas import Pledge as PledgeSchema
 from polar.pledge.service import pledge as pledge_service
 from polar.postgres import AsyncSession, get_db_session
@@ -121,11 +121,9 @@ async def get_dashboard(
         )
 
     # Limit to repositories that the authed subject can read
-    repositories = [
-        r
-        for r in repositories
-        if await authz.can(auth_subject.subject, AccessType.read, r)
-    ]
+    repositories = await authz.filter_readable(
+        auth_subject.subject, AccessType.read, repositories
+    )
 
     if not repositories:
         raise HTTPException(
@@ -201,29 +199,25 @@ async def dashboard(
     user_memberships: Sequence[UserOrganization] = []
     user_memberships = await user_organization_service.list_by_user_id(session, user.id)
 
-    # add pledges to included
-    issue_pledges: dict[UUID, list[PledgeSchema]] = {}
-    for i in issues:
-        for pled in i.pledges:
-            # Filter out invalid pledges
-            if pled.state not in pledge_statuses:
-                continue
-
-            pledge_schema = await pledge_to_schema(session, user, pled)
+    # add pledges to included, filtering out invalid pledges
+    pledges = [
+        pled for i in issues for pled in i.pledges if pled.state in pledge_statuses
+    ]
+    pledge_schemas = await pledges_to_schemas(session, user, pledges)
 
-            # Add user-specific metadata
-            pledge_schema.authed_can_admin_sender = (
-                pledge_service.user_can_admin_sender_pledge(
-                    user, pled, user_memberships
-                )
-            )
-            pledge_schema.authed_can_admin_received = (
-                pledge_service.user_can_admin_received_pledge(pled, user_memberships)
-            )
+    issue_pledges: dict[UUID, list[PledgeSchema]] = {}
+    for pled, pledge_schema in zip(pledges, pledge_schemas):
+        # Add user-specific metadata
+        pledge_schema.authed_can_admin_sender = (
+            pledge_service.user_can_admin_sender_pledge(user, pled, user_memberships)
+        )
+        pledge_schema.authed_can_admin_received = (
+            pledge_service.user_can_admin_received_pledge(pled, user_memberships)
+        )
 
-            irefs = issue_pledges.get(i.id, [])
-            irefs.append(pledge_schema)
-            issue_pledges[i.id] = irefs
+        irefs = issue_pledges.get(pled.issue_id, [])
+        irefs.append(pledge_schema)
+        issue_pledges[pled.issue_id] = irefs
 
     # get linked pull requests
     issue_references: dict[UUID, list[IssueReferenceRead]] = {}
@@ -247,14 +241,17 @@ async def dashboard(
     issue_rewards: dict[UUID, list[Reward]] = {}
     if for_org:
         rewards = await reward_service.list(session, issue_ids=[i.id for i in issues])
-        for pledge, reward, transaction in rewards:
+        can_write = await authz.can_many(
+            user, AccessType.write, [pledge for pledge, _, _ in rewards]
+        )
+        for (pledge, reward, transaction), include_receiver_admin_fields in zip(
+            rewards, can_write
+        ):
             reward_resource = to_resource(
                 pledge,
                 reward,
                 transaction,
-                include_receiver_admin_fields=await authz.can(
-                    user, AccessType.write, pledge
-                ),
+                include_receiver_admin_fields=include_receiver_admin_fields,
             )
 
             ir2 = issue_rewards.get(pledge.issue_id, [])
@@ -0,0 +1,86 @@
+import asyncio
+from collections.abc import Callable
+
+import structlog
+
+from polar.config import settings
+from polar.logging import Logger
+
+from .sender import Email, EmailSender, get_email_sender
+
+log: Logger = structlog.get_logger()
+
+_GroupKey = tuple[str, str, str]
+
+
+class EmailBatcher:
+    """
+    Group emails sent by concurrent worker jobs into provider batch requests.
+
+    Emails are grouped by sender and subject, i.e. by template, so a burst like
+    a newsletter goes out in a few batch requests instead of one request per
+    recipient. A group is sent as soon as it's full, or after `linger` seconds.
+
+    `send` waits until the email is actually sent, and raises if its batch
+    failed, so jobs can still be retried.
+    """
+
+    def __init__(
+        self,
+        get_sender: Callable[[], EmailSender],
+        *,
+        max_batch_size: int,
+        linger: float,
+    ) -> None:
+        self.get_sender = get_sender
+        self.max_batch_size = max_batch_size
+        self.linger = linger
+        self._groups: dict[_GroupKey, list[tuple[Email, asyncio.Future[None]]]] = {}
+        self._timers: dict[_GroupKey, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def send(self, email: Email) -> None:
+        key = (email.from_name, email.from_email_addr, email.subject)
+        future = asyncio.get_running_loop().create_future()
+        group = self._groups.setdefault(key, [])
+        group.append((email, future))
+
+        if len(group) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.linger, self._flush, key
+            )
+
+        await future
+
+    def _flush(self, key: _GroupKey) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._groups.pop(key, [])
+        if group:
+            task = asyncio.create_task(self._send(group))
+            # Keep a reference, so the task isn't garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, group: list[tuple[Email, asyncio.Future[None]]]) -> None:
+        try:
+            await self.get_sender().send_batch([email for email, _ in group])
+        except Exception as e:
+            log.error("email.batch.failed", count=len(group), error=str(e))
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in group:
+                if not future.done():
+                    future.set_result(None)
+
+
+email_batcher = EmailBatcher(
+    get_email_sender,
+    max_batch_size=settings.EMAIL_BATCH_MAX_SIZE,
+    linger=settings.EMAIL_BATCH_LINGER_SECONDS,
+)
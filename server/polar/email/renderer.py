@@ -1,21 +1,37 @@
 import datetime
-from collections.abc import Mapping
+import functools
+from collections.abc import Iterable, Mapping, Sequence
 from typing import Any
 
 from jinja2 import (
     ChoiceLoader,
     Environment,
+    FileSystemBytecodeCache,
     PackageLoader,
     PrefixLoader,
     StrictUndefined,
+    Template,
     select_autoescape,
 )
 
 EMAIL_TEMPLATES_FOLDER_NAME = "email_templates"
 
+_BODY_WRAPPER = """
+        {{% extends 'base.html' %}}
+
+        {{% block body %}}
+            {body}
+        {{% endblock %}}
+        """
+
 
 class EmailRenderer:
-    def __init__(self, extras_templates_packages: Mapping[str, str] = {}) -> None:
+    def __init__(
+        self,
+        extras_templates_packages: Mapping[str, str] = {},
+        *,
+        compiled_templates_maxsize: int = 256,
+    ) -> None:
         """
         Args:
             extras_templates_package: Optional mapping to load additional templates.
@@ -23,6 +39,8 @@ class EmailRenderer:
                 e.g. `magic_link/template.html`.
                 Value is the namespace of the package containing an `email_templates`
                 directory containing Jinja templates.
+            compiled_templates_maxsize: Number of templates compiled from strings
+                to keep in memory.
 
         Example:
 
@@ -44,35 +62,61 @@ class EmailRenderer:
             ),
             autoescape=select_autoescape(),
             undefined=StrictUndefined,
+            bytecode_cache=FileSystemBytecodeCache(),
+        )
+        self._compile = functools.lru_cache(maxsize=compiled_templates_maxsize)(
+            self.env.from_string
         )
 
     def render_from_string(
         self, subject: str, body: str, context: dict[str, Any]
     ) -> tuple[str, str]:
-        rendered_subject = self.env.from_string(subject).render(context).strip()
+        return self.render_many_from_string(subject, body, [context])[0]
 
-        wrapped_body = f"""
-        {{% extends 'base.html' %}}
-
-        {{% block body %}}
-            {body}
-        {{% endblock %}}
+    def render_many_from_string(
+        self, subject: str, body: str, contexts: Iterable[Mapping[str, Any]]
+    ) -> Sequence[tuple[str, str]]:
         """
-
-        context["current_year"] = datetime.datetime.now().year
-
-        rendered_body = self.env.from_string(wrapped_body).render(context).strip()
-        return rendered_subject, rendered_body
+        Render the same subject and body for several contexts,
+        compiling them only once.
+        """
+        subject_template = self._compile(subject)
+        body_template = self._compile(_BODY_WRAPPER.format(body=body))
+        current_year = datetime.datetime.now().year
+        return [
+            self._render(
+                subject_template,
+                body_template,
+                {**context, "current_year": current_year},
+            )
+            for context in contexts
+        ]
 
     def render_from_template(
         self, subject: str, body_template: str, context: dict[str, Any]
     ) -> tuple[str, str]:
-        rendered_subject = self.env.from_string(subject).render(context).strip()
-        rendered_body = self.env.get_template(body_template).render(context).strip()
-        return rendered_subject, rendered_body
+        return self._render(
+            self._compile(subject), self.env.get_template(body_template), context
+        )
+
+    def _render(
+        self, subject: Template, body: Template, context: Mapping[str, Any]
+    ) -> tuple[str, str]:
+        return subject.render(context).strip(), body.render(context).strip()
+
+
+@functools.cache
+def _get_email_renderer(
+    extras_templates_packages: frozenset[tuple[str, str]],
+) -> EmailRenderer:
+    return EmailRenderer(dict(extras_templates_packages))
 
 
 def get_email_renderer(
     extras_templates_packages: Mapping[str, str] = {},
 ) -> EmailRenderer:
-    return EmailRenderer(extras_templates_packages)
+    """
+    Return the process-wide renderer for the given extra templates packages,
+    so Jinja environments and compiled templates are reused across emails.
+    """
+    return _get_email_renderer(frozenset(extras_templates_packages.items()))
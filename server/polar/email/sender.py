@@ -1,18 +1,42 @@
+import asyncio
+import functools
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
 
-import resend
+import httpx
 import structlog
 
 from polar.config import EmailSender as EmailSenderType
 from polar.config import settings
+from polar.exceptions import PolarError
 from polar.logging import Logger
 
 log: Logger = structlog.get_logger()
 
+RESEND_BATCH_MAX_SIZE = 100
+RESEND_MAX_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class Email:
+    to_email_addr: str
+    subject: str
+    html_content: str
+    from_name: str = "Polar"
+    from_email_addr: str = "notifications@polar.sh"
+    email_headers: dict[str, str] = field(default_factory=dict)
+    reply_to_name: str | None = None
+    reply_to_email_addr: str | None = None
+
+
+class EmailSenderError(PolarError): ...
+
 
 class EmailSender(ABC):
-    @abstractmethod
-    def send_to_user(
+    async def send_to_user(
         self,
         *,
         to_email_addr: str,
@@ -24,74 +48,137 @@ class EmailSender(ABC):
         reply_to_name: str | None = None,
         reply_to_email_addr: str | None = None,
     ) -> None:
+        await self.send_batch(
+            [
+                Email(
+                    to_email_addr=to_email_addr,
+                    subject=subject,
+                    html_content=html_content,
+                    from_name=from_name,
+                    from_email_addr=from_email_addr,
+                    email_headers=email_headers,
+                    reply_to_name=reply_to_name,
+                    reply_to_email_addr=reply_to_email_addr,
+                )
+            ]
+        )
+
+    @abstractmethod
+    async def send_batch(self, emails: Sequence[Email]) -> None:
         pass
 
 
 class LoggingEmailSender(EmailSender):
-    def send_to_user(
-        self,
-        *,
-        to_email_addr: str,
-        subject: str,
-        html_content: str,
-        from_name: str = "Polar",
-        from_email_addr: str = "notifications@polar.sh",
-        email_headers: dict[str, str] = {},
-        reply_to_name: str | None = None,
-        reply_to_email_addr: str | None = None,
-    ) -> None:
-        log.info(
-            "logging email",
-            to_email_addr=to_email_addr,
-            subject=subject,
-            html_content=html_content,
-            from_name=from_name,
-            from_email_addr=from_email_addr,
-            email_headers=email_headers,
-        )
+    async def send_batch(self, emails: Sequence[Email]) -> None:
+        for email in emails:
+            log.info(
+                "logging email",
+                to_email_addr=email.to_email_addr,
+                subject=email.subject,
+                html_content=email.html_content,
+                from_name=email.from_name,
+                from_email_addr=email.from_email_addr,
+                email_headers=email.email_headers,
+            )
 
 
 class ResendEmailSender(EmailSender):
-    def __init__(self) -> None:
-        super().__init__()
-        resend.api_key = settings.RESEND_API_KEY
+    """
+    Send emails through the Resend API, using its batch endpoint.
+
+    Requests are made concurrently up to `max_concurrency`. When Resend reports
+    we exhausted our rate limit, new requests wait until it resets, and
+    rate-limited requests are retried after the delay it asks for.
+    """
 
-    def send_to_user(
+    def __init__(
         self,
         *,
-        to_email_addr: str,
-        subject: str,
-        html_content: str,
-        from_name: str = "Polar",
-        from_email_addr: str = "polarsource@posts.polar.sh",
-        email_headers: dict[str, str] = {},
-        reply_to_name: str | None = None,
-        reply_to_email_addr: str | None = None,
+        api_key: str,
+        base_url: str,
+        max_concurrency: int,
+        transport: httpx.AsyncBaseTransport | None = None,
     ) -> None:
-        params = {
-            "from": f"{from_name} <{from_email_addr}>",
-            "to": [to_email_addr],
-            "subject": subject,
-            "html": html_content,
-            "headers": email_headers,
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=max_concurrency),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._resume_at = 0.0
+
+    async def send_batch(self, emails: Sequence[Email]) -> None:
+        batches = [
+            emails[i : i + RESEND_BATCH_MAX_SIZE]
+            for i in range(0, len(emails), RESEND_BATCH_MAX_SIZE)
+        ]
+        await asyncio.gather(*(self._send_batch(batch) for batch in batches))
+
+    async def _send_batch(self, emails: Sequence[Email]) -> None:
+        payload = [self._get_params(email) for email in emails]
+        for attempt in range(1, RESEND_MAX_ATTEMPTS + 1):
+            async with self._semaphore:
+                await self._wait_rate_limit()
+                response = await self.client.post("/emails/batch", json=payload)
+            self._update_rate_limit(response)
+
+            if response.status_code == 429 and attempt < RESEND_MAX_ATTEMPTS:
+                log.warning("resend.rate_limited", attempt=attempt)
+                continue
+            if not response.is_success:
+                raise EmailSenderError(
+                    f"Resend returned {response.status_code}: {response.text}"
+                )
+            break
+
+        for email, sent in zip(emails, response.json()["data"]):
+            log.info(
+                "resend.send",
+                to_email_addr=email.to_email_addr,
+                subject=email.subject,
+                email_id=sent["id"],
+            )
+
+    async def _wait_rate_limit(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _update_rate_limit(self, response: httpx.Response) -> None:
+        delay: float | None = None
+        if response.status_code == 429:
+            delay = float(response.headers.get("retry-after", 1))
+        elif response.headers.get("ratelimit-remaining") == "0":
+            delay = float(response.headers.get("ratelimit-reset", 1))
+        if delay is not None:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    def _get_params(self, email: Email) -> dict[str, Any]:
+        params: dict[str, Any] = {
+            "from": f"{email.from_name} <{email.from_email_addr}>",
+            "to": [email.to_email_addr],
+            "subject": email.subject,
+            "html": email.html_content,
+            "headers": email.email_headers,
         }
-
-        if reply_to_name and reply_to_email_addr:
-            params["reply_to"] = f"{reply_to_name} <{reply_to_email_addr}>"
-
-        email = resend.Emails.send(params)
-
-        log.info(
-            "resend.send",
-            to_email_addr=to_email_addr,
-            subject=subject,
-            email_id=email["id"],
+        if email.reply_to_name and email.reply_to_email_addr:
+            params["reply_to"] = f"{email.reply_to_name} <{email.reply_to_email_addr}>"
+        return params
+
+
+@functools.cache
+def _get_email_sender(type: EmailSenderType) -> EmailSender:
+    if type == EmailSenderType.resend:
+        return ResendEmailSender(
+            api_key=settings.RESEND_API_KEY,
+            base_url=settings.RESEND_API_BASE_URL,
+            max_concurrency=settings.RESEND_MAX_CONCURRENCY,
         )
 
-
-def get_email_sender(type: str = "notification") -> EmailSender:
-    if settings.EMAIL_SENDER == EmailSenderType.resend:
-        return ResendEmailSender()
-
     # Logging in development
     return LoggingEmailSender()
+
+
+def get_email_sender(type: str = "notification") -> EmailSender:
+    return _get_email_sender(settings.EMAIL_SENDER)
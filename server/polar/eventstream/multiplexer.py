@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+from collections import deque
+from collections.abc import AsyncIterator
+
+import structlog
+from redis.asyncio.client import PubSub
+from redis.exceptions import ConnectionError
+from uvicorn import Server
+
+from polar.config import settings
+from polar.logging import Logger
+from polar.redis import Redis
+from polar.redis import redis as redis_client
+
+log: Logger = structlog.get_logger()
+
+
+class SubscriptionClosed(Exception):
+    pass
+
+
+class Subscription:
+    """
+    Messages received on a set of channels, buffered for a single client.
+
+    The buffer is bounded: if the client doesn't keep up, the oldest messages
+    are dropped to make room for new ones.
+    """
+
+    def __init__(self, channels: list[str], buffer_size: int) -> None:
+        self.channels = channels
+        self.dropped = 0
+        self._messages: deque[str] = deque(maxlen=buffer_size)
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def put(self, message: str) -> None:
+        if len(self._messages) == self._messages.maxlen:
+            self.dropped += 1
+        self._messages.append(message)
+        self._ready.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+
+    async def get(self, timeout: float) -> str | None:
+        """
+        Wait for the next message, for up to `timeout` seconds.
+
+        Returns `None` if no message was received in time.
+
+        Raises:
+            SubscriptionClosed: The multiplexer is shutting down.
+        """
+        if not self._messages and not self._closed:
+            self._ready.clear()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._ready.wait(), timeout)
+
+        if self._messages:
+            return self._messages.popleft()
+        if self._closed:
+            raise SubscriptionClosed()
+        return None
+
+
+class PubSubMultiplexer:
+    """
+    Share a single Redis pub/sub connection between all the event streams
+    of the process.
+
+    A background task reads messages from Redis and dispatches them to the
+    subscriptions listening on the message's channel. Channels are subscribed
+    on Redis as long as at least one subscription listens to them.
+    """
+
+    def __init__(self, redis: Redis, *, buffer_size: int) -> None:
+        self.redis = redis
+        self.buffer_size = buffer_size
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._pubsub: PubSub | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._lock = asyncio.Lock()
+        self._server: Server | None = None
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channels: list[str]) -> AsyncIterator[Subscription]:
+        subscription = Subscription(channels, self.buffer_size)
+
+        async with self._lock:
+            pubsub = self._get_pubsub()
+            new_channels = [c for c in channels if c not in self._subscriptions]
+            for channel in channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+            if new_channels:
+                await pubsub.subscribe(*new_channels)
+            self._start_reader()
+
+        try:
+            yield subscription
+        finally:
+            async with self._lock:
+                stale_channels: list[str] = []
+                for channel in channels:
+                    subscriptions = self._subscriptions.get(channel)
+                    if subscriptions is None:
+                        continue
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[channel]
+                        stale_channels.append(channel)
+                if stale_channels and self._pubsub is not None:
+                    with contextlib.suppress(ConnectionError):
+                        await self._pubsub.unsubscribe(*stale_channels)
+
+    @property
+    def should_exit(self) -> bool:
+        """
+        Whether the Uvicorn server running this process is shutting down.
+
+        We do this because the exit signal handler monkey-patch made by
+        sse_starlette doesn't work when running Uvicorn from the CLI,
+        preventing a graceful shutdown when a SSE connection is open.
+        """
+        return self._server is not None and self._server.should_exit
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader_task
+            self._reader_task = None
+        self._close_subscriptions()
+        self._subscriptions = {}
+        if self._pubsub is not None:
+            await self._pubsub.aclose()  # type: ignore[attr-defined]
+            self._pubsub = None
+
+    def _get_pubsub(self) -> PubSub:
+        if self._pubsub is None:
+            self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        return self._pubsub
+
+    def _start_reader(self) -> None:
+        if self._reader_task is None or self._reader_task.done():
+            self._server = _get_uvicorn_server()
+            self._reader_task = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        pubsub = self._get_pubsub()
+        while not self.should_exit:
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except ConnectionError as e:
+                log.warning("eventstream.multiplexer.connection_error", error=str(e))
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is None or message["type"] != "message":
+                continue
+
+            for subscription in self._subscriptions.get(message["channel"], ()):
+                subscription.put(message["data"])
+
+        # Wake up all the clients so they can disconnect
+        self._close_subscriptions()
+
+    def _close_subscriptions(self) -> None:
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+
+def _get_uvicorn_server() -> Server | None:
+    """
+    Hacky way to retrieve the Uvicorn server from the running asyncio tasks.
+
+    Only called when the reader task starts, so we don't walk every task
+    of the loop on each iteration.
+    """
+    try:
+        for task in asyncio.all_tasks():
+            coroutine = task.get_coro()
+            frame = getattr(coroutine, "cr_frame", None)
+            if frame is None:
+                continue
+            if isinstance(server := frame.f_locals.get("self"), Server):
+                return server
+    except RuntimeError:
+        pass
+    return None
+
+
+multiplexer = PubSubMultiplexer(
+    redis_client, buffer_size=settings.EVENTSTREAM_CLIENT_BUFFER_SIZE
+)
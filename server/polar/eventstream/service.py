@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from typing import Any
 from uuid import UUID
 
@@ -41,8 +42,10 @@ class Event(BaseModel):
 
 async def send(event: Event, channels: list[str]) -> None:
     event_json = event.model_dump_json()
-    for channel in channels:
-        await redis.publish(channel, event_json)
+    async with redis.pipeline(transaction=False) as pipe:
+        for channel in channels:
+            pipe.publish(channel, event_json)
+        await pipe.execute()
 
 
 async def publish(
@@ -55,7 +58,28 @@ async def publish(
     receivers = Receivers(
         user_id=user_id, organization_id=organization_id, repository_id=repository_id
     )
-    channels = receivers.get_channels()
+    await publish_many(key, payload, [receivers])
+
+
+async def publish_many(
+    key: str,
+    payload: dict[str, Any],
+    receivers: Iterable[Receivers],
+) -> None:
+    """
+    Publish the same event to several receivers.
+
+    The event is serialized once and published to all the channels
+    in a single Redis round-trip.
+    """
+    channels = list(
+        dict.fromkeys(
+            channel for receiver in receivers for channel in receiver.get_channels()
+        )
+    )
+    if not channels:
+        return
+
     event = Event(
         id=generate_uuid(),
         key=key,
@@ -70,16 +94,7 @@ async def publish_members(
     payload: dict[str, Any],
     organization_id: UUID,
 ) -> None:
-    members = await user_organization_service.list_by_org(
+    user_ids = await user_organization_service.list_user_ids_by_org(
         session, org_id=organization_id
     )
-
-    for m in members:
-        receivers = Receivers(user_id=m.user_id)
-        channels = receivers.get_channels()
-        event = Event(
-            id=generate_uuid(),
-            key=key,
-            payload=payload,
-        )
-        await send(event, channels)
+    await publish_many(key, payload, (Receivers(user_id=u) for u in user_ids))
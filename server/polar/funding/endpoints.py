@@ -1,11 +1,12 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from polar.auth.dependencies import WebUserOrAnonymous
 from polar.exceptions import ResourceNotFound
 from polar.kit.pagination import ListResource, PaginationParamsQuery
 from polar.models import Repository
+from polar.organization.cache import name_alias, organization_response_cache
 from polar.organization.dependencies import OrganizationNamePlatform
 from polar.organization.service import organization as organization_service
 from polar.postgres import AsyncSession, get_db_session
@@ -23,6 +24,7 @@ router = APIRouter(prefix="/funding", tags=["funding"])
 
 @router.get("/search", response_model=ListResource[IssueFunding], tags=[Tags.PUBLIC])
 async def search(
+    request: Request,
     pagination: PaginationParamsQuery,
     organization_name_platform: OrganizationNamePlatform,
     auth_subject: WebUserOrAnonymous,
@@ -32,8 +34,14 @@ async def search(
     closed: bool | None = Query(None),
     sorting: ListFundingSorting = [ListFundingSortBy.newest],
     session: AsyncSession = Depends(get_db_session),
-) -> ListResource[IssueFunding]:
+) -> ListResource[IssueFunding] | Response:
     organization_name, platform = organization_name_platform
+    cache_lookup = await organization_response_cache.lookup(
+        request, auth_subject, alias=name_alias(platform, organization_name)
+    )
+    if cache_lookup.response is not None:
+        return cache_lookup.response
+
     organization = await organization_service.get_by_name(
         session, platform, organization_name
     )
@@ -60,10 +68,14 @@ async def search(
         pagination=pagination,
     )
 
-    return ListResource.from_paginated_results(
-        [IssueFunding.from_list_by_result(result) for result in results],
-        count,
-        pagination,
+    return await organization_response_cache.store(
+        cache_lookup,
+        organization.id,
+        ListResource.from_paginated_results(
+            [IssueFunding.from_list_by_result(result) for result in results],
+            count,
+            pagination,
+        ),
     )
 
 
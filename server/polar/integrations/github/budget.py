@@ -0,0 +1,236 @@
+import asyncio
+import contextlib
+import contextvars
+import time
+from collections.abc import Iterator
+from typing import NamedTuple, cast
+
+import httpx
+import structlog
+from prometheus_client import Counter, Histogram
+
+from polar.config import settings
+from polar.exceptions import PolarError
+from polar.logging import Logger
+from polar.redis import Redis, redis
+
+log: Logger = structlog.get_logger()
+
+github_rate_limit_utilization_ratio = Histogram(
+    "github_rate_limit_utilization_ratio",
+    "Share of the installation rate limit used, observed on each response",
+    buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0),
+)
+github_rate_limit_exceeded_total = Counter(
+    "github_rate_limit_exceeded_total",
+    "Responses rejected by GitHub because the rate limit was exceeded",
+)
+github_crawl_budget_requests_total = Counter(
+    "github_crawl_budget_requests_total",
+    "Crawl requests asking for budget, by outcome",
+    ["outcome"],
+)
+github_crawl_budget_wait_seconds = Histogram(
+    "github_crawl_budget_wait_seconds",
+    "Time crawl requests had to wait for budget",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+_paced = contextvars.ContextVar("polar_github_crawl_paced", default=False)
+
+# The header is the source of truth for the current window: it replaces what
+# we spent since the last response, including requests GitHub didn't charge,
+# like conditional requests answered with 304 Not Modified.
+_OBSERVE_SCRIPT = """
+local stored_reset = tonumber(redis.call("HGET", KEYS[1], "reset"))
+local reset = tonumber(ARGV[3])
+if stored_reset ~= nil and reset < stored_reset then
+    return
+end
+redis.call(
+    "HSET", KEYS[1], "limit", ARGV[1], "remaining", ARGV[2], "reset", reset, "spent", 0
+)
+redis.call("EXPIRE", KEYS[1], ARGV[4])
+"""
+
+# Generic cell rate algorithm: requests are spaced by `interval`, the time left
+# until the reset divided by the requests we can still spend, allowing bursts
+# of `burst` requests. Returns how long to wait, as a string to keep decimals.
+_ACQUIRE_SCRIPT = """
+local state = redis.call("HMGET", KEYS[1], "remaining", "reset", "tat", "spent")
+local remaining = tonumber(state[1])
+local reset = tonumber(state[2])
+local now = tonumber(ARGV[1])
+local reserve = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+if remaining == nil or reset == nil or now >= reset then
+    return "0"
+end
+local available = remaining - (tonumber(state[4]) or 0) - reserve
+if available <= 0 then
+    return tostring(reset - now)
+end
+local interval = (reset - now) / available
+local tat = math.max(tonumber(state[3]) or now, now)
+local wait = tat - now - interval * (burst - 1)
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call("HSET", KEYS[1], "tat", tostring(tat + interval))
+redis.call("HINCRBY", KEYS[1], "spent", 1)
+return "0"
+"""
+
+
+class RateLimitStatus(NamedTuple):
+    limit: int
+    remaining: int
+    reset: int
+
+
+class CrawlBudgetExceeded(PolarError):
+    def __init__(self, installation_id: int, retry_after: float) -> None:
+        self.installation_id = installation_id
+        self.retry_after = retry_after
+        message = (
+            f"Crawl budget of installation {installation_id} exceeded, "
+            f"retry after {retry_after:.1f}s"
+        )
+        super().__init__(message)
+
+
+class RateLimitBudget:
+    """
+    Per-installation budget of GitHub API requests, shared by all workers.
+
+    The remaining quota is tracked from the rate limit headers of every response,
+    minus the requests spent since the last one.
+    Crawl requests spend it through a token bucket, which spreads what's left,
+    minus a reserve for webhooks and user actions, until the limit resets:
+    the crawl uses the quota fully without ever exhausting it.
+    """
+
+    def __init__(
+        self, redis: Redis, *, reserve: int, burst: int, max_wait: float
+    ) -> None:
+        self.redis = redis
+        self.reserve = reserve
+        self.burst = burst
+        self.max_wait = max_wait
+        self._observe = redis.register_script(_OBSERVE_SCRIPT)
+        self._acquire = redis.register_script(_ACQUIRE_SCRIPT)
+
+    async def observe(self, installation_id: int, response: httpx.Response) -> None:
+        headers = response.headers
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = int(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+
+        if limit > 0:
+            github_rate_limit_utilization_ratio.observe((limit - remaining) / limit)
+        if response.status_code in (403, 429) and remaining == 0:
+            github_rate_limit_exceeded_total.inc()
+
+        ttl = max(reset - int(time.time()), 0) + 3600
+        await self._observe(
+            keys=[self._key(installation_id)], args=[limit, remaining, reset, ttl]
+        )
+
+    async def get(self, installation_id: int) -> RateLimitStatus | None:
+        values = await self.redis.hmget(
+            self._key(installation_id), ["limit", "remaining", "reset", "spent"]
+        )
+        *status, spent = values
+        if any(value is None for value in status):
+            return None
+        limit, remaining, reset = (int(cast(str, value)) for value in status)
+        if reset <= time.time():
+            return None
+        return RateLimitStatus(limit, remaining - int(spent or 0), reset)
+
+    def get_capacity(self, status: RateLimitStatus, period: float) -> int:
+        """
+        Requests we can spend over the next `period` seconds.
+        """
+        available = status.remaining - self.reserve
+        if available <= 0:
+            return 0
+        window = status.reset - time.time()
+        if window <= period:
+            return available
+        return int(available * period / window)
+
+    def get_schedule(self, status: RateLimitStatus, count: int) -> list[float] | None:
+        """
+        Delays to start `count` jobs at, in order, evenly over the budget
+        left until the reset; or `None` if there is no budget left.
+        """
+        available = status.remaining - self.reserve
+        if available <= 0:
+            return None
+        interval = max(status.reset - time.time(), 0) / available
+        return [i * interval for i in range(count)]
+
+    async def acquire(self, installation_id: int) -> None:
+        """
+        Spend one request of the budget, waiting for it if needed.
+
+        Raises `CrawlBudgetExceeded` if we would need to wait more than
+        `max_wait`, so the job can be deferred instead of holding a worker.
+        """
+        waited = 0.0
+        while True:
+            result = await self._acquire(
+                keys=[self._key(installation_id)],
+                args=[time.time(), self.reserve, self.burst],
+            )
+            wait = float(result)
+            if wait <= 0:
+                github_crawl_budget_requests_total.labels(
+                    outcome="delayed" if waited else "granted"
+                ).inc()
+                github_crawl_budget_wait_seconds.observe(waited)
+                return
+
+            if waited + wait > self.max_wait:
+                github_crawl_budget_requests_total.labels(outcome="deferred").inc()
+                github_crawl_budget_wait_seconds.observe(waited + wait)
+                log.info(
+                    "github.crawl_budget.exceeded",
+                    installation_id=installation_id,
+                    retry_after=wait,
+                )
+                raise CrawlBudgetExceeded(installation_id, wait)
+
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _key(self, installation_id: int) -> str:
+        return f"polar:github:rate_limit:{installation_id}"
+
+
+@contextlib.contextmanager
+def paced() -> Iterator[None]:
+    """
+    Make the requests of installation clients spend the crawl budget.
+    """
+    token = _paced.set(True)
+    try:
+        yield
+    finally:
+        _paced.reset(token)
+
+
+def is_paced() -> bool:
+    return _paced.get()
+
+
+rate_limit_budget = RateLimitBudget(
+    redis,
+    reserve=settings.GITHUB_CRAWL_RATE_LIMIT_RESERVE,
+    burst=settings.GITHUB_CRAWL_BURST,
+    max_wait=settings.GITHUB_CRAWL_MAX_WAIT_SECONDS,
+)
@@ -1,8 +1,17 @@
 import datetime
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+from urllib.parse import urlencode
 
+import httpx
+from githubkit import GitHub, Response
 from githubkit.cache.base import BaseCache
+from redis.exceptions import WatchError
 
-from polar.redis import redis
+from polar.config import settings
+from polar.redis import Redis, redis
+
+T = TypeVar("T")
 
 
 class RedisCache(BaseCache):
@@ -22,3 +31,120 @@ class RedisCache(BaseCache):
 
     async def aset(self, key: str, value: str, ex: datetime.timedelta) -> None:
         await redis.setex(f"githubkit:{self.app}:{key}", time=ex, value=value)
+
+
+@dataclass
+class CachedResponse(Generic[T]):
+    key: str
+    response: Response[T]
+    """The response from GitHub, or rebuilt from the cache if not modified."""
+    changed: bool
+    """Whether the response changed since it was last marked as applied."""
+
+
+class GitHubResponseCache:
+    """
+    Cache of GitHub REST responses, keyed by installation and URL.
+
+    Requests are made conditional with the cached ETag and Last-Modified, so an
+    unchanged resource costs a 304, which doesn't count against the rate limit,
+    and its body is served from the cache.
+
+    A response is `changed` until its consumer calls `mark_applied`, once it's
+    done processing it: a job failing mid-way will process it again on retry,
+    even though GitHub answers 304 by then.
+    """
+
+    def __init__(self, redis: Redis, *, ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+
+    async def request(
+        self,
+        client: GitHub[Any],
+        installation_id: int,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        response_model: type[T],
+    ) -> CachedResponse[T]:
+        key = self._key(installation_id, url, params)
+        cached = await self.redis.hgetall(key)
+
+        headers: dict[str, str] = {}
+        if etag := cached.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := cached.get("last_modified"):
+            headers["If-Modified-Since"] = last_modified
+
+        response = await client.arequest(
+            "GET", url, params=params, headers=headers, response_model=response_model
+        )
+
+        if response.status_code == 304 and cached:
+            await self.redis.expire(key, self.ttl)
+            raw_response = httpx.Response(
+                200,
+                content=cached["body"],
+                headers={
+                    "content-type": "application/json",
+                    **{
+                        name: cached[field]
+                        for field, name in (
+                            ("etag", "etag"),
+                            ("last_modified", "last-modified"),
+                        )
+                        if cached.get(field)
+                    },
+                },
+            )
+            return CachedResponse(
+                key=key,
+                response=Response(raw_response, response_model),
+                changed=cached.get("applied") != "1",
+            )
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(
+                key,
+                mapping={
+                    "etag": response.headers.get("etag", ""),
+                    "last_modified": response.headers.get("last-modified", ""),
+                    "body": response.text,
+                    "applied": "0",
+                },
+            )
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+        return CachedResponse(key=key, response=response, changed=True)
+
+    async def mark_applied(self, cached_response: CachedResponse[Any]) -> None:
+        """
+        Mark the response as processed, unless a newer version
+        was cached in the meantime.
+        """
+        etag = cached_response.response.headers.get("etag", "")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(cached_response.key)
+                if await pipe.hget(cached_response.key, "etag") != etag:
+                    return
+                pipe.multi()
+                pipe.hset(cached_response.key, "applied", "1")
+                await pipe.execute()
+            except WatchError:
+                pass
+
+    def _key(
+        self, installation_id: int, url: str, params: dict[str, Any] | None
+    ) -> str:
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return f"polar:github:response:{installation_id}:{url}"
+
+
+github_response_cache = GitHubResponseCache(
+    redis, ttl=settings.GITHUB_RESPONSE_CACHE_TTL_SECONDS
+)
@@ -2,6 +2,7 @@ import time
 from enum import StrEnum
 from typing import Any
 
+import httpx
 import structlog
 from githubkit import (
     AppAuthStrategy,
@@ -17,6 +18,7 @@ from githubkit.utils import UNSET, Unset
 from pydantic import BaseModel, Field
 
 from polar.config import settings
+from polar.integrations.github.budget import is_paced, rate_limit_budget
 from polar.integrations.github.cache import RedisCache
 from polar.locker import Locker
 from polar.models.user import OAuthAccount, OAuthPlatform, User
@@ -218,6 +220,27 @@ def get_app_client(app: GitHubApp = GitHubApp.polar) -> GitHub[AppAuthStrategy]:
         )
 
 
+class InstallationGitHub(GitHub[AppInstallationAuthStrategy]):
+    """
+    Installation client keeping the installation's rate limit budget up to date.
+
+    Inside `paced()`, e.g. in crawl jobs, every request first spends the budget.
+    """
+
+    async def _arequest(self, *args: Any, **kwargs: Any) -> httpx.Response:
+        installation_id = self.auth.installation_id
+        if is_paced():
+            await rate_limit_budget.acquire(installation_id)
+
+        response = await super()._arequest(*args, **kwargs)
+
+        # Requests authenticated as the app itself have their own rate limit
+        if response.request.headers.get("Authorization", "").startswith("token "):
+            await rate_limit_budget.observe(installation_id, response)
+
+        return response
+
+
 def get_app_installation_client(
     installation_id: int,
     *,
@@ -232,7 +255,7 @@ def get_app_installation_client(
     # they can be reused across restarts of the python process and by multiple workers.
 
     if app == GitHubApp.polar:
-        return GitHub(
+        return InstallationGitHub(
             AppInstallationAuthStrategy(
                 app_id=settings.GITHUB_APP_IDENTIFIER,
                 private_key=settings.GITHUB_APP_PRIVATE_KEY,
@@ -244,7 +267,7 @@ def get_app_installation_client(
             )
         )
     elif app == GitHubApp.repository_benefit:
-        return GitHub(
+        return InstallationGitHub(
             AppInstallationAuthStrategy(
                 app_id=settings.GITHUB_REPOSITORY_BENEFITS_APP_IDENTIFIER,
                 private_key=settings.GITHUB_REPOSITORY_BENEFITS_APP_PRIVATE_KEY,
@@ -263,6 +286,7 @@ __all__ = [
     "get_app_installation_client",
     "get_user_client",
     "GitHub",
+    "InstallationGitHub",
     "Missing",
     "AppInstallationAuthStrategy",
     "TokenAuthStrategy",
@@ -9,13 +9,14 @@ from uuid import UUID
 import structlog
 from githubkit import GitHub, Paginator
 from githubkit.exception import RequestFailed
-from sqlalchemy import asc, or_
+from sqlalchemy import asc, desc, or_
+from sqlalchemy.orm import contains_eager
 
 from polar.dashboard.schemas import IssueSortBy
 from polar.enums import Platforms
 from polar.exceptions import ResourceNotFound
 from polar.integrations.loops.service import loops as loops_service
-from polar.issue.hooks import IssueHook, issue_upserted
+from polar.issue.hooks import IssuesHook, issues_upserted
 from polar.issue.schemas import IssueCreate, IssueUpdate
 from polar.issue.service import IssueService
 from polar.kit.db.postgres import (
@@ -40,6 +41,7 @@ from polar.repository.hooks import (
 from .. import client as github
 from .. import types
 from ..badge import GithubBadge
+from ..cache import github_response_cache
 from .organization import github_organization
 from .paginated import ErrorCount, SyncedCount, github_paginated_service
 from .repository import github_repository
@@ -47,6 +49,14 @@ from .repository import github_repository
 log: Logger = structlog.get_logger()
 
 
+def get_issue_url(org_name: str, repo_name: str, number: int) -> str:
+    return f"/repos/{org_name}/{repo_name}/issues/{number}"
+
+
+def get_issue_timeline_url(org_name: str, repo_name: str, number: int) -> str:
+    return f"{get_issue_url(org_name, repo_name, number)}/timeline"
+
+
 class GithubIssueService(IssueService):
     async def get_by_external_id(
         self, session: AsyncSession, external_id: int
@@ -152,8 +162,7 @@ class GithubIssueService(IssueService):
         #
         # TODO: migrate away from this hook!
         if autocommit:
-            for record in records:
-                await issue_upserted.call(IssueHook(session, record))
+            await issues_upserted.call(IssuesHook(session, records))
 
         return records
 
@@ -315,13 +324,11 @@ class GithubIssueService(IssueService):
         log.info("github.sync_issue", issue_id=issue.id)
 
         try:
-            res = await client.rest.issues.async_get(
-                org.name,
-                repo=repo.name,
-                issue_number=issue.number,
-                headers={"If-None-Match": issue.github_issue_etag}
-                if issue.github_issue_etag
-                else {},
+            cached = await github_response_cache.request(
+                client,
+                installation_id,
+                get_issue_url(org.name, repo.name, issue.number),
+                response_model=types.Issue,
             )
         except RequestFailed as e:
             if e.response.status_code == 404:
@@ -337,58 +344,79 @@ class GithubIssueService(IssueService):
                 raise e
 
         # Cache hit, nothing new
-        if res.status_code == 304:
+        if not cached.changed:
             log.info("github.sync_issue.etag_cache_hit", issue_id=issue.id)
             return
 
-        if res.status_code == 200:
-            log.info("github.sync_issue.etag_cache_miss", issue_id=issue.id)
-
-            do_upsert = True
-
-            # This happens when a repository has been moved from one repository to
-            # another repo. The old URL and ID will redirect to issue in the new
-            # repository, but with the response changed. A real-life example of this is
-            # https://www.github.com/litestar-org/litestar/issues/2027 which has been
-            # moved to https://github.com/litestar-org/litestar.dev/issues/8. To avoid
-            # confusion between litestar.dev#8 and litestar#8, abort here and do not
-            # save the new version.
-            #
-            # A potential improvement here is to mark the issue as deleted?
-            if (
-                res.parsed_data.repository
-                and res.parsed_data.repository.id != repo.external_id
-            ):
-                log.info(
-                    "github.sync_issue.repository_changed_skipping",
-                    expected_repo_id=repo.external_id,
-                    got_repo_id=res.parsed_data.repository.id,
-                )
-                do_upsert = False
+        log.info("github.sync_issue.etag_cache_miss", issue_id=issue.id)
+        res = cached.response
 
-            # Same as above, but checking for issue number changes
-            if res.parsed_data.number != issue.number:
-                log.info(
-                    "github.sync_issue.number_changed_skipping",
-                    expected_issue_number=issue.number,
-                    got_issue_number=res.parsed_data.number,
-                )
-                do_upsert = False
+        do_upsert = True
 
-            if do_upsert:
-                await self.store(
-                    session, data=res.parsed_data, organization=org, repository=repo
-                )
+        # This happens when a repository has been moved from one repository to
+        # another repo. The old URL and ID will redirect to issue in the new
+        # repository, but with the response changed. A real-life example of this is
+        # https://www.github.com/litestar-org/litestar/issues/2027 which has been
+        # moved to https://github.com/litestar-org/litestar.dev/issues/8. To avoid
+        # confusion between litestar.dev#8 and litestar#8, abort here and do not
+        # save the new version.
+        #
+        # A potential improvement here is to mark the issue as deleted?
+        if (
+            res.parsed_data.repository
+            and res.parsed_data.repository.id != repo.external_id
+        ):
+            log.info(
+                "github.sync_issue.repository_changed_skipping",
+                expected_repo_id=repo.external_id,
+                got_repo_id=res.parsed_data.repository.id,
+            )
+            do_upsert = False
+
+        # Same as above, but checking for issue number changes
+        if res.parsed_data.number != issue.number:
+            log.info(
+                "github.sync_issue.number_changed_skipping",
+                expected_issue_number=issue.number,
+                got_issue_number=res.parsed_data.number,
+            )
+            do_upsert = False
+
+        if do_upsert:
+            await self.store(
+                session, data=res.parsed_data, organization=org, repository=repo
+            )
+
+        # Save etag
+        issue.github_issue_fetched_at = utc_now()
+        issue.github_issue_etag = res.headers.get("etag", None)
+        session.add(issue)
+
+        await session.commit()
+        await github_response_cache.mark_applied(cached)
+
+    async def has_issue_changed(self, installation_id: int, url: str) -> bool:
+        """
+        Revalidate the cached issue at `url`, without touching the database.
 
-            # Save etag
-            issue.github_issue_fetched_at = utc_now()
-            issue.github_issue_etag = res.headers.get("etag", None)
-            session.add(issue)
+        Returns `False` only if the issue didn't change since it was last synced.
+        """
+        client = github.get_app_installation_client(installation_id)
+        try:
+            cached = await github_response_cache.request(
+                client, installation_id, url, response_model=types.Issue
+            )
+        except RequestFailed:
+            # Handled by the full sync
+            return True
+        return cached.changed
 
     async def list_issues_to_crawl_issue(
         self,
         session: AsyncSession,
         organization: Organization,
+        *,
+        limit: int = 100,
     ) -> Sequence[Issue]:
         current_time = utc_now()
         cutoff_time = current_time - datetime.timedelta(hours=12)
@@ -408,8 +436,14 @@ class GithubIssueService(IssueService):
                 Organization.installation_id.is_not(None),
                 Organization.id == organization.id,
             )
-            .order_by(asc(Issue.github_issue_fetched_at))
-            .limit(100)
+            # Issues people care about first: recently pledged, then badged
+            .order_by(
+                desc(Issue.last_pledged_at).nulls_last(),
+                desc(Issue.pledge_badge_embedded_at).nulls_last(),
+                asc(Issue.github_issue_fetched_at).nulls_first(),
+            )
+            .limit(limit)
+            .options(contains_eager(Issue.repository))
         )
 
         res = await session.execute(stmt)
@@ -420,6 +454,8 @@ class GithubIssueService(IssueService):
         self,
         session: AsyncSession,
         organization: Organization,
+        *,
+        limit: int = 100,
     ) -> Sequence[Issue]:
         current_time = utc_now()
         cutoff_time = current_time - datetime.timedelta(hours=12)
@@ -439,14 +475,42 @@ class GithubIssueService(IssueService):
                 Organization.installation_id.is_not(None),
                 Organization.id == organization.id,
             )
-            .order_by(asc(Issue.github_timeline_fetched_at))
-            .limit(100)
+            # Issues people care about first: recently pledged, then badged
+            .order_by(
+                desc(Issue.last_pledged_at).nulls_last(),
+                desc(Issue.pledge_badge_embedded_at).nulls_last(),
+                asc(Issue.github_timeline_fetched_at).nulls_first(),
+            )
+            .limit(limit)
+            .options(contains_eager(Issue.repository))
         )
 
         res = await session.execute(stmt)
 
         return res.scalars().unique().all()
 
+    async def mark_crawl_scheduled(
+        self,
+        session: AsyncSession,
+        issues: Sequence[Issue],
+        column: Literal["github_issue_fetched_at", "github_timeline_fetched_at"],
+    ) -> None:
+        """
+        Push scheduled issues back in the crawl queue.
+
+        Unchanged issues are answered from the response cache without touching
+        the database, so they would otherwise be picked again by the next run.
+        """
+        if not issues:
+            return
+        stmt = (
+            sql.update(Issue)
+            .where(Issue.id.in_([issue.id for issue in issues]))
+            .values({column: utc_now()})
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
+
     async def list_issues_to_add_badge_to_auto(
         self,
         session: AsyncSession,
@@ -695,7 +759,8 @@ class GithubIssueService(IssueService):
         synced, errors = await github_paginated_service.store_paginated_resource(
             session,
             paginator=paginator,
-            store_resource_method=github_issue.store,
+            page_size=per_page,
+            store_many_method=github_issue.store_many,
             organization=organization,
             repository=repository,
             skip_condition=skip_if_pr,
@@ -1,8 +1,16 @@
+import asyncio
+from typing import Any, Literal
+from uuid import UUID
+
+import httpx
+import structlog
+
 from polar.integrations.github.service.organization import Member
-from polar.models import Organization
-from polar.models.user import OAuthAccount
+from polar.integrations.loops.service import loops as loops_service
+from polar.logging import Logger
+from polar.models import Organization, User
+from polar.models.user import OAuthAccount, OAuthPlatform
 from polar.models.user_organization import UserOrganization
-from polar.organization.service import organization as organization_service
 from polar.postgres import AsyncSession, sql
 from polar.subscription.service.subscription import subscription as subscription_service
 from polar.user_organization.service import (
@@ -10,74 +18,82 @@ from polar.user_organization.service import (
 )
 
 from .. import client as github
-from .user import github_user as github_user_service
+from .. import types
 
+log: Logger = structlog.get_logger()
 
-class GitHubMembersService:
-    async def _fetch_members(
-        self,
-        org: Organization,
-    ) -> list[Member]:
-        client = github.get_app_installation_client(org.safe_installation_id)
+PER_PAGE = 100
+MAX_CONCURRENT_PAGES = 5
 
-        mems: list[Member] = []
 
-        # GitHub has no API to list all members and their role.
+def _get_last_page(response: httpx.Response) -> int:
+    last = response.links.get("last")
+    if last is None:
+        return 1
+    return int(httpx.URL(last["url"]).params.get("page", 1))
 
-        admins: set[int] = set()
 
-        per_page = 50
+class GitHubMembersService:
+    async def _list_members(
+        self,
+        client: github.GitHub[Any],
+        org: Organization,
+        role: Literal["all", "admin"],
+    ) -> list[types.SimpleUser]:
+        first = await client.rest.orgs.async_list_members(
+            org.name, page=1, per_page=PER_PAGE, role=role
+        )
 
-        # First, we get all admins, and then we get all users
-        for page in range(1, 1000):
-            res = await client.rest.orgs.async_list_members(
-                org.name,
-                page=page,
-                per_page=per_page,
-                role="admin",
-            )
+        # The first page tells how many there are: fetch the others concurrently
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
 
-            if len(res.parsed_data) == 0:
-                break
-
-            for m in res.parsed_data:
-                mems.append(
-                    Member(
-                        external_id=m.id,
-                        username=m.login,
-                        avatar_url=m.avatar_url,
-                        is_admin=True,
-                    )
+        async def _list_page(page: int) -> list[types.SimpleUser]:
+            async with semaphore:
+                res = await client.rest.orgs.async_list_members(
+                    org.name, page=page, per_page=PER_PAGE, role=role
                 )
-                admins.add(m.id)
+                return res.parsed_data
 
-            if len(res.parsed_data) < per_page:
-                break
-
-        # ... then get all users, including admins, and filter away users that we already have!
-        for page in range(1, 1000):
-            res = await client.rest.orgs.async_list_members(
-                org.name, page=page, per_page=per_page, role="all"
+        pages = await asyncio.gather(
+            *(
+                _list_page(page)
+                for page in range(2, _get_last_page(first.raw_response) + 1)
             )
+        )
 
-            if len(res.parsed_data) == 0:
-                break
+        members = list(first.parsed_data)
+        for page_members in pages:
+            members.extend(page_members)
+        return members
+
+    async def _fetch_members(
+        self,
+        org: Organization,
+    ) -> list[Member]:
+        client = github.get_app_installation_client(org.safe_installation_id)
 
-            for m in res.parsed_data:
-                if m.id in admins:
-                    continue
+        # GitHub has no API to list all members and their role:
+        # get all admins, and all users, including admins.
+        admins, users = await asyncio.gather(
+            self._list_members(client, org, "admin"),
+            self._list_members(client, org, "all"),
+        )
+        admin_ids = {m.id for m in admins}
 
-                mems.append(
-                    Member(
-                        external_id=m.id,
-                        username=m.login,
-                        avatar_url=m.avatar_url,
-                        is_admin=False,
-                    )
+        mems: list[Member] = []
+        seen: set[int] = set()
+        for m in [*admins, *users]:
+            if m.id in seen:
+                continue
+            seen.add(m.id)
+            mems.append(
+                Member(
+                    external_id=m.id,
+                    username=m.login,
+                    avatar_url=m.avatar_url,
+                    is_admin=m.id in admin_ids,
                 )
-
-            if len(res.parsed_data) < per_page:
-                break
+            )
 
         return mems
 
@@ -86,49 +102,87 @@ class GitHubMembersService:
     ) -> None:
         # get members from github
         github_members = await self._fetch_members(org)
+        github_user_ids = {str(m.external_id) for m in github_members}
 
-        db_members_stmt = (
-            sql.select(OAuthAccount)
-            .where(
-                UserOrganization.user_id == OAuthAccount.user_id,
-                OAuthAccount.platform == "github",
-                OAuthAccount.deleted_at.is_(None),
-            )
-            .where(
-                UserOrganization.organization_id == org.id,
-                UserOrganization.deleted_at.is_(None),
-            )
+        # Polar users of the GitHub members
+        users_stmt = sql.select(OAuthAccount.account_id, OAuthAccount.user_id).where(
+            OAuthAccount.platform == OAuthPlatform.github,
+            OAuthAccount.account_id.in_(github_user_ids),
         )
+        users_by_account: dict[str, UUID] = {}
+        for account_id, user_id in await session.execute(users_stmt):
+            users_by_account.setdefault(account_id, user_id)
 
-        res = await session.execute(db_members_stmt)
-        db_members = res.scalars().unique().all()
-
-        # add or update members from github
+        members: dict[UUID, bool] = {}
         for gh_m in github_members:
-            # get user
-            get_user = await github_user_service.get_user_by_github_id(
-                session, gh_m.external_id
-            )
-            if not get_user:
-                continue
+            user_id = users_by_account.get(str(gh_m.external_id))
+            if user_id is not None:
+                members[user_id] = members.get(user_id, False) or gh_m.is_admin
 
-            # add as member, or update admin status
-            await organization_service.add_user(
-                session, org, get_user, is_admin=gh_m.is_admin
-            )
+        # Current memberships, including removed ones
+        memberships_stmt = sql.select(UserOrganization).where(
+            UserOrganization.organization_id == org.id
+        )
+        memberships = {
+            m.user_id: m for m in (await session.execute(memberships_stmt)).scalars()
+        }
+
+        added_user_ids = {
+            user_id
+            for user_id in members
+            if user_id not in memberships or memberships[user_id].deleted_at is not None
+        }
+        updated = {
+            user_id: is_admin
+            for user_id, is_admin in members.items()
+            if user_id in added_user_ids or memberships[user_id].is_admin != is_admin
+        }
 
         # remove members that are members in our DB, but not a member on github
-        github_user_ids: set[int] = set()
-        for gh_m in github_members:
-            github_user_ids.add(gh_m.external_id)
+        db_members_stmt = sql.select(
+            OAuthAccount.user_id, OAuthAccount.account_id
+        ).where(
+            UserOrganization.user_id == OAuthAccount.user_id,
+            OAuthAccount.platform == OAuthPlatform.github,
+            OAuthAccount.deleted_at.is_(None),
+            UserOrganization.organization_id == org.id,
+            UserOrganization.deleted_at.is_(None),
+        )
+        removed_user_ids = list(
+            {
+                user_id
+                for user_id, account_id in await session.execute(db_members_stmt)
+                if account_id not in github_user_ids and user_id not in members
+            }
+        )
 
-        for db_m in db_members:
-            if int(db_m.account_id) in github_user_ids:
-                continue
+        await user_organization_service.upsert_members(session, org.id, updated)
+        await user_organization_service.remove_members(
+            session, org.id, removed_user_ids
+        )
 
-            await user_organization_service.remove_member(session, db_m.user_id, org.id)
+        if added_user_ids:
+            added_users = await session.execute(
+                sql.select(User).where(User.id.in_(added_user_ids))
+            )
+            for user in added_users.scalars().unique():
+                await loops_service.organization_installed(session, user=user)
+
+        log.info(
+            "github.organization.synchronize_members",
+            organization_id=org.id,
+            members=len(members),
+            added=len(added_user_ids),
+            updated=len(updated) - len(added_user_ids),
+            removed=len(removed_user_ids),
+        )
 
-        await subscription_service.update_organization_benefits_grants(session, org)
+        await subscription_service.update_organization_members_benefits_grants(
+            session,
+            org,
+            added_user_ids=list(added_user_ids),
+            removed_user_ids=removed_user_ids,
+        )
 
 
 github_members_service = GitHubMembersService()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Callable, Coroutine
-from typing import Any, Literal
+from collections.abc import AsyncIterator, Callable, Coroutine, Sequence
+from typing import Any, Literal, TypeVar, cast
 
 import structlog
 from githubkit import Paginator
@@ -20,6 +20,25 @@ log = structlog.get_logger()
 SyncedCount = int
 ErrorCount = int
 
+T = TypeVar("T")
+
+
+async def iter_pages(items: AsyncIterator[T], page_size: int) -> AsyncIterator[list[T]]:
+    """
+    Group the items yielded by a paginator back into pages of `page_size`.
+
+    As long as `page_size` matches the `per_page` of the paginator,
+    each group is exactly one page fetched from GitHub.
+    """
+    page: list[T] = []
+    async for item in items:
+        page.append(item)
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
 
 class GitHubPaginatedService:
     async def store_paginated_resource(
@@ -27,8 +46,9 @@ class GitHubPaginatedService:
         session: AsyncSession,
         *,
         paginator: Paginator[types.Issue] | Paginator[types.PullRequestSimple],
-        store_resource_method: Callable[
-            ..., Coroutine[Any, Any, Issue | PullRequest | None]
+        page_size: int,
+        store_many_method: Callable[
+            ..., Coroutine[Any, Any, Sequence[Issue] | Sequence[PullRequest]]
         ],
         organization: Organization,
         repository: Repository,
@@ -39,34 +59,41 @@ class GitHubPaginatedService:
         on_completed_signal: Hook[SyncCompletedHook] | None = None,
     ) -> tuple[SyncedCount, ErrorCount]:
         synced, errors = 0, 0
-        async for data in paginator:
-            synced += 1
+        items = cast(AsyncIterator[types.Issue | types.PullRequestSimple], paginator)
+        async for page in iter_pages(items, page_size):
+            synced += len(page)
 
-            if skip_condition and skip_condition(data):
+            data = [d for d in page if not (skip_condition and skip_condition(d))]
+            if not data:
                 continue
 
-            record = await store_resource_method(
+            # Upsert the whole page in a single statement
+            records = await store_many_method(
                 session,
                 data=data,
                 organization=organization,
                 repository=repository,
             )
 
-            if not record:
-                log.warning(
-                    f"{resource_type}.sync.failed",
-                    error="save was unsuccessful",
-                    received=data.model_dump(mode="json"),
-                )
-                errors += 1
+            if len(records) < len(data):
+                stored = {record.external_id for record in records}
+                for d in data:
+                    if d.id not in stored:
+                        log.warning(
+                            f"{resource_type}.sync.failed",
+                            error="save was unsuccessful",
+                            received=d.model_dump(mode="json"),
+                        )
+                        errors += 1
+
+            if not records:
                 continue
 
             log.debug(
                 f"{resource_type}.synced",
                 organization_id=organization.id,
                 repository_id=repository.id,
-                id=record.id,
-                title=record.title,
+                count=len(records),
             )
 
             if on_sync_signal:
@@ -74,7 +101,7 @@ class GitHubPaginatedService:
                     SyncedHook(
                         repository=repository,
                         organization=organization,
-                        record=record,
+                        records=records,
                         synced=synced,
                     )
                 )
@@ -7,7 +7,7 @@ from githubkit import GitHub, Paginator
 from polar.enums import Platforms
 from polar.models import Organization, PullRequest, Repository
 from polar.postgres import AsyncSession
-from polar.pull_request.hooks import PullRequestHook, pull_request_upserted
+from polar.pull_request.hooks import PullRequestsHook, pull_requests_upserted
 from polar.pull_request.schemas import FullPullRequestCreate, MinimalPullRequestCreate
 from polar.pull_request.service import PullRequestService, full_pull_request
 
@@ -72,8 +72,7 @@ class GithubPullRequestService(PullRequestService):
             mutable_keys=MinimalPullRequestCreate.__mutable_keys__,
         )
 
-        for r in res:
-            await pull_request_upserted.call(PullRequestHook(session, r))
+        await pull_requests_upserted.call(PullRequestsHook(session, res))
 
         return res
 
@@ -131,8 +130,7 @@ class GithubPullRequestService(PullRequestService):
             mutable_keys=FullPullRequestCreate.__mutable_keys__,
         )
 
-        for r in res:
-            await pull_request_upserted.call(PullRequestHook(session, r))
+        await pull_requests_upserted.call(PullRequestsHook(session, res))
 
         return res
 
@@ -189,7 +187,8 @@ class GithubPullRequestService(PullRequestService):
         synced, errors = await github_paginated_service.store_paginated_resource(
             session,
             paginator=paginator,
-            store_resource_method=github_pull_request.store_simple,
+            page_size=per_page,
+            store_many_method=github_pull_request.store_many_simple,
             organization=organization,
             repository=repository,
             resource_type="pull_request",
@@ -10,7 +10,10 @@ from githubkit.exception import RequestFailed
 from pydantic import Discriminator, Field, Tag, ValidationError
 from sqlalchemy.exc import IntegrityError
 
-from polar.integrations.github.service.issue import github_issue
+from polar.integrations.github.service.issue import (
+    get_issue_timeline_url,
+    github_issue,
+)
 from polar.integrations.github.service.pull_request import github_pull_request
 from polar.issue.hooks import (
     IssueReferenceHook,
@@ -32,6 +35,7 @@ from polar.worker import QueueName, enqueue_job
 
 from .. import client as github
 from .. import types
+from ..cache import github_response_cache
 
 log: Logger = structlog.get_logger()
 
@@ -203,28 +207,18 @@ class GitHubIssueReferencesService:
 
         log.info("github.sync_issue_references", issue_id=issue.id)
 
-        # TODO: if the first page is a cache miss, we're currently re-crawling all pages
-        # A nice improvement would be to figure out if we can stop crawling early.
+        url = get_issue_timeline_url(org.name, repo.name, issue.number)
+        changed = False
         for page in range(1, 100):
-            first_page = page == 1
-
             try:
-                headers: dict[str, str] = (
-                    {"If-None-Match": issue.github_timeline_etag}
-                    if issue.github_timeline_etag is not None and first_page
-                    else {}
-                )
                 # Manual request because the builtin one has a too restrictive type.
                 # Our flavor of `TimelineEventType` includes `UnknownIssueEvent` schema
                 # which is an escape hatch for type-inconsistent events.
-                res = await client.arequest(
-                    "GET",
-                    f"/repos/{org.name}/{repo.name}/issues/{issue.number}/timeline",
-                    params={
-                        "per_page": 100,
-                        "page": page,
-                    },
-                    headers=headers,
+                cached = await github_response_cache.request(
+                    client,
+                    installation_id,
+                    url,
+                    params={"per_page": 100, "page": page},
                     response_model=list[TimelineEventType],
                 )
             except RequestFailed as e:
@@ -236,44 +230,72 @@ class GitHubIssueReferencesService:
                 else:
                     raise e
 
-            # Cache hit, nothing new
-            if first_page and res.status_code == 304:
-                log.info(
-                    "github.sync_issue_references.etag_cache_hit", issue_id=issue.id
-                )
-                return
+            res = cached.response
+
+            # Every page is revalidated, since new events are added on the last one,
+            # but only the ones which changed are processed again.
+            if cached.changed:
+                if page == 1:
+                    issue.github_timeline_etag = res.headers.get("etag", None)
+                changed = True
+
+                try:
+                    for event in res.parsed_data:
+                        ref = await self.parse_issue_timeline_event(
+                            session, org, repo, issue, event, client=client
+                        )
+                        if ref:
+                            # add data missing from github api
+                            ref = await self.annotate(session, org, ref, client=client)
+
+                            # persist
+                            await self.create_reference(session, ref)
+                except ValidationError as e:
+                    log.warning(
+                        "github.sync_issue_references.parsing_failed",
+                        issue_id=issue.id,
+                        errors=e.json(indent=None),
+                    )
 
-            # Save ETag of the first page
-            if first_page and res.status_code == 200:
-                log.info(
-                    "github.sync_issue_references.etag_cache_miss", issue_id=issue.id
-                )
+                await session.commit()
+                await github_response_cache.mark_applied(cached)
+
+            # No more pages
+            if len(res.json()) < 100:
+                break
+
+        if not changed:
+            log.info("github.sync_issue_references.etag_cache_hit", issue_id=issue.id)
+            return
+
+        log.info("github.sync_issue_references.etag_cache_miss", issue_id=issue.id)
+        issue.github_timeline_fetched_at = utils.utc_now()
+        session.add(issue)
 
-                issue.github_timeline_fetched_at = utils.utc_now()
-                issue.github_timeline_etag = res.headers.get("etag", None)
-                session.add(issue)
+    async def has_timeline_changed(self, installation_id: int, url: str) -> bool:
+        """
+        Revalidate the cached timeline pages at `url`, without touching the database.
 
+        Returns `False` only if none of them changed since they were last synced.
+        """
+        client = github.get_app_installation_client(installation_id)
+        for page in range(1, 100):
             try:
-                for event in res.parsed_data:
-                    ref = await self.parse_issue_timeline_event(
-                        session, org, repo, issue, event, client=client
-                    )
-                    if ref:
-                        # add data missing from github api
-                        ref = await self.annotate(session, org, ref, client=client)
-
-                        # persist
-                        await self.create_reference(session, ref)
-            except ValidationError as e:
-                log.warning(
-                    "github.sync_issue_references.parsing_failed",
-                    issue_id=issue.id,
-                    errors=e.json(indent=None),
+                cached = await github_response_cache.request(
+                    client,
+                    installation_id,
+                    url,
+                    params={"per_page": 100, "page": page},
+                    response_model=list[TimelineEventType],
                 )
-
-            # No more pages
-            if len(res.parsed_data) < 100:
-                return
+            except RequestFailed:
+                # Handled by the full sync
+                return True
+            if cached.changed:
+                return True
+            if len(cached.response.json()) < 100:
+                return False
+        return False
 
     async def parse_issue_timeline_event(
         self,
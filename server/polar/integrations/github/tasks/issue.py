@@ -1,11 +1,12 @@
-import random
 from uuid import UUID
 
 import structlog
 
+from polar.config import settings
 from polar.integrations.github import service
 from polar.integrations.github.client import get_app_installation_client
 from polar.locker import Locker
+from polar.models import Organization
 from polar.organization.service import organization as organization_service
 from polar.redis import get_redis
 from polar.worker import (
@@ -18,23 +19,41 @@ from polar.worker import (
     task,
 )
 
+from ..budget import RateLimitStatus, rate_limit_budget
 from ..service.api import github_api
-from ..service.issue import github_issue
-from .utils import get_organization_and_repo, github_rate_limit_retry
+from ..service.issue import get_issue_timeline_url, get_issue_url, github_issue
+from .utils import (
+    get_organization_and_repo,
+    github_crawl_paced,
+    github_rate_limit_retry,
+)
 
 log = structlog.get_logger()
 
 
 @task("github.issue.sync")
 @github_rate_limit_retry
+@github_crawl_paced
 async def issue_sync(
     ctx: JobContext,
     issue_id: UUID,
     polar_context: PolarWorkerContext,
     crawl_with_installation_id: int
     | None = None,  # Override which installation to use when crawling
+    url: str | None = None,  # Cached issue URL, to revalidate before anything else
 ) -> None:
     with polar_context.to_execution_context():
+        # Unchanged issues are answered from the cache, without the database
+        if (
+            url is not None
+            and crawl_with_installation_id is not None
+            and not await github_issue.has_issue_changed(
+                crawl_with_installation_id, url
+            )
+        ):
+            log.info("github.issue.sync.unchanged", issue_id=issue_id)
+            return
+
         async with AsyncSessionMaker(ctx) as session:
             issue = await github_issue.get(session, issue_id)
             if not issue or not issue.organization_id or not issue.repository_id:
@@ -60,14 +79,27 @@ async def issue_sync(
 
 @task("github.issue.sync.issue_references")
 @github_rate_limit_retry
+@github_crawl_paced
 async def issue_sync_issue_references(
     ctx: JobContext,
     issue_id: UUID,
     polar_context: PolarWorkerContext,
     crawl_with_installation_id: int
     | None = None,  # Override which installation to use when crawling
+    url: str | None = None,  # Cached timeline URL, to revalidate before anything else
 ) -> None:
     with polar_context.to_execution_context():
+        # Unchanged timelines are answered from the cache, without the database
+        if (
+            url is not None
+            and crawl_with_installation_id is not None
+            and not await service.github_reference.has_timeline_changed(
+                crawl_with_installation_id, url
+            )
+        ):
+            log.info("github.issue.sync.issue_references.unchanged", issue_id=issue_id)
+            return
+
         async with AsyncSessionMaker(ctx) as session:
             issue = await github_issue.get(session, issue_id)
             if not issue or not issue.organization_id or not issue.repository_id:
@@ -93,6 +125,7 @@ async def issue_sync_issue_references(
 
 @task("github.issue.sync.issue_dependencies")
 @github_rate_limit_retry
+@github_crawl_paced
 async def issue_sync_issue_dependencies(
     ctx: JobContext,
     issue_id: UUID,
@@ -125,6 +158,34 @@ async def issue_sync_issue_dependencies(
             )
 
 
+# Each cron runs every 10 minutes, both sharing the installation's budget
+CRON_PERIOD = 60 * 10
+CRON_BUDGET_SHARE = 2
+
+
+async def get_crawl_batch_size(
+    organization: Organization,
+) -> tuple[RateLimitStatus, int] | None:
+    status = await rate_limit_budget.get(organization.safe_installation_id)
+    if status is None:
+        client = get_app_installation_client(organization.safe_installation_id)
+        try:
+            rate_limit = await github_api.get_rate_limit(client)
+        except Exception as e:
+            log.info(
+                "failed to get rate limit, treating it as no remaining",
+                org_name=organization.name,
+                err=e,
+            )
+            return None
+        status = RateLimitStatus(
+            rate_limit.limit, rate_limit.remaining, rate_limit.reset
+        )
+
+    capacity = rate_limit_budget.get_capacity(status, CRON_PERIOD) // CRON_BUDGET_SHARE
+    return status, min(capacity, settings.GITHUB_CRAWL_MAX_BATCH_SIZE)
+
+
 @interval(
     minute={
         2,
@@ -141,49 +202,45 @@ async def cron_refresh_issues(ctx: JobContext) -> None:
     async with AsyncSessionMaker(ctx) as session:
         orgs = await organization_service.list_installed(session)
         for org in orgs:
-            issues = await github_issue.list_issues_to_crawl_issue(session, org)
-            if len(issues) == 0:
-                log.info(
-                    "github.issue.sync.cron_refresh_issues",
-                    org_name=org.name,
-                    found_count=len(issues),
-                )
+            batch = await get_crawl_batch_size(org)
+            if batch is None:
                 continue
 
-            client = get_app_installation_client(org.safe_installation_id)
-            try:
-                rate_limit = await github_api.get_rate_limit(client)
-            except Exception as e:
-                log.info(
-                    "failed to get rate limit, treating it as no remaining",
-                    org_name=org.name,
-                    err=e,
-                )
-                continue
-
-            if rate_limit.remaining < 1000:
+            status, batch_size = batch
+            if batch_size == 0:
                 log.info(
                     "github.issue.sync.cron_refresh_issues.rate_limit_almost_exhausted",
                     org_name=org.name,
-                    rate_limit_remaining=rate_limit.remaining,
+                    rate_limit_remaining=status.remaining,
                 )
                 continue
 
+            issues = await github_issue.list_issues_to_crawl_issue(
+                session, org, limit=batch_size
+            )
+            schedule = rate_limit_budget.get_schedule(status, len(issues))
             log.info(
                 "github.issue.sync.cron_refresh_issues",
                 org_name=org.name,
                 found_count=len(issues),
-                rate_limit_remaining=rate_limit.remaining,
+                rate_limit_remaining=status.remaining,
             )
+            if not issues or schedule is None:
+                continue
 
-            for issue in issues:
+            for issue, defer_by in zip(issues, schedule):
                 enqueue_job(
                     "github.issue.sync",
                     issue.id,
+                    crawl_with_installation_id=org.safe_installation_id,
+                    url=get_issue_url(org.name, issue.repository.name, issue.number),
                     _job_id=f"github.issue.sync:{issue.id}",
-                    _defer_by=random.randint(0, 60 * 5),
+                    _defer_by=defer_by,
                     queue_name=QueueName.github_crawl,
                 )
+            await github_issue.mark_crawl_scheduled(
+                session, issues, "github_issue_fetched_at"
+            )
 
 
 @interval(
@@ -202,47 +259,44 @@ async def cron_refresh_issue_timelines(ctx: JobContext) -> None:
     async with AsyncSessionMaker(ctx) as session:
         orgs = await organization_service.list_installed(session)
         for org in orgs:
-            issues = await github_issue.list_issues_to_crawl_timeline(session, org)
-            if len(issues) == 0:
-                log.info(
-                    "github.issue.sync.cron_refresh_issue_timelines",
-                    org_name=org.name,
-                    found_count=len(issues),
-                )
+            batch = await get_crawl_batch_size(org)
+            if batch is None:
                 continue
 
-            client = get_app_installation_client(org.safe_installation_id)
-
-            try:
-                rate_limit = await github_api.get_rate_limit(client)
-            except Exception as e:
-                log.info(
-                    "failed to get rate limit, treating it as no remaining",
-                    org_name=org.name,
-                    err=e,
-                )
-                continue
-
-            if rate_limit.remaining < 1000:
+            status, batch_size = batch
+            if batch_size == 0:
                 log.info(
                     "github.issue.sync.cron_refresh_issue_timelines.rate_limit_almost_exhausted",
                     org_name=org.name,
-                    rate_limit_remaining=rate_limit.remaining,
+                    rate_limit_remaining=status.remaining,
                 )
                 continue
 
+            issues = await github_issue.list_issues_to_crawl_timeline(
+                session, org, limit=batch_size
+            )
+            schedule = rate_limit_budget.get_schedule(status, len(issues))
             log.info(
                 "github.issue.sync.cron_refresh_issue_timelines",
                 org_name=org.name,
                 found_count=len(issues),
-                rate_limit_remaining=rate_limit.remaining,
+                rate_limit_remaining=status.remaining,
             )
+            if not issues or schedule is None:
+                continue
 
-            for issue in issues:
+            for issue, defer_by in zip(issues, schedule):
                 enqueue_job(
                     "github.issue.sync.issue_references",
                     issue.id,
+                    crawl_with_installation_id=org.safe_installation_id,
+                    url=get_issue_timeline_url(
+                        org.name, issue.repository.name, issue.number
+                    ),
                     _job_id=f"github.issue.sync.issue_references:{issue.id}",
-                    _defer_by=random.randint(0, 60 * 5),
+                    _defer_by=defer_by,
                     queue_name=QueueName.github_crawl,
                 )
+            await github_issue.mark_crawl_scheduled(
+                session, issues, "github_timeline_fetched_at"
+            )
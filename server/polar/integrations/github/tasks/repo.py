@@ -12,7 +12,11 @@ from polar.worker import (
     task,
 )
 
-from .utils import get_organization_and_repo, github_rate_limit_retry
+from .utils import (
+    get_organization_and_repo,
+    github_crawl_paced,
+    github_rate_limit_retry,
+)
 
 log = structlog.get_logger()
 
@@ -39,6 +43,7 @@ async def sync_repositories(
 
 @task("github.repo.sync.issues")
 @github_rate_limit_retry
+@github_crawl_paced
 async def sync_repository_issues(
     ctx: JobContext,
     organization_id: UUID,
@@ -62,6 +67,7 @@ async def sync_repository_issues(
 
 @task("github.repo.sync.pull_requests")
 @github_rate_limit_retry
+@github_crawl_paced
 async def sync_repository_pull_requests(
     ctx: JobContext,
     organization_id: UUID,
@@ -91,6 +97,7 @@ async def sync_repository_pull_requests(
 
 @task("github.repo.sync.issue_references")
 @github_rate_limit_retry
+@github_crawl_paced
 async def repo_sync_issue_references(
     ctx: JobContext,
     organization_id: UUID,
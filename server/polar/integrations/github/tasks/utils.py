@@ -8,6 +8,7 @@ from arq import Retry
 from githubkit.exception import RateLimitExceeded
 
 from polar.integrations.github import service
+from polar.integrations.github.budget import CrawlBudgetExceeded, paced
 from polar.models import Organization, Repository
 from polar.postgres import AsyncSession
 
@@ -45,5 +46,22 @@ def github_rate_limit_retry(
             return await func(*args, **kwargs)
         except RateLimitExceeded as e:
             raise Retry(e.retry_after)
+        except CrawlBudgetExceeded as e:
+            raise Retry(e.retry_after)
+
+    return wrapper
+
+
+def github_crawl_paced(
+    func: Callable[Params, Awaitable[ReturnValue]],
+) -> Callable[Params, Awaitable[ReturnValue]]:
+    """
+    Make the GitHub requests of a crawl task spend the installation's budget.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Params.args, **kwargs: Params.kwargs) -> ReturnValue:
+        with paced():
+            return await func(*args, **kwargs)
 
     return wrapper
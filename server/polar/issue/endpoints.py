@@ -16,6 +16,7 @@ from polar.issue.body import IssueBodyRenderer, get_issue_body_renderer
 from polar.kit.db.postgres import AsyncSessionMaker
 from polar.kit.pagination import ListResource, Pagination
 from polar.locker import Locker, get_locker
+from polar.models.issue import Issue
 from polar.organization.service import organization as organization_service
 from polar.pledge.service import pledge as pledge_service
 from polar.postgres import (
@@ -118,14 +119,11 @@ async def search(
         load_repository=True,
         have_pledge=have_pledge,
         have_polar_badge=have_badge,
+        readable_clause=await authz.readable_clause(auth_subject.subject, Issue),
     )
 
     return ListResource(
-        items=[
-            IssueSchema.from_db(i)
-            for i in issues
-            if await authz.can(auth_subject.subject, AccessType.read, i)
-        ],
+        items=[IssueSchema.from_db(i) for i in issues],
         pagination=Pagination(total_count=count, max_page=1),
     )
 
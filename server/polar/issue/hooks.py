@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 from polar.kit.hook import Hook
@@ -17,9 +18,9 @@ issue_reference_updated: Hook[IssueReferenceHook] = Hook()
 
 
 @dataclass
-class IssueHook:
+class IssuesHook:
     session: AsyncSession
-    issue: Issue
+    issues: Sequence[Issue]
 
 
-issue_upserted: Hook[IssueHook] = Hook()
+issues_upserted: Hook[IssuesHook] = Hook()
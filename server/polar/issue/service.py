@@ -11,11 +11,13 @@ from sqlalchemy import (
     and_,
     asc,
     desc,
+    exists,
     func,
     nullslast,
     or_,
 )
-from sqlalchemy.orm import aliased, contains_eager, joinedload
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 
 from polar.dashboard.schemas import IssueSortBy
 from polar.enums import Platforms
@@ -27,16 +29,17 @@ from polar.models.issue_dependency import IssueDependency
 from polar.models.issue_reference import IssueReference
 from polar.models.issue_reward import IssueReward
 from polar.models.notification import Notification
-from polar.models.organization import Organization
 from polar.models.pledge import Pledge, PledgeState
 from polar.models.repository import Repository
-from polar.models.user import User
 from polar.postgres import AsyncSession, sql
 
 from .schemas import IssueCreate, IssueUpdate
 
 log = structlog.get_logger()
 
+# Issues loaded per statement, well below the bound parameters limit
+HYDRATE_BATCH_SIZE = 1000
+
 
 class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
     async def create(self, session: AsyncSession, create_schema: IssueCreate) -> Issue:
@@ -151,6 +154,7 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
             sql.select(Issue)
             .where(Issue.repository_id == repository_id)
             .where(Issue.number.in_(numbers))
+            .where(Issue.deleted_at.is_(None))
         )
         res = await session.execute(statement)
         issues = res.scalars().unique().all()
@@ -176,58 +180,45 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
         github_milestone_number: int | None = None,
         show_closed: bool = False,
         show_closed_if_needs_action: bool = False,
+        readable_clause: ColumnElement[bool]
+        | None = None,  # Permission predicate, see Authz.readable_clause
     ) -> tuple[Sequence[Issue], int]:  # (issues, total_issue_count)
-        pledge_by_organization = aliased(Organization)
-        issue_repository = aliased(Repository)
-        issue_organization = aliased(Organization, name="pledge_organization")
+        """
+        List issues in two phases.
 
-        statement = (
-            sql.select(
-                Issue,
-                sql.func.count().over().label("total_count"),
-            )
-            .join(
-                Pledge,
-                and_(
-                    Pledge.issue_id == Issue.id,
-                    Pledge.state.in_(PledgeState.active_states()),
-                ),
-                isouter=True,
-            )
-            .join(
-                pledge_by_organization,
-                Pledge.by_organization.of_type(pledge_by_organization),
-                isouter=True,
-            )
-            .join(
-                Pledge.user,
-                isouter=True,
-            )
-        )
+        A narrow query selects the page of issue IDs, without joining anything,
+        so LIMIT/OFFSET and the sorting can use the issues indexes. The issues
+        of this page are then loaded with the requested relationships.
+        """
+        # Active pledges of the issue, restricted to the given pledgers if any
+        pledger_criterias: list[ColumnElement[bool]] = []
+        if pledged_by_org:
+            pledger_criterias.append(Pledge.by_organization_id == pledged_by_org)
+        if pledged_by_user:
+            pledger_criterias.append(Pledge.by_user_id == pledged_by_user)
+
+        pledge_criterias: list[ColumnElement[bool]] = [
+            Pledge.state.in_(PledgeState.active_states())
+        ]
+        if pledger_criterias:
+            pledge_criterias.append(or_(*pledger_criterias))
+
+        issue_pledges = and_(Pledge.issue_id == Issue.id, *pledge_criterias)
+
+        statement = sql.select(Issue.id)
 
         # issues in repo
         if repository_ids:
             statement = statement.where(Issue.repository_id.in_(repository_ids))
 
-        # issues with pledges by
-        pledge_criterias: list[ColumnElement[bool]] = []
-        if pledged_by_org:
-            pledge_criterias.append(Pledge.by_organization_id == pledged_by_org)
-
-        if pledged_by_user:
-            pledge_criterias.append(Pledge.by_user_id == pledged_by_user)
+        if readable_clause is not None:
+            statement = statement.where(readable_clause)
 
-        if len(pledge_criterias) > 0:
-            statement = statement.where(
-                or_(*pledge_criterias),
-            )
-
-        # pledge filter
-        if have_pledge is not None:
-            if have_pledge:
-                statement = statement.where(Pledge.id.is_not(None))
-            else:
-                statement = statement.where(Pledge.id.is_(None))
+        # issues with pledges by
+        if pledger_criterias or have_pledge:
+            statement = statement.where(exists().where(issue_pledges))
+        elif have_pledge is False:
+            statement = statement.where(~exists().where(issue_pledges))
 
         if have_polar_badge is not None:
             statement = statement.where(
@@ -270,6 +261,10 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
                     desc(func.ts_rank_cd(Issue.title_tsv, func.to_tsquery(search)))
                 )
 
+        count_statement = statement.with_only_columns(func.count(Issue.id)).order_by(
+            None
+        )
+
         if sort_by == IssueSortBy.issues_default:
             statement = statement.order_by(
                 desc(Issue.pledged_amount_sum),
@@ -289,7 +284,13 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
             )
         elif sort_by == IssueSortBy.dependencies_default:
             statement = statement.order_by(
-                nullslast(desc(sql.func.sum(Pledge.amount))),
+                nullslast(
+                    desc(
+                        sql.select(func.sum(Pledge.amount))
+                        .where(issue_pledges)
+                        .scalar_subquery()
+                    )
+                ),
                 desc(Issue.issue_modified_at),
             )
         elif sort_by == IssueSortBy.recently_updated:
@@ -313,78 +314,88 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
                 desc(Issue.issue_modified_at),
             )
         elif sort_by == IssueSortBy.most_recently_funded:
-            statement = statement.order_by(nullslast(desc(Pledge.created_at)))
+            statement = statement.order_by(
+                nullslast(
+                    desc(
+                        sql.select(func.max(Pledge.created_at))
+                        .where(issue_pledges)
+                        .scalar_subquery()
+                    )
+                )
+            )
         else:
             raise Exception("unknown sort_by")
 
-        if load_references:
-            statement = statement.options(
-                joinedload(Issue.references).joinedload(IssueReference.pull_request)
-            )
+        # Stable pages when the sorting columns are equal
+        statement = statement.order_by(Issue.id)
 
-        if load_pledges:
-            statement = statement.options(
-                contains_eager(Issue.pledges),
-                contains_eager(Issue.pledges).contains_eager(Pledge.user),
-                contains_eager(Issue.pledges).contains_eager(
-                    Pledge.by_organization.of_type(pledge_by_organization)
-                ),
-                contains_eager(Issue.pledges)
-                .joinedload(Pledge.issue)
-                .joinedload(Issue.repository)
-                .joinedload(Repository.organization),
-                contains_eager(Issue.pledges).joinedload(
-                    Pledge.on_behalf_of_organization
-                ),
-                contains_eager(Issue.pledges).joinedload(Pledge.created_by_user),
-            )
-            statement = statement.group_by(
-                Issue.id,
-                Pledge.id,
-                User.id,
-                pledge_by_organization.id,
-            )
+        if limit:
+            statement = statement.limit(limit).offset(offset)
 
-        if load_repository:
-            statement = statement.join(
-                issue_repository,
-                Issue.repository.of_type(issue_repository),
-                isouter=False,
-            )
+        res = await session.execute(statement)
+        issue_ids = res.scalars().all()
 
-            statement = statement.join(
-                issue_organization, issue_repository.organization, isouter=False
-            )
+        # The count is only needed if there might be more issues than this page
+        if not limit:
+            total_count = len(issue_ids)
+        elif len(issue_ids) < limit and (issue_ids or offset == 0):
+            total_count = offset + len(issue_ids)
+        else:
+            total_count = (await session.execute(count_statement)).scalar_one()
 
-            statement = statement.options(
-                contains_eager(
-                    Issue.repository.of_type(issue_repository)
-                ).contains_eager(
-                    issue_repository.organization.of_type(issue_organization)
+        issues = await self._hydrate(
+            session,
+            issue_ids,
+            pledge_criterias=pledge_criterias,
+            load_references=load_references,
+            load_pledges=load_pledges,
+            load_repository=load_repository,
+        )
+        return (issues, total_count)
+
+    async def _hydrate(
+        self,
+        session: AsyncSession,
+        issue_ids: Sequence[UUID],
+        *,
+        pledge_criterias: list[ColumnElement[bool]],
+        load_references: bool,
+        load_pledges: bool,
+        load_repository: bool,
+    ) -> list[Issue]:
+        options: list[ORMOption] = []
+        if load_references:
+            options.append(
+                selectinload(Issue.references).joinedload(IssueReference.pull_request)
+            )
+        if load_pledges:
+            options.append(
+                selectinload(Issue.pledges.and_(*pledge_criterias)).options(
+                    joinedload(Pledge.user),
+                    joinedload(Pledge.by_organization),
+                    joinedload(Pledge.on_behalf_of_organization),
+                    joinedload(Pledge.created_by_user),
+                    selectinload(Pledge.issue)
+                    .joinedload(Issue.repository)
+                    .joinedload(Repository.organization),
                 )
             )
-
-            statement = statement.group_by(
-                Issue.id,
-                issue_repository.id,
-                issue_organization.id,
+        if load_repository or load_pledges:
+            options.append(
+                joinedload(Issue.repository).joinedload(Repository.organization)
             )
 
-        else:
-            statement = statement.group_by(
-                Issue.id,
+        issues: dict[UUID, Issue] = {}
+        for i in range(0, len(issue_ids), HYDRATE_BATCH_SIZE):
+            statement = (
+                sql.select(Issue)
+                .where(Issue.id.in_(issue_ids[i : i + HYDRATE_BATCH_SIZE]))
+                .options(*options)
             )
+            res = await session.execute(statement)
+            issues.update((issue.id, issue) for issue in res.scalars().unique().all())
 
-        if limit:
-            statement = statement.limit(limit).offset(offset)
-
-        res = await session.execute(statement)
-        rows = res.unique().all()
-
-        total_count = rows[0][1] if len(rows) > 0 else 0
-        issues = [r[0] for r in rows]
-
-        return (issues, total_count)
+        return [issues[issue_id] for issue_id in issue_ids]
 
     async def list_issue_references(
         self,
@@ -512,27 +523,24 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
         return True
 
     async def mark_not_needs_confirmation(
-        self, session: AsyncSession, issue_id: UUID
-    ) -> bool:
-        issue = await self.get(session, issue_id)
-        if not issue:
-            return False
-
-        # Already marked as solved, do not go back to needs confirmation
-        if issue.confirmed_solved_at:
-            return False
-
+        self, session: AsyncSession, issue_ids: Sequence[UUID]
+    ) -> None:
         stmt = (
             sql.update(Issue)
-            .where(Issue.id == issue_id)
+            .where(
+                Issue.id.in_(issue_ids),
+                Issue.deleted_at.is_(None),
+                # Already marked as solved, do not go back to needs confirmation
+                Issue.confirmed_solved_at.is_(None),
+                # Don't rewrite rows which aren't marked
+                Issue.needs_confirmation_solved.is_(True),
+            )
             .values(needs_confirmation_solved=False)
         )
 
         await session.execute(stmt)
         await session.commit()
 
-        return True
-
     async def transfer(
         self, session: AsyncSession, old_issue: Issue, new_issue: Issue
     ) -> Issue:
@@ -1,6 +1,8 @@
-from typing import TypeAlias
+from collections.abc import Callable, Coroutine, Hashable
+from typing import Any, Generic, TypeAlias, TypeVar
 
-from sqlalchemy import Engine
+import structlog
+from sqlalchemy import Engine, event
 from sqlalchemy import create_engine as _create_engine
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -11,9 +13,12 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine as _create_async_engine,
 )
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.util import await_only
 
 from ..extensions.sqlalchemy import sql
 
+log = structlog.get_logger()
+
 
 def create_async_engine(
     *,
@@ -65,7 +70,61 @@ def create_sync_sessionmaker(engine: Engine) -> sessionmaker[Session]:
     return sessionmaker(engine, expire_on_commit=False)
 
 
+H = TypeVar("H", bound=Hashable)
+
+
+class AfterCommit(Generic[H]):
+    """
+    Collect values on a session, and pass them to an async callback once its
+    transaction is committed. They're dropped if it's rolled back.
+
+    Meant for side effects which must not happen before the data is visible
+    to other sessions, like cache invalidation. The callback is awaited
+    before `session.commit()` returns; its errors are logged, not raised, since
+    the transaction is committed already.
+    """
+
+    def __init__(
+        self, key: str, callback: Callable[[set[H]], Coroutine[Any, Any, None]]
+    ) -> None:
+        self.key = key
+        self.callback = callback
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def add(self, session: Session | AsyncSession, *values: H) -> None:
+        if isinstance(session, AsyncSession):
+            session = session.sync_session
+        session.info.setdefault(self.key, set()).update(values)
+
+    async def schedule(self, session: AsyncSession, *values: H) -> None:
+        """
+        Like `add`, but run the callback right away if the session has no
+        transaction in progress, e.g. because it was just committed.
+        """
+        if session.in_transaction():
+            self.add(session, *values)
+        else:
+            await self._run(set(values))
+
+    def _after_commit(self, session: Session) -> None:
+        values: set[H] | None = session.info.pop(self.key, None)
+        if values:
+            # Commits of an AsyncSession run in a greenlet, which can await
+            await_only(self._run(values))
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(self.key, None)
+
+    async def _run(self, values: set[H]) -> None:
+        try:
+            await self.callback(values)
+        except Exception:
+            log.exception("after_commit.failed", key=self.key)
+
+
 __all__ = [
+    "AfterCommit",
     "AsyncSession",
     "AsyncEngine",
     "Session",
@@ -1,6 +1,7 @@
 from polar.kit.db.models import Model, TimestampedModel
 
 from .account import Account
+from .account_balance_snapshot import AccountBalanceSnapshot
 from .advertisement_campaign import AdvertisementCampaign
 from .article import Article
 from .articles_subscription import ArticlesSubscription
@@ -11,6 +12,7 @@ from .held_balance import HeldBalance
 from .invites import Invite
 from .issue import Issue
 from .issue_dependency import IssueDependency
+from .issue_pledge_summary import IssuePledgeSummary
 from .issue_reference import IssueReference
 from .issue_reward import IssueReward
 from .magic_link import MagicLink
@@ -31,6 +33,7 @@ from .repository import Repository
 from .sale import Sale
 from .subscription import Subscription
 from .traffic import Traffic
+from .traffic_rollup import TrafficRollup
 from .transaction import Transaction
 from .user import OAuthAccount, User
 from .user_notification import UserNotification
@@ -42,6 +45,7 @@ from .webhook_notifications import WebhookNotification
 
 __all__ = [
     "Account",
+    "AccountBalanceSnapshot",
     "AdvertisementCampaign",
     "Article",
     "ArticlesSubscription",
@@ -52,6 +56,7 @@ __all__ = [
     "Invite",
     "Issue",
     "IssueDependency",
+    "IssuePledgeSummary",
     "IssueReference",
     "IssueReward",
     "MagicLink",
@@ -75,6 +80,7 @@ __all__ = [
     "ProductPrice",
     "TimestampedModel",
     "Traffic",
+    "TrafficRollup",
     "Transaction",
     "User",
     "UserNotification",
@@ -0,0 +1,40 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from polar.kit.db.models.base import Model
+from polar.kit.extensions.sqlalchemy import PostgresUUID
+from polar.kit.utils import utc_now
+from polar.models.transaction import TransactionType
+
+
+class AccountBalanceSnapshot(Model):
+    """
+    Running sums of the transactions of an account, per transaction type.
+
+    Updated in the same database transaction as the `Transaction` they sum,
+    so reading an account's balance doesn't need to scan its whole history.
+    """
+
+    __tablename__ = "account_balance_snapshots"
+
+    account_id: Mapped[UUID] = mapped_column(
+        PostgresUUID,
+        ForeignKey("accounts.id", ondelete="cascade"),
+        primary_key=True,
+    )
+    type: Mapped[TransactionType] = mapped_column(String, primary_key=True)
+
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the transactions amount, in cents."""
+
+    account_amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the transactions amount in the account's currency, in cents."""
+
+    transactions_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    modified_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, default=utc_now, onupdate=utc_now
+    )
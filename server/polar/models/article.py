@@ -91,6 +91,13 @@ class Article(RecordModel):
     email_sent_to_count: Mapped[int | None] = mapped_column(
         Integer, nullable=True, default=None
     )
+    # Last receiver whose email was enqueued, to resume an interrupted fan-out
+    email_fanout_cursor: Mapped[UUID | None] = mapped_column(
+        PostgresUUID, nullable=True, default=None
+    )
+    email_fanout_completed_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True, default=None
+    )
     email_open_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     web_view_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
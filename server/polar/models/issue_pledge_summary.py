@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from polar.kit.db.models.base import Model
+from polar.kit.extensions.sqlalchemy import PostgresUUID
+from polar.kit.utils import utc_now
+from polar.models.pledge import PledgeType
+
+
+class IssuePledgeSummary(Model):
+    """
+    Active pledges of an issue, aggregated per pledge type.
+
+    Refreshed on each pledge state transition, so funding summaries are read
+    from a handful of rows instead of loading every pledge of the issue.
+    """
+
+    __tablename__ = "issue_pledge_summaries"
+
+    issue_id: Mapped[UUID] = mapped_column(
+        PostgresUUID,
+        ForeignKey("issues.id", ondelete="cascade"),
+        primary_key=True,
+    )
+    type: Mapped[PledgeType] = mapped_column(String, primary_key=True)
+
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the pledges amount, in cents."""
+
+    pledges_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    last_pledged_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True, default=None
+    )
+
+    pledgers: Mapped[list[dict[str, Any] | None]] = mapped_column(
+        JSONB, nullable=False, default=list
+    )
+    """
+    Pledgers of the largest pledges, largest first, one entry per pledge.
+
+    `None` for pledges without pledger. At most `TOP_PLEDGERS` entries.
+    """
+
+    modified_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, default=utc_now, onupdate=utc_now
+    )
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import TIMESTAMP, ForeignKey, String
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKey, String
 from sqlalchemy.orm import (
     Mapped,
     declared_attr,
@@ -32,6 +32,10 @@ class PersonalAccessToken(RecordModel):
         TIMESTAMP(timezone=True), nullable=True, default=None
     )
 
+    requests_count: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+
     @declared_attr
     def user(cls) -> Mapped[User]:
         return relationship(User)
@@ -0,0 +1,69 @@
+import datetime
+from enum import StrEnum
+from uuid import UUID
+
+from sqlalchemy import DATE, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from polar.kit.db.models.base import Model
+from polar.kit.extensions.sqlalchemy import PostgresUUID
+from polar.kit.utils import generate_uuid
+
+
+class TrafficRollupInterval(StrEnum):
+    week = "week"
+    month = "month"
+
+
+class TrafficRollup(Model):
+    """
+    Views of `Traffic` summed per week or month, without the `location_href`.
+
+    Only contains completed periods; they're computed by a cron job.
+    """
+
+    __tablename__ = "traffic_rollups"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "interval",
+            "period_start",
+            "organization_id",
+            "article_id",
+            "referrer",
+            name="traffic_rollups_unique_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "idx_traffic_rollups_article_id_period",
+            "article_id",
+            "interval",
+            "period_start",
+        ),
+        Index(
+            "idx_traffic_rollups_organization_id_period",
+            "organization_id",
+            "interval",
+            "period_start",
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column(
+        PostgresUUID, primary_key=True, default=generate_uuid
+    )
+
+    interval: Mapped[TrafficRollupInterval] = mapped_column(String, nullable=False)
+
+    period_start: Mapped[datetime.date] = mapped_column(DATE, nullable=False)
+
+    article_id: Mapped[UUID | None] = mapped_column(
+        PostgresUUID, ForeignKey("articles.id"), nullable=True
+    )
+
+    organization_id: Mapped[UUID | None] = mapped_column(
+        PostgresUUID, ForeignKey("organizations.id"), nullable=True
+    )
+
+    referrer: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    views: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -46,8 +46,7 @@ class NotificationPayloadBase(BaseModel):
     def render(self) -> tuple[str, str]:
         m: dict[str, str] = vars(self)
 
-        email_renderer = get_email_renderer()
-        return email_renderer.render_from_string(self.subject(), self.body(), m)
+        return get_email_renderer().render_from_string(self.subject(), self.body(), m)
 
 
 class NotificationBase(Schema):
@@ -2,15 +2,14 @@ from uuid import UUID
 
 import structlog
 
-from polar.email.sender import get_email_sender
+from polar.email.batcher import email_batcher
+from polar.email.sender import Email
 from polar.notifications.service import notifications
 from polar.user.service import user as user_service
 from polar.worker import AsyncSessionMaker, JobContext, PolarWorkerContext, task
 
 log = structlog.get_logger()
 
-sender = get_email_sender()
-
 
 @task("notifications.send")
 async def notifications_send(
@@ -48,11 +47,13 @@ async def notifications_send(
                 )
                 return
 
-            sender.send_to_user(
-                to_email_addr=user.email,
-                subject=f"[Polar] {subject}",
-                html_content=body,
-                from_email_addr="notifications@notifications.polar.sh",
-                reply_to_email_addr="support@polar.sh",
-                reply_to_name="Polar Support",
+            await email_batcher.send(
+                Email(
+                    to_email_addr=user.email,
+                    subject=f"[Polar] {subject}",
+                    html_content=body,
+                    from_email_addr="notifications@notifications.polar.sh",
+                    reply_to_email_addr="support@polar.sh",
+                    reply_to_name="Polar Support",
+                )
             )
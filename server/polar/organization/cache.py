@@ -0,0 +1,239 @@
+import hashlib
+import secrets
+from dataclasses import dataclass
+from typing import TypeVar
+from urllib.parse import urlencode
+from uuid import UUID
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+from pydantic import BaseModel
+
+from polar.auth.models import AuthSubject, Subject, is_anonymous
+from polar.config import settings
+from polar.enums import Platforms
+from polar.kit.db.postgres import AfterCommit, AsyncSession
+from polar.redis import Redis, redis
+
+_KEY_PREFIX = "polar:organization_response"
+
+M = TypeVar("M", bound=BaseModel)
+
+organization_response_cache_requests_total = Counter(
+    "organization_response_cache_requests_total",
+    "Anonymous reads of public organization pages, by endpoint and outcome",
+    ["endpoint", "outcome"],
+)
+
+
+def name_alias(platform: Platforms, name: str) -> str:
+    return f"name:{platform.value}:{name}"
+
+
+def benefit_alias(benefit_id: UUID) -> str:
+    return f"benefit:{benefit_id}"
+
+
+def _etag(body: str) -> str:
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in {c.removeprefix("W/") for c in candidates}
+
+
+def _response(request: Request, body: str, etag: str) -> Response:
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+@dataclass
+class CacheLookup:
+    request: Request
+    enabled: bool
+    """Whether the request is anonymous and scoped to an organization."""
+    alias: str | None = None
+    organization_id: UUID | None = None
+    """The organization, if known before running the endpoint."""
+    version: str | None = None
+    response: Response | None = None
+    """The cached response, if any."""
+
+
+class OrganizationResponseCache:
+    """
+    Read-through cache of the public pages of an organization, for anonymous
+    requests.
+
+    Responses are keyed by organization, version, path and query parameters.
+    Invalidating an organization replaces its version with a random one, so all
+    its responses are dropped at once, including the ones being computed
+    concurrently: those are stored under the version read before running the
+    endpoint.
+
+    Writers invalidate with `invalidate_after_commit`: a request starting
+    before the commit would read the new version, but compute from the old
+    rows.
+
+    Endpoints addressing the organization by something else than its ID, like
+    its name, pass an alias, which is resolved to the organization ID the
+    first time the endpoint runs.
+    """
+
+    def __init__(self, redis: Redis, *, ttl: int, alias_ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.alias_ttl = alias_ttl
+
+    async def lookup(
+        self,
+        request: Request,
+        auth_subject: AuthSubject[Subject] | None,
+        *,
+        organization_id: UUID | None = None,
+        alias: str | None = None,
+    ) -> CacheLookup:
+        """
+        Look up the cached response of a request.
+
+        `auth_subject` is `None` for endpoints whose response doesn't depend
+        on the subject at all. Otherwise, only anonymous requests are cached.
+        """
+        if auth_subject is not None and not is_anonymous(auth_subject):
+            return CacheLookup(request, enabled=False)
+        if organization_id is None and alias is None:
+            return CacheLookup(request, enabled=False)
+
+        lookup = CacheLookup(
+            request, enabled=True, alias=alias, organization_id=organization_id
+        )
+        if lookup.organization_id is None and alias is not None:
+            cached_organization_id = await self.redis.get(self._alias_key(alias))
+            if cached_organization_id is not None:
+                lookup.organization_id = UUID(cached_organization_id)
+
+        cached: dict[str, str] = {}
+        if lookup.organization_id is not None:
+            lookup.version = (
+                await self.redis.get(self._version_key(lookup.organization_id)) or "0"
+            )
+            cached = await self.redis.hgetall(self._key(lookup))
+
+        if cached:
+            outcome = "hit"
+            lookup.response = _response(request, cached["body"], cached["etag"])
+            if lookup.response.status_code == 304:
+                outcome = "not_modified"
+        else:
+            outcome = "miss"
+        organization_response_cache_requests_total.labels(
+            endpoint=self._endpoint(request), outcome=outcome
+        ).inc()
+
+        return lookup
+
+    async def store(
+        self, lookup: CacheLookup, organization_id: UUID, content: M
+    ) -> M | Response:
+        """
+        Cache the content computed by the endpoint on a miss.
+
+        Returns the response to send: the content itself if the request
+        isn't cacheable.
+        """
+        if not lookup.enabled:
+            return content
+
+        body = content.model_dump_json(by_alias=True)
+        etag = _etag(body)
+
+        if lookup.alias is not None and lookup.organization_id != organization_id:
+            # The version can't be trusted: it was read for another organization,
+            # or not at all. The next request will be cached.
+            await self.redis.set(
+                self._alias_key(lookup.alias), str(organization_id), ex=self.alias_ttl
+            )
+        else:
+            key = self._key(lookup)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"body": body, "etag": etag})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+
+        return _response(lookup.request, body, etag)
+
+    async def invalidate(self, *organization_ids: UUID) -> None:
+        """Drop the cached responses of the organizations."""
+        if not organization_ids:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for organization_id in set(organization_ids):
+                # Outlive the responses stored under the previous version:
+                # once expired, the version is back to "0"
+                pipe.set(
+                    self._version_key(organization_id),
+                    secrets.token_hex(8),
+                    ex=self.ttl * 2,
+                )
+            await pipe.execute()
+
+    async def invalidate_after_commit(
+        self, session: AsyncSession, *organization_ids: UUID
+    ) -> None:
+        """
+        Drop the cached responses of the organizations once the session is
+        committed, or right away if it has no transaction in progress.
+        """
+        await _invalidate_after_commit.schedule(session, *organization_ids)
+
+    async def forget_alias(self, *aliases: str) -> None:
+        await self.redis.delete(*(self._alias_key(alias) for alias in aliases))
+
+    async def forget_alias_after_commit(
+        self, session: AsyncSession, alias: str
+    ) -> None:
+        await _forget_alias_after_commit.schedule(session, alias)
+
+    def _endpoint(self, request: Request) -> str:
+        route = request.scope.get("route")
+        return getattr(route, "path", request.url.path)
+
+    def _key(self, lookup: CacheLookup) -> str:
+        request = lookup.request
+        query = urlencode(sorted(request.query_params.multi_items()))
+        digest = hashlib.sha256(f"{request.url.path}?{query}".encode()).hexdigest()
+        return f"{_KEY_PREFIX}:{lookup.organization_id}:{lookup.version}:{digest}"
+
+    def _version_key(self, organization_id: UUID) -> str:
+        return f"{_KEY_PREFIX}:version:{organization_id}"
+
+    def _alias_key(self, alias: str) -> str:
+        return f"{_KEY_PREFIX}:alias:{alias}"
+
+
+organization_response_cache = OrganizationResponseCache(
+    redis,
+    ttl=settings.ORGANIZATION_RESPONSE_CACHE_TTL_SECONDS,
+    alias_ttl=settings.ORGANIZATION_RESPONSE_CACHE_ALIAS_TTL_SECONDS,
+)
+
+
+async def _invalidate_committed(organization_ids: set[UUID]) -> None:
+    await organization_response_cache.invalidate(*organization_ids)
+
+
+async def _forget_committed_aliases(aliases: set[str]) -> None:
+    await organization_response_cache.forget_alias(*aliases)
+
+
+_invalidate_after_commit = AfterCommit(
+    "organization_response_cache_invalidate", _invalidate_committed
+)
+_forget_alias_after_commit = AfterCommit(
+    "organization_response_cache_forget_alias", _forget_committed_aliases
+)
@@ -1,7 +1,7 @@
 from uuid import UUID
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from polar.auth.dependencies import WebUser, WebUserOrAnonymous
 from polar.auth.models import Subject
@@ -22,6 +22,7 @@ from polar.user_organization.service import (
     user_organization as user_organization_service,
 )
 
+from .cache import name_alias, organization_response_cache
 from .schemas import (
     CreditBalance,
     OrganizationBadgeSettingsRead,
@@ -130,17 +131,28 @@ async def search(
     responses={404: {}},
 )
 async def lookup(
+    request: Request,
     auth_subject: WebUserOrAnonymous,
     platform: Platforms | None = None,
     organization_name: str | None = None,
     custom_domain: str | None = None,
     session: AsyncSession = Depends(get_db_session),
-) -> OrganizationSchema:
+) -> OrganizationSchema | Response:
     # Search by platform and organization name.
     if platform and organization_name:
+        cache_lookup = await organization_response_cache.lookup(
+            request, auth_subject, alias=name_alias(platform, organization_name)
+        )
+        if cache_lookup.response is not None:
+            return cache_lookup.response
+
         org = await organization.get_by_name(session, platform, organization_name)
         if org:
-            return await to_schema(session, auth_subject.subject, org)
+            return await organization_response_cache.store(
+                cache_lookup,
+                org.id,
+                await to_schema(session, auth_subject.subject, org),
+            )
 
     # Search by custom domain
     if custom_domain:
@@ -20,6 +20,7 @@ from polar.user_organization.service import (
 from polar.webhook.service import webhook as webhook_service
 from polar.worker import enqueue_job
 
+from .cache import name_alias, organization_response_cache
 from .schemas import (
     OrganizationCreateFromGitHubInstallation,
     OrganizationCreateFromGitHubUser,
@@ -179,6 +180,7 @@ class OrganizationService(ResourceServiceReader[Organization]):
             await session.execute(stmt)
             await session.commit()
         finally:
+            await user_organization_service.invalidate_members_cache(organization.id)
             await loops_service.organization_installed(session, user=user)
 
     async def update_settings(
@@ -339,6 +341,12 @@ class OrganizationService(ResourceServiceReader[Organization]):
         session: AsyncSession,
         organization: Organization,
     ) -> None:
+        await organization_response_cache.invalidate_after_commit(
+            session, organization.id
+        )
+        await organization_response_cache.forget_alias_after_commit(
+            session, name_alias(organization.platform, organization.name)
+        )
         await webhook_service.send(
             session,
             target=organization,
@@ -12,6 +12,7 @@ class PersonalAccessToken(Schema):
     id: UUID
     created_at: datetime
     last_used_at: datetime | None = None
+    requests_count: int = 0
     expires_at: datetime
     comment: str
 
@@ -21,6 +22,7 @@ class PersonalAccessToken(Schema):
             id=p.id,
             created_at=p.created_at,
             last_used_at=p.last_used_at,
+            requests_count=p.requests_count,
             expires_at=p.expires_at,
             comment=p.comment,
         )
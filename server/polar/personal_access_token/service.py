@@ -1,14 +1,18 @@
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from datetime import timedelta
 from uuid import UUID
 
+from sqlalchemy import TIMESTAMP, Integer, column, func, values
 from sqlalchemy.orm import joinedload
 
-from polar.kit.extensions.sqlalchemy import sql
+from polar.auth.cache import auth_subject_cache
+from polar.kit.extensions.sqlalchemy import PostgresUUID, sql
 from polar.kit.utils import utc_now
 from polar.models.personal_access_token import PersonalAccessToken
 from polar.postgres import AsyncSession
 
+from .usage import PersonalAccessTokenUsage, usage_buffer
+
 
 class PersonalAccessTokenService:
     async def get(
@@ -58,15 +62,44 @@ class PersonalAccessTokenService:
 
         await session.execute(stmt)
         await session.commit()
+        await auth_subject_cache.invalidate(id)
 
-    async def record_usage(self, session: AsyncSession, id: UUID) -> None:
-        stmt = (
+    async def record_usage(self, id: UUID) -> None:
+        """
+        Count a request made with the token.
+
+        Only buffered: `last_used_at` is updated by the
+        `personal_access_token_flush_usage` cron.
+        """
+        await usage_buffer.record(id)
+
+    async def add_usage(
+        self, session: AsyncSession, usage: Mapping[UUID, PersonalAccessTokenUsage]
+    ) -> None:
+        """Apply the usage drained from the usage buffer, in a single UPDATE."""
+        if not usage:
+            return
+        usages = values(
+            column("id", PostgresUUID),
+            column("last_used_at", TIMESTAMP(timezone=True)),
+            column("requests", Integer),
+            name="usages",
+        ).data(sorted((id, u.last_used_at, u.requests) for id, u in usage.items()))
+        statement = (
             sql.update(PersonalAccessToken)
-            .where(PersonalAccessToken.id == id)
-            .values(last_used_at=utc_now())
+            .where(PersonalAccessToken.id == usages.c.id)
+            .values(
+                {
+                    # GREATEST ignores NULL values
+                    "last_used_at": func.greatest(
+                        PersonalAccessToken.last_used_at, usages.c.last_used_at
+                    ),
+                    "requests_count": PersonalAccessToken.requests_count
+                    + usages.c.requests,
+                }
+            )
         )
-        await session.execute(stmt)
-        await session.commit()
+        await session.execute(statement)
 
 
 personal_access_token_service = PersonalAccessTokenService()
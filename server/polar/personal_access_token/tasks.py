@@ -0,0 +1,22 @@
+import structlog
+
+from polar.logging import Logger
+from polar.worker import AsyncSessionMaker, JobContext, interval
+
+from .service import personal_access_token_service
+from .usage import usage_buffer
+
+log: Logger = structlog.get_logger()
+
+
+@interval(second=0)
+async def personal_access_token_flush_usage(ctx: JobContext) -> None:
+    """
+    Apply the personal access tokens usage buffered in Redis to the database.
+    """
+    async with AsyncSessionMaker(ctx) as session:
+        async with usage_buffer.drain() as usage:
+            await personal_access_token_service.add_usage(session, usage)
+            await session.commit()
+
+    log.info("personal_access_token.flush_usage", tokens=len(usage))
@@ -0,0 +1,64 @@
+import contextlib
+import datetime
+from collections.abc import AsyncIterator
+from typing import NamedTuple
+from uuid import UUID
+
+from polar.kit.utils import utc_now
+from polar.redis import Redis, drain_hash
+from polar.redis import redis as redis_client
+
+_KEY = "polar:personal_access_token:usage"
+_LAST_USED_AT_SUFFIX = ":last_used_at"
+
+
+class PersonalAccessTokenUsage(NamedTuple):
+    last_used_at: datetime.datetime
+    requests: int
+
+
+class UsageBuffer:
+    """
+    Buffer of personal access tokens usage.
+
+    Each request only touches a Redis hash: a worker cron periodically
+    drains it, so each token row is written at most once per flush, however
+    many parallel requests an integration makes.
+
+    For each token, the hash holds its requests count under the token ID,
+    and its last usage timestamp under `{token_id}:last_used_at`.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def record(self, id: UUID) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(_KEY, str(id), 1)
+            pipe.hset(_KEY, f"{id}{_LAST_USED_AT_SUFFIX}", utc_now().isoformat())
+            await pipe.execute()
+
+    @contextlib.asynccontextmanager
+    async def drain(self) -> AsyncIterator[dict[UUID, PersonalAccessTokenUsage]]:
+        """
+        Take the buffered usage, while new requests keep being counted
+        in a fresh hash. See `drain_hash`.
+        """
+        async with drain_hash(self.redis, _KEY) as fields:
+            yield self._parse(fields)
+
+    def _parse(self, fields: dict[str, str]) -> dict[UUID, PersonalAccessTokenUsage]:
+        usage: dict[UUID, PersonalAccessTokenUsage] = {}
+        for field, value in fields.items():
+            if field.endswith(_LAST_USED_AT_SUFFIX):
+                continue
+            last_used_at = fields.get(f"{field}{_LAST_USED_AT_SUFFIX}")
+            if last_used_at is None:
+                continue
+            usage[UUID(field)] = PersonalAccessTokenUsage(
+                datetime.datetime.fromisoformat(last_used_at), int(value)
+            )
+        return usage
+
+
+usage_buffer = UsageBuffer(redis_client)
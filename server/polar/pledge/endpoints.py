@@ -1,3 +1,4 @@
+from collections.abc import Mapping, Sequence
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -39,10 +40,8 @@ from .service import pledge as pledge_service
 router = APIRouter(tags=["pledges"])
 
 
-async def include_receiver_admin_fields(
-    session: AsyncSession,
-    subject: Subject,
-    pledge: Pledge,
+def include_receiver_admin_fields(
+    subject: Subject, pledge: Pledge, memberships: Mapping[UUID, bool]
 ) -> bool:
     if not isinstance(subject, User):
         return False
@@ -52,19 +51,14 @@ async def include_receiver_admin_fields(
 
     # is admin of receiver org
     if pledge.organization_id:
-        m = await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.organization_id
-        )
-        if m and m.is_admin:
+        if memberships.get(pledge.organization_id, False):
             return True
 
     return False
 
 
-async def include_sender_admin_fields(
-    session: AsyncSession,
-    subject: Subject,
-    pledge: Pledge,
+def include_sender_admin_fields(
+    subject: Subject, pledge: Pledge, memberships: Mapping[UUID, bool]
 ) -> bool:
     if not isinstance(subject, User):
         return False
@@ -76,28 +70,20 @@ async def include_sender_admin_fields(
     if pledge.by_user_id == subject.id:
         return True
 
-    # is member if sending org
+    # is admin of sending org
     if pledge.by_organization_id:
-        m = await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.by_organization_id
-        )
-        if m and m.is_admin:
+        if memberships.get(pledge.by_organization_id, False):
             return True
 
     if pledge.on_behalf_of_organization_id:
-        m = await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.on_behalf_of_organization_id
-        )
-        if m and m.is_admin:
+        if memberships.get(pledge.on_behalf_of_organization_id, False):
             return True
 
     return False
 
 
-async def include_sender_fields(
-    session: AsyncSession,
-    subject: Subject,
-    pledge: Pledge,
+def include_sender_fields(
+    subject: Subject, pledge: Pledge, memberships: Mapping[UUID, bool]
 ) -> bool:
     if not isinstance(subject, User):
         return False
@@ -109,33 +95,49 @@ async def include_sender_fields(
     if pledge.by_user_id == subject.id:
         return True
 
-    # is member if sending org
+    # is member of sending org
     if pledge.by_organization_id:
-        if await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.by_organization_id
-        ):
+        if pledge.by_organization_id in memberships:
             return True
 
     if pledge.on_behalf_of_organization_id:
-        if await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.on_behalf_of_organization_id
-        ):
+        if pledge.on_behalf_of_organization_id in memberships:
             return True
 
     return False
 
 
+async def to_schemas(
+    session: AsyncSession, subject: Subject, pledges: Sequence[Pledge]
+) -> list[PledgeSchema]:
+    # Organizations the subject is a member of, and if they're admin of it
+    memberships: dict[UUID, bool] = {}
+    if isinstance(subject, User) and subject.id and pledges:
+        memberships = {
+            m.organization_id: m.is_admin
+            for m in await user_organization_service.list_by_user_id(
+                session, subject.id
+            )
+        }
+
+    return [
+        PledgeSchema.from_db(
+            p,
+            include_receiver_admin_fields=include_receiver_admin_fields(
+                subject, p, memberships
+            ),
+            include_sender_admin_fields=include_sender_admin_fields(
+                subject, p, memberships
+            ),
+            include_sender_fields=include_sender_fields(subject, p, memberships),
+        )
+        for p in pledges
+    ]
+
+
 async def to_schema(session: AsyncSession, subject: Subject, p: Pledge) -> PledgeSchema:
-    return PledgeSchema.from_db(
-        p,
-        include_receiver_admin_fields=await include_receiver_admin_fields(
-            session, subject, p
-        ),
-        include_sender_admin_fields=await include_sender_admin_fields(
-            session, subject, p
-        ),
-        include_sender_fields=await include_sender_fields(session, subject, p),
-    )
+    [schema] = await to_schemas(session, subject, [p])
+    return schema
 
 
 @router.get(
@@ -259,13 +261,10 @@ async def search(
         pledging_user=by_user_id,
         load_issue=True,
         load_pledger=True,
+        readable_clause=await authz.readable_clause(auth_subject.subject, Pledge),
     )
 
-    items = [
-        await to_schema(session, auth_subject.subject, p)
-        for p in pledges
-        if await authz.can(auth_subject.subject, AccessType.read, p)
-    ]
+    items = await to_schemas(session, auth_subject.subject, pledges)
 
     return ListResource(
         items=items, pagination=Pagination(total_count=len(items), max_page=1)
@@ -77,7 +77,7 @@ class PaymentIntentService:
 
         # Create a payment intent with Stripe
         try:
-            payment_intent = pledge_stripe_service.create_anonymous_intent(
+            payment_intent = await pledge_stripe_service.create_anonymous_intent(
                 amount=amount_including_fee,
                 pledge_issue=pledge_issue,
                 pledge_issue_org=pledge_issue_org,
@@ -135,7 +135,7 @@ class PaymentIntentService:
         fee = self.calculate_fee(updates.amount)
         amount_including_fee = updates.amount + fee
 
-        payment_intent = pledge_stripe_service.modify_intent(
+        payment_intent = await pledge_stripe_service.modify_intent(
             payment_intent_id,
             amount=amount_including_fee,
             receipt_email=updates.email,
@@ -164,7 +164,7 @@ class PaymentIntentService:
         if pledge:
             return pledge
 
-        intent = stripe_service.retrieve_intent(payment_intent_id)
+        intent = await stripe_service.retrieve_intent(payment_intent_id)
         if not intent:
             raise ResourceNotFound()
 
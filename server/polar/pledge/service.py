@@ -9,7 +9,7 @@ from uuid import UUID
 import stripe as stripe_lib
 import structlog
 from discord_webhook import AsyncDiscordWebhook, DiscordEmbed
-from sqlalchemy import func, or_
+from sqlalchemy import ColumnElement, func, or_
 from sqlalchemy.orm import (
     joinedload,
 )
@@ -82,6 +82,7 @@ from .schemas import (
     Pledger,
     SummaryPledge,
 )
+from .summary_service import pledge_summary_service
 
 log = structlog.get_logger()
 
@@ -127,9 +128,13 @@ class PledgeService(ResourceServiceReader[Pledge]):
         load_issue: bool = False,
         load_pledger: bool = False,
         all_states: bool = False,
+        readable_clause: ColumnElement[bool] | None = None,
     ) -> Sequence[Pledge]:
         statement = sql.select(Pledge)
 
+        if readable_clause is not None:
+            statement = statement.where(readable_clause)
+
         if not all_states:
             statement = statement.where(
                 Pledge.state.in_(PledgeState.active_states()),
@@ -952,24 +957,12 @@ class PledgeService(ResourceServiceReader[Pledge]):
                 ),
             )
 
-    async def set_issue_pledged_amount_sum(
+    async def refresh_issue_pledge_summary(
         self,
         session: AsyncSession,
         issue_id: UUID,
     ) -> None:
-        pledges = await self.get_by_issue_ids(session, issue_ids=[issue_id])
-        last_pledged_at = max(p.created_at for p in pledges) if pledges else None
-        summed = sum(p.amount for p in pledges) if pledges else 0
-        stmt = (
-            sql.update(Issue)
-            .where(Issue.id == issue_id)
-            .values(
-                pledged_amount_sum=summed,
-                last_pledged_at=last_pledged_at,
-            )
-        )
-
-        await session.execute(stmt)
+        await pledge_summary_service.refresh(session, issue_id)
         await session.commit()
 
     async def mark_disputed(
@@ -1259,24 +1252,15 @@ class PledgeService(ResourceServiceReader[Pledge]):
     async def issues_pledge_summary(
         self, session: AsyncSession, issues: Sequence[Issue]
     ) -> dict[UUID, PledgePledgesSummary]:
-        all_pledges = await self.list_by(
-            session,
-            issue_ids=[i.id for i in issues],
-            load_pledger=True,
+        summaries = await pledge_summary_service.get_by_issue_ids(
+            session, [i.id for i in issues]
         )
 
         res: dict[UUID, PledgePledgesSummary] = {}
-
-        pledges_by_issue: dict[UUID, list[Pledge]] = {}
-        for p in all_pledges:
-            exist = pledges_by_issue.get(p.issue_id, [])
-            exist.append(p)
-            pledges_by_issue[p.issue_id] = exist
-
         for i in issues:
-            pledges = pledges_by_issue.get(i.id, [])
+            issue_summaries = summaries.get(i.id, {})
 
-            sum_pledges = sum([p.amount for p in pledges])
+            sum_pledges = sum(s.amount for s in issue_summaries.values())
 
             funding = Funding(
                 funding_goal=CurrencyAmount(currency="USD", amount=i.funding_goal)
@@ -1285,7 +1269,15 @@ class PledgeService(ResourceServiceReader[Pledge]):
                 pledges_sum=CurrencyAmount(currency="USD", amount=sum_pledges),
             )
 
-            summary_pledges = [SummaryPledge.from_db(p) for p in pledges]
+            summary_pledges = [
+                SummaryPledge(
+                    type=type,
+                    pledger=Pledger.model_validate(pledger) if pledger else None,
+                )
+                for type in PledgeType
+                if type in issue_summaries
+                for pledger in issue_summaries[type].pledgers
+            ]
 
             res[i.id] = PledgePledgesSummary(funding=funding, pledges=summary_pledges)
 
@@ -1294,31 +1286,21 @@ class PledgeService(ResourceServiceReader[Pledge]):
     async def issues_pledge_type_summary(
         self, session: AsyncSession, issues: Sequence[Issue]
     ) -> dict[UUID, PledgesTypeSummaries]:
-        all_pledges = await self.list_by(
-            session, issue_ids=[i.id for i in issues], load_pledger=True
+        summaries = await pledge_summary_service.get_by_issue_ids(
+            session, [i.id for i in issues]
         )
 
         res: dict[UUID, PledgesTypeSummaries] = {}
-
-        pledges_by_issue: dict[UUID, list[Pledge]] = {}
-        for p in all_pledges:
-            exist = pledges_by_issue.get(p.issue_id, [])
-            exist.append(p)
-            pledges_by_issue[p.issue_id] = exist
-
         for i in issues:
-            pledges = pledges_by_issue.get(i.id, [])
+            issue_summaries = summaries.get(i.id, {})
 
             def summary(type: PledgeType) -> FundingPledgesSummary:
-                pledges_of_type = [p for p in pledges if p.type == type]
-                amount = sum([p.amount for p in pledges_of_type])
-                pledgers = [
-                    p for p in [Pledger.from_pledge(p) for p in pledges_of_type] if p
-                ]
-
+                s = issue_summaries.get(type)
                 return FundingPledgesSummary(
-                    total=CurrencyAmount(currency="USD", amount=amount),
-                    pledgers=pledgers,
+                    total=CurrencyAmount(currency="USD", amount=s.amount if s else 0),
+                    pledgers=[Pledger.model_validate(p) for p in s.pledgers if p]
+                    if s
+                    else [],
                 )
 
             res[i.id] = PledgesTypeSummaries(
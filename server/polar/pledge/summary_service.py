@@ -0,0 +1,321 @@
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, TypedDict
+from uuid import UUID
+
+import structlog
+from sqlalchemy import ColumnElement, case, exists, func, or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import aliased
+
+from polar.logging import Logger
+from polar.models import Issue, IssuePledgeSummary, Organization, Pledge, User
+from polar.models.pledge import PledgeState, PledgeType
+from polar.models.user import OAuthAccount, OAuthPlatform
+from polar.postgres import AsyncSession, sql
+
+log: Logger = structlog.get_logger()
+
+TOP_PLEDGERS = 100
+"""Maximum number of pledgers kept per issue and pledge type."""
+
+ByOrganization = aliased(Organization)
+OnBehalfOfOrganization = aliased(Organization)
+
+
+class _Summary(TypedDict):
+    issue_id: UUID
+    type: PledgeType
+    amount: int
+    pledges_count: int
+    last_pledged_at: datetime | None
+    pledgers: list[dict[str, Any] | None]
+
+
+def _organization_pledger(organization: type[Organization]) -> ColumnElement[Any]:
+    return func.jsonb_build_object(
+        "name",
+        func.coalesce(func.nullif(organization.pretty_name, ""), organization.name),
+        "github_username",
+        organization.name,
+        "avatar_url",
+        organization.avatar_url,
+    )
+
+
+def _pledger_column() -> ColumnElement[dict[str, Any] | None]:
+    """SQL counterpart of `Pledger.from_pledge`."""
+    github_username = (
+        select(OAuthAccount.account_username)
+        .where(
+            OAuthAccount.user_id == User.id,
+            OAuthAccount.platform == OAuthPlatform.github,
+        )
+        .order_by(OAuthAccount.created_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+    user_pledger = func.jsonb_build_object(
+        "name",
+        func.coalesce(func.nullif(github_username, ""), User.email),
+        "github_username",
+        github_username,
+        "avatar_url",
+        User.avatar_url,
+    )
+    return type_coerce(
+        case(
+            (
+                OnBehalfOfOrganization.id.is_not(None),
+                _organization_pledger(OnBehalfOfOrganization),
+            ),
+            (User.id.is_not(None), user_pledger),
+            (ByOrganization.id.is_not(None), _organization_pledger(ByOrganization)),
+            else_=None,
+        ),
+        JSONB,
+    )
+
+
+class PledgeSummaryService:
+    async def get_by_issue_ids(
+        self, session: AsyncSession, issue_ids: Sequence[UUID]
+    ) -> dict[UUID, dict[PledgeType, IssuePledgeSummary]]:
+        if not issue_ids:
+            return {}
+
+        statement = (
+            select(IssuePledgeSummary)
+            .where(IssuePledgeSummary.issue_id.in_(issue_ids))
+            .execution_options(populate_existing=True)
+        )
+        result = await session.execute(statement)
+
+        summaries: dict[UUID, dict[PledgeType, IssuePledgeSummary]] = {}
+        for summary in result.scalars():
+            summaries.setdefault(summary.issue_id, {})[PledgeType(summary.type)] = (
+                summary
+            )
+        return summaries
+
+    async def refresh(self, session: AsyncSession, issue_id: UUID) -> None:
+        """
+        Recompute the summaries of an issue from its active pledges, and its
+        `pledged_amount_sum` and `last_pledged_at`.
+
+        Called after every pledge state transition. Doesn't commit.
+        """
+        # Serialize the refreshes of the issue, so the last one wins
+        await session.execute(
+            select(Issue.id).where(Issue.id == issue_id).with_for_update()
+        )
+
+        computed = await self._compute(session, [issue_id])
+        await self._write(session, [issue_id], computed)
+
+    async def reconcile(
+        self, session: AsyncSession, *, batch_size: int = 500
+    ) -> list[UUID]:
+        """
+        Compare the summaries with the pledges, repair the issues that
+        drifted and return their IDs.
+
+        Also catches pledger names and avatars that changed since the last
+        refresh of the issue. Commits after each batch of issues.
+        """
+        has_summary = exists().where(IssuePledgeSummary.issue_id == Issue.id)
+        has_pledges = exists().where(
+            Pledge.issue_id == Issue.id,
+            Pledge.state.in_(PledgeState.active_states()),
+        )
+
+        drifted: list[UUID] = []
+        last_issue_id: UUID | None = None
+        while True:
+            statement = (
+                select(Issue.id, Issue.pledged_amount_sum, Issue.last_pledged_at)
+                .where(
+                    or_(
+                        has_summary,
+                        has_pledges,
+                        Issue.pledged_amount_sum != 0,
+                        Issue.last_pledged_at.is_not(None),
+                    )
+                )
+                .order_by(Issue.id)
+                .limit(batch_size)
+            )
+            if last_issue_id is not None:
+                statement = statement.where(Issue.id > last_issue_id)
+
+            issues = (await session.execute(statement)).tuples().all()
+            if not issues:
+                break
+            last_issue_id = issues[-1][0]
+
+            issue_ids = [issue_id for issue_id, _, _ in issues]
+            computed = await self._compute(session, issue_ids)
+            stored = await self.get_by_issue_ids(session, issue_ids)
+
+            batch_drifted: list[UUID] = []
+            for issue_id, pledged_amount_sum, last_pledged_at in issues:
+                expected = computed.get(issue_id, {})
+                actual = {
+                    type: self._to_dict(summary)
+                    for type, summary in stored.get(issue_id, {}).items()
+                }
+                expected_amount_sum, expected_last_pledged_at = self._issue_values(
+                    expected
+                )
+                if (
+                    actual != expected
+                    or pledged_amount_sum != expected_amount_sum
+                    or last_pledged_at != expected_last_pledged_at
+                ):
+                    log.warning(
+                        "pledge.summary.drift",
+                        issue_id=str(issue_id),
+                        pledged_amount_sum=pledged_amount_sum,
+                        expected_pledged_amount_sum=expected_amount_sum,
+                    )
+                    batch_drifted.append(issue_id)
+
+            if batch_drifted:
+                await self._write(session, batch_drifted, computed)
+                await session.commit()
+                drifted.extend(batch_drifted)
+
+        return drifted
+
+    async def _compute(
+        self, session: AsyncSession, issue_ids: Sequence[UUID]
+    ) -> dict[UUID, dict[PledgeType, _Summary]]:
+        active_pledges = (
+            Pledge.issue_id.in_(issue_ids),
+            Pledge.state.in_(PledgeState.active_states()),
+        )
+
+        totals_statement = (
+            select(
+                Pledge.issue_id,
+                Pledge.type,
+                func.sum(Pledge.amount),
+                func.count(Pledge.id),
+                func.max(Pledge.created_at),
+            )
+            .where(*active_pledges)
+            .group_by(Pledge.issue_id, Pledge.type)
+        )
+
+        computed: dict[UUID, dict[PledgeType, _Summary]] = {}
+        for issue_id, type, amount, count, last_pledged_at in (
+            await session.execute(totals_statement)
+        ).tuples():
+            computed.setdefault(issue_id, {})[PledgeType(type)] = _Summary(
+                issue_id=issue_id,
+                type=PledgeType(type),
+                amount=amount,
+                pledges_count=count,
+                last_pledged_at=last_pledged_at,
+                pledgers=[],
+            )
+
+        if not computed:
+            return computed
+
+        ranked = (
+            select(
+                Pledge.id,
+                func.row_number()
+                .over(
+                    partition_by=(Pledge.issue_id, Pledge.type),
+                    order_by=(Pledge.amount.desc(), Pledge.created_at, Pledge.id),
+                )
+                .label("rank"),
+            )
+            .where(*active_pledges)
+            .subquery()
+        )
+        pledgers_statement = (
+            select(Pledge.issue_id, Pledge.type, _pledger_column())
+            .join(ranked, ranked.c.id == Pledge.id)
+            .join(
+                OnBehalfOfOrganization,
+                OnBehalfOfOrganization.id == Pledge.on_behalf_of_organization_id,
+                isouter=True,
+            )
+            .join(User, User.id == Pledge.by_user_id, isouter=True)
+            .join(
+                ByOrganization,
+                ByOrganization.id == Pledge.by_organization_id,
+                isouter=True,
+            )
+            .where(ranked.c.rank <= TOP_PLEDGERS)
+            .order_by(Pledge.issue_id, Pledge.type, ranked.c.rank)
+        )
+        for issue_id, type, pledger in (
+            await session.execute(pledgers_statement)
+        ).tuples():
+            computed[issue_id][PledgeType(type)]["pledgers"].append(pledger)
+
+        return computed
+
+    async def _write(
+        self,
+        session: AsyncSession,
+        issue_ids: Sequence[UUID],
+        computed: dict[UUID, dict[PledgeType, _Summary]],
+    ) -> None:
+        await session.execute(
+            sql.delete(IssuePledgeSummary).where(
+                IssuePledgeSummary.issue_id.in_(issue_ids)
+            )
+        )
+
+        rows = [
+            summary
+            for issue_id in issue_ids
+            for summary in computed.get(issue_id, {}).values()
+        ]
+        if rows:
+            await session.execute(sql.insert(IssuePledgeSummary).values(rows))
+
+        for issue_id in issue_ids:
+            pledged_amount_sum, last_pledged_at = self._issue_values(
+                computed.get(issue_id, {})
+            )
+            await session.execute(
+                sql.update(Issue)
+                .where(Issue.id == issue_id)
+                .values(
+                    pledged_amount_sum=pledged_amount_sum,
+                    last_pledged_at=last_pledged_at,
+                )
+            )
+
+    def _issue_values(
+        self, summaries: dict[PledgeType, _Summary]
+    ) -> tuple[int, datetime | None]:
+        pledged_amount_sum = sum(s["amount"] for s in summaries.values())
+        last_pledged_at = max(
+            (
+                s["last_pledged_at"]
+                for s in summaries.values()
+                if s["last_pledged_at"] is not None
+            ),
+            default=None,
+        )
+        return pledged_amount_sum, last_pledged_at
+
+    def _to_dict(self, summary: IssuePledgeSummary) -> _Summary:
+        return _Summary(
+            issue_id=summary.issue_id,
+            type=PledgeType(summary.type),
+            amount=summary.amount,
+            pledges_count=summary.pledges_count,
+            last_pledged_at=summary.last_pledged_at,
+            pledgers=summary.pledgers,
+        )
+
+
+pledge_summary_service = PledgeSummaryService()
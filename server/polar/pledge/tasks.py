@@ -0,0 +1,9 @@
+from polar.worker import AsyncSessionMaker, JobContext, interval
+
+from .summary_service import pledge_summary_service
+
+
+@interval(hour=4, minute=0)
+async def pledge_summaries_reconcile(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await pledge_summary_service.reconcile(session)
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import Depends, Path, Query
+from fastapi import Depends, Path, Query, Request, Response
 from pydantic import UUID4
 
 from polar.authz.service import Authz
@@ -9,6 +9,7 @@ from polar.kit.pagination import ListResource, PaginationParamsQuery
 from polar.kit.routing import APIRouter
 from polar.models import Product
 from polar.models.product import SubscriptionTierType
+from polar.organization.cache import organization_response_cache
 from polar.postgres import AsyncSession, get_db_session
 from polar.product.schemas import Product as ProductSchema
 from polar.product.schemas import ProductBenefitsUpdate, ProductCreate, ProductUpdate
@@ -28,6 +29,7 @@ ProductNotFound = {
 
 @router.get("/", response_model=ListResource[ProductSchema], tags=[Tags.PUBLIC])
 async def list_products(
+    request: Request,
     pagination: PaginationParamsQuery,
     auth_subject: auth.CreatorProductsReadOrAnonymous,
     organization_id: UUID4 | None = Query(
@@ -38,8 +40,14 @@ async def list_products(
     ),
     type: SubscriptionTierType | None = Query(None),
     session: AsyncSession = Depends(get_db_session),
-) -> ListResource[ProductSchema]:
+) -> ListResource[ProductSchema] | Response:
     """List products."""
+    cache_lookup = await organization_response_cache.lookup(
+        request, auth_subject, organization_id=organization_id
+    )
+    if cache_lookup.response is not None:
+        return cache_lookup.response
+
     results, count = await product_service.list(
         session,
         auth_subject,
@@ -49,11 +57,16 @@ async def list_products(
         pagination=pagination,
     )
 
-    return ListResource.from_paginated_results(
+    content = ListResource.from_paginated_results(
         [ProductSchema.model_validate(result) for result in results],
         count,
         pagination,
     )
+    if organization_id is None:
+        return content
+    return await organization_response_cache.store(
+        cache_lookup, organization_id, content
+    )
 
 
 @router.get(
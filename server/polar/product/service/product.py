@@ -26,6 +26,7 @@ from polar.models import (
 )
 from polar.models.product import SubscriptionTierType
 from polar.models.webhook_endpoint import WebhookEventType
+from polar.organization.cache import organization_response_cache
 from polar.organization.resolver import get_payload_organization
 from polar.organization.service import organization as organization_service
 from polar.webhook.service import webhook as webhook_service
@@ -174,7 +175,7 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
         metadata["organization_id"] = str(organization.id)
         metadata["organization_name"] = organization.name
 
-        stripe_product = stripe_service.create_product(
+        stripe_product = await stripe_service.create_product(
             product.get_stripe_name(),
             description=product.description,
             metadata=metadata,
@@ -182,7 +183,7 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
         product.stripe_product_id = stripe_product.id
 
         for price_create in create_schema.prices:
-            stripe_price = stripe_service.create_price_for_product(
+            stripe_price = await stripe_service.create_price_for_product(
                 stripe_product.id,
                 price_create.price_amount,
                 price_create.price_currency,
@@ -246,7 +247,9 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
             product_update["description"] = update_schema.description
 
         if product_update and product.stripe_product_id is not None:
-            stripe_service.update_product(product.stripe_product_id, **product_update)
+            await stripe_service.update_product(
+                product.stripe_product_id, **product_update
+            )
 
         existing_prices: set[ProductPrice] = set()
         added_prices: list[ProductPrice] = []
@@ -263,7 +266,7 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
                     continue
 
                 assert product.stripe_product_id is not None
-                stripe_price = stripe_service.create_price_for_product(
+                stripe_price = await stripe_service.create_price_for_product(
                     product.stripe_product_id,
                     price_update.price_amount,
                     price_update.price_currency,
@@ -284,12 +287,12 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
             if deleted_prices:
                 # Make sure to set Stripe's default price to a non-archived price
                 assert product.stripe_product_id is not None
-                stripe_service.update_product(
+                await stripe_service.update_product(
                     product.stripe_product_id,
                     default_price=updated_prices[0].stripe_price_id,
                 )
                 for deleted_price in deleted_prices:
-                    stripe_service.archive_price(deleted_price.stripe_price_id)
+                    await stripe_service.archive_price(deleted_price.stripe_price_id)
                     deleted_price.is_archived = True
                     session.add(deleted_price)
 
@@ -451,7 +454,7 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
             raise FreeTierIsNotArchivable(product.id)
 
         if product.stripe_product_id is not None:
-            stripe_service.archive_product(product.stripe_product_id)
+            await stripe_service.archive_product(product.stripe_product_id)
 
         product.is_archived = True
 
@@ -459,7 +462,7 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
 
     async def _unarchive(self, product: Product) -> Product:
         if product.stripe_product_id is not None:
-            stripe_service.unarchive_product(product.stripe_product_id)
+            await stripe_service.unarchive_product(product.stripe_product_id)
 
         product.is_archived = False
 
@@ -530,11 +533,17 @@ class ProductService(ResourceService[Product, ProductCreate, ProductUpdate]):
     async def _after_product_created(
         self, session: AsyncSession, product: Product
     ) -> None:
+        await organization_response_cache.invalidate_after_commit(
+            session, product.organization_id
+        )
         await self._send_webhook(session, product, WebhookEventType.product_created)
 
     async def _after_product_updated(
         self, session: AsyncSession, product: Product
     ) -> None:
+        await organization_response_cache.invalidate_after_commit(
+            session, product.organization_id
+        )
         await self._send_webhook(session, product, WebhookEventType.product_updated)
 
     async def _send_webhook(
@@ -1,8 +1,15 @@
 from polar.integrations.github import receivers as github_receivers
-from polar.receivers import issue_reference, onboarding, pledges, pull_request
+from polar.receivers import (
+    issue_reference,
+    onboarding,
+    organization_response_cache,
+    pledges,
+    pull_request,
+)
 
 __all__ = [
     "onboarding",
+    "organization_response_cache",
     "pledges",
     "github_receivers",
     "issue_reference",
@@ -1,9 +1,9 @@
 import structlog
 
 from polar.eventstream.service import publish, publish_members
-from polar.issue.hooks import IssueHook, issue_upserted
+from polar.issue.hooks import IssuesHook, issues_upserted
 from polar.organization.hooks import OrganizationHook, organization_upserted
-from polar.pull_request.hooks import PullRequestHook, pull_request_upserted
+from polar.pull_request.hooks import PullRequestsHook, pull_requests_upserted
 from polar.repository.hooks import (
     SyncCompletedHook,
     SyncedHook,
@@ -15,18 +15,21 @@ log = structlog.get_logger()
 
 
 async def on_issue_synced(hook: SyncedHook) -> None:
+    # Published once per synced page, the progress is given by `synced_issues`
+    last_record = hook.records[-1]
     log.info(
         "issue.synced",
-        issue=hook.record.id,
-        title=hook.record.title,
+        issue=last_record.id,
+        title=last_record.title,
+        count=len(hook.records),
         synced=hook.synced,
     )
     await publish(
         "issue.synced",
         {
             "issue": {
-                "id": hook.record.id,
-                "title": hook.record.title,
+                "id": last_record.id,
+                "title": last_record.title,
             },
             "open_issues": hook.repository.open_issues or 0,
             "synced_issues": hook.synced,
@@ -62,32 +65,34 @@ repository_issues_sync_completed.add(on_issue_sync_completed)
 ###############################################################################
 
 
-async def on_issue_updated(hook: IssueHook) -> None:
-    await publish(
-        "issue.updated",
-        {
-            "issue_id": hook.issue.id,
-            "organization_id": hook.issue.organization_id,
-            "repository_id": hook.issue.repository_id,
-        },
-        repository_id=hook.issue.repository_id,
-        organization_id=hook.issue.organization_id,
-    )
+async def on_issue_updated(hook: IssuesHook) -> None:
+    for issue in hook.issues:
+        await publish(
+            "issue.updated",
+            {
+                "issue_id": issue.id,
+                "organization_id": issue.organization_id,
+                "repository_id": issue.repository_id,
+            },
+            repository_id=issue.repository_id,
+            organization_id=issue.organization_id,
+        )
 
 
-issue_upserted.add(on_issue_updated)
+issues_upserted.add(on_issue_updated)
 
 
-async def on_pull_request_updated(hook: PullRequestHook) -> None:
-    await publish(
-        "pull_request.updated",
-        {"pull_request": hook.pull_request.id},
-        repository_id=hook.pull_request.repository_id,
-        organization_id=hook.pull_request.organization_id,
-    )
+async def on_pull_request_updated(hook: PullRequestsHook) -> None:
+    for pull_request in hook.pull_requests:
+        await publish(
+            "pull_request.updated",
+            {"pull_request": pull_request.id},
+            repository_id=pull_request.repository_id,
+            organization_id=pull_request.organization_id,
+        )
 
 
-pull_request_upserted.add(on_pull_request_updated)
+pull_requests_upserted.add(on_pull_request_updated)
 
 
 async def on_organization_upserted(hook: OrganizationHook) -> None:
@@ -0,0 +1,38 @@
+from polar.issue.hooks import IssuesHook, issues_upserted
+from polar.organization.cache import organization_response_cache
+from polar.organization.hooks import OrganizationHook, organization_upserted
+from polar.pledge.hooks import (
+    PledgeHook,
+    pledge_created,
+    pledge_disputed,
+    pledge_updated,
+)
+
+
+async def invalidate_organization(hook: OrganizationHook) -> None:
+    await organization_response_cache.invalidate_after_commit(
+        hook.session, hook.organization.id
+    )
+
+
+organization_upserted.add(invalidate_organization)
+
+
+async def invalidate_issues_organizations(hook: IssuesHook) -> None:
+    await organization_response_cache.invalidate_after_commit(
+        hook.session, *(issue.organization_id for issue in hook.issues)
+    )
+
+
+issues_upserted.add(invalidate_issues_organizations)
+
+
+async def invalidate_pledge_organization(hook: PledgeHook) -> None:
+    await organization_response_cache.invalidate_after_commit(
+        hook.session, hook.pledge.organization_id
+    )
+
+
+pledge_created.add(invalidate_pledge_organization)
+pledge_updated.add(invalidate_pledge_organization)
+pledge_disputed.add(invalidate_pledge_organization)
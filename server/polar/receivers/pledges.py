@@ -4,7 +4,7 @@ from slack_sdk.webhook import WebhookClient as SlackWebhookClient
 
 from polar.account.service import account as account_service
 from polar.config import settings
-from polar.issue.hooks import IssueHook, issue_upserted
+from polar.issue.hooks import IssuesHook, issues_upserted
 from polar.issue.service import issue as issue_service
 from polar.kit.money import get_cents_in_dollar_string
 from polar.models import Issue
@@ -42,29 +42,35 @@ log = structlog.get_logger()
 
 
 async def mark_pledges_confirmation_pending_on_issue_close(
-    hook: IssueHook,
+    hook: IssuesHook,
 ) -> None:
-    if hook.issue.state == "closed":
+    closed_issue_ids = [
+        issue.id for issue in hook.issues if issue.state == Issue.State.CLOSED
+    ]
+    open_issue_ids = [
+        issue.id for issue in hook.issues if issue.state != Issue.State.CLOSED
+    ]
+
+    if closed_issue_ids:
         # Only do this if the issue has pledges
-        pledges = await pledge_service.get_by_issue_ids(hook.session, [hook.issue.id])
-        if len(pledges) == 0:
-            return
-
-        # Mark pledges in "created" as "confirmation_pending"
-        changed = await issue_service.mark_needs_confirmation(
-            hook.session, hook.issue.id
-        )
-
-        # Send notifications
-        if changed:
-            await pledge_service.pledge_confirmation_pending_notifications(
-                hook.session, hook.issue.id
+        pledges = await pledge_service.get_by_issue_ids(hook.session, closed_issue_ids)
+        for issue_id in dict.fromkeys(pledge.issue_id for pledge in pledges):
+            # Mark pledges in "created" as "confirmation_pending"
+            changed = await issue_service.mark_needs_confirmation(
+                hook.session, issue_id
             )
-    else:
-        await issue_service.mark_not_needs_confirmation(hook.session, hook.issue.id)
 
+            # Send notifications
+            if changed:
+                await pledge_service.pledge_confirmation_pending_notifications(
+                    hook.session, issue_id
+                )
 
-issue_upserted.add(mark_pledges_confirmation_pending_on_issue_close)
+    if open_issue_ids:
+        await issue_service.mark_not_needs_confirmation(hook.session, open_issue_ids)
+
+
+issues_upserted.add(mark_pledges_confirmation_pending_on_issue_close)
 
 
 async def pledge_created_backoffice_discord_alert(hook: PledgeHook) -> None:
@@ -191,14 +197,14 @@ async def pledge_created_webhook_alerts(hook: PledgeHook) -> None:
 pledge_created_hook.add(pledge_created_webhook_alerts)
 
 
-async def pledge_created_issue_pledge_sum(hook: PledgeHook) -> None:
+async def pledge_issue_pledge_summary(hook: PledgeHook) -> None:
     session = hook.session
     pledge = hook.pledge
-    await pledge_service.set_issue_pledged_amount_sum(session, pledge.issue_id)
+    await pledge_service.refresh_issue_pledge_summary(session, pledge.issue_id)
 
 
-pledge_created_hook.add(pledge_created_issue_pledge_sum)
-pledge_updated_hook.add(pledge_created_issue_pledge_sum)
+pledge_created_hook.add(pledge_issue_pledge_summary)
+pledge_updated_hook.add(pledge_issue_pledge_summary)
 
 
 def issue_url(org: Organization, repo: Repository, issue: Issue) -> str:
@@ -234,8 +240,11 @@ async def pledge_created_notification(pledge: Pledge, session: AsyncSession) ->
         log.error("pledge_created_notification.no_repo_found")
         return
 
+    # Load the pledger relationships of the pledge
+    loaded_pledge = await pledge_service.get_with_loaded(session, pledge.id)
+
     n = MaintainerPledgeCreatedNotificationPayload(
-        pledger_name=pledger_name(pledge),
+        pledger_name=pledger_name(loaded_pledge) if loaded_pledge else None,
         pledge_amount=get_cents_in_dollar_string(pledge.amount),
         issue_url=issue_url(org, repo, issue),
         issue_title=issue.title,
@@ -1,14 +1,16 @@
-from polar.enums import Platforms
+from uuid import UUID
+
 from polar.integrations.github.service.url import github_url
 from polar.issue.service import issue as issue_service
+from polar.models import Organization, Repository
 from polar.organization.service import organization as organization_service
-from polar.pull_request.hooks import PullRequestHook, pull_request_upserted
+from polar.pull_request.hooks import PullRequestsHook, pull_requests_upserted
 from polar.repository.service import repository as repository_service
 from polar.worker import QueueName, enqueue_job
 
 
 async def pull_request_find_reverse_references(
-    hook: PullRequestHook,
+    hook: PullRequestsHook,
 ) -> None:
     """
     Find links to issues within the same repository, and re-crawl those issues for
@@ -19,45 +21,58 @@ async def pull_request_find_reverse_references(
     """
 
     session = hook.session
-    item = hook.pull_request
 
-    if not item.body:
-        return
+    # Pull requests are usually upserted by page of a single repository:
+    # only load each organization and repository once,
+    # and look up the linked issues of the whole page at once.
+    repositories: dict[UUID, Repository | None] = {}
+    organizations: dict[UUID, Organization | None] = {}
+    linked_numbers: dict[UUID, set[int]] = {}
 
-    repo = await repository_service.get(session, item.repository_id)
-    if not repo:
-        return
+    for item in hook.pull_requests:
+        if not item.body:
+            continue
 
-    org = await organization_service.get(session, item.organization_id)
-    if not org:
-        return
+        if item.repository_id not in repositories:
+            repositories[item.repository_id] = await repository_service.get(
+                session, item.repository_id
+            )
+        repo = repositories[item.repository_id]
+        if not repo:
+            continue
 
-    urls = github_url.parse_urls(item.body)
+        if item.organization_id not in organizations:
+            organizations[item.organization_id] = await organization_service.get(
+                session, item.organization_id
+            )
+        org = organizations[item.organization_id]
+        if not org:
+            continue
 
-    for url in urls:
-        # Find deps in same repository, and trigger syncs for the issue
-        is_same_owner = url.owner is None or url.owner == org.name
-        is_same_repo = url.repo is None or url.repo == repo.name
+        urls = github_url.parse_urls(item.body)
 
-        if not is_same_owner or not is_same_repo:
-            continue
+        for url in urls:
+            # Find deps in same repository, and trigger syncs for the issue
+            is_same_owner = url.owner is None or url.owner == org.name
+            is_same_repo = url.repo is None or url.repo == repo.name
 
-        linked_issue = await issue_service.get_by_number(
-            session,
-            Platforms.github,
-            organization_id=org.id,
-            repository_id=repo.id,
-            number=url.number,
-        )
-        if not linked_issue:
-            continue
+            if not is_same_owner or not is_same_repo:
+                continue
 
-        # Schedule sync for this issue
-        enqueue_job(
-            "github.issue.sync.issue_references",
-            linked_issue.id,
-            queue_name=QueueName.github_crawl,
+            linked_numbers.setdefault(repo.id, set()).add(url.number)
+
+    for repository_id, numbers in linked_numbers.items():
+        linked_issues = await issue_service.list_by_repository_and_numbers(
+            session, repository_id, sorted(numbers)
         )
 
+        # Schedule sync for these issues
+        for linked_issue in linked_issues:
+            enqueue_job(
+                "github.issue.sync.issue_references",
+                linked_issue.id,
+                queue_name=QueueName.github_crawl,
+            )
+
 
-pull_request_upserted.add(pull_request_find_reverse_references)
+pull_requests_upserted.add(pull_request_find_reverse_references)
@@ -1,6 +1,9 @@
+import contextlib
+from collections.abc import AsyncIterator
 from typing import TYPE_CHECKING, cast
 
 import redis.asyncio as _async_redis
+from redis.exceptions import ResponseError
 
 from polar.config import settings
 
@@ -29,4 +32,25 @@ def get_redis() -> Redis:
 
 redis = get_redis()
 
-__all__ = ["redis", "Redis"]
+
+@contextlib.asynccontextmanager
+async def drain_hash(redis: Redis, key: str) -> AsyncIterator[dict[str, str]]:
+    """
+    Take the fields of a hash used as a write-behind buffer, while new writes
+    keep going to a fresh hash.
+
+    The fields are only discarded if the block exits without error;
+    otherwise they're picked up again by the next drain.
+    """
+    flushing_key = f"{key}:flushing"
+
+    # A previous drain failed: retry it before taking new writes
+    if not await redis.exists(flushing_key):
+        with contextlib.suppress(ResponseError):  # Nothing buffered
+            await redis.rename(key, flushing_key)
+
+    yield await redis.hgetall(flushing_key)
+    await redis.delete(flushing_key)
+
+
+__all__ = ["redis", "Redis", "drain_hash"]
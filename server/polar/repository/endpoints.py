@@ -90,9 +90,7 @@ async def search(
     # Anonymous requests can only see public repositories,
     # authed users can also see private repositories in orgs that they are a
     # member of
-    repos = [
-        r for r in repos if await authz.can(auth_subject.subject, AccessType.read, r)
-    ]
+    repos = await authz.filter_readable(auth_subject.subject, AccessType.read, repos)
 
     return ListResource(
         items=[RepositorySchema.from_db(r) for r in repos],
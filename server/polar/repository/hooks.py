@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 from polar.kit.hook import Hook
@@ -11,7 +12,7 @@ from polar.models.repository import Repository
 class SyncedHook:
     repository: Repository
     organization: Organization
-    record: Issue | PullRequest
+    records: Sequence[Issue] | Sequence[PullRequest]
     synced: int
 
 
@@ -144,7 +144,7 @@ class SaleService(ResourceServiceReader[Sale]):
         if sale.stripe_invoice_id is None:
             raise InvoiceNotAvailable(sale)
 
-        stripe_invoice = stripe_service.get_invoice(sale.stripe_invoice_id)
+        stripe_invoice = await stripe_service.get_invoice(sale.stripe_invoice_id)
 
         if stripe_invoice.hosted_invoice_url is None:
             raise InvoiceNotAvailable(sale)
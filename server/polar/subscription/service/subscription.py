@@ -583,7 +583,7 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
         subscription.set_started_at()
 
         customer_id = get_expandable_id(stripe_subscription.customer)
-        customer = stripe_service.get_customer(customer_id)
+        customer = await stripe_service.get_customer(customer_id)
         customer_email = cast(str, customer.email)
 
         # Subscribe as organization
@@ -788,18 +788,83 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
         else:
             users_ids = [subscription.user_id]
 
-        task = "grant" if subscription.active else "revoke"
+        task: Literal["grant", "revoke"] = "grant" if subscription.active else "revoke"
+        await self._enqueue_users_benefits_grants(
+            session,
+            subscription,
+            subscription_tier,
+            users_ids,
+            task,
+            outdated_grants,
+            include_subscriber_benefits=True,
+        )
+
+    async def enqueue_members_benefits_grants(
+        self,
+        session: AsyncSession,
+        subscription: Subscription,
+        *,
+        added_user_ids: Sequence[uuid.UUID],
+        removed_user_ids: Sequence[uuid.UUID],
+    ) -> None:
+        """
+        Grant or revoke the benefits of an organization subscription
+        to the members who joined or left the organization only.
+        """
+        subscription_tier = await product_service.get(session, subscription.product_id)
+        assert subscription_tier is not None
+
+        if subscription.is_incomplete():
+            return
+
+        outdated_grants = await self._get_outdated_grants(
+            session, subscription, subscription_tier
+        )
+
+        # Benefits granted to the subscriber only are not affected
+        task: Literal["grant", "revoke"] = "grant" if subscription.active else "revoke"
+        await self._enqueue_users_benefits_grants(
+            session,
+            subscription,
+            subscription_tier,
+            added_user_ids,
+            task,
+            outdated_grants,
+            include_subscriber_benefits=False,
+        )
+        await self._enqueue_users_benefits_grants(
+            session,
+            subscription,
+            subscription_tier,
+            removed_user_ids,
+            "revoke",
+            outdated_grants,
+            include_subscriber_benefits=False,
+        )
+
+    async def _enqueue_users_benefits_grants(
+        self,
+        session: AsyncSession,
+        subscription: Subscription,
+        subscription_tier: Product,
+        users_ids: Sequence[uuid.UUID],
+        task: Literal["grant", "revoke"],
+        outdated_grants: Sequence[BenefitGrant],
+        *,
+        include_subscriber_benefits: bool,
+    ) -> None:
         for benefit in subscription_tier.benefits:
             # FIXME: Hack to prevent GitHub Repository benefit abuse
             # Only enqueue it for the subscriber user.
             # Remove this when we have proper per-seat support
             if benefit.type == BenefitType.github_repository:
-                enqueue_job(
-                    f"benefit.{task}",
-                    subscription_id=subscription.id,
-                    user_id=subscription.user_id,
-                    benefit_id=benefit.id,
-                )
+                if include_subscriber_benefits:
+                    enqueue_job(
+                        f"benefit.{task}",
+                        subscription_id=subscription.id,
+                        user_id=subscription.user_id,
+                        benefit_id=benefit.id,
+                    )
             else:
                 for user_id in users_ids:
                     enqueue_job(
@@ -843,17 +908,28 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
                 "subscription.subscription.enqueue_benefits_grants", subscription.id
             )
 
-    async def update_organization_benefits_grants(
-        self, session: AsyncSession, organization: Organization
+    async def update_organization_members_benefits_grants(
+        self,
+        session: AsyncSession,
+        organization: Organization,
+        *,
+        added_user_ids: Sequence[uuid.UUID],
+        removed_user_ids: Sequence[uuid.UUID],
     ) -> None:
-        statement = select(Subscription).where(
+        if not added_user_ids and not removed_user_ids:
+            return
+
+        statement = select(Subscription.id).where(
             Subscription.organization_id == organization.id,
             Subscription.deleted_at.is_(None),
         )
-        subscriptions = await session.stream_scalars(statement)
-        async for subscription in subscriptions:
+        subscription_ids = await session.stream_scalars(statement)
+        async for subscription_id in subscription_ids:
             enqueue_job(
-                "subscription.subscription.enqueue_benefits_grants", subscription.id
+                "subscription.subscription.enqueue_members_benefits_grants",
+                subscription_id,
+                added_user_ids=list(added_user_ids),
+                removed_user_ids=list(removed_user_ids),
             )
 
     async def upgrade_subscription(
@@ -897,7 +973,7 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
             raise InvalidSubscriptionTierUpgrade(new_subscription_tier.id)
         assert subscription.price is not None
 
-        stripe_service.update_subscription_price(
+        await stripe_service.update_subscription_price(
             subscription.stripe_subscription_id,
             old_price=subscription.price.stripe_price_id,
             new_price=new_price.stripe_price_id,
@@ -930,7 +1006,9 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
             raise AlreadyCanceledSubscription(subscription)
 
         if subscription.stripe_subscription_id is not None:
-            stripe_service.cancel_subscription(subscription.stripe_subscription_id)
+            await stripe_service.cancel_subscription(
+                subscription.stripe_subscription_id
+            )
         else:
             subscription.ended_at = utc_now()
             subscription.cancel_at_period_end = True
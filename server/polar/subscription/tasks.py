@@ -48,6 +48,27 @@ async def subscription_enqueue_benefits_grants(
         await subscription_service.enqueue_benefits_grants(session, subscription)
 
 
+@task("subscription.subscription.enqueue_members_benefits_grants")
+async def subscription_enqueue_members_benefits_grants(
+    ctx: JobContext,
+    subscription_id: uuid.UUID,
+    added_user_ids: list[uuid.UUID],
+    removed_user_ids: list[uuid.UUID],
+    polar_context: PolarWorkerContext,
+) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        subscription = await subscription_service.get(session, subscription_id)
+        if subscription is None:
+            raise SubscriptionDoesNotExist(subscription_id)
+
+        await subscription_service.enqueue_members_benefits_grants(
+            session,
+            subscription,
+            added_user_ids=added_user_ids,
+            removed_user_ids=removed_user_ids,
+        )
+
+
 @task("subscription.subscription.update_product_benefits_grants")
 async def subscription_update_product_benefits_grants(
     ctx: JobContext, subscription_tier_id: uuid.UUID, polar_context: PolarWorkerContext
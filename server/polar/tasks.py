@@ -7,7 +7,10 @@ from polar.integrations.stripe import tasks as stripe
 from polar.magic_link import tasks as magic_link
 from polar.notifications import tasks as notifications
 from polar.organization import tasks as organization
+from polar.personal_access_token import tasks as personal_access_token
+from polar.pledge import tasks as pledge
 from polar.subscription import tasks as subscription
+from polar.traffic import tasks as traffic
 from polar.transaction import tasks as transaction
 from polar.user import tasks as user
 from polar.webhook import tasks as webhook
@@ -22,7 +25,10 @@ __all__ = [
     "magic_link",
     "notifications",
     "organization",
+    "personal_access_token",
+    "pledge",
     "subscription",
+    "traffic",
     "transaction",
     "user",
     "webhook",
@@ -0,0 +1,112 @@
+import contextlib
+import datetime
+import json
+from collections.abc import AsyncIterator
+from enum import StrEnum
+from typing import NamedTuple
+from uuid import UUID
+
+from polar.redis import Redis, drain_hash
+from polar.redis import redis as redis_client
+
+_KEY_PREFIX = "polar:view_buffer"
+
+
+class ViewCounter(StrEnum):
+    page = "page"
+    article = "article"
+    advertisement_campaign = "advertisement_campaign"
+
+
+class PageViewKey(NamedTuple):
+    location_href: str
+    referrer: str | None
+    article_id: UUID | None
+    organization_id: UUID | None
+    date: datetime.date
+
+    def to_field(self) -> str:
+        return json.dumps(
+            [
+                self.location_href,
+                self.referrer,
+                str(self.article_id) if self.article_id else None,
+                str(self.organization_id) if self.organization_id else None,
+                self.date.isoformat(),
+            ]
+        )
+
+    @classmethod
+    def from_field(cls, field: str) -> "PageViewKey":
+        location_href, referrer, article_id, organization_id, date = json.loads(field)
+        return cls(
+            location_href=location_href,
+            referrer=referrer,
+            article_id=UUID(article_id) if article_id else None,
+            organization_id=UUID(organization_id) if organization_id else None,
+            date=datetime.date.fromisoformat(date),
+        )
+
+
+class ViewBuffer:
+    """
+    Write-behind buffer for view counters.
+
+    Views are counted in Redis hashes instead of hitting the database on each
+    hit, which causes row lock contention on popular pages. A worker cron
+    periodically drains the buffer and applies the counts in bulk.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def track_page_view(
+        self,
+        *,
+        location_href: str,
+        date: datetime.date,
+        referrer: str | None = None,
+        article_id: UUID | None = None,
+        organization_id: UUID | None = None,
+    ) -> None:
+        if article_id is None and organization_id is None:
+            raise Exception("article_id or organization_id must be set")
+
+        key = PageViewKey(location_href, referrer, article_id, organization_id, date)
+        await self.redis.hincrby(self._key(ViewCounter.page), key.to_field(), 1)
+
+    async def track_article_view(self, article_id: UUID) -> None:
+        await self.redis.hincrby(self._key(ViewCounter.article), str(article_id), 1)
+
+    async def track_advertisement_campaign_view(self, campaign_id: UUID) -> None:
+        await self.redis.hincrby(
+            self._key(ViewCounter.advertisement_campaign), str(campaign_id), 1
+        )
+
+    @contextlib.asynccontextmanager
+    async def drain_page_views(self) -> AsyncIterator[dict[PageViewKey, int]]:
+        async with self._drain(ViewCounter.page) as counts:
+            yield {PageViewKey.from_field(f): count for f, count in counts.items()}
+
+    @contextlib.asynccontextmanager
+    async def drain_article_views(self) -> AsyncIterator[dict[UUID, int]]:
+        async with self._drain(ViewCounter.article) as counts:
+            yield {UUID(f): count for f, count in counts.items()}
+
+    @contextlib.asynccontextmanager
+    async def drain_advertisement_campaign_views(
+        self,
+    ) -> AsyncIterator[dict[UUID, int]]:
+        async with self._drain(ViewCounter.advertisement_campaign) as counts:
+            yield {UUID(f): count for f, count in counts.items()}
+
+    @contextlib.asynccontextmanager
+    async def _drain(self, counter: ViewCounter) -> AsyncIterator[dict[str, int]]:
+        async with drain_hash(self.redis, self._key(counter)) as counts:
+            yield {field: int(count) for field, count in counts.items()}
+
+    def _key(self, counter: ViewCounter) -> str:
+        return f"{_KEY_PREFIX}:{counter}"
+
+
+view_buffer = ViewBuffer(redis_client)
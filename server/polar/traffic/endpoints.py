@@ -18,6 +18,7 @@ from polar.organization.service import organization as organization_service
 from polar.postgres import AsyncSession, get_db_session
 from polar.tags.api import Tags
 
+from .buffer import view_buffer
 from .schemas import (
     TrackPageView,
     TrackPageViewResponse,
@@ -36,13 +37,9 @@ router = APIRouter(prefix="", tags=["traffic"])
     response_model=TrackPageViewResponse,
     tags=[Tags.PUBLIC],
 )
-async def track_page_view(
-    track: TrackPageView,
-    session: AsyncSession = Depends(get_db_session),
-) -> TrackPageViewResponse:
+async def track_page_view(track: TrackPageView) -> TrackPageViewResponse:
     if track.article_id or track.organization_id:
-        await traffic_service.add(
-            session,
+        await view_buffer.track_page_view(
             location_href=track.location_href,
             referrer=track.referrer,
             article_id=track.article_id,
@@ -1,16 +1,58 @@
 import datetime
-from collections.abc import Sequence
-from typing import Literal
+import itertools
+from collections.abc import Mapping, Sequence
+from typing import Any, Literal
 from uuid import UUID
 
-from sqlalchemy import ColumnExpressionArgument, and_, desc, func, null, text
+from sqlalchemy import (
+    DATE,
+    BigInteger,
+    ColumnExpressionArgument,
+    Select,
+    and_,
+    desc,
+    func,
+    literal,
+    null,
+    text,
+    union_all,
+)
 
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.utils import utc_now
+from polar.models import Article, Organization
 from polar.models.traffic import Traffic
+from polar.models.traffic_rollup import TrafficRollup, TrafficRollupInterval
 from polar.postgres import AsyncSession, sql
+from polar.traffic.buffer import PageViewKey
 from polar.traffic.schemas import TrafficReferrer, TrafficStatisticsPeriod
 
+# Keep the number of bind parameters of the multi-row upsert well under
+# the 32767 limit of PostgreSQL
+ADD_VIEWS_CHUNK_SIZE = 1000
+
+# Days to wait after the end of a period before rolling it up, so views still
+# in the view buffer or tracked around midnight have landed
+ROLLUP_GRACE_DAYS = 1
+
+
+def _period_start(
+    interval: TrafficRollupInterval, date: datetime.date
+) -> datetime.date:
+    if interval == TrafficRollupInterval.month:
+        return date.replace(day=1)
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def _next_period_start(
+    interval: TrafficRollupInterval, period_start: datetime.date
+) -> datetime.date:
+    if interval == TrafficRollupInterval.month:
+        return (period_start.replace(day=28) + datetime.timedelta(days=4)).replace(
+            day=1
+        )
+    return period_start + datetime.timedelta(weeks=1)
+
 
 class TrafficService:
     async def add(
@@ -43,6 +85,58 @@ class TrafficService:
         await session.execute(do_update)
         await session.commit()
 
+    async def add_views(
+        self, session: AsyncSession, views: Mapping[PageViewKey, int]
+    ) -> None:
+        """
+        Add page views counted by the view buffer, using multi-row upserts.
+        """
+        # Views are tracked from public requests: skip the ones referencing
+        # articles or organizations that don't exist (anymore)
+        article_ids = {key.article_id for key in views if key.article_id}
+        organization_ids = {key.organization_id for key in views if key.organization_id}
+        existing_ids: set[UUID] = set()
+        if article_ids:
+            res = await session.execute(
+                sql.select(Article.id).where(Article.id.in_(article_ids))
+            )
+            existing_ids.update(res.scalars().all())
+        if organization_ids:
+            res = await session.execute(
+                sql.select(Organization.id).where(Organization.id.in_(organization_ids))
+            )
+            existing_ids.update(res.scalars().all())
+
+        # Sort the rows so concurrent upserts lock them in the same order
+        keys = sorted(
+            (
+                key
+                for key in views
+                if (key.article_id is None or key.article_id in existing_ids)
+                and (key.organization_id is None or key.organization_id in existing_ids)
+            ),
+            key=PageViewKey.to_field,
+        )
+        for chunk in itertools.batched(keys, ADD_VIEWS_CHUNK_SIZE):
+            insert_stmt = sql.insert(Traffic).values(
+                [
+                    {
+                        "location_href": key.location_href,
+                        "referrer": key.referrer,
+                        "article_id": key.article_id,
+                        "organization_id": key.organization_id,
+                        "date": key.date,
+                        "views": views[key],
+                    }
+                    for key in chunk
+                ]
+            )
+            do_update = insert_stmt.on_conflict_do_update(
+                constraint="traffic_unique_key",
+                set_=dict(views=Traffic.views + insert_stmt.excluded.views),
+            )
+            await session.execute(do_update)
+
     async def views_statistics(
         self,
         session: AsyncSession,
@@ -55,9 +149,101 @@ class TrafficService:
         group_by_article: bool,
         start_of_last_period: datetime.date | None = None,
     ) -> Sequence[TrafficStatisticsPeriod]:
+        """
+        Count views per period.
+
+        Weekly and monthly periods aligned on calendar weeks and months are
+        read from the rollups when available; the periods not rolled up yet,
+        like the current one, are computed from the raw traffic.
+        """
         if article_ids is None and organization_id is None:
             raise Exception("neither article_ids nor organization_id is set")
 
+        start_of_last_period = start_of_last_period or utc_now().date().replace(day=1)
+
+        rollup_interval: TrafficRollupInterval | None = None
+        if interval != "day" and not group_by_article:
+            rollup_interval = TrafficRollupInterval(interval)
+            if _period_start(rollup_interval, start_date) != start_date:
+                rollup_interval = None
+
+        coverage: datetime.date | None = None
+        if rollup_interval is not None:
+            coverage = await self.get_rollup_coverage(session, rollup_interval)
+
+        if rollup_interval is None or coverage is None or coverage <= start_date:
+            return await self._views_statistics_raw(
+                session,
+                article_ids=article_ids,
+                organization_id=organization_id,
+                start_date=start_date,
+                end_date=end_date,
+                interval=interval,
+                group_by_article=group_by_article,
+                start_of_last_period=start_of_last_period,
+            )
+
+        statement = (
+            sql.select(TrafficRollup.period_start, func.sum(TrafficRollup.views))
+            .where(
+                TrafficRollup.interval == rollup_interval,
+                TrafficRollup.period_start >= start_date,
+                TrafficRollup.period_start < coverage,
+            )
+            .group_by(TrafficRollup.period_start)
+        )
+        if article_ids is not None:
+            statement = statement.where(TrafficRollup.article_id.in_(article_ids))
+        if organization_id is not None:
+            statement = statement.where(
+                TrafficRollup.organization_id == organization_id
+            )
+        res = await session.execute(statement)
+        rolled_up_views: dict[datetime.date, int] = dict(res.tuples().all())
+
+        periods: list[TrafficStatisticsPeriod] = []
+        period_start = start_date
+        while (
+            period_start < coverage
+            and period_start <= end_date
+            and period_start <= start_of_last_period
+        ):
+            period_end = _next_period_start(rollup_interval, period_start)
+            periods.append(
+                TrafficStatisticsPeriod(
+                    start_date=period_start,
+                    end_date=period_end,
+                    views=rolled_up_views.get(period_start, 0),
+                )
+            )
+            period_start = period_end
+
+        if period_start <= end_date and period_start <= start_of_last_period:
+            periods += await self._views_statistics_raw(
+                session,
+                article_ids=article_ids,
+                organization_id=organization_id,
+                start_date=period_start,
+                end_date=end_date,
+                interval=interval,
+                group_by_article=group_by_article,
+                start_of_last_period=start_of_last_period,
+            )
+
+        return periods
+
+    async def _views_statistics_raw(
+        self,
+        session: AsyncSession,
+        *,
+        article_ids: list[UUID] | None,
+        organization_id: UUID | None,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        interval: Literal["month", "week", "day"],
+        group_by_article: bool,
+        start_of_last_period: datetime.date,
+    ) -> Sequence[TrafficStatisticsPeriod]:
         interval_txt = {
             "month": "interval 'P1M'",
             "week": "interval 'P1W'",
@@ -71,8 +257,6 @@ class TrafficService:
         ).column_valued("start_date")
         end_date_column = start_date_column + sql_interval
 
-        start_of_last_period = start_of_last_period or utc_now().date().replace(day=1)
-
         joinclauses: list[ColumnExpressionArgument[bool]] = []
         if article_ids is not None:
             joinclauses.append(Traffic.article_id.in_(article_ids))
@@ -124,17 +308,62 @@ class TrafficService:
         end_date: datetime.date,
         pagination: PaginationParams,
     ) -> tuple[Sequence[TrafficReferrer], int]:
+        """
+        Count views per referrer.
+
+        The months fully included in the range and already rolled up are read
+        from the monthly rollups; the edges of the range from the raw traffic.
+        """
+        raw_ranges = [(start_date, end_date)]
+        parts: list[Select[Any]] = []
+
+        coverage = await self.get_rollup_coverage(session, TrafficRollupInterval.month)
+        if coverage is not None:
+            first_month = start_date.replace(day=1)
+            if first_month != start_date:
+                first_month = _next_period_start(
+                    TrafficRollupInterval.month, first_month
+                )
+            months_end = min(
+                coverage, (end_date + datetime.timedelta(days=1)).replace(day=1)
+            )
+            if first_month < months_end:
+                parts.append(
+                    sql.select(
+                        TrafficRollup.referrer, TrafficRollup.views.label("views")
+                    ).where(
+                        TrafficRollup.interval == TrafficRollupInterval.month,
+                        TrafficRollup.article_id.in_(article_ids),
+                        TrafficRollup.period_start >= first_month,
+                        TrafficRollup.period_start < months_end,
+                        TrafficRollup.referrer.is_not(None),
+                        TrafficRollup.referrer != "",
+                    )
+                )
+                raw_ranges = [
+                    (start_date, first_month - datetime.timedelta(days=1)),
+                    (months_end, end_date),
+                ]
+
+        for raw_start_date, raw_end_date in raw_ranges:
+            if raw_start_date > raw_end_date:
+                continue
+            parts.append(
+                sql.select(Traffic.referrer, Traffic.views.label("views")).where(
+                    Traffic.article_id.in_(article_ids),
+                    Traffic.date >= raw_start_date,
+                    Traffic.date <= raw_end_date,
+                    Traffic.referrer.is_not(None),
+                    Traffic.referrer != "",
+                )
+            )
+
+        views = union_all(*parts).subquery()
+        total_views = func.sum(views.c.views).cast(BigInteger)
         statement = (
-            sql.select(Traffic.referrer, func.sum(Traffic.views))
-            .where(
-                Traffic.article_id.in_(article_ids),
-                Traffic.date >= start_date,
-                Traffic.date <= end_date,
-                Traffic.referrer.is_not(None),
-                Traffic.referrer != "",
-            )
-            .group_by(Traffic.referrer)
-            .order_by(desc(func.sum(Traffic.views)))
+            sql.select(views.c.referrer, total_views)
+            .group_by(views.c.referrer)
+            .order_by(desc(total_views))
         )
 
         results, count = await paginate(session, statement, pagination=pagination)
@@ -147,5 +376,83 @@ class TrafficService:
             for (referrer, views) in results
         ], count
 
+    async def get_rollup_coverage(
+        self, session: AsyncSession, interval: TrafficRollupInterval
+    ) -> datetime.date | None:
+        """
+        Return the end of the periods covered by the rollups, if any.
+        """
+        last_period_start = await session.scalar(
+            sql.select(func.max(TrafficRollup.period_start)).where(
+                TrafficRollup.interval == interval
+            )
+        )
+        if last_period_start is None:
+            return None
+        return _next_period_start(interval, last_period_start)
+
+    async def refresh_rollups(
+        self,
+        session: AsyncSession,
+        interval: TrafficRollupInterval,
+        *,
+        today: datetime.date | None = None,
+    ) -> None:
+        """
+        Roll up the completed periods since the last refresh.
+        """
+        today = today or utc_now().date()
+        cutoff = _period_start(
+            interval, today - datetime.timedelta(days=ROLLUP_GRACE_DAYS)
+        )
+
+        start = await self.get_rollup_coverage(session, interval)
+        if start is None:
+            first_date = await session.scalar(sql.select(func.min(Traffic.date)))
+            if first_date is None:
+                return
+            start = _period_start(interval, first_date)
+
+        if start >= cutoff:
+            return
+
+        period_start = func.date_trunc(interval.value, Traffic.date).cast(DATE)
+        select_stmt = (
+            sql.select(
+                func.gen_random_uuid(),
+                literal(interval.value),
+                period_start,
+                Traffic.article_id,
+                Traffic.organization_id,
+                Traffic.referrer,
+                func.sum(Traffic.views),
+            )
+            .where(Traffic.date >= start, Traffic.date < cutoff)
+            .group_by(
+                period_start,
+                Traffic.article_id,
+                Traffic.organization_id,
+                Traffic.referrer,
+            )
+        )
+        insert_stmt = sql.insert(TrafficRollup).from_select(
+            [
+                TrafficRollup.id,
+                TrafficRollup.interval,
+                TrafficRollup.period_start,
+                TrafficRollup.article_id,
+                TrafficRollup.organization_id,
+                TrafficRollup.referrer,
+                TrafficRollup.views,
+            ],
+            select_stmt,
+        )
+        await session.execute(
+            insert_stmt.on_conflict_do_update(
+                constraint="traffic_rollups_unique_key",
+                set_=dict(views=insert_stmt.excluded.views),
+            )
+        )
+
 
 traffic_service = TrafficService()
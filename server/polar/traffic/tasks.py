@@ -0,0 +1,47 @@
+import structlog
+
+from polar.advertisement.service import (
+    advertisement_campaign_service,
+)
+from polar.article.service import article_service
+from polar.logging import Logger
+from polar.models.traffic_rollup import TrafficRollupInterval
+from polar.worker import AsyncSessionMaker, JobContext, interval
+
+from .buffer import view_buffer
+from .service import traffic_service
+
+log: Logger = structlog.get_logger()
+
+
+@interval(second={0, 15, 30, 45})
+async def traffic_flush_views(ctx: JobContext) -> None:
+    """
+    Apply the view counts buffered in Redis to the database.
+    """
+    async with AsyncSessionMaker(ctx) as session:
+        async with view_buffer.drain_page_views() as page_views:
+            await traffic_service.add_views(session, page_views)
+            await session.commit()
+
+        async with view_buffer.drain_article_views() as article_views:
+            await article_service.add_web_views(session, article_views)
+            await session.commit()
+
+        async with view_buffer.drain_advertisement_campaign_views() as ad_views:
+            await advertisement_campaign_service.add_views(session, ad_views)
+            await session.commit()
+
+    log.info(
+        "traffic.flush_views",
+        page_views=len(page_views),
+        article_views=len(article_views),
+        advertisement_campaign_views=len(ad_views),
+    )
+
+
+@interval(minute=5)
+async def traffic_refresh_rollups(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        for rollup_interval in TrafficRollupInterval:
+            await traffic_service.refresh_rollups(session, rollup_interval)
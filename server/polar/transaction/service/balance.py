@@ -12,6 +12,7 @@ from polar.models.donation import Donation
 from polar.models.transaction import PlatformFeeType, TransactionType
 from polar.postgres import AsyncSession
 
+from .balance_snapshot import balance_snapshot as balance_snapshot_service
 from .base import BaseTransactionService, BaseTransactionServiceError
 
 log: Logger = structlog.get_logger()
@@ -84,6 +85,9 @@ class BalanceTransactionService(BaseTransactionService):
         session.add(outgoing_transaction)
         session.add(incoming_transaction)
         await session.flush()
+        await balance_snapshot_service.record(
+            session, outgoing_transaction, incoming_transaction
+        )
 
         if destination_account is not None:
             await account_service.check_review_threshold(session, destination_account)
@@ -134,7 +138,7 @@ class BalanceTransactionService(BaseTransactionService):
         issue_reward: IssueReward | None = None,
         donation: Donation | None = None,
     ) -> tuple[Transaction, Transaction]:
-        payment_intent = stripe_service.retrieve_intent(payment_intent_id)
+        payment_intent = await stripe_service.retrieve_intent(payment_intent_id)
         assert payment_intent.latest_charge is not None
         charge_id = get_expandable_id(payment_intent.latest_charge)
 
@@ -208,6 +212,9 @@ class BalanceTransactionService(BaseTransactionService):
         session.add(outgoing_reversal)
         session.add(incoming_reversal)
         await session.flush()
+        await balance_snapshot_service.record(
+            session, outgoing_reversal, incoming_reversal
+        )
 
         return (outgoing_reversal, incoming_reversal)
 
@@ -0,0 +1,218 @@
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import structlog
+from sqlalchemy import and_, func, or_, select
+
+from polar.kit.utils import utc_now
+from polar.logging import Logger
+from polar.models import AccountBalanceSnapshot, Transaction
+from polar.models.transaction import TransactionType
+from polar.postgres import AsyncSession, sql
+
+log: Logger = structlog.get_logger()
+
+
+@dataclass
+class BalanceSnapshotDrift:
+    account_id: uuid.UUID
+    type: TransactionType
+    snapshot_amount: int
+    ledger_amount: int
+    snapshot_account_amount: int
+    ledger_account_amount: int
+
+
+class BalanceSnapshotService:
+    async def record(self, session: AsyncSession, *transactions: Transaction) -> None:
+        """
+        Add flushed transactions to the running sums of their account.
+
+        Must be called by every service writing transactions on an account,
+        in the same database transaction.
+        """
+        deltas: dict[tuple[uuid.UUID, TransactionType], tuple[int, int, int]] = {}
+        for transaction in transactions:
+            if transaction.account_id is None:
+                continue
+            key = (transaction.account_id, transaction.type)
+            amount, account_amount, count = deltas.get(key, (0, 0, 0))
+            deltas[key] = (
+                amount + transaction.amount,
+                account_amount + transaction.account_amount,
+                count + 1,
+            )
+
+        if not deltas:
+            return
+
+        insert_stmt = sql.insert(AccountBalanceSnapshot).values(
+            [
+                {
+                    "account_id": account_id,
+                    "type": type,
+                    "amount": amount,
+                    "account_amount": account_amount,
+                    "transactions_count": count,
+                }
+                # Sort the rows so concurrent writers lock them in the same order
+                for (account_id, type), (amount, account_amount, count) in sorted(
+                    deltas.items()
+                )
+            ]
+        )
+        await session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[
+                    AccountBalanceSnapshot.account_id,
+                    AccountBalanceSnapshot.type,
+                ],
+                set_={
+                    "amount": AccountBalanceSnapshot.amount
+                    + insert_stmt.excluded.amount,
+                    "account_amount": AccountBalanceSnapshot.account_amount
+                    + insert_stmt.excluded.account_amount,
+                    "transactions_count": AccountBalanceSnapshot.transactions_count
+                    + insert_stmt.excluded.transactions_count,
+                    "modified_at": utc_now(),
+                },
+            )
+        )
+
+    async def get_sums(
+        self, session: AsyncSession, account_id: uuid.UUID
+    ) -> dict[TransactionType, tuple[int, int]]:
+        """
+        Return the sums of `amount` and `account_amount` of the account's
+        transactions, per transaction type.
+        """
+        statement = select(
+            AccountBalanceSnapshot.type,
+            AccountBalanceSnapshot.amount,
+            AccountBalanceSnapshot.account_amount,
+        ).where(AccountBalanceSnapshot.account_id == account_id)
+        result = await session.execute(statement)
+        return {
+            TransactionType(type): (amount, account_amount)
+            for type, amount, account_amount in result.tuples().all()
+        }
+
+    async def rebuild(
+        self, session: AsyncSession, account_id: uuid.UUID | None = None
+    ) -> None:
+        """
+        Recompute the snapshots from the transactions, for one account or all
+        of them. Used to repair drift reported by `reconcile`.
+        """
+        ledger = (
+            select(
+                Transaction.account_id,
+                Transaction.type,
+                func.sum(Transaction.amount),
+                func.sum(Transaction.account_amount),
+                func.count(Transaction.id),
+                func.now(),
+            )
+            .where(Transaction.account_id.is_not(None))
+            .group_by(Transaction.account_id, Transaction.type)
+        )
+        delete_stmt = sql.delete(AccountBalanceSnapshot)
+        if account_id is not None:
+            ledger = ledger.where(Transaction.account_id == account_id)
+            delete_stmt = delete_stmt.where(
+                AccountBalanceSnapshot.account_id == account_id
+            )
+
+        await session.execute(delete_stmt)
+        await session.execute(
+            sql.insert(AccountBalanceSnapshot).from_select(
+                [
+                    AccountBalanceSnapshot.account_id,
+                    AccountBalanceSnapshot.type,
+                    AccountBalanceSnapshot.amount,
+                    AccountBalanceSnapshot.account_amount,
+                    AccountBalanceSnapshot.transactions_count,
+                    AccountBalanceSnapshot.modified_at,
+                ],
+                ledger,
+            )
+        )
+
+    async def reconcile(self, session: AsyncSession) -> Sequence[BalanceSnapshotDrift]:
+        """
+        Compare the snapshots with the sums computed from the transactions,
+        and report the ones that drifted.
+        """
+        ledger = (
+            select(
+                Transaction.account_id,
+                Transaction.type,
+                func.sum(Transaction.amount).label("amount"),
+                func.sum(Transaction.account_amount).label("account_amount"),
+            )
+            .where(Transaction.account_id.is_not(None))
+            .group_by(Transaction.account_id, Transaction.type)
+            .subquery()
+        )
+        statement = (
+            select(
+                func.coalesce(ledger.c.account_id, AccountBalanceSnapshot.account_id),
+                func.coalesce(ledger.c.type, AccountBalanceSnapshot.type),
+                func.coalesce(AccountBalanceSnapshot.amount, 0),
+                func.coalesce(ledger.c.amount, 0),
+                func.coalesce(AccountBalanceSnapshot.account_amount, 0),
+                func.coalesce(ledger.c.account_amount, 0),
+            )
+            .select_from(ledger)
+            .join(
+                AccountBalanceSnapshot,
+                onclause=and_(
+                    AccountBalanceSnapshot.account_id == ledger.c.account_id,
+                    AccountBalanceSnapshot.type == ledger.c.type,
+                ),
+                full=True,
+            )
+            .where(
+                or_(
+                    func.coalesce(AccountBalanceSnapshot.amount, 0)
+                    != func.coalesce(ledger.c.amount, 0),
+                    func.coalesce(AccountBalanceSnapshot.account_amount, 0)
+                    != func.coalesce(ledger.c.account_amount, 0),
+                )
+            )
+        )
+        result = await session.execute(statement)
+
+        drifts = [
+            BalanceSnapshotDrift(
+                account_id=account_id,
+                type=TransactionType(type),
+                snapshot_amount=snapshot_amount,
+                ledger_amount=ledger_amount,
+                snapshot_account_amount=snapshot_account_amount,
+                ledger_account_amount=ledger_account_amount,
+            )
+            for (
+                account_id,
+                type,
+                snapshot_amount,
+                ledger_amount,
+                snapshot_account_amount,
+                ledger_account_amount,
+            ) in result.tuples().all()
+        ]
+        for drift in drifts:
+            log.warning(
+                "transaction.balance_snapshot.drift",
+                account_id=str(drift.account_id),
+                type=drift.type,
+                snapshot_amount=drift.snapshot_amount,
+                ledger_amount=drift.ledger_amount,
+                snapshot_account_amount=drift.snapshot_account_amount,
+                ledger_account_amount=drift.ledger_account_amount,
+            )
+        return drifts
+
+
+balance_snapshot = BalanceSnapshotService()
@@ -77,7 +77,7 @@ class PaymentTransactionService(BaseTransactionService):
         tax_state = None
         pledge_invoice = False
         if charge.invoice:
-            stripe_invoice = stripe_service.get_invoice(
+            stripe_invoice = await stripe_service.get_invoice(
                 get_expandable_id(charge.invoice)
             )
             if stripe_invoice.tax is not None:
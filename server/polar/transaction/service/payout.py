@@ -23,6 +23,7 @@ from polar.postgres import AsyncSession
 from polar.transaction.schemas import PayoutEstimate
 from polar.worker import enqueue_job
 
+from .balance_snapshot import balance_snapshot as balance_snapshot_service
 from .base import BaseTransactionService, BaseTransactionServiceError
 from .platform_fee import PayoutAmountTooLow
 from .platform_fee import platform_fee_transaction as platform_fee_transaction_service
@@ -185,6 +186,7 @@ class PayoutTransactionService(BaseTransactionService):
 
         session.add(transaction)
         await session.flush()
+        await balance_snapshot_service.record(session, transaction)
 
         enqueue_job("payout.created", payout_id=transaction.id)
 
@@ -205,7 +207,7 @@ class PayoutTransactionService(BaseTransactionService):
             account = payout.account
             assert account is not None
             assert account.stripe_id is not None
-            _, balance = stripe_service.retrieve_balance(account.stripe_id)
+            _, balance = await stripe_service.retrieve_balance(account.stripe_id)
 
             if balance < -payout.account_amount:
                 log.info(
@@ -220,7 +222,7 @@ class PayoutTransactionService(BaseTransactionService):
                 continue
 
             # Trigger a payout on the Stripe Connect account
-            stripe_payout = stripe_service.create_payout(
+            stripe_payout = await stripe_service.create_payout(
                 stripe_account=account.stripe_id,
                 amount=-payout.account_amount,
                 currency=payout.account_currency,
@@ -278,7 +280,7 @@ class PayoutTransactionService(BaseTransactionService):
         balance_transactions = stripe_service.list_balance_transactions(
             account_id=account.stripe_id, payout=payout.id
         )
-        for balance_transaction in balance_transactions:
+        async for balance_transaction in balance_transactions:
             source = balance_transaction.source
             if source is not None:
                 source_transfer: str | None = getattr(source, "source_transfer", None)
@@ -305,6 +307,7 @@ class PayoutTransactionService(BaseTransactionService):
 
         session.add(transaction)
         await session.flush()
+        await balance_snapshot_service.record(session, transaction)
 
         return transaction
 
@@ -447,7 +450,7 @@ class PayoutTransactionService(BaseTransactionService):
         assert account.stripe_id is not None
         for source_transaction, amount, balance_transaction in transfers:
             if balance_transaction.transfer_id is None:
-                stripe_transfer = stripe_service.transfer(
+                stripe_transfer = await stripe_service.transfer(
                     account.stripe_id,
                     amount,
                     source_transaction=source_transaction,
@@ -464,10 +467,10 @@ class PayoutTransactionService(BaseTransactionService):
             # Legacy behavior from the time when we automatically
             # transferred each balance
             else:
-                stripe_transfer = stripe_service.get_transfer(
+                stripe_transfer = await stripe_service.get_transfer(
                     balance_transaction.transfer_id
                 )
-                stripe_service.update_transfer(
+                await stripe_service.update_transfer(
                     stripe_transfer.id,
                     metadata={"payout_transaction_id": str(transaction.id)},
                 )
@@ -475,7 +478,7 @@ class PayoutTransactionService(BaseTransactionService):
             # Different source and destination currencies: get the converted amount
             if transaction.currency != transaction.account_currency:
                 assert stripe_transfer.destination_payment is not None
-                stripe_destination_charge = stripe_service.get_charge(
+                stripe_destination_charge = await stripe_service.get_charge(
                     get_expandable_id(stripe_transfer.destination_payment),
                     stripe_account=account.stripe_id,
                     expand=["balance_transaction"],
@@ -1,10 +1,9 @@
 import uuid
 from collections.abc import Sequence
 from enum import StrEnum
-from typing import Any, cast
+from typing import Any
 
 from sqlalchemy import Select, UnaryExpression, asc, desc, func, or_, select
-from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import aliased, joinedload, subqueryload
 
 from polar.authz.service import AccessType, Authz
@@ -30,6 +29,7 @@ from ..schemas import (
     TransactionsBalance,
     TransactionsSummary,
 )
+from .balance_snapshot import balance_snapshot as balance_snapshot_service
 from .base import BaseTransactionService
 
 
@@ -186,48 +186,15 @@ class TransactionService(BaseTransactionService):
         if not await authz.can(user, AccessType.read, account):
             raise NotPermitted()
 
-        statement = select(
-            cast(type[int], func.coalesce(func.sum(Transaction.amount), 0)),
-            cast(type[int], func.coalesce(func.sum(Transaction.account_amount), 0)),
-            cast(
-                type[int],
-                func.coalesce(
-                    func.sum(Transaction.amount).filter(
-                        Transaction.type == TransactionType.payout
-                    ),
-                    0,
-                ),
-            ),
-            cast(
-                type[int],
-                func.coalesce(
-                    func.sum(Transaction.account_amount).filter(
-                        Transaction.type == TransactionType.payout
-                    ),
-                    0,
-                ),
-            ),
-        ).where(Transaction.account_id == account.id)
-
-        result = await session.execute(statement)
+        sums = await balance_snapshot_service.get_sums(session, account.id)
+        amount = sum(amount for amount, _ in sums.values())
+        account_amount = sum(account_amount for _, account_amount in sums.values())
+        payout_amount, account_payout_amount = sums.get(TransactionType.payout, (0, 0))
 
         currency = "usd"  # FIXME: Main Polar currency
         account_currency = account.currency
         assert account_currency is not None
 
-        try:
-            (
-                amount,
-                account_amount,
-                payout_amount,
-                account_payout_amount,
-            ) = result.one()._tuple()
-        except NoResultFound:
-            amount = 0
-            account_amount = 0
-            payout_amount = 0
-            account_payout_amount = 0
-
         return TransactionsSummary(
             balance=TransactionsBalance(
                 currency=currency,
@@ -250,8 +217,15 @@ class TransactionService(BaseTransactionService):
         *,
         type: TransactionType | None = None,
     ) -> int:
+        if account_id is not None:
+            sums = await balance_snapshot_service.get_sums(session, account_id)
+            if type is not None:
+                return sums.get(type, (0, 0))[0]
+            return sum(amount for amount, _ in sums.values())
+
+        # Polar's own account isn't snapshotted
         statement = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-            Transaction.account_id == account_id
+            Transaction.account_id.is_(None)
         )
 
         if type is not None:
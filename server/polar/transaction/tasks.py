@@ -14,6 +14,7 @@ from polar.worker import (
     task,
 )
 
+from .service.balance_snapshot import balance_snapshot as balance_snapshot_service
 from .service.payout import payout_transaction as payout_transaction_service
 from .service.processor_fee import (
     processor_fee_transaction as processor_fee_transaction_service,
@@ -36,6 +37,12 @@ async def sync_stripe_fees(ctx: JobContext) -> None:
         await processor_fee_transaction_service.sync_stripe_fees(session)
 
 
+@interval(hour=3, minute=0)
+async def balance_snapshots_reconcile(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await balance_snapshot_service.reconcile(session)
+
+
 @interval(minute=15)
 async def trigger_stripe_payouts(ctx: JobContext) -> None:
     async with AsyncSessionMaker(ctx) as session:
@@ -1,5 +1,5 @@
 import structlog
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, Request, Response
 
 from polar.auth.dependencies import Authenticator, WebUser
 from polar.auth.models import AuthSubject
@@ -89,7 +89,10 @@ async def set_account(
     "/logout",
     deprecated=True,  # Use /api/v1/auth/logout instead, which also has support for custom domains
 )
-async def logout(response: Response, auth_subject: WebUser) -> LogoutResponse:
+async def logout(
+    request: Request, response: Response, auth_subject: WebUser
+) -> LogoutResponse:
+    await AuthService.invalidate_auth_cookie(request)
     return AuthService.generate_logout_response(response=response)
 
 
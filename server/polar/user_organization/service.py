@@ -1,13 +1,17 @@
-from collections.abc import Sequence
+import json
+import secrets
+from collections.abc import Mapping, Sequence
 from uuid import UUID
 
 import structlog
 from sqlalchemy.orm import joinedload
 
+from polar.config import settings
 from polar.enums import Platforms
 from polar.kit.utils import utc_now
 from polar.models import Organization, UserOrganization
 from polar.postgres import AsyncSession, sql
+from polar.redis import redis
 
 log = structlog.get_logger()
 
@@ -34,6 +38,48 @@ class UserOrganizationervice:
         res = await session.execute(stmt)
         return res.scalars().unique().all()
 
+    async def list_user_ids_by_org(
+        self, session: AsyncSession, org_id: UUID
+    ) -> list[UUID]:
+        """
+        List the user IDs of the organization members.
+
+        The list is cached in Redis and invalidated when a member is added
+        or removed, so it's cheap to call on hot paths like event publishing.
+
+        Lists are cached under a version of the organization's members, read
+        before querying them: if they change in the meantime, the stale list
+        is stored under the previous version, which is never read again.
+        """
+        version = await redis.get(self._members_version_key(org_id)) or "0"
+        cache_key = self._members_cache_key(org_id, version)
+        cached = await redis.get(cache_key)
+        if cached is not None:
+            return [UUID(user_id) for user_id in json.loads(cached)]
+
+        stmt = sql.select(UserOrganization.user_id).where(
+            UserOrganization.organization_id == org_id,
+            UserOrganization.deleted_at.is_(None),
+        )
+        res = await session.execute(stmt)
+        user_ids = list(res.scalars().all())
+
+        await redis.set(
+            cache_key,
+            json.dumps([str(user_id) for user_id in user_ids]),
+            ex=settings.USER_ORGANIZATION_MEMBERS_CACHE_TTL_SECONDS,
+        )
+        return user_ids
+
+    async def invalidate_members_cache(self, org_id: UUID) -> None:
+        # Outlive the lists cached under the previous version:
+        # once expired, the version is back to "0"
+        await redis.set(
+            self._members_version_key(org_id),
+            secrets.token_hex(8),
+            ex=settings.USER_ORGANIZATION_MEMBERS_CACHE_TTL_SECONDS * 2,
+        )
+
     async def list_by_user_id(
         self, session: AsyncSession, user_id: UUID
     ) -> Sequence[UserOrganization]:
@@ -94,16 +140,60 @@ class UserOrganizationervice:
         res = await session.execute(stmt)
         return res.scalars().unique().one_or_none()
 
-    async def remove_member(
+    async def upsert_members(
+        self,
+        session: AsyncSession,
+        organization_id: UUID,
+        members: Mapping[UUID, bool],
+    ) -> None:
+        """
+        Add members, or update their admin status, in a single statement.
+
+        `members` maps user IDs to their admin status.
+        Previously removed members are restored.
+        """
+        if not members:
+            return
+
+        insert_stmt = sql.insert(UserOrganization).values(
+            [
+                {
+                    "user_id": user_id,
+                    "organization_id": organization_id,
+                    "is_admin": is_admin,
+                }
+                for user_id, is_admin in members.items()
+            ]
+        )
+        await session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[
+                    UserOrganization.user_id,
+                    UserOrganization.organization_id,
+                ],
+                set_={
+                    "is_admin": insert_stmt.excluded.is_admin,
+                    "deleted_at": None,
+                    "modified_at": utc_now(),
+                },
+            )
+        )
+        await session.commit()
+        await self.invalidate_members_cache(organization_id)
+
+    async def remove_members(
         self,
         session: AsyncSession,
-        user_id: UUID,
         organization_id: UUID,
+        user_ids: Sequence[UUID],
     ) -> None:
+        if not user_ids:
+            return
+
         stmt = (
             sql.update(UserOrganization)
             .where(
-                UserOrganization.user_id == user_id,
+                UserOrganization.user_id.in_(user_ids),
                 UserOrganization.organization_id == organization_id,
                 UserOrganization.deleted_at.is_(None),
             )
@@ -111,6 +201,13 @@ class UserOrganizationervice:
         )
         await session.execute(stmt)
         await session.commit()
+        await self.invalidate_members_cache(organization_id)
+
+    def _members_cache_key(self, org_id: UUID, version: str) -> str:
+        return f"polar:user_organization:members:{org_id}:{version}"
+
+    def _members_version_key(self, org_id: UUID) -> str:
+        return f"polar:user_organization:members_version:{org_id}"
 
 
 user_organization = UserOrganizationervice()
@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import socket
+import time
+from collections.abc import AsyncIterator, Mapping
+from typing import Any, TypeAlias
+from uuid import UUID
+
+import httpx
+import structlog
+
+from polar.config import settings
+from polar.logging import Logger
+
+log: Logger = structlog.get_logger()
+
+AddrInfo: TypeAlias = tuple[
+    socket.AddressFamily, socket.SocketKind, int, str, tuple[Any, ...]
+]
+
+
+class DNSCache:
+    """
+    Resolve hostnames without blocking the event loop and remember the result
+    for a short amount of time.
+
+    Resolution is delegated to `loop.getaddrinfo`, which runs the lookup in the
+    default executor. Failed lookups are not cached.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, list[AddrInfo]]] = {}
+
+    async def resolve(self, hostname: str) -> list[AddrInfo]:
+        now = time.monotonic()
+        entry = self._entries.get(hostname)
+        if entry is not None:
+            expires_at, info = entry
+            if expires_at > now:
+                return info
+            del self._entries[hostname]
+
+        loop = asyncio.get_running_loop()
+        info = await loop.getaddrinfo(hostname, 0)
+        self._entries[hostname] = (now + self.ttl, info)
+        return info
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class WebhookHTTPClient:
+    """
+    Shared HTTP client used to deliver webhook events.
+
+    Connections are pooled and kept alive per origin, so successive deliveries
+    to the same endpoint reuse their TCP/TLS connection.
+
+    The number of in-flight requests per webhook endpoint is capped, so one slow
+    endpoint can't take every connection of the pool.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        max_concurrency_per_endpoint: int,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            transport=transport,
+        )
+        self.max_concurrency_per_endpoint = max_concurrency_per_endpoint
+        self._endpoint_semaphores: dict[UUID, asyncio.Semaphore] = {}
+        self._endpoint_users: dict[UUID, int] = {}
+
+    async def post(
+        self,
+        endpoint_id: UUID,
+        url: str,
+        *,
+        content: str,
+        headers: Mapping[str, str],
+    ) -> httpx.Response:
+        async with self._endpoint_slot(endpoint_id):
+            return await self.client.post(url, content=content, headers=headers)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    @contextlib.asynccontextmanager
+    async def _endpoint_slot(self, endpoint_id: UUID) -> AsyncIterator[None]:
+        semaphore = self._endpoint_semaphores.get(endpoint_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency_per_endpoint)
+            self._endpoint_semaphores[endpoint_id] = semaphore
+        self._endpoint_users[endpoint_id] = self._endpoint_users.get(endpoint_id, 0) + 1
+
+        try:
+            async with semaphore:
+                yield
+        finally:
+            # Forget about the endpoint once nobody is using or waiting for it,
+            # so the registry doesn't grow with every endpoint we ever called.
+            self._endpoint_users[endpoint_id] -= 1
+            if self._endpoint_users[endpoint_id] == 0:
+                del self._endpoint_users[endpoint_id]
+                del self._endpoint_semaphores[endpoint_id]
+
+
+dns_cache = DNSCache(settings.WEBHOOK_DNS_CACHE_TTL_SECONDS)
+webhook_http_client = WebhookHTTPClient(
+    timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+    max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.WEBHOOK_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.WEBHOOK_KEEPALIVE_EXPIRY_SECONDS,
+    max_concurrency_per_endpoint=settings.WEBHOOK_MAX_CONCURRENCY_PER_ENDPOINT,
+)
@@ -13,9 +13,10 @@ from polar.postgres import AsyncSession, get_db_session
 from polar.tags.api import Tags
 
 from .auth import WebhooksRead, WebhooksWrite
+from .health import webhook_endpoint_health
 from .schemas import WebhookDelivery as WebhookDeliverySchema
 from .schemas import WebhookEndpoint as WebhookEndpointSchema
-from .schemas import WebhookEndpointCreate, WebhookEndpointUpdate
+from .schemas import WebhookEndpointCreate, WebhookEndpointHealth, WebhookEndpointUpdate
 from .service import webhook as webhook_service
 
 log = structlog.get_logger()
@@ -79,6 +80,35 @@ async def get_webhook_endpoint(
     return endpoint
 
 
+@router.get(
+    "/endpoints/{id}/health",
+    response_model=WebhookEndpointHealth,
+    tags=[Tags.PUBLIC],
+    responses={404: WebhookEndpointNotFound},
+)
+async def get_webhook_endpoint_health(
+    id: WebhookEndpointID,
+    auth_subject: WebhooksRead,
+    session: AsyncSession = Depends(get_db_session),
+    authz: Authz = Depends(Authz.authz),
+) -> WebhookEndpointHealth:
+    """
+    Get the health of a webhook endpoint.
+
+    When too many deliveries to an endpoint fail, it's marked as unhealthy
+    and its events are held back until it recovers.
+    """
+    endpoint = await webhook_service.get_endpoint(session, auth_subject, id)
+    if not endpoint:
+        raise ResourceNotFound()
+
+    if not await authz.can(auth_subject.subject, AccessType.write, endpoint):
+        raise Unauthorized()
+
+    health = await webhook_endpoint_health.get_health(endpoint.id)
+    return WebhookEndpointHealth.model_validate(health)
+
+
 @router.post(
     "/endpoints",
     response_model=WebhookEndpointSchema,
@@ -0,0 +1,241 @@
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import StrEnum
+from uuid import UUID
+
+import structlog
+
+from polar.config import settings
+from polar.logging import Logger
+from polar.redis import Redis
+from polar.redis import redis as redis_client
+
+log: Logger = structlog.get_logger()
+
+_KEY_PREFIX = "polar:webhook_endpoint_health"
+_OPEN_CIRCUITS_KEY = f"{_KEY_PREFIX}:open"
+
+
+class CircuitState(StrEnum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class DeliveryDecision(StrEnum):
+    deliver = "deliver"
+    probe = "probe"
+    park = "park"
+
+
+@dataclass
+class EndpointHealth:
+    state: CircuitState
+    success_rate: float | None
+    window_size: int
+    last_failure_at: datetime | None
+    opened_at: datetime | None
+    parked_events: int
+
+
+class WebhookEndpointHealthService:
+    """
+    Circuit breaker tracking the health of webhook endpoints.
+
+    For each endpoint, we keep in Redis the outcome of the last deliveries and
+    the state of the circuit:
+
+    * `closed`: the endpoint is healthy, events are delivered.
+    * `open`: too many deliveries failed, events are parked until the endpoint
+    recovers.
+    * `half_open`: the cooldown is over and a single probe delivery is in flight.
+    If it succeeds, the circuit closes and parked events are drained.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def get_health(self, endpoint_id: UUID) -> EndpointHealth:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._state_key(endpoint_id))
+            pipe.lrange(self._outcomes_key(endpoint_id), 0, -1)
+            pipe.llen(self._parked_key(endpoint_id))
+            state, outcomes, parked_events = await pipe.execute()
+
+        success_rate: float | None = None
+        if outcomes:
+            success_rate = outcomes.count("1") / len(outcomes)
+
+        return EndpointHealth(
+            state=CircuitState(state.get("state", CircuitState.closed)),
+            success_rate=success_rate,
+            window_size=len(outcomes),
+            last_failure_at=_parse_timestamp(state.get("last_failure_at")),
+            opened_at=_parse_timestamp(state.get("opened_at")),
+            parked_events=parked_events,
+        )
+
+    async def before_delivery(self, endpoint_id: UUID) -> DeliveryDecision:
+        """
+        Decide what to do with a delivery to this endpoint.
+
+        When the circuit is open and its cooldown is over, the first caller
+        becomes the probe; the others are parked until the probe returns.
+        """
+        state = await self.redis.hgetall(self._state_key(endpoint_id))
+        circuit_state = CircuitState(state.get("state", CircuitState.closed))
+
+        if circuit_state == CircuitState.closed:
+            return DeliveryDecision.deliver
+
+        opened_at = _parse_float(state.get("opened_at")) or 0.0
+        if time.time() - opened_at < settings.WEBHOOK_CIRCUIT_OPEN_SECONDS:
+            return DeliveryDecision.park
+
+        probe_acquired = await self.redis.set(
+            self._probe_key(endpoint_id),
+            "1",
+            nx=True,
+            ex=int(settings.WEBHOOK_TIMEOUT_SECONDS) + 10,
+        )
+        if not probe_acquired:
+            return DeliveryDecision.park
+
+        await self.redis.hset(
+            self._state_key(endpoint_id), "state", CircuitState.half_open
+        )
+        return DeliveryDecision.probe
+
+    async def record_success(self, endpoint_id: UUID) -> CircuitState:
+        """
+        Record a successful delivery.
+
+        Returns the previous state of the circuit: if it wasn't closed,
+        the caller should drain the parked events.
+        """
+        state_key = self._state_key(endpoint_id)
+        previous_state = CircuitState(
+            await self.redis.hget(state_key, "state") or CircuitState.closed
+        )
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if previous_state != CircuitState.closed:
+                pipe.delete(self._outcomes_key(endpoint_id))
+                pipe.hset(state_key, "state", CircuitState.closed)
+                pipe.hdel(state_key, "opened_at")
+                pipe.delete(self._probe_key(endpoint_id))
+                pipe.srem(_OPEN_CIRCUITS_KEY, str(endpoint_id))
+            pipe.lpush(self._outcomes_key(endpoint_id), "1")
+            pipe.ltrim(
+                self._outcomes_key(endpoint_id),
+                0,
+                settings.WEBHOOK_CIRCUIT_WINDOW_SIZE - 1,
+            )
+            await pipe.execute()
+
+        if previous_state != CircuitState.closed:
+            log.info("webhook.circuit.closed", webhook_endpoint_id=endpoint_id)
+
+        return previous_state
+
+    async def record_failure(self, endpoint_id: UUID) -> CircuitState:
+        """
+        Record a failed delivery, opening the circuit if the endpoint
+        looks unhealthy.
+
+        Returns the new state of the circuit.
+        """
+        state_key = self._state_key(endpoint_id)
+        now = time.time()
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hget(state_key, "state")
+            pipe.hset(state_key, "last_failure_at", str(now))
+            pipe.lpush(self._outcomes_key(endpoint_id), "0")
+            pipe.ltrim(
+                self._outcomes_key(endpoint_id),
+                0,
+                settings.WEBHOOK_CIRCUIT_WINDOW_SIZE - 1,
+            )
+            pipe.lrange(self._outcomes_key(endpoint_id), 0, -1)
+            results = await pipe.execute()
+
+        previous_state = CircuitState(results[0] or CircuitState.closed)
+        outcomes: list[str] = results[-1]
+
+        should_open = previous_state == CircuitState.half_open or (
+            previous_state == CircuitState.closed
+            and len(outcomes) >= settings.WEBHOOK_CIRCUIT_MIN_DELIVERIES
+            and outcomes.count("0") / len(outcomes)
+            >= settings.WEBHOOK_CIRCUIT_FAILURE_RATE_THRESHOLD
+        )
+        if not should_open:
+            return previous_state
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                state_key, mapping={"state": CircuitState.open, "opened_at": str(now)}
+            )
+            pipe.delete(self._probe_key(endpoint_id))
+            pipe.sadd(_OPEN_CIRCUITS_KEY, str(endpoint_id))
+            await pipe.execute()
+
+        log.info("webhook.circuit.opened", webhook_endpoint_id=endpoint_id)
+        return CircuitState.open
+
+    async def park(self, endpoint_id: UUID, event_id: UUID) -> None:
+        parked_key = self._parked_key(endpoint_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(parked_key, str(event_id))
+            # Keep the most recent events if the endpoint stays down for long
+            pipe.ltrim(parked_key, -settings.WEBHOOK_PARKED_MAX_EVENTS, -1)
+            pipe.expire(parked_key, settings.WEBHOOK_PARKED_TTL_SECONDS)
+            await pipe.execute()
+
+    async def pop_parked(self, endpoint_id: UUID, count: int) -> list[UUID]:
+        event_ids = await self.redis.lpop(self._parked_key(endpoint_id), count)
+        return [UUID(event_id) for event_id in event_ids or []]
+
+    async def has_parked(self, endpoint_id: UUID) -> bool:
+        return await self.redis.llen(self._parked_key(endpoint_id)) > 0
+
+    async def list_probe_candidates(self) -> list[UUID]:
+        """
+        List endpoints with an open circuit whose cooldown is over.
+        """
+        now = time.time()
+        candidates: list[UUID] = []
+        for endpoint_id in await self.redis.smembers(_OPEN_CIRCUITS_KEY):
+            opened_at = _parse_float(
+                await self.redis.hget(self._state_key(endpoint_id), "opened_at")
+            )
+            if opened_at is None:
+                await self.redis.srem(_OPEN_CIRCUITS_KEY, endpoint_id)
+                continue
+            if now - opened_at >= settings.WEBHOOK_CIRCUIT_OPEN_SECONDS:
+                candidates.append(UUID(endpoint_id))
+        return candidates
+
+    def _state_key(self, endpoint_id: UUID | str) -> str:
+        return f"{_KEY_PREFIX}:{endpoint_id}"
+
+    def _outcomes_key(self, endpoint_id: UUID | str) -> str:
+        return f"{_KEY_PREFIX}:{endpoint_id}:outcomes"
+
+    def _probe_key(self, endpoint_id: UUID | str) -> str:
+        return f"{_KEY_PREFIX}:{endpoint_id}:probe"
+
+    def _parked_key(self, endpoint_id: UUID | str) -> str:
+        return f"{_KEY_PREFIX}:{endpoint_id}:parked"
+
+
+def _parse_float(value: str | None) -> float | None:
+    return float(value) if value is not None else None
+
+
+def _parse_timestamp(value: str | None) -> datetime | None:
+    return datetime.fromtimestamp(float(value), UTC) if value is not None else None
+
+
+webhook_endpoint_health = WebhookEndpointHealthService(redis_client)
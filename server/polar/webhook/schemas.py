@@ -1,9 +1,11 @@
+from datetime import datetime
 from typing import Annotated
 
 from pydantic import UUID4, AnyUrl, Field, PlainSerializer, UrlConstraints
 
 from polar.kit.schemas import Schema, TimestampedSchema
 from polar.models.webhook_endpoint import WebhookEventType
+from polar.webhook.health import CircuitState
 
 HttpsUrl = Annotated[
     AnyUrl,
@@ -78,6 +80,41 @@ class WebhookEndpointUpdate(Schema):
     events: EndpointEvents | None = None
 
 
+class WebhookEndpointHealth(Schema):
+    """
+    Health of a webhook endpoint, computed from its latest deliveries.
+    """
+
+    state: CircuitState = Field(
+        description=(
+            "State of the endpoint. "
+            "`closed` if the endpoint is healthy. "
+            "`open` if too many deliveries failed: "
+            "events are held back until the endpoint recovers. "
+            "`half_open` if a delivery is being attempted to check "
+            "if the endpoint recovered."
+        )
+    )
+    success_rate: float | None = Field(
+        description=(
+            "Ratio of successful deliveries among the latest ones. "
+            "`null` if no delivery has been attempted recently."
+        )
+    )
+    window_size: int = Field(
+        description="Number of latest deliveries used to compute the success rate."
+    )
+    last_failure_at: datetime | None = Field(
+        description="Timestamp of the last failed delivery."
+    )
+    opened_at: datetime | None = Field(
+        description="Timestamp at which the endpoint was marked as unhealthy."
+    )
+    parked_events: int = Field(
+        description="Number of events held back until the endpoint recovers."
+    )
+
+
 class WebhookEvent(TimestampedSchema):
     """
     A webhook event.
@@ -2,7 +2,7 @@ from collections.abc import Sequence
 from typing import NoReturn
 from uuid import UUID
 
-from sqlalchemy import Select, and_, desc, or_, select, text
+from sqlalchemy import Select, and_, desc, insert, or_, select, text
 from sqlalchemy.orm import contains_eager, joinedload
 
 from polar.auth.models import AuthSubject, is_organization, is_user
@@ -326,18 +326,30 @@ class WebhookService:
         if payload is None:
             raise Exception("no payload")
 
-        for e in await self._get_event_target_endpoints(
+        endpoints = await self._get_event_target_endpoints(
             session, event=we[0], target=target
-        ):
-            event = WebhookEvent(
-                webhook_endpoint_id=e.id, payload=payload.model_dump_json()
-            )
-            session.add(event)
-            await session.flush()
+        )
+        if not endpoints:
+            return
 
-            enqueue_job("webhook_event.send", webhook_event_id=event.id)
+        # Serialize once, the payload is the same for every endpoint
+        payload_json = payload.model_dump_json()
+
+        # Create all the events in a single INSERT statement
+        statement = (
+            insert(WebhookEvent)
+            .values(
+                [
+                    {"webhook_endpoint_id": endpoint.id, "payload": payload_json}
+                    for endpoint in endpoints
+                ]
+            )
+            .returning(WebhookEvent.id)
+        )
+        res = await session.execute(statement)
 
-        return
+        for event_id in res.scalars().all():
+            enqueue_job("webhook_event.send", webhook_event_id=event_id)
 
     def _get_readable_endpoints_statement(
         self, auth_subject: AuthSubject[User | Organization]
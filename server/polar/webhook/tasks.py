@@ -1,4 +1,5 @@
 import base64
+import random
 import socket
 from collections.abc import Mapping
 from urllib.parse import urlparse
@@ -10,12 +11,22 @@ from arq import Retry
 from netaddr import IPAddress
 from standardwebhooks.webhooks import Webhook as StandardWebhook
 
+from polar.config import settings
 from polar.kit.db.postgres import AsyncSession
 from polar.kit.utils import utc_now
 from polar.logging import Logger
 from polar.models.webhook_delivery import WebhookDelivery
-from polar.worker import AsyncSessionMaker, JobContext, PolarWorkerContext, task
-
+from polar.worker import (
+    AsyncSessionMaker,
+    JobContext,
+    PolarWorkerContext,
+    enqueue_job,
+    interval,
+    task,
+)
+
+from .delivery import dns_cache, webhook_http_client
+from .health import CircuitState, DeliveryDecision, webhook_endpoint_health
 from .service import webhook as webhook_service
 
 log: Logger = structlog.get_logger()
@@ -36,7 +47,54 @@ async def webhook_event_send(
         )
 
 
-def allowed_url(url: str) -> bool:
+@task("webhook_endpoint.drain_parked")
+async def webhook_endpoint_drain_parked(
+    ctx: JobContext,
+    webhook_endpoint_id: UUID,
+    polar_context: PolarWorkerContext,
+) -> None:
+    health = await webhook_endpoint_health.get_health(webhook_endpoint_id)
+    # The endpoint failed again, the next probe will resume draining
+    if health.state != CircuitState.closed:
+        return
+
+    event_ids = await webhook_endpoint_health.pop_parked(
+        webhook_endpoint_id, settings.WEBHOOK_DRAIN_BATCH_SIZE
+    )
+    for event_id in event_ids:
+        enqueue_job("webhook_event.send", webhook_event_id=event_id)
+
+    if await webhook_endpoint_health.has_parked(webhook_endpoint_id):
+        enqueue_job(
+            "webhook_endpoint.drain_parked",
+            webhook_endpoint_id=webhook_endpoint_id,
+            _defer_by=settings.WEBHOOK_DRAIN_INTERVAL_SECONDS,
+        )
+
+
+@interval(second=0)
+async def webhook_endpoint_probe_open_circuits(ctx: JobContext) -> None:
+    """
+    Send one parked event to each endpoint whose circuit cooldown is over.
+
+    This delivery acts as the probe: if it succeeds, the circuit closes
+    and the other parked events are drained.
+    """
+    for endpoint_id in await webhook_endpoint_health.list_probe_candidates():
+        for event_id in await webhook_endpoint_health.pop_parked(endpoint_id, 1):
+            enqueue_job("webhook_event.send", webhook_event_id=event_id)
+
+
+def _retry_delay(job_try: int) -> int:
+    """
+    Exponential backoff with jitter, so events that failed together
+    don't all hit the endpoint at the same time when they're retried.
+    """
+    delay = DELAY**job_try
+    return random.randint(delay // 2, delay)
+
+
+async def allowed_url(url: str) -> bool:
     """
     Webhooks can only be sent over HTTPS, to global IPs.
     Webhooks can not be sent to loopback or "internal" or "reserved" ranges
@@ -44,15 +102,11 @@ def allowed_url(url: str) -> bool:
 
     parsed = urlparse(url)
 
-    if parsed.scheme != "https":
+    if parsed.scheme != "https" or parsed.hostname is None:
         return False
 
     try:
-        info = socket.getaddrinfo(
-            parsed.hostname,
-            0,
-            # 0  # port, required
-        )
+        info = await dns_cache.resolve(parsed.hostname)
     except:  # noqa: E722
         return False
 
@@ -86,11 +140,22 @@ async def _webhook_event_send(
     if not event:
         raise Exception(f"webhook event not found id={webhook_event_id}")
 
-    if not allowed_url(event.webhook_endpoint.url):
+    if not await allowed_url(event.webhook_endpoint.url):
         raise Exception(
             f"invalid webhook url id={webhook_event_id} url={event.webhook_endpoint.url}"
         )
 
+    endpoint_id = event.webhook_endpoint_id
+    decision = await webhook_endpoint_health.before_delivery(endpoint_id)
+    if decision == DeliveryDecision.park:
+        log.info(
+            "webhook.event.parked",
+            webhook_event_id=webhook_event_id,
+            webhook_endpoint_id=endpoint_id,
+        )
+        await webhook_endpoint_health.park(endpoint_id, event.id)
+        return
+
     ts = utc_now()
 
     b64secret = base64.b64encode(event.webhook_endpoint.secret.encode("utf-8")).decode(
@@ -109,24 +174,29 @@ async def _webhook_event_send(
         "webhook-signature": signature,
     }
 
-    r = httpx.post(
-        event.webhook_endpoint.url,
-        content=event.payload,
-        headers=headers,
-        timeout=20.0,
-    )
-
-    succeeded = r.is_success
+    http_code: int | None = None
+    try:
+        r = await webhook_http_client.post(
+            endpoint_id,
+            event.webhook_endpoint.url,
+            content=event.payload,
+            headers=headers,
+        )
+        http_code = r.status_code
+        succeeded = r.is_success
+    # Endpoint unreachable
+    except httpx.HTTPError:
+        succeeded = False
 
     if succeeded:
         event.succeeded = True
 
-    event.last_http_code = r.status_code
+    event.last_http_code = http_code
 
     delivery = WebhookDelivery(
         webhook_event_id=webhook_event_id,
-        webhook_endpoint_id=event.webhook_endpoint_id,
-        http_code=r.status_code,
+        webhook_endpoint_id=endpoint_id,
+        http_code=http_code,
         succeeded=succeeded,
     )
     session.add(delivery)
@@ -134,14 +204,23 @@ async def _webhook_event_send(
     # save delivery even if job fails
     await session.commit()
 
-    if not succeeded and ctx["job_try"] >= MAX_RETRIES:
+    # Successful
+    if succeeded:
+        previous_state = await webhook_endpoint_health.record_success(endpoint_id)
+        # Endpoint recovered, deliver the events parked while it was down
+        if previous_state != CircuitState.closed:
+            enqueue_job(
+                "webhook_endpoint.drain_parked", webhook_endpoint_id=endpoint_id
+            )
+        return
+
+    await webhook_endpoint_health.record_failure(endpoint_id)
+
+    if ctx["job_try"] >= MAX_RETRIES:
         # Permanent failure
         event.succeeded = False
         session.add(event)
         return
 
-    # Retry
-    if not succeeded:
-        raise Retry(DELAY ** ctx["job_try"])
-
-    # Successful
+    # Retry. If the circuit opened in the meantime, the retry will be parked.
+    raise Retry(_retry_delay(ctx["job_try"]))
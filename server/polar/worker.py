@@ -1,6 +1,7 @@
 import contextlib
 import contextvars
 import functools
+import time
 import uuid
 from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import datetime
@@ -12,10 +13,15 @@ import structlog
 from arq import cron, func
 from arq.connections import ArqRedis, RedisSettings
 from arq.connections import create_pool as arq_create_pool
+from arq.constants import job_key_prefix, result_key_prefix
 from arq.cron import CronJob
+from arq.jobs import serialize_job
 from arq.typing import OptionType, SecondsTimedelta, WeekdayOptionType
+from arq.utils import timestamp_ms, to_ms, to_unix_ms
 from arq.worker import Function
+from prometheus_client import Histogram
 from pydantic import BaseModel
+from redis.exceptions import WatchError
 
 from polar.config import settings
 from polar.context import ExecutionContext
@@ -38,6 +44,16 @@ _jobs_to_enqueue = contextvars.ContextVar[list[JobToEnqueue]](
     "polar_worker_jobs_to_enqueue", default=[]
 )
 
+flush_enqueued_jobs_batch_size = Histogram(
+    "worker_flush_enqueued_jobs_batch_size",
+    "Number of jobs flushed to Redis at once",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+flush_enqueued_jobs_latency_seconds = Histogram(
+    "worker_flush_enqueued_jobs_latency_seconds",
+    "Time spent flushing enqueued jobs to Redis",
+)
+
 
 class WorkerContext(TypedDict):
     redis: ArqRedis
@@ -231,12 +247,82 @@ def enqueue_job(
 async def flush_enqueued_jobs(arq_pool: ArqRedis) -> None:
     if _jobs_to_enqueue_list := _jobs_to_enqueue.get([]):
         log.debug("polar.worker.flush_enqueued_jobs")
+        t0 = time.perf_counter()
+        await _bulk_enqueue_jobs(arq_pool, _jobs_to_enqueue_list)
+        flush_enqueued_jobs_latency_seconds.observe(time.perf_counter() - t0)
+        flush_enqueued_jobs_batch_size.observe(len(_jobs_to_enqueue_list))
         for name, args, kwargs in _jobs_to_enqueue_list:
-            await arq_pool.enqueue_job(name, *args, **kwargs)
             log.debug("polar.worker.job_flushed", name=name, args=args, kwargs=kwargs)
         _jobs_to_enqueue.set([])
 
 
+async def _bulk_enqueue_jobs(arq_pool: ArqRedis, jobs: list[JobToEnqueue]) -> None:
+    """
+    Write jobs to Redis in a single transaction.
+
+    Behaves like calling `ArqRedis.enqueue_job` for each job: a job whose ID
+    already exists, in the queue or in the results, is skipped. If one of those
+    jobs is concurrently enqueued by someone else, the transaction is aborted
+    and we fall back to enqueuing the jobs one by one.
+    """
+    # First job wins, like successive calls to `ArqRedis.enqueue_job` would do
+    jobs_by_id: dict[str, JobToEnqueue] = {}
+    for job in jobs:
+        jobs_by_id.setdefault(job[2]["_job_id"], job)
+
+    job_ids = list(jobs_by_id.keys())
+    job_keys = [job_key_prefix + job_id for job_id in job_ids]
+    result_keys = [result_key_prefix + job_id for job_id in job_ids]
+
+    async with arq_pool.pipeline(transaction=True) as pipe:
+        await pipe.watch(*job_keys)
+        existing = await pipe.mget(job_keys + result_keys)
+
+        pipe.multi()
+        enqueue_time_ms = timestamp_ms()
+        for i, (job_id, (name, args, kwargs)) in enumerate(jobs_by_id.items()):
+            if existing[i] is not None or existing[len(job_ids) + i] is not None:
+                continue
+
+            kwargs = {**kwargs}
+            del kwargs["_job_id"]
+            queue_name = kwargs.pop("_queue_name", arq_pool.default_queue_name)
+            defer_until = kwargs.pop("_defer_until", None)
+            defer_by_ms = to_ms(kwargs.pop("_defer_by", None))
+            expires_ms = to_ms(kwargs.pop("_expires", None))
+            job_try = kwargs.pop("_job_try", None)
+
+            if defer_until is not None:
+                score = to_unix_ms(defer_until)
+            elif defer_by_ms:
+                score = enqueue_time_ms + defer_by_ms
+            else:
+                score = enqueue_time_ms
+            expires_ms = (
+                expires_ms or score - enqueue_time_ms + arq_pool.expires_extra_ms
+            )
+
+            serialized_job = serialize_job(
+                name,
+                args,
+                kwargs,
+                job_try,
+                enqueue_time_ms,
+                serializer=arq_pool.job_serializer,
+            )
+            pipe.psetex(job_keys[i], expires_ms, serialized_job)
+            pipe.zadd(queue_name, {job_id: score})
+
+        try:
+            await pipe.execute()
+            return
+        except WatchError:
+            log.debug("polar.worker.bulk_enqueue_conflict")
+
+    for name, args, kwargs in jobs_by_id.values():
+        await arq_pool.enqueue_job(name, *args, **kwargs)
+
+
 Params = ParamSpec("Params")
 ReturnValue = TypeVar("ReturnValue")
 
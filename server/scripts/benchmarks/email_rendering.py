@@ -0,0 +1,104 @@
+import time
+import tracemalloc
+import typing
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+import typer
+
+from polar.email.renderer import EmailRenderer, get_email_renderer
+from polar.models.pledge import PledgeType
+from polar.notifications.notification import (
+    Notification,
+    NotificationPayloadBase,
+    NotificationType,
+)
+
+#
+# Render every notification type, creating a new renderer for each email like
+# we used to, versus going through the shared renderer and its compiled
+# templates cache.
+#
+# Reports the renders per second, and the peak memory allocated during a round
+# of renders, as traced by `tracemalloc`.
+#
+# python -m scripts.benchmarks.email_rendering --rounds 50
+#
+
+cli = typer.Typer()
+
+SAMPLE_VALUES: dict[Any, Any] = {
+    str: "sample",
+    str | None: "sample",
+    int: 123,
+    bool: True,
+    uuid.UUID: uuid.UUID("00000000-0000-0000-0000-000000000000"),
+    uuid.UUID | None: uuid.UUID("00000000-0000-0000-0000-000000000000"),
+    PledgeType | None: PledgeType.pay_upfront,
+    dict[str, Any]: {},
+}
+
+
+def sample_payloads() -> dict[NotificationType, NotificationPayloadBase]:
+    payloads: dict[NotificationType, NotificationPayloadBase] = {}
+    for notification in typing.get_args(typing.get_args(Notification)[0]):
+        (type,) = typing.get_args(notification.model_fields["type"].annotation)
+        payload_class = notification.model_fields["payload"].annotation
+        payloads[type] = payload_class(
+            **{
+                name: SAMPLE_VALUES[field.annotation]
+                for name, field in payload_class.model_fields.items()
+            }
+        )
+    assert payloads.keys() == set(NotificationType)
+    return payloads
+
+
+def bench(
+    label: str,
+    payloads: list[NotificationPayloadBase],
+    rounds: int,
+    get_renderer: Callable[[], EmailRenderer],
+) -> None:
+    def _render_all() -> None:
+        for payload in payloads:
+            get_renderer().render_from_string(
+                payload.subject(), payload.body(), dict(vars(payload))
+            )
+
+    _render_all()  # Warm up
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        _render_all()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    _render_all()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    typer.echo(
+        f"{label:<10} "
+        f"{rounds * len(payloads) / elapsed:>10.1f} renders/s  "
+        f"peak={peak / 1024:>10.1f}KiB per round of {len(payloads)}"
+    )
+
+
+@cli.command()
+def run(
+    rounds: int = typer.Option(50, help="Rounds over all notification types"),
+) -> None:
+    payloads = list(sample_payloads().values())
+    bench(
+        "before",
+        payloads,
+        rounds,
+        lambda: EmailRenderer(compiled_templates_maxsize=0),
+    )
+    bench("after", payloads, rounds, get_email_renderer)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Any
+
+import resend
+import typer
+
+from polar.email.batcher import EmailBatcher
+from polar.email.sender import Email, ResendEmailSender
+from scripts.benchmarks.utils import (
+    report,
+    run_concurrently,
+    stub_http_server,
+    typer_async,
+)
+
+#
+# Compare the throughput of sending a newsletter-like burst of emails, one
+# blocking Resend SDK call per recipient like we used to, versus grouping them
+# through the `EmailBatcher` into async batch requests.
+#
+# The Resend API is replaced by a local stub server answering after `latency`
+# seconds. Sends run `concurrency` at a time, like concurrent worker jobs.
+#
+# python -m scripts.benchmarks.email_sending --emails 2000 --latency 0.1
+#
+
+cli = typer.Typer()
+
+
+def resend_handler(latency: float):  # type: ignore
+    async def _handler(method: str, path: str, content: bytes) -> tuple[int, bytes]:
+        await asyncio.sleep(latency)
+        payload = json.loads(content)
+        data: dict[str, Any]
+        if path == "/emails/batch":
+            data = {"data": [{"id": f"email_{i}"} for i in range(len(payload))]}
+        else:
+            data = {"id": "email_0"}
+        return 200, json.dumps(data).encode()
+
+    return _handler
+
+
+def get_email(i: int) -> Email:
+    return Email(
+        to_email_addr=f"user{i}@example.com",
+        subject="New post from polarsource",
+        html_content="<p>Hello</p>" * 100,
+        from_email_addr="polarsource@posts.polar.sh",
+    )
+
+
+@cli.command()
+@typer_async
+async def run(
+    emails: int = typer.Option(2000, help="Number of emails"),
+    latency: float = typer.Option(0.05, help="Stub server latency, in seconds"),
+    concurrency: int = typer.Option(50, help="Number of concurrent sends"),
+    max_concurrency: int = typer.Option(4, help="Concurrent requests to Resend"),
+) -> None:
+    with stub_http_server(resend_handler(latency)) as base_url:
+        resend.api_key = "re_BENCHMARK"
+        resend.api_url = base_url
+
+        async def blocking_send(i: int) -> None:
+            email = get_email(i)
+            resend.Emails.send(
+                {
+                    "from": f"{email.from_name} <{email.from_email_addr}>",
+                    "to": [email.to_email_addr],
+                    "subject": email.subject,
+                    "html": email.html_content,
+                    "headers": email.email_headers,
+                }
+            )
+
+        durations, elapsed = await run_concurrently(
+            [lambda i=i: blocking_send(i) for i in range(emails)],  # type: ignore
+            concurrency,
+        )
+        report("before", durations, elapsed)
+
+        sender = ResendEmailSender(
+            api_key="re_BENCHMARK", base_url=base_url, max_concurrency=max_concurrency
+        )
+        batcher = EmailBatcher(lambda: sender, max_batch_size=100, linger=0.2)
+
+        durations, elapsed = await run_concurrently(
+            [lambda i=i: batcher.send(get_email(i)) for i in range(emails)],  # type: ignore
+            concurrency,
+        )
+        report("after", durations, elapsed)
+        await sender.client.aclose()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,175 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections.abc import AsyncGenerator
+from enum import StrEnum
+from typing import Any
+
+import typer
+import uvicorn
+from fastapi import FastAPI, Request
+from sse_starlette.sse import EventSourceResponse
+
+from polar.eventstream.endpoints import subscribe
+from polar.redis import Redis, get_redis
+from scripts.benchmarks.utils import typer_async
+
+#
+# Load test of the SSE event streams.
+#
+# Starts an API process serving a stripped-down stream endpoint, opens
+# `clients` SSE connections to it, publishes messages on their channels
+# and reports the memory and CPU used by the API process, as well as the
+# number of Redis connections it holds.
+#
+# `legacy` mode reproduces the previous implementation, opening one Redis
+# pub/sub connection per client; `multiplexed` uses the shared connection.
+#
+# python -m scripts.benchmarks.eventstream --mode legacy --clients 5000
+# python -m scripts.benchmarks.eventstream --mode multiplexed --clients 5000
+#
+
+cli = typer.Typer()
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class Mode(StrEnum):
+    legacy = "legacy"
+    multiplexed = "multiplexed"
+
+
+async def legacy_subscribe(
+    redis: Redis, channels: list[str], request: Request
+) -> AsyncGenerator[Any, Any]:
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(*channels)
+        while True:
+            if await request.is_disconnected():
+                break
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=10.0
+            )
+            if message is not None:
+                yield message["data"]
+
+
+def create_app(mode: Mode) -> FastAPI:
+    app = FastAPI()
+    redis = get_redis()
+
+    @app.get("/stream/{channel}")
+    async def stream(channel: str, request: Request) -> EventSourceResponse:
+        if mode == Mode.legacy:
+            return EventSourceResponse(legacy_subscribe(redis, [channel], request))
+        return EventSourceResponse(subscribe([channel], request))
+
+    return app
+
+
+def run_server(mode: Mode) -> None:
+    uvicorn.run(create_app(mode), host=HOST, port=PORT, log_level="error")
+
+
+def process_stats(pid: int) -> tuple[int, float]:
+    """Return the RSS in bytes and the CPU time in seconds of a process."""
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+    return rss_kb * 1024, cpu
+
+
+async def open_client(
+    channel: str, received: list[int], index: int
+) -> asyncio.StreamWriter:
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(
+        f"GET /stream/{channel} HTTP/1.1\r\nHost: {HOST}\r\n"
+        "Accept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+
+    async def _read() -> None:
+        while line := await reader.readline():
+            if line.startswith(b"data:"):
+                received[index] += 1
+
+    asyncio.create_task(_read())
+    return writer
+
+
+@cli.command()
+@typer_async
+async def run(
+    mode: Mode = typer.Option(Mode.multiplexed),
+    clients: int = typer.Option(5000, help="Number of SSE clients"),
+    channels: int = typer.Option(500, help="Number of distinct channels"),
+    messages: int = typer.Option(20, help="Messages published on each channel"),
+    idle: float = typer.Option(10.0, help="Idle time, in seconds, before publishing"),
+) -> None:
+    server = multiprocessing.Process(target=run_server, args=(mode,), daemon=True)
+    server.start()
+    assert server.pid is not None
+    await asyncio.sleep(2.0)
+
+    redis = get_redis()
+    baseline_clients = (await redis.info("clients"))["connected_clients"]
+    rss_start, _ = process_stats(server.pid)
+
+    received = [0] * clients
+    writers: list[asyncio.StreamWriter] = []
+    batch = 200
+    for start in range(0, clients, batch):
+        writers += await asyncio.gather(
+            *(
+                open_client(f"bench:{i % channels}", received, i)
+                for i in range(start, min(start + batch, clients))
+            )
+        )
+    await asyncio.sleep(2.0)
+
+    rss_connected, cpu_connected = process_stats(server.pid)
+    redis_clients = (await redis.info("clients"))["connected_clients"]
+
+    await asyncio.sleep(idle)
+    _, cpu_idle = process_stats(server.pid)
+
+    t0 = time.perf_counter()
+    for _ in range(messages):
+        for channel in range(channels):
+            await redis.publish(f"bench:{channel}", '{"key": "bench"}')
+    expected = clients * messages
+    while sum(received) < expected and time.perf_counter() - t0 < 30:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - t0
+    rss_end, cpu_end = process_stats(server.pid)
+
+    typer.echo(f"mode:                  {mode}")
+    typer.echo(f"clients:               {clients}")
+    typer.echo(
+        f"redis connections:     {redis_clients - baseline_clients} (API process)"
+    )
+    typer.echo(
+        f"memory:                {rss_start / 2**20:.1f} MiB idle -> "
+        f"{rss_connected / 2**20:.1f} MiB connected -> "
+        f"{rss_end / 2**20:.1f} MiB after publishing"
+    )
+    typer.echo(f"CPU while idle:        {cpu_idle - cpu_connected:.2f}s over {idle}s")
+    typer.echo(
+        f"delivered:             {sum(received)}/{expected} messages "
+        f"in {elapsed:.2f}s, CPU {cpu_end - cpu_idle:.2f}s"
+    )
+
+    for writer in writers:
+        writer.close()
+    server.terminate()
+    server.join()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import secrets
+from collections.abc import AsyncIterator, Callable, Coroutine
+from types import SimpleNamespace
+from typing import Any, Literal, cast
+
+import typer
+from githubkit import Paginator
+
+from polar.enums import Platforms
+from polar.integrations.github import types
+from polar.integrations.github.service.issue import github_issue
+from polar.integrations.github.service.paginated import github_paginated_service
+from polar.integrations.github.service.pull_request import github_pull_request
+from polar.kit.db.postgres import AsyncSessionMaker, create_async_sessionmaker
+from polar.models import Issue, Organization, PullRequest, Repository
+from polar.postgres import create_async_engine, sql
+from polar.repository.hooks import repository_issue_synced
+from scripts.benchmarks.utils import typer_async
+from tests.fixtures.vcr import read_cassette
+
+#
+# Crawl a repository's issues and pull requests, replaying GitHub pages built
+# from the recorded VCR cassettes, and compare storing them one item at a time,
+# like we used to, with upserting them a page at a time.
+#
+# GitHub is replaced by a fake request answering after `latency` seconds.
+# A throwaway organization and repository are created, then deleted.
+#
+# python -m scripts.benchmarks.github_crawl --items 2000 --per-page 100
+#
+
+cli = typer.Typer()
+
+EXTERNAL_ID_BASE = secrets.randbelow(1_000_000) * 1_000_000_000
+
+
+def recorded_issues(count: int, offset: int) -> list[types.Issue]:
+    body = read_cassette("github/webhooks/issues.opened.json")["body"]["issue"]
+    return [
+        types.Issue(**{**body, "id": EXTERNAL_ID_BASE + number, "number": number})
+        for number in range(offset + 1, offset + count + 1)
+    ]
+
+
+def recorded_pull_requests(count: int, offset: int) -> list[types.PullRequestSimple]:
+    body = read_cassette("github/pull_request/simple.json")
+    return [
+        types.PullRequestSimple(
+            **{**body, "id": EXTERNAL_ID_BASE + number, "number": number}
+        )
+        for number in range(offset + 1, offset + count + 1)
+    ]
+
+
+def replay(items: list[Any], per_page: int, latency: float) -> Paginator[Any]:
+    async def request(*, page: int, per_page: int) -> Any:
+        await asyncio.sleep(latency)
+        start = (page - 1) * per_page
+        return SimpleNamespace(parsed_data=items[start : start + per_page])
+
+    return Paginator(cast(Any, request), per_page=per_page)
+
+
+@contextlib.asynccontextmanager
+async def throwaway_repository(
+    sessionmaker: AsyncSessionMaker,
+) -> AsyncIterator[tuple[Organization, Repository]]:
+    async with sessionmaker() as session:
+        organization = Organization(
+            platform=Platforms.github,
+            name=f"benchmark-{secrets.token_hex(4)}",
+            external_id=secrets.randbelow(1_000_000_000),
+            avatar_url="https://avatars.githubusercontent.com/u/105373340",
+            is_personal=False,
+        )
+        session.add(organization)
+        await session.flush()
+        repository = Repository(
+            platform=Platforms.github,
+            name="crawl",
+            organization_id=organization.id,
+            external_id=secrets.randbelow(1_000_000_000),
+            is_private=False,
+        )
+        session.add(repository)
+        await session.commit()
+
+    try:
+        yield organization, repository
+    finally:
+        async with sessionmaker() as session:
+            await session.execute(
+                sql.delete(PullRequest).where(
+                    PullRequest.repository_id == repository.id
+                )
+            )
+            await session.execute(
+                sql.delete(Issue).where(Issue.repository_id == repository.id)
+            )
+            await session.execute(
+                sql.delete(Repository).where(Repository.id == repository.id)
+            )
+            await session.execute(
+                sql.delete(Organization).where(Organization.id == organization.id)
+            )
+            await session.commit()
+
+
+async def crawl(
+    sessionmaker: AsyncSessionMaker,
+    organization: Organization,
+    repository: Repository,
+    *,
+    items: list[Any],
+    per_page: int,
+    page_size: int,
+    latency: float,
+    store_many_method: Callable[..., Coroutine[Any, Any, Any]],
+    resource_type: Literal["issue", "pull_request"],
+) -> float:
+    loop = asyncio.get_running_loop()
+    async with sessionmaker() as session:
+        t0 = loop.time()
+        await github_paginated_service.store_paginated_resource(
+            session,
+            paginator=replay(items, per_page, latency),
+            page_size=page_size,
+            store_many_method=store_many_method,
+            organization=organization,
+            repository=repository,
+            on_sync_signal=repository_issue_synced
+            if resource_type == "issue"
+            else None,
+            resource_type=resource_type,
+        )
+        return loop.time() - t0
+
+
+@cli.command()
+@typer_async
+async def run(
+    items: int = typer.Option(2000, help="Number of issues and of pull requests"),
+    per_page: int = typer.Option(100, help="Items per GitHub page"),
+    latency: float = typer.Option(0.05, help="GitHub latency per page, in seconds"),
+) -> None:
+    engine = create_async_engine("script")
+    sessionmaker = create_async_sessionmaker(engine)
+
+    async with throwaway_repository(sessionmaker) as (organization, repository):
+        # One item per store call, like the former per-item loop, then a page
+        for label, page_size, offset in (
+            ("before", 1, 0),
+            ("after", per_page, items),
+        ):
+            issues_elapsed = await crawl(
+                sessionmaker,
+                organization,
+                repository,
+                items=recorded_issues(items, offset),
+                per_page=per_page,
+                page_size=page_size,
+                latency=latency,
+                store_many_method=github_issue.store_many,
+                resource_type="issue",
+            )
+            pull_requests_elapsed = await crawl(
+                sessionmaker,
+                organization,
+                repository,
+                items=recorded_pull_requests(items, offset),
+                per_page=per_page,
+                page_size=page_size,
+                latency=latency,
+                store_many_method=github_pull_request.store_many_simple,
+                resource_type="pull_request",
+            )
+            typer.echo(
+                f"{label:<10} "
+                f"issues={items / issues_elapsed:>8.1f}/s  "
+                f"pull_requests={items / pull_requests_elapsed:>8.1f}/s  "
+                f"total={issues_elapsed + pull_requests_elapsed:.2f}s"
+            )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    cli()
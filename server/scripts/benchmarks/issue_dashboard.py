@@ -0,0 +1,201 @@
+import asyncio
+import contextlib
+import secrets
+from collections.abc import AsyncIterator
+
+import typer
+from sqlalchemy import text
+
+from polar.dashboard.schemas import IssueSortBy
+from polar.enums import Platforms
+from polar.issue.service import issue as issue_service
+from polar.kit.db.postgres import AsyncSessionMaker, create_async_sessionmaker
+from polar.models import Issue, Organization, Pledge, Repository
+from polar.postgres import create_async_engine, sql
+from scripts.benchmarks.utils import percentile, typer_async
+
+#
+# List the issues of a repository like the dashboard does, with their pledges,
+# references and repository, and report the p50/p95 latency of each sorting.
+#
+# A throwaway organization and repository are seeded with `--issues` issues and
+# `--pledges` pledges, skewed towards a few popular issues, then deleted.
+#
+# python -m scripts.benchmarks.issue_dashboard --issues 100000 --pledges 500000
+#
+
+cli = typer.Typer()
+
+SEED_ISSUES = text(
+    """
+    INSERT INTO issues (
+        id, created_at, organization_id, repository_id, platform, external_id,
+        number, title, state, issue_created_at, issue_modified_at, issue_closed_at,
+        pledged_amount_sum, positive_reactions_count, total_engagement_count,
+        funding_goal, pledge_badge_ever_embedded, has_pledge_badge_label,
+        needs_confirmation_solved
+    )
+    SELECT
+        gen_random_uuid(), now(), :organization_id, :repository_id, 'github',
+        CAST(:external_id_base AS bigint) + n, n,
+        'Benchmark issue ' || n || ' about ' || (ARRAY[
+            'pagination', 'search', 'sorting', 'billing', 'webhooks'
+        ])[1 + n % 5],
+        'open', created_at, created_at + random() * interval '30 days',
+        CASE WHEN random() < 0.2 THEN now() END,
+        0, floor(random() * 100)::int, floor(random() * 500)::int,
+        CASE WHEN random() < 0.1 THEN floor(random() * 100000)::bigint END,
+        false, false, false
+    FROM (
+        SELECT n, now() - random() * interval '730 days' AS created_at
+        FROM generate_series(1, :issues) AS n
+    ) AS s
+    """
+)
+
+SEED_PLEDGES = text(
+    """
+    INSERT INTO pledges (
+        id, created_at, issue_id, repository_id, organization_id,
+        by_organization_id, amount, fee, state, type
+    )
+    SELECT
+        gen_random_uuid(), p.created_at, i.id, i.repository_id, i.organization_id,
+        :pledging_organization_id, p.amount, p.amount / 20, p.state, 'pay_upfront'
+    FROM (
+        SELECT
+            1 + floor(power(random(), 3) * :issues)::int AS number,
+            1000 + floor(random() * 100000)::bigint AS amount,
+            (ARRAY['created', 'pending', 'disputed', 'initiated', 'refunded'])[
+                1 + floor(random() * 5)::int
+            ] AS state,
+            now() - random() * interval '365 days' AS created_at
+        FROM generate_series(1, :pledges)
+    ) AS p
+    JOIN issues AS i ON i.repository_id = :repository_id AND i.number = p.number
+    """
+)
+
+UPDATE_PLEDGED_AMOUNT_SUM = text(
+    """
+    UPDATE issues SET pledged_amount_sum = s.amount
+    FROM (
+        SELECT issue_id, sum(amount) AS amount FROM pledges
+        WHERE repository_id = :repository_id
+        AND state IN ('created', 'pending', 'disputed')
+        GROUP BY issue_id
+    ) AS s
+    WHERE issues.id = s.issue_id
+    """
+)
+
+
+@contextlib.asynccontextmanager
+async def seeded_repository(
+    sessionmaker: AsyncSessionMaker, issues: int, pledges: int
+) -> AsyncIterator[Repository]:
+    async with sessionmaker() as session:
+        organization, pledging_organization = (
+            Organization(
+                platform=Platforms.github,
+                name=f"benchmark-{secrets.token_hex(4)}",
+                external_id=secrets.randbelow(1_000_000_000),
+                avatar_url="https://avatars.githubusercontent.com/u/105373340",
+                is_personal=False,
+            )
+            for _ in range(2)
+        )
+        session.add_all([organization, pledging_organization])
+        await session.flush()
+        repository = Repository(
+            platform=Platforms.github,
+            name="dashboard",
+            organization_id=organization.id,
+            external_id=secrets.randbelow(1_000_000_000),
+            is_private=False,
+        )
+        session.add(repository)
+        await session.flush()
+
+        params = {
+            "organization_id": organization.id,
+            "pledging_organization_id": pledging_organization.id,
+            "repository_id": repository.id,
+            "external_id_base": secrets.randbelow(1_000_000) * 1_000_000_000,
+            "issues": issues,
+            "pledges": pledges,
+        }
+        await session.execute(SEED_ISSUES, params)
+        await session.execute(SEED_PLEDGES, params)
+        await session.execute(UPDATE_PLEDGED_AMOUNT_SUM, params)
+        await session.commit()
+
+    async with sessionmaker() as session:
+        await session.execute(text("ANALYZE issues"))
+        await session.execute(text("ANALYZE pledges"))
+
+    try:
+        yield repository
+    finally:
+        async with sessionmaker() as session:
+            await session.execute(
+                sql.delete(Pledge).where(Pledge.repository_id == repository.id)
+            )
+            await session.execute(
+                sql.delete(Issue).where(Issue.repository_id == repository.id)
+            )
+            await session.execute(
+                sql.delete(Repository).where(Repository.id == repository.id)
+            )
+            await session.execute(
+                sql.delete(Organization).where(
+                    Organization.id.in_([organization.id, pledging_organization.id])
+                )
+            )
+            await session.commit()
+
+
+@cli.command()
+@typer_async
+async def run(
+    issues: int = typer.Option(100_000, help="Number of seeded issues"),
+    pledges: int = typer.Option(500_000, help="Number of seeded pledges"),
+    iterations: int = typer.Option(20, help="Queries per sorting"),
+    pages: int = typer.Option(5, help="Queries are spread over the first pages"),
+) -> None:
+    engine = create_async_engine("script")
+    sessionmaker = create_async_sessionmaker(engine)
+    loop = asyncio.get_running_loop()
+    limit = 100
+
+    async with seeded_repository(sessionmaker, issues, pledges) as repository:
+        for sort_by in IssueSortBy:
+            durations: list[float] = []
+            for i in range(iterations):
+                async with sessionmaker() as session:
+                    t0 = loop.time()
+                    await issue_service.list_by_repository_type_and_status(
+                        session,
+                        [repository.id],
+                        text="pagination" if sort_by == IssueSortBy.relevance else None,
+                        load_references=True,
+                        load_pledges=True,
+                        load_repository=True,
+                        show_closed_if_needs_action=True,
+                        sort_by=sort_by,
+                        limit=limit,
+                        offset=(i % pages) * limit,
+                    )
+                    durations.append(loop.time() - t0)
+
+            typer.echo(
+                f"{sort_by.value:<46} "
+                f"p50={percentile(durations, 50) * 1000:>9.2f}ms  "
+                f"p95={percentile(durations, 95) * 1000:>9.2f}ms"
+            )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    cli()
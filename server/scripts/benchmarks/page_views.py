@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import datetime
+import secrets
+import uuid
+from collections.abc import AsyncIterator
+from enum import StrEnum
+
+import typer
+from sqlalchemy import text
+
+from polar.article.service import article_service
+from polar.enums import Platforms
+from polar.kit.db.postgres import (
+    AsyncEngine,
+    AsyncSessionMaker,
+    create_async_sessionmaker,
+)
+from polar.models import Article, Organization, Traffic, User
+from polar.postgres import create_async_engine, sql
+from polar.traffic.buffer import view_buffer
+from polar.traffic.service import traffic_service
+from scripts.benchmarks.utils import report, run_concurrently, typer_async
+
+#
+# Hammer a single article with concurrent page views, and compare writing each
+# view to the database with buffering them in Redis and flushing periodically.
+#
+# Reports the write throughput as well as the number of sessions waiting on a
+# row lock, sampled from `pg_stat_activity` during the run.
+#
+# A throwaway organization, user and article are created, then deleted.
+#
+# python -m scripts.benchmarks.page_views --mode direct --hits 5000
+# python -m scripts.benchmarks.page_views --mode buffered --hits 5000
+#
+
+cli = typer.Typer()
+
+LOCATION_HREF = "https://polar.sh/benchmark/posts/hello"
+
+
+class Mode(StrEnum):
+    direct = "direct"
+    buffered = "buffered"
+
+
+@contextlib.asynccontextmanager
+async def throwaway_article(sessionmaker: AsyncSessionMaker) -> AsyncIterator[Article]:
+    async with sessionmaker() as session:
+        organization = Organization(
+            platform=Platforms.github,
+            name=f"benchmark-{secrets.token_hex(4)}",
+            external_id=secrets.randbelow(1_000_000_000),
+            avatar_url="https://avatars.githubusercontent.com/u/105373340",
+            is_personal=False,
+        )
+        user = User(
+            username=f"benchmark-{secrets.token_hex(4)}",
+            email=f"benchmark-{secrets.token_hex(4)}@example.com",
+            avatar_url="https://avatars.githubusercontent.com/u/105373340",
+        )
+        session.add_all([organization, user])
+        await session.flush()
+        article = Article(
+            id=uuid.uuid4(),
+            organization_id=organization.id,
+            slug="hello",
+            title="Hello",
+            body="Hello!",
+            created_by=user.id,
+        )
+        session.add(article)
+        await session.commit()
+
+    try:
+        yield article
+    finally:
+        async with sessionmaker() as session:
+            await session.execute(
+                sql.delete(Traffic).where(Traffic.article_id == article.id)
+            )
+            await session.execute(sql.delete(Article).where(Article.id == article.id))
+            await session.execute(sql.delete(User).where(User.id == user.id))
+            await session.execute(
+                sql.delete(Organization).where(Organization.id == organization.id)
+            )
+            await session.commit()
+
+
+async def sample_lock_waits(engine: AsyncEngine, samples: list[int]) -> None:
+    statement = text(
+        "SELECT count(*) FROM pg_stat_activity "
+        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+    )
+    async with engine.connect() as connection:
+        while True:
+            samples.append((await connection.execute(statement)).scalar_one())
+            await asyncio.sleep(0.01)
+
+
+async def flush(sessionmaker: AsyncSessionMaker) -> None:
+    async with sessionmaker() as session:
+        async with view_buffer.drain_page_views() as page_views:
+            await traffic_service.add_views(session, page_views)
+            await session.commit()
+        async with view_buffer.drain_article_views() as article_views:
+            await article_service.add_web_views(session, article_views)
+            await session.commit()
+
+
+@cli.command()
+@typer_async
+async def run(
+    mode: Mode = typer.Option(Mode.buffered),
+    hits: int = typer.Option(5000, help="Number of page views"),
+    concurrency: int = typer.Option(50, help="Number of concurrent requests"),
+    flush_interval: float = typer.Option(1.0, help="Buffer flush interval, in s"),
+) -> None:
+    engine = create_async_engine("script")
+    sessionmaker = create_async_sessionmaker(engine)
+    date = datetime.date.today()
+
+    async with throwaway_article(sessionmaker) as article:
+
+        async def direct_hit() -> None:
+            async with sessionmaker() as session:
+                await traffic_service.add(
+                    session,
+                    location_href=LOCATION_HREF,
+                    article_id=article.id,
+                    date=date,
+                )
+                await session.execute(
+                    sql.update(Article)
+                    .where(Article.id == article.id)
+                    .values({"web_view_count": Article.web_view_count + 1})
+                )
+                await session.commit()
+
+        async def buffered_hit() -> None:
+            await view_buffer.track_page_view(
+                location_href=LOCATION_HREF, article_id=article.id, date=date
+            )
+            await view_buffer.track_article_view(article.id)
+
+        async def flusher() -> None:
+            while True:
+                await asyncio.sleep(flush_interval)
+                await flush(sessionmaker)
+
+        lock_waits: list[int] = []
+        background = [asyncio.create_task(sample_lock_waits(engine, lock_waits))]
+        if mode == Mode.buffered:
+            background.append(asyncio.create_task(flusher()))
+
+        hit = direct_hit if mode == Mode.direct else buffered_hit
+        durations, elapsed = await run_concurrently([hit] * hits, concurrency)
+
+        for task in background:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if mode == Mode.buffered:
+            await flush(sessionmaker)
+
+        async with sessionmaker() as session:
+            views = await session.scalar(
+                sql.select(Traffic.views).where(Traffic.article_id == article.id)
+            )
+            web_view_count = await session.scalar(
+                sql.select(Article.web_view_count).where(Article.id == article.id)
+            )
+
+    await engine.dispose()
+    await view_buffer.redis.connection_pool.disconnect()
+
+    report(mode, durations, elapsed)
+    waiting = [s for s in lock_waits if s > 0]
+    typer.echo(
+        f"lock waits: {len(waiting)}/{len(lock_waits)} samples with waiters, "
+        f"max={max(lock_waits, default=0)} waiting sessions"
+    )
+    typer.echo(f"stored: traffic.views={views} web_view_count={web_view_count}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import stripe as stripe_lib
+import typer
+
+from polar.integrations.stripe.service import stripe as stripe_service
+from scripts.benchmarks.utils import (
+    report,
+    run_concurrently,
+    stub_http_server,
+    typer_async,
+)
+
+#
+# Compare the throughput of a checkout-like flow (retrieve the customer, create
+# a payment intent, then fetch its charge) calling the blocking Stripe SDK
+# methods versus the async `StripeService`.
+#
+# The Stripe API is replaced by a local stub server answering after `latency`
+# seconds. Flows run `concurrency` at a time, like concurrent API requests.
+#
+# python -m scripts.benchmarks.stripe_checkout --flows 500 --latency 0.05
+#
+
+cli = typer.Typer()
+
+OBJECTS = {
+    "customers": {"id": "cus_BENCHMARK", "object": "customer"},
+    "payment_intents": {
+        "id": "pi_BENCHMARK",
+        "object": "payment_intent",
+        "amount": 1000,
+        "currency": "usd",
+        "latest_charge": "ch_BENCHMARK",
+    },
+    "charges": {"id": "ch_BENCHMARK", "object": "charge", "amount": 1000},
+}
+
+
+def stripe_handler(latency: float):  # type: ignore
+    async def _handler(method: str, path: str, content: bytes) -> tuple[int, bytes]:
+        await asyncio.sleep(latency)
+        resource = path.split("?", 1)[0].split("/")[2]
+        return 200, json.dumps(OBJECTS[resource]).encode()
+
+    return _handler
+
+
+@cli.command()
+@typer_async
+async def run(
+    flows: int = typer.Option(500, help="Number of checkout flows"),
+    latency: float = typer.Option(0.02, help="Stub server latency, in seconds"),
+    concurrency: int = typer.Option(50, help="Number of concurrent flows"),
+) -> None:
+    stripe_lib.api_key = "sk_test_BENCHMARK"
+
+    with stub_http_server(stripe_handler(latency)) as base_url:
+        stripe_lib.api_base = base_url
+
+        async def blocking_flow() -> None:
+            stripe_lib.Customer.retrieve("cus_BENCHMARK")
+            stripe_lib.PaymentIntent.create(
+                amount=1000, currency="usd", customer="cus_BENCHMARK"
+            )
+            stripe_lib.Charge.retrieve("ch_BENCHMARK")
+
+        durations, elapsed = await run_concurrently(
+            [blocking_flow] * flows, concurrency
+        )
+        report("before", durations, elapsed)
+
+        async def async_flow() -> None:
+            await stripe_service.get_customer("cus_BENCHMARK")
+            await stripe_lib.PaymentIntent.create_async(
+                amount=1000, currency="usd", customer="cus_BENCHMARK"
+            )
+            await stripe_service.get_charge("ch_BENCHMARK")
+
+        durations, elapsed = await run_concurrently([async_flow] * flows, concurrency)
+        report("after", durations, elapsed)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+import statistics
+import threading
+from collections.abc import Awaitable, Callable, Iterator, Sequence
+from functools import wraps
+from typing import Any
+
+import typer
+
+
+def typer_async(f):  # type: ignore
+    # From https://github.com/tiangolo/typer/issues/85
+    @wraps(f)
+    def wrapper(*args, **kwargs):  # type: ignore
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(p) - 1]
+
+
+def report(label: str, durations: Sequence[float], elapsed: float) -> None:
+    typer.echo(
+        f"{label:<10} "
+        f"{len(durations) / elapsed:>10.1f} ops/s  "
+        f"p50={percentile(durations, 50) * 1000:>8.2f}ms  "
+        f"p99={percentile(durations, 99) * 1000:>8.2f}ms  "
+        f"total={elapsed:.2f}s"
+    )
+
+
+StubHandler = Callable[[str, str, bytes], Awaitable[tuple[int, bytes]]]
+
+
+def latency_handler(latency: float, body: bytes = b"") -> StubHandler:
+    async def _handler(method: str, path: str, content: bytes) -> tuple[int, bytes]:
+        await asyncio.sleep(latency)
+        return 200, body
+
+    return _handler
+
+
+@contextlib.contextmanager
+def stub_http_server(handler: StubHandler) -> Iterator[str]:
+    """
+    Minimal HTTP/1.1 server with keep-alive support, running its own event loop
+    in a background thread so it keeps serving even if the benchmarked code
+    blocks the caller's loop.
+
+    Yields the base URL of the server.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    server: asyncio.Server | None = None
+
+    async def _handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                content_length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        content_length = int(value)
+                content = await reader.readexactly(content_length)
+                status, body = await handler(method, path, content)
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Content-Type: application/json\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _start() -> None:
+        nonlocal server
+        server = await asyncio.start_server(_handle, "127.0.0.1", 0, backlog=4096)
+        started.set()
+
+    async def _stop() -> None:
+        assert server is not None
+        server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(_start())
+        loop.run_forever()
+        loop.close()
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    started.wait()
+    assert server is not None
+    port = server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        asyncio.run_coroutine_threadsafe(_stop(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+
+async def run_concurrently(
+    jobs: Sequence[Callable[[], Awaitable[Any]]], concurrency: int
+) -> tuple[list[float], float]:
+    """
+    Run `jobs` with at most `concurrency` of them in flight, like an arq worker
+    with `max_jobs=concurrency` would.
+
+    Returns the duration of each job and the total elapsed time.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: list[float] = []
+
+    async def _run(job: Callable[[], Awaitable[Any]]) -> None:
+        async with semaphore:
+            t0 = loop.time()
+            await job()
+            durations.append(loop.time() - t0)
+
+    t0 = loop.time()
+    await asyncio.gather(*(_run(job) for job in jobs))
+    return durations, loop.time() - t0
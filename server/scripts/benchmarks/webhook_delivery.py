@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+
+import httpx
+import typer
+
+from polar.webhook.delivery import WebhookHTTPClient
+from scripts.benchmarks.utils import (
+    latency_handler,
+    report,
+    run_concurrently,
+    stub_http_server,
+    typer_async,
+)
+
+#
+# Compare the throughput of `webhook_event.send` deliveries using the blocking
+# `httpx.post` call versus the pooled `WebhookHTTPClient`.
+#
+# Each simulated job yields to the event loop once (standing for the database
+# lookup of the event) before delivering the payload to a local stub server
+# answering after `latency` seconds. Jobs run `max_jobs` at a time, like on an
+# arq worker.
+#
+# python -m scripts.benchmarks.webhook_delivery --jobs 2000 --latency 0.05
+#
+
+cli = typer.Typer()
+
+PAYLOAD = '{"type":"subscription.created","data":{}}'
+HEADERS = {"user-agent": "polar.sh webhooks", "content-type": "application/json"}
+
+
+@cli.command()
+@typer_async
+async def run(
+    jobs: int = typer.Option(2000, help="Number of deliveries"),
+    endpoints: int = typer.Option(50, help="Number of distinct webhook endpoints"),
+    latency: float = typer.Option(0.02, help="Stub server latency, in seconds"),
+    max_jobs: int = typer.Option(10, help="Worker concurrency"),
+) -> None:
+    endpoint_ids = [uuid.uuid4() for _ in range(endpoints)]
+
+    with stub_http_server(latency_handler(latency)) as base_url:
+        url = f"{base_url}/hook"
+
+        def blocking_job(endpoint_id: uuid.UUID):  # type: ignore
+            async def _job() -> None:
+                await asyncio.sleep(0)
+                httpx.post(url, content=PAYLOAD, headers=HEADERS, timeout=20.0)
+
+            return _job
+
+        durations, elapsed = await run_concurrently(
+            [blocking_job(endpoint_ids[i % endpoints]) for i in range(jobs)],
+            max_jobs,
+        )
+        report("before", durations, elapsed)
+
+        client = WebhookHTTPClient(
+            timeout=20.0,
+            max_connections=100,
+            max_keepalive_connections=50,
+            keepalive_expiry=30.0,
+            max_concurrency_per_endpoint=4,
+        )
+
+        def pooled_job(endpoint_id: uuid.UUID):  # type: ignore
+            async def _job() -> None:
+                await asyncio.sleep(0)
+                await client.post(endpoint_id, url, content=PAYLOAD, headers=HEADERS)
+
+            return _job
+
+        durations, elapsed = await run_concurrently(
+            [pooled_job(endpoint_ids[i % endpoints]) for i in range(jobs)],
+            max_jobs,
+        )
+        report("after", durations, elapsed)
+
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    cli()
@@ -8,6 +8,8 @@ from polar.models.benefit import Benefit
 from polar.models.subscription import Subscription
 from polar.models.user import User
 from polar.models.user_organization import UserOrganization
+from polar.traffic.tasks import traffic_flush_views
+from polar.worker import JobContext
 from tests.fixtures.auth import AuthSubjectFixture
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import create_benefit_grant
@@ -333,6 +335,7 @@ class TestAdvertisementCampaign:
         benefit_organization: Benefit,
         advertisement_campaign: AdvertisementCampaign,
         save_fixture: SaveFixture,
+        job_context: JobContext,
     ) -> None:
         user_organization.is_admin = True
         await save_fixture(user_organization)
@@ -351,7 +354,8 @@ class TestAdvertisementCampaign:
         assert track.status_code == 200
         assert track.json()["image_url"] == advertisement_campaign.image_url
 
-        # check bumped view counter
+        # check bumped view counter, once views are flushed
+        await traffic_flush_views(job_context)
 
         got = await client.get(
             f"/api/v1/advertisements/campaigns/{advertisement_campaign.id}"
@@ -7,6 +7,8 @@ from polar.models.organization import Organization
 from polar.models.user import OAuthAccount, User
 from polar.models.user_organization import UserOrganization
 from polar.postgres import AsyncSession
+from polar.traffic.tasks import traffic_flush_views
+from polar.worker import JobContext
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import create_user
 
@@ -720,6 +722,7 @@ async def test_view_counter(
     client: AsyncClient,
     session: AsyncSession,
     save_fixture: SaveFixture,
+    job_context: JobContext,
 ) -> None:
     user_organization.is_admin = True
     await save_fixture(user_organization)
@@ -746,6 +749,9 @@ async def test_view_counter(
         viewed = await client.post(f"/api/v1/articles/{res['id']}/viewed")
         assert viewed.status_code == 200
 
+    # views are buffered until the next flush
+    await traffic_flush_views(job_context)
+
     # get again
     get = await client.get(f"/api/v1/articles/{res['id']}")
     assert get.status_code == 200
@@ -6,6 +6,7 @@ from datetime import datetime
 
 import pytest
 import pytest_asyncio
+from pytest_mock import MockerFixture
 
 from polar.article.service import article_service
 from polar.auth.models import Anonymous, Subject
@@ -788,3 +789,101 @@ class TestListReceivers:
         receivers = await article_service.list_receivers(session, organization.id, True)
         assert len(receivers) == 1
         assert receivers[0] == (user.id, True, True)
+
+
+@pytest.mark.asyncio
+class TestCountReceivers:
+    async def test_valid(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+        user_organization: UserOrganization,
+    ) -> None:
+        for paid_subscriber in (False, False, True):
+            await create_articles_subscription(
+                save_fixture,
+                user=await create_user(save_fixture),
+                organization=organization,
+                paid_subscriber=paid_subscriber,
+            )
+        unsubscribed = await create_articles_subscription(
+            save_fixture,
+            user=await create_user(save_fixture),
+            organization=organization,
+            paid_subscriber=False,
+        )
+        unsubscribed.emails_unsubscribed_at = utc_now()
+        await save_fixture(unsubscribed)
+
+        # then
+        session.expunge_all()
+
+        assert await article_service.count_receivers(
+            session, organization.id, False
+        ) == (2, 1, 1)
+        assert await article_service.count_receivers(
+            session, organization.id, True
+        ) == (0, 1, 1)
+
+
+@pytest.mark.asyncio
+class TestListReceiverIds:
+    async def test_keyset_pagination(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        organization: Organization,
+    ) -> None:
+        user_ids = []
+        for _ in range(5):
+            user = await create_user(save_fixture)
+            await create_articles_subscription(
+                save_fixture,
+                user=user,
+                organization=organization,
+                paid_subscriber=False,
+            )
+            user_ids.append(user.id)
+
+        # then
+        session.expunge_all()
+
+        pages: list[uuid.UUID] = []
+        after: uuid.UUID | None = None
+        while page := await article_service.list_receiver_ids(
+            session, organization.id, False, after=after, limit=2
+        ):
+            assert len(page) <= 2
+            pages.extend(page)
+            after = page[-1]
+
+        assert pages == sorted(user_ids)
+
+
+@pytest.mark.asyncio
+class TestSendToSubscribers:
+    async def test_valid(
+        self,
+        session: AsyncSession,
+        mocker: MockerFixture,
+        article_public_free_published: Article,
+    ) -> None:
+        enqueue_job_mock = mocker.patch("polar.article.service.enqueue_job")
+        article_public_free_published.notify_subscribers = True
+
+        # then
+        session.expunge_all()
+
+        await article_service.send_to_subscribers(
+            session, article_public_free_published
+        )
+
+        assert article_public_free_published.notifications_sent_at is not None
+        assert article_public_free_published.email_sent_to_count == 0
+        enqueue_job_mock.assert_called_once_with(
+            "articles.fan_out",
+            article_id=article_public_free_published.id,
+            _job_id=f"articles.fan_out:{article_public_free_published.id}",
+        )
@@ -0,0 +1,172 @@
+import json
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+import pytest_asyncio
+import respx
+from pytest_mock import MockerFixture
+
+from polar.article.email import UNSUBSCRIBE_LINK_PLACEHOLDER
+from polar.article.tasks import articles_fan_out, articles_send_to_users
+from polar.config import settings
+from polar.kit.utils import utc_now
+from polar.models import Article, Organization, User, UserOrganization
+from polar.postgres import AsyncSession
+from polar.redis import redis
+from polar.worker import JobContext, PolarWorkerContext
+from tests.article.test_service import create_articles_subscription
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.email import FakeEmailSender
+from tests.fixtures.random_objects import create_user
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_article_email_cache() -> AsyncIterator[None]:
+    async def _clear() -> None:
+        async for key in redis.scan_iter("polar:article_email:*"):
+            await redis.delete(key)
+
+    await _clear()
+    yield
+    await _clear()
+
+
+@pytest.mark.asyncio
+async def test_send_to_users(
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    respx_mock: respx.MockRouter,
+    email_sender: FakeEmailSender,
+    article: Article,
+    organization: Organization,
+    user: User,
+    user_organization: UserOrganization,
+) -> None:
+    free_subscribers = [await create_user(save_fixture) for _ in range(2)]
+    free_subscriptions = [
+        await create_articles_subscription(
+            save_fixture, user=u, organization=organization, paid_subscriber=False
+        )
+        for u in free_subscribers
+    ]
+    paid_subscriber = await create_user(save_fixture)
+    await create_articles_subscription(
+        save_fixture,
+        user=paid_subscriber,
+        organization=organization,
+        paid_subscriber=True,
+    )
+
+    def render(request: httpx.Request) -> httpx.Response:
+        unsubscribe_link = json.loads(request.content).get("unsubscribe_link")
+        return httpx.Response(200, text=f"<a href='{unsubscribe_link}'>Unsubscribe</a>")
+
+    render_mock = respx_mock.post(
+        f"{settings.FRONTEND_BASE_URL}/email/article/{article.id}"
+    ).mock(side_effect=render)
+
+    # then
+    session.expunge_all()
+
+    user_ids = [user.id, paid_subscriber.id, *(u.id for u in free_subscribers)]
+    await articles_send_to_users(
+        job_context, article.id, user_ids, polar_worker_context
+    )
+
+    # One render per audience variant
+    assert render_mock.call_count == 3
+    assert len(email_sender.batches) == 1
+    emails = {email.to_email_addr: email for email in email_sender.sent}
+    assert emails.keys() == {
+        user.email,
+        paid_subscriber.email,
+        *(u.email for u in free_subscribers),
+    }
+
+    for free_subscriber, subscription in zip(free_subscribers, free_subscriptions):
+        email = emails[free_subscriber.email]
+        unsubscribe_link = (
+            f"https://polar.sh/unsubscribe?org={organization.name}"
+            f"&id={subscription.id}"
+        )
+        assert email.email_headers["List-Unsubscribe"] == f"<{unsubscribe_link}>"
+        assert unsubscribe_link.replace("&", "&amp;") in email.html_content
+        assert UNSUBSCRIBE_LINK_PLACEHOLDER not in email.html_content
+
+    member_email = emails[user.email]
+    assert "List-Unsubscribe" not in member_email.email_headers
+
+    # Renders are cached across jobs
+    await articles_send_to_users(
+        job_context, article.id, user_ids, polar_worker_context
+    )
+    assert render_mock.call_count == 3
+    assert len(email_sender.sent) == 8
+
+
+@pytest.mark.asyncio
+class TestFanOut:
+    async def test_resumable(
+        self,
+        job_context: JobContext,
+        polar_worker_context: PolarWorkerContext,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        mocker: MockerFixture,
+        article: Article,
+        organization: Organization,
+    ) -> None:
+        mocker.patch.object(settings, "ARTICLE_EMAIL_CHUNK_SIZE", 2)
+        mocker.patch.object(settings, "ARTICLE_EMAIL_FANOUT_CHUNKS_PER_PAGE", 1)
+        enqueue_job_mock = mocker.patch("polar.article.service.enqueue_job")
+        flush_mock = mocker.patch("polar.article.tasks.flush_enqueued_jobs")
+
+        user_ids = []
+        for _ in range(5):
+            receiver = await create_user(save_fixture)
+            await create_articles_subscription(
+                save_fixture,
+                user=receiver,
+                organization=organization,
+                paid_subscriber=False,
+            )
+            user_ids.append(receiver.id)
+        user_ids.sort()
+
+        # Fan-out interrupted after the first chunk
+        article.notifications_sent_at = utc_now()
+        article.email_sent_to_count = 2
+        article.email_fanout_cursor = user_ids[1]
+        await save_fixture(article)
+
+        # then
+        session.expunge_all()
+
+        await articles_fan_out(job_context, article.id, polar_worker_context)
+
+        assert [
+            call.kwargs["user_ids"] for call in enqueue_job_mock.call_args_list
+        ] == [
+            user_ids[2:4],
+            user_ids[4:],
+        ]
+        # The worker names the task after everything before the last ":"
+        assert {
+            call.kwargs["_job_id"].rsplit(":", 1)[0]
+            for call in enqueue_job_mock.call_args_list
+        } == {"articles.send_to_users"}
+        assert flush_mock.call_count == 2
+
+        updated_article = await session.get(Article, article.id)
+        assert updated_article is not None
+        assert updated_article.email_sent_to_count == 5
+        assert updated_article.email_fanout_cursor == user_ids[-1]
+        assert updated_article.email_fanout_completed_at is not None
+
+        # Already completed
+        enqueue_job_mock.reset_mock()
+        await articles_fan_out(job_context, article.id, polar_worker_context)
+        enqueue_job_mock.assert_not_called()
@@ -0,0 +1,175 @@
+import secrets
+import time
+
+import pytest
+from pytest_mock import MockerFixture
+from redis import RedisError
+from sqlalchemy import inspect
+
+from polar.auth.cache import auth_subject_cache
+from polar.auth.scope import Scope
+from polar.auth.service import AuthService
+from polar.models import Organization, User
+from polar.models.user import OAuthAccount
+from polar.personal_access_token.service import personal_access_token_service
+from polar.postgres import AsyncSession
+from polar.user.service import user as user_service
+
+
+def _token() -> str:
+    return secrets.token_urlsafe()
+
+
+@pytest.mark.asyncio
+class TestAuthSubjectCache:
+    async def test_user(
+        self, session: AsyncSession, user: User, user_github_oauth: OAuthAccount
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        token = _token()
+        assert await auth_subject_cache.get(session, token) is None
+
+        loaded_user = await user_service.get(session, user.id)
+        assert loaded_user is not None
+        await auth_subject_cache.set(token, loaded_user)
+        session.expunge_all()
+        # Skip the in-process tier to check the Redis round-trip
+        auth_subject_cache._local.clear()
+
+        cached = await auth_subject_cache.get(session, token)
+        assert cached is not None
+        subject, scopes = cached
+        assert isinstance(subject, User)
+        assert inspect(subject).persistent
+        assert subject.id == user.id
+        assert subject.email == user.email
+        assert subject.created_at == user.created_at
+        assert scopes == set()
+        assert [a.id for a in subject.oauth_accounts] == [user_github_oauth.id]
+        assert subject.github_username == user_github_oauth.account_username
+
+    async def test_organization(
+        self, session: AsyncSession, organization: Organization
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        token = _token()
+        await auth_subject_cache.set(token, organization, {Scope.articles_read})
+
+        cached = await auth_subject_cache.get(session, token)
+        assert cached is not None
+        subject, scopes = cached
+        assert isinstance(subject, Organization)
+        assert subject.id == organization.id
+        assert subject.platform == organization.platform
+        assert scopes == {Scope.articles_read}
+
+    async def test_expired_token(self, session: AsyncSession, user: User) -> None:
+        # then
+        session.expunge_all()
+
+        token = _token()
+        await auth_subject_cache.set(token, user, expires_at=int(time.time()) - 1)
+        assert await auth_subject_cache.get(session, token) is None
+
+    async def test_invalidate(self, session: AsyncSession, user: User) -> None:
+        # then
+        session.expunge_all()
+
+        token, other_token = _token(), _token()
+        await auth_subject_cache.set(token, user)
+        await auth_subject_cache.set(other_token, user)
+
+        await auth_subject_cache.invalidate_token(token)
+        assert await auth_subject_cache.get(session, token) is None
+        assert await auth_subject_cache.get(session, other_token) is not None
+
+        await auth_subject_cache.invalidate(user.id)
+        assert await auth_subject_cache.get(session, other_token) is None
+
+    async def test_invalidate_on_commit(
+        self, session: AsyncSession, user: User
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        token = _token()
+        await auth_subject_cache.set(token, user)
+
+        cached = await auth_subject_cache.get(session, token)
+        assert cached is not None
+        cached.subject.blocked_at = user.created_at
+        await session.flush()
+
+        # Not committed yet: other sessions still see the old row
+        assert await auth_subject_cache.get(session, token) is not None
+
+        await session.commit()
+
+        assert await auth_subject_cache.get(session, token) is None
+
+    async def test_not_invalidated_on_rollback(
+        self, session: AsyncSession, user: User
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        token = _token()
+        await auth_subject_cache.set(token, user)
+
+        cached = await auth_subject_cache.get(session, token)
+        assert cached is not None
+        cached.subject.blocked_at = user.created_at
+        await session.flush()
+        await session.rollback()
+        await session.commit()
+
+        assert await auth_subject_cache.get(session, token) is not None
+
+    async def test_invalidate_on_commit_error(
+        self, session: AsyncSession, user: User, mocker: MockerFixture
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        invalidate = mocker.patch.object(
+            auth_subject_cache, "invalidate", side_effect=RedisError()
+        )
+
+        loaded_user = await user_service.get(session, user.id)
+        assert loaded_user is not None
+        loaded_user.blocked_at = user.created_at
+        await session.flush()
+
+        # The transaction is committed anyway
+        await session.commit()
+
+        invalidate.assert_awaited_once_with(user.id)
+
+
+@pytest.mark.asyncio
+class TestGetUserFromAuthHeader:
+    async def test_personal_access_token(
+        self, session: AsyncSession, user: User
+    ) -> None:
+        pat = await personal_access_token_service.create(session, user.id, "test")
+        token = AuthService.generate_pat_token(
+            pat.id, pat.expires_at, [Scope.articles_read]
+        )
+
+        # then
+        session.expunge_all()
+
+        result = await AuthService.get_user_from_auth_header(session, token=token)
+        assert result is not None
+        assert result[0].id == user.id
+        assert result[1] == {Scope.articles_read}
+        assert await auth_subject_cache.get(session, token) is not None
+
+        await personal_access_token_service.delete(session, pat.id)
+
+        assert await auth_subject_cache.get(session, token) is None
+        assert await AuthService.get_user_from_auth_header(session, token=token) is None
@@ -12,11 +12,12 @@ from polar.models.pledge import Pledge, PledgeState
 from polar.models.repository import Repository
 from polar.models.user import User
 from polar.models.user_organization import UserOrganization
-from polar.postgres import AsyncSession
-from tests.fixtures.database import SaveFixture
+from polar.postgres import AsyncSession, sql
+from tests.fixtures.database import CountQueries, SaveFixture
 from tests.fixtures.random_objects import (
     create_issue,
     create_organization,
+    create_pledge,
     create_repository,
     create_user,
 )
@@ -735,3 +736,140 @@ async def test_can_write_pledge(
                 )
                 is tc.expected
             )
+
+
+@pytest.mark.asyncio
+async def test_can_many(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    count_queries: CountQueries,
+    user: User,
+    organization: Organization,
+    user_organization: UserOrganization,
+) -> None:
+    private_repository = await create_repository(
+        save_fixture, organization, is_private=True
+    )
+    other_organization = await create_organization(save_fixture)
+    other_repository = await create_repository(
+        save_fixture, other_organization, is_private=True
+    )
+    issues = [
+        await create_issue(save_fixture, organization, private_repository),
+        await create_issue(save_fixture, other_organization, other_repository),
+        await create_issue(save_fixture, organization, private_repository),
+    ]
+
+    # then
+    session.expunge_all()
+
+    authz = Authz(session)
+    with count_queries() as queries:
+        assert await authz.can_many(user, AccessType.read, issues) == [
+            True,
+            False,
+            True,
+        ]
+        assert await authz.can_many(Anonymous(), AccessType.read, issues) == [
+            False,
+            False,
+            False,
+        ]
+
+    # The memberships and the repositories, once
+    assert queries.count == 2
+
+
+@pytest.mark.asyncio
+async def test_filter_readable(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    organization: Organization,
+    user_organization: UserOrganization,
+) -> None:
+    other_organization = await create_organization(save_fixture)
+    repositories = [
+        await create_repository(save_fixture, organization, is_private=True),
+        await create_repository(save_fixture, other_organization, is_private=True),
+        await create_repository(save_fixture, other_organization, is_private=False),
+    ]
+
+    # then
+    session.expunge_all()
+
+    authz = Authz(session)
+    assert await authz.filter_readable(user, AccessType.read, repositories) == [
+        repositories[0],
+        repositories[2],
+    ]
+    assert await authz.filter_readable(Anonymous(), AccessType.read, repositories) == [
+        repositories[2]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_readable_clause(
+    subtests: Any,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    organization: Organization,
+    user_organization: UserOrganization,
+) -> None:
+    other_organization = await create_organization(save_fixture)
+    pledger = await create_user(save_fixture)
+
+    repositories: list[Repository] = []
+    issues: list[Issue] = []
+    pledges: list[Pledge] = []
+    for org in [organization, other_organization]:
+        for is_private in [True, False]:
+            repository = await create_repository(save_fixture, org, is_private)
+            issue = await create_issue(save_fixture, org, repository)
+            repositories.append(repository)
+            issues.append(issue)
+            pledges.append(
+                await create_pledge(
+                    save_fixture, org, repository, issue, other_organization
+                )
+            )
+            pledges.append(
+                await create_pledge(save_fixture, org, repository, issue, organization)
+            )
+
+    pledge_by_user = await create_pledge(
+        save_fixture, other_organization, repository, issue, other_organization
+    )
+    pledge_by_user.by_organization_id = None
+    pledge_by_user.by_user_id = pledger.id
+    await save_fixture(pledge_by_user)
+    pledges.append(pledge_by_user)
+
+    # then
+    session.expunge_all()
+
+    subjects: list[Subject] = [Anonymous(), user, pledger, other_organization]
+    objects: list[list[Repository] | list[Issue] | list[Pledge]] = [
+        repositories,
+        issues,
+        pledges,
+    ]
+    for idx, (subject, objs) in enumerate(
+        (subject, objs) for subject in subjects for objs in objects
+    ):
+        model = type(objs[0])
+        if isinstance(subject, Organization) and model is not Repository:
+            continue
+
+        with subtests.test(msg=f"subject={type(subject)} model={model}", id=idx):
+            authz = Authz(session)
+            expected = {
+                o.id for o in objs if await authz.can(subject, AccessType.read, o)
+            }
+
+            clause = await authz.readable_clause(subject, model)
+            result = await session.execute(
+                sql.select(model.id).where(model.id.in_([o.id for o in objs]), clause)
+            )
+            assert set(result.scalars()) == expected
@@ -4,6 +4,7 @@ import pytest
 from httpx import AsyncClient
 
 from polar.models.issue import Issue
+from polar.models.issue_reward import IssueReward
 from polar.models.organization import Organization
 from polar.models.pledge import Pledge, PledgeState
 from polar.models.repository import Repository
@@ -11,8 +12,12 @@ from polar.models.user import User
 from polar.models.user_organization import UserOrganization
 from polar.postgres import AsyncSession
 from polar.user.service import user as user_service
-from tests.fixtures.database import SaveFixture
-from tests.fixtures.random_objects import create_user_github_oauth
+from tests.fixtures.database import CountQueries, SaveFixture
+from tests.fixtures.random_objects import (
+    create_issue,
+    create_pledge,
+    create_user_github_oauth,
+)
 
 
 @pytest.mark.asyncio
@@ -293,3 +298,51 @@ async def test_get_only_badged_is_badged(
     res = response.json()
 
     assert len(res["data"]) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.auth
+async def test_get_query_count(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    count_queries: CountQueries,
+    organization: Organization,
+    repository: Repository,
+    user_organization: UserOrganization,  # makes User a member of Organization
+    pledging_organization: Organization,
+    client: AsyncClient,
+) -> None:
+    async def create_issues(count: int, pledges_per_issue: int) -> None:
+        for _ in range(count):
+            issue = await create_issue(save_fixture, organization, repository)
+            for _ in range(pledges_per_issue):
+                await create_pledge(
+                    save_fixture, organization, repository, issue, pledging_organization
+                )
+            await save_fixture(
+                IssueReward(
+                    issue_id=issue.id,
+                    share_thousands=900,
+                    organization_id=organization.id,
+                )
+            )
+
+    async def get_dashboard(expected_issues: int) -> int:
+        session.expunge_all()
+        with count_queries() as queries:
+            response = await client.get(f"/api/v1/dashboard/github/{organization.name}")
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert len(data) == expected_issues
+        assert all(len(entry["pledges"]) > 0 for entry in data)
+        assert all(len(entry["rewards"]) > 0 for entry in data)
+        return queries.count
+
+    await create_issues(1, 1)
+    one_issue = await get_dashboard(1)
+
+    await create_issues(9, 3)
+    ten_issues = await get_dashboard(10)
+
+    assert ten_issues == one_issue
@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Sequence
+
+import pytest
+
+from polar.email.batcher import EmailBatcher
+from polar.email.sender import Email
+from tests.fixtures.email import FakeEmailSender
+
+
+def get_email(to_email_addr: str, subject: str = "Hello") -> Email:
+    return Email(to_email_addr=to_email_addr, subject=subject, html_content="")
+
+
+@pytest.mark.asyncio
+class TestEmailBatcher:
+    async def test_grouped_by_subject(self) -> None:
+        sender = FakeEmailSender()
+        batcher = EmailBatcher(lambda: sender, max_batch_size=100, linger=0.01)
+
+        await asyncio.gather(
+            batcher.send(get_email("a@example.com")),
+            batcher.send(get_email("b@example.com")),
+            batcher.send(get_email("c@example.com", subject="Bye")),
+        )
+
+        assert sorted(
+            [email.to_email_addr for email in batch] for batch in sender.batches
+        ) == [["a@example.com", "b@example.com"], ["c@example.com"]]
+
+    async def test_full_batch_sent_without_lingering(self) -> None:
+        sender = FakeEmailSender()
+        batcher = EmailBatcher(lambda: sender, max_batch_size=2, linger=3600)
+
+        await asyncio.wait_for(
+            asyncio.gather(
+                batcher.send(get_email("a@example.com")),
+                batcher.send(get_email("b@example.com")),
+            ),
+            timeout=1,
+        )
+
+        assert len(sender.batches) == 1
+
+    async def test_failed_batch(self) -> None:
+        class FailingEmailSender(FakeEmailSender):
+            async def send_batch(self, emails: Sequence[Email]) -> None:
+                raise RuntimeError()
+
+        batcher = EmailBatcher(
+            lambda: FailingEmailSender(), max_batch_size=100, linger=0
+        )
+
+        with pytest.raises(RuntimeError):
+            await batcher.send(get_email("a@example.com"))
@@ -1,4 +1,4 @@
-from polar.email.renderer import EmailRenderer
+from polar.email.renderer import EmailRenderer, get_email_renderer
 
 email_renderer = EmailRenderer()
 
@@ -14,3 +14,42 @@ def test_render_from_string() -> None:
     assert rendered_subject == "Hello, John!"
     assert rendered_body.startswith("<!DOCTYPE html")
     assert "<p>Hi, John! Welcome to Polar!</p>" in rendered_body
+
+
+def test_render_many_from_string() -> None:
+    subject = "Hello, {{ name }}!"
+    body = "<p>Hi, {{ name }}! Welcome to Polar!</p>"
+
+    rendered = email_renderer.render_many_from_string(
+        subject, body, [{"name": "John"}, {"name": "Jane"}]
+    )
+
+    assert [rendered_subject for rendered_subject, _ in rendered] == [
+        "Hello, John!",
+        "Hello, Jane!",
+    ]
+    assert "<p>Hi, Jane! Welcome to Polar!</p>" in rendered[1][1]
+
+
+def test_compiled_templates_are_cached() -> None:
+    renderer = EmailRenderer()
+    context = {"name": "John"}
+
+    renderer.render_from_string("Hello, {{ name }}!", "<p>Hi</p>", context)
+    renderer.render_from_string("Hello, {{ name }}!", "<p>Hi</p>", context)
+    renderer.render_from_string("Bye, {{ name }}!", "<p>Hi</p>", context)
+
+    cache_info = renderer._compile.cache_info()
+    assert cache_info.misses == 3
+    assert cache_info.hits == 3
+    assert "current_year" not in context
+
+
+def test_get_email_renderer_is_shared() -> None:
+    assert get_email_renderer() is get_email_renderer()
+    assert get_email_renderer({"magic_link": "polar.magic_link"}) is (
+        get_email_renderer({"magic_link": "polar.magic_link"})
+    )
+    assert get_email_renderer() is not (
+        get_email_renderer({"magic_link": "polar.magic_link"})
+    )
@@ -0,0 +1,87 @@
+import json
+
+import httpx
+import pytest
+
+from polar.email.sender import Email, EmailSenderError, ResendEmailSender
+
+
+def get_emails(count: int) -> list[Email]:
+    return [
+        Email(
+            to_email_addr=f"user{i}@example.com",
+            subject="Hello",
+            html_content="<p>Hello</p>",
+            reply_to_name="Polar Support",
+            reply_to_email_addr="support@polar.sh",
+        )
+        for i in range(count)
+    ]
+
+
+def get_sender(handler: httpx.MockTransport) -> ResendEmailSender:
+    return ResendEmailSender(
+        api_key="RESEND_API_KEY",
+        base_url="https://api.resend.com",
+        max_concurrency=2,
+        transport=handler,
+    )
+
+
+def batch_response(request: httpx.Request) -> httpx.Response:
+    payload = json.loads(request.content)
+    return httpx.Response(
+        200, json={"data": [{"id": f"email_{i}"} for i in range(len(payload))]}
+    )
+
+
+@pytest.mark.asyncio
+class TestResendEmailSender:
+    async def test_send_batch(self) -> None:
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return batch_response(request)
+
+        sender = get_sender(httpx.MockTransport(handler))
+        await sender.send_batch(get_emails(150))
+
+        assert len(requests) == 2
+        for request in requests:
+            assert request.url.path == "/emails/batch"
+            assert request.headers["Authorization"] == "Bearer RESEND_API_KEY"
+        first_batch = json.loads(requests[0].content)
+        assert len(first_batch) == 100
+        assert first_batch[0] == {
+            "from": "Polar <notifications@polar.sh>",
+            "to": ["user0@example.com"],
+            "subject": "Hello",
+            "html": "<p>Hello</p>",
+            "headers": {},
+            "reply_to": "Polar Support <support@polar.sh>",
+        }
+        assert len(json.loads(requests[1].content)) == 50
+
+    async def test_rate_limited(self) -> None:
+        responses = [
+            httpx.Response(429, headers={"retry-after": "0.01"}),
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if responses:
+                return responses.pop()
+            return batch_response(request)
+
+        sender = get_sender(httpx.MockTransport(handler))
+        await sender.send_batch(get_emails(1))
+
+        assert responses == []
+
+    async def test_error(self) -> None:
+        sender = get_sender(
+            httpx.MockTransport(lambda _: httpx.Response(422, json={"error": "..."}))
+        )
+
+        with pytest.raises(EmailSenderError):
+            await sender.send_batch(get_emails(1))
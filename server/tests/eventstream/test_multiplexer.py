@@ -0,0 +1,91 @@
+import contextlib
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from polar.eventstream.multiplexer import (
+    PubSubMultiplexer,
+    Subscription,
+    SubscriptionClosed,
+)
+from polar.redis import redis
+
+
+@pytest_asyncio.fixture
+async def multiplexer() -> AsyncIterator[PubSubMultiplexer]:
+    multiplexer = PubSubMultiplexer(redis, buffer_size=3)
+    yield multiplexer
+    await multiplexer.close()
+
+
+def _channel() -> str:
+    return f"test:{uuid.uuid4()}"
+
+
+@pytest.mark.asyncio
+class TestSubscription:
+    async def test_drop_oldest(self) -> None:
+        subscription = Subscription(["channel"], buffer_size=2)
+
+        subscription.put("1")
+        subscription.put("2")
+        subscription.put("3")
+
+        assert subscription.dropped == 1
+        assert await subscription.get(timeout=0) == "2"
+        assert await subscription.get(timeout=0) == "3"
+        assert await subscription.get(timeout=0) is None
+
+    async def test_closed(self) -> None:
+        subscription = Subscription(["channel"], buffer_size=2)
+
+        subscription.put("1")
+        subscription.close()
+
+        assert await subscription.get(timeout=0) == "1"
+        with pytest.raises(SubscriptionClosed):
+            await subscription.get(timeout=0)
+
+
+@pytest.mark.asyncio
+class TestPubSubMultiplexer:
+    async def test_fan_out(self, multiplexer: PubSubMultiplexer) -> None:
+        channel = _channel()
+        other_channel = _channel()
+
+        async with (
+            multiplexer.subscribe([channel]) as subscription_1,
+            multiplexer.subscribe([channel, other_channel]) as subscription_2,
+        ):
+            await redis.publish(channel, "hello")
+            await redis.publish(other_channel, "world")
+
+            assert await subscription_1.get(timeout=1.0) == "hello"
+            assert await subscription_2.get(timeout=1.0) == "hello"
+            assert await subscription_2.get(timeout=1.0) == "world"
+            assert await subscription_1.get(timeout=0.1) is None
+
+    async def test_shared_channels(self, multiplexer: PubSubMultiplexer) -> None:
+        channels = [_channel() for _ in range(10)]
+
+        async with contextlib.AsyncExitStack() as stack:
+            for channel in channels:
+                # Several clients listening to the same channel
+                for _ in range(3):
+                    await stack.enter_async_context(multiplexer.subscribe([channel]))
+
+            # Each channel is subscribed once, on the shared connection
+            numsub = await redis.pubsub_numsub(*channels)
+            assert all(count == 1 for _, count in numsub)
+
+        # Channels are unsubscribed when the last client leaves
+        numsub = await redis.pubsub_numsub(*channels)
+        assert all(count == 0 for _, count in numsub)
+
+    async def test_close(self, multiplexer: PubSubMultiplexer) -> None:
+        async with multiplexer.subscribe([_channel()]) as subscription:
+            await multiplexer.close()
+            with pytest.raises(SubscriptionClosed):
+                await subscription.get(timeout=1.0)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from pytest_mock import MockerFixture
+from redis.asyncio.client import PubSub
+
+from polar.eventstream.service import Receivers, publish_many, publish_members
+from polar.models import Organization, User, UserOrganization
+from polar.organization.service import organization as organization_service
+from polar.postgres import AsyncSession
+from polar.redis import redis
+from polar.user_organization.service import (
+    user_organization as user_organization_service,
+)
+
+
+@pytest_asyncio.fixture
+async def pubsub() -> AsyncIterator[PubSub]:
+    async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+        yield pubsub
+
+
+async def _get_messages(pubsub: PubSub, count: int) -> list[tuple[str, dict[str, Any]]]:
+    messages: list[tuple[str, dict[str, Any]]] = []
+    async with asyncio.timeout(2.0):
+        while len(messages) < count:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=0.1
+            )
+            if message is not None:
+                messages.append((message["channel"], json.loads(message["data"])))
+    return messages
+
+
+@pytest.mark.asyncio
+class TestPublishMany:
+    async def test_single_event(self, pubsub: PubSub) -> None:
+        user_id, user_second_id = uuid.uuid4(), uuid.uuid4()
+        channels = [f"user:{user_id}", f"user:{user_second_id}"]
+        await pubsub.subscribe(*channels)
+
+        await publish_many(
+            "test.key",
+            {"foo": "bar"},
+            [
+                Receivers(user_id=user_id),
+                Receivers(user_id=user_second_id),
+                Receivers(user_id=user_id),
+            ],
+        )
+
+        messages = await _get_messages(pubsub, 2)
+        assert sorted(channel for channel, _ in messages) == sorted(channels)
+        # Same event, serialized once
+        assert messages[0][1] == messages[1][1]
+        assert messages[0][1]["key"] == "test.key"
+        assert messages[0][1]["payload"] == {"foo": "bar"}
+
+        assert await pubsub.get_message(timeout=0.1) is None
+
+
+@pytest.mark.asyncio
+class TestPublishMembers:
+    async def test_cached_members(
+        self,
+        session: AsyncSession,
+        pubsub: PubSub,
+        organization: Organization,
+        user: User,
+        user_second: User,
+        user_organization: UserOrganization,
+    ) -> None:
+        await user_organization_service.invalidate_members_cache(organization.id)
+        await pubsub.subscribe(f"user:{user.id}", f"user:{user_second.id}")
+
+        # then
+        session.expunge_all()
+
+        await publish_members(session, "test.key", {}, organization.id)
+        assert [c for c, _ in await _get_messages(pubsub, 1)] == [f"user:{user.id}"]
+
+        # Cached: a member added behind the service's back isn't seen
+        session.add(
+            UserOrganization(user_id=user_second.id, organization_id=organization.id)
+        )
+        await session.flush()
+        await publish_members(session, "test.key", {}, organization.id)
+        assert [c for c, _ in await _get_messages(pubsub, 1)] == [f"user:{user.id}"]
+
+    async def test_invalidated_on_membership_change(
+        self,
+        session: AsyncSession,
+        pubsub: PubSub,
+        organization: Organization,
+        user: User,
+        user_second: User,
+        user_organization: UserOrganization,
+    ) -> None:
+        await user_organization_service.invalidate_members_cache(organization.id)
+        await pubsub.subscribe(f"user:{user.id}", f"user:{user_second.id}")
+
+        # then
+        session.expunge_all()
+        assert await user_organization_service.list_user_ids_by_org(
+            session, organization.id
+        ) == [user.id]
+
+        await organization_service.add_user(
+            session, organization, user_second, is_admin=False
+        )
+        await publish_members(session, "test.key", {}, organization.id)
+        messages = await _get_messages(pubsub, 2)
+        assert sorted(c for c, _ in messages) == sorted(
+            [f"user:{user.id}", f"user:{user_second.id}"]
+        )
+
+        await user_organization_service.remove_members(
+            session, organization.id, [user.id]
+        )
+        await publish_members(session, "test.key", {}, organization.id)
+        messages = await _get_messages(pubsub, 1)
+        assert [c for c, _ in messages] == [f"user:{user_second.id}"]
+
+    async def test_invalidated_while_listing(
+        self,
+        session: AsyncSession,
+        mocker: MockerFixture,
+        organization: Organization,
+        user: User,
+        user_second: User,
+        user_organization: UserOrganization,
+    ) -> None:
+        await user_organization_service.invalidate_members_cache(organization.id)
+
+        # then
+        session.expunge_all()
+
+        # Members change between the query and the cache write
+        execute = session.execute
+
+        async def execute_then_invalidate(*args: Any, **kwargs: Any) -> Any:
+            result = await execute(*args, **kwargs)
+            await user_organization_service.invalidate_members_cache(organization.id)
+            return result
+
+        execute_mock = mocker.patch.object(
+            session, "execute", side_effect=execute_then_invalidate
+        )
+        assert await user_organization_service.list_user_ids_by_org(
+            session, organization.id
+        ) == [user.id]
+        mocker.stop(execute_mock)
+
+        session.add(
+            UserOrganization(user_id=user_second.id, organization_id=organization.id)
+        )
+        await session.flush()
+
+        # The list read before the change isn't served
+        assert sorted(
+            await user_organization_service.list_user_ids_by_org(
+                session, organization.id
+            )
+        ) == sorted([user.id, user_second.id])
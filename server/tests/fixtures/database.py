@@ -1,14 +1,17 @@
+import contextlib
 import functools
 import inspect
 import warnings
-from collections.abc import AsyncIterator, Callable, Coroutine
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterator
 from pathlib import Path
+from typing import Any
 from uuid import UUID
 
 import pytest
 import pytest_asyncio
 from pytest_mock import MockerFixture
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, event
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import text
 
@@ -130,3 +133,48 @@ def save_fixture_factory(session: AsyncSession) -> SaveFixture:
 @pytest_asyncio.fixture
 def save_fixture(session: AsyncSession) -> SaveFixture:
     return save_fixture_factory(session)
+
+
+class QueryCount:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+CountQueries = Callable[[], contextlib.AbstractContextManager[QueryCount]]
+
+
+@pytest.fixture
+def count_queries(session: AsyncSession) -> CountQueries:
+    """
+    Count the SQL statements executed on the test session's connection.
+
+    Used to assert that the number of queries of an endpoint or a service
+    doesn't grow with the number of returned objects:
+
+        with count_queries() as queries:
+            await client.get("/api/v1/...")
+        assert queries.count == ...
+    """
+
+    @contextlib.contextmanager
+    def _count_queries() -> Iterator[QueryCount]:
+        query_count = QueryCount()
+        connection = session.sync_session.get_bind()
+        assert isinstance(connection, Connection)
+
+        def _before_cursor_execute(
+            conn: Connection, cursor: Any, statement: str, *args: Any
+        ) -> None:
+            query_count.statements.append(statement)
+
+        event.listen(connection, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield query_count
+        finally:
+            event.remove(connection, "before_cursor_execute", _before_cursor_execute)
+
+    return _count_queries
@@ -0,0 +1,30 @@
+from collections.abc import Sequence
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.email.batcher import email_batcher
+from polar.email.sender import Email, EmailSender
+
+
+class FakeEmailSender(EmailSender):
+    """Keep sent emails in memory, to make assertions on them."""
+
+    def __init__(self) -> None:
+        self.batches: list[Sequence[Email]] = []
+
+    @property
+    def sent(self) -> list[Email]:
+        return [email for batch in self.batches for email in batch]
+
+    async def send_batch(self, emails: Sequence[Email]) -> None:
+        self.batches.append(emails)
+
+
+@pytest.fixture
+def email_sender(mocker: MockerFixture) -> FakeEmailSender:
+    """Route the emails sent from tasks through a `FakeEmailSender`."""
+    sender = FakeEmailSender()
+    mocker.patch("polar.email.sender._get_email_sender", return_value=sender)
+    mocker.patch.object(email_batcher, "linger", 0)
+    return sender
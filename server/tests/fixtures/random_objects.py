@@ -35,6 +35,8 @@ from polar.models.product_price import ProductPriceRecurringInterval, ProductPri
 from polar.models.pull_request import PullRequest
 from polar.models.subscription import SubscriptionStatus
 from polar.models.user import OAuthAccount, OAuthPlatform
+from polar.pledge.summary_service import pledge_summary_service
+from polar.postgres import AsyncSession
 from tests.fixtures.database import SaveFixture
 
 
@@ -310,19 +312,23 @@ async def create_user_pledge(
 
 @pytest_asyncio.fixture(scope="function")
 async def pledge(
+    session: AsyncSession,
     save_fixture: SaveFixture,
     organization: Organization,
     repository: Repository,
     issue: Issue,
     pledging_organization: Organization,
 ) -> Pledge:
-    return await create_pledge(
+    pledge = await create_pledge(
         save_fixture, organization, repository, issue, pledging_organization
     )
+    await pledge_summary_service.refresh(session, issue.id)
+    return pledge
 
 
 @pytest_asyncio.fixture(scope="function")
 async def pledge_by_user(
+    session: AsyncSession,
     save_fixture: SaveFixture,
     organization: Organization,
     repository: Repository,
@@ -344,6 +350,7 @@ async def pledge_by_user(
         type=PledgeType.pay_upfront,
     )
     await save_fixture(pledge)
+    await pledge_summary_service.refresh(session, issue.id)
     return pledge
 
 
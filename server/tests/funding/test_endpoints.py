@@ -1,9 +1,12 @@
 import pytest
 from httpx import AsyncClient
+from pytest_mock import MockerFixture
 
+from polar.funding.service import funding as funding_service
 from polar.models import Organization
 from polar.models.repository import Repository
 from polar.models.user_organization import UserOrganization
+from polar.organization.cache import organization_response_cache
 from polar.postgres import AsyncSession
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import create_repository
@@ -156,6 +159,73 @@ class TestSearch:
         json = response.json()
         assert len(json["items"]) == len(issues_pledges)
 
+    async def test_anonymous_cache(
+        self,
+        issues_pledges: IssuesPledgesFixture,
+        client: AsyncClient,
+        organization: Organization,
+        mocker: MockerFixture,
+    ) -> None:
+        list_by = mocker.spy(funding_service, "list_by")
+        params = {
+            "platform": organization.platform.value,
+            "organization_name": organization.name,
+        }
+
+        # First request resolves the organization name, the second one is cached
+        first = await client.get("/api/v1/funding/search", params=params)
+        second = await client.get("/api/v1/funding/search", params=params)
+        assert list_by.call_count == 2
+        assert first.json() == second.json()
+        assert first.headers["ETag"] == second.headers["ETag"]
+
+        hit = await client.get("/api/v1/funding/search", params=params)
+        assert list_by.call_count == 2
+        assert hit.status_code == 200
+        assert hit.json() == first.json()
+        assert len(hit.json()["items"]) == len(issues_pledges)
+
+        # Other query parameters are cached separately
+        paginated = await client.get(
+            "/api/v1/funding/search", params={**params, "limit": 1}
+        )
+        assert list_by.call_count == 3
+        assert len(paginated.json()["items"]) == 1
+
+        not_modified = await client.get(
+            "/api/v1/funding/search",
+            params=params,
+            headers={"If-None-Match": first.headers["ETag"]},
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == first.headers["ETag"]
+        assert list_by.call_count == 3
+
+        await organization_response_cache.invalidate(organization.id)
+        invalidated = await client.get("/api/v1/funding/search", params=params)
+        assert list_by.call_count == 4
+        assert invalidated.json() == first.json()
+
+    @pytest.mark.auth
+    async def test_user_not_cached(
+        self,
+        issues_pledges: IssuesPledgesFixture,
+        client: AsyncClient,
+        organization: Organization,
+        mocker: MockerFixture,
+    ) -> None:
+        list_by = mocker.spy(funding_service, "list_by")
+        params = {
+            "platform": organization.platform.value,
+            "organization_name": organization.name,
+        }
+
+        for _ in range(3):
+            response = await client.get("/api/v1/funding/search", params=params)
+            assert response.status_code == 200
+            assert "ETag" not in response.headers
+        assert list_by.call_count == 3
+
     async def test_pagination(
         self,
         issues_pledges: IssuesPledgesFixture,
@@ -89,7 +89,7 @@ async def run_calculate_sort_columns(session: AsyncSession) -> None:
     res = await session.execute(stmt)
     ids = res.scalars().unique().all()
     for id in ids:
-        await pledge_service.set_issue_pledged_amount_sum(session, id)
+        await pledge_service.refresh_issue_pledge_summary(session, id)
 
 
 @pytest.mark.asyncio
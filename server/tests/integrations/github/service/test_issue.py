@@ -2,7 +2,11 @@ import pytest
 
 from polar.integrations.github.client import get_client
 from polar.integrations.github.service.issue import github_issue
+from polar.kit.utils import utc_now
+from polar.models import Organization, Repository
 from polar.postgres import AsyncSession
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_issue
 
 
 @pytest.mark.asyncio
@@ -35,3 +39,36 @@ async def test_sync_external_org_with_repo_and_issue(
     )
 
     assert issue is not None
+
+
+@pytest.mark.asyncio
+async def test_list_issues_to_crawl_issue(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    organization: Organization,
+    repository: Repository,
+) -> None:
+    now = utc_now()
+    stale = await create_issue(save_fixture, organization, repository)
+    badged = await create_issue(save_fixture, organization, repository)
+    badged.pledge_badge_embedded_at = now
+    await save_fixture(badged)
+    pledged = await create_issue(save_fixture, organization, repository)
+    pledged.last_pledged_at = now
+    await save_fixture(pledged)
+    fresh = await create_issue(save_fixture, organization, repository)
+    fresh.github_issue_fetched_at = now
+    await save_fixture(fresh)
+
+    # then
+    session.expunge_all()
+
+    issues = await github_issue.list_issues_to_crawl_issue(session, organization)
+    assert [issue.id for issue in issues] == [pledged.id, badged.id, stale.id]
+
+    await github_issue.mark_crawl_scheduled(
+        session, issues[:2], "github_issue_fetched_at"
+    )
+
+    issues = await github_issue.list_issues_to_crawl_issue(session, organization)
+    assert [issue.id for issue in issues] == [stale.id]
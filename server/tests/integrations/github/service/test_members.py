@@ -0,0 +1,172 @@
+import secrets
+
+import httpx
+import pytest
+import respx
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.client import get_client
+from polar.integrations.github.service.members import github_members_service
+from polar.integrations.github.service.organization import Member
+from polar.kit.utils import utc_now
+from polar.models import Organization, User, UserOrganization
+from polar.models.user import OAuthAccount, OAuthPlatform
+from polar.postgres import AsyncSession, sql
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_user
+from tests.integrations.github.conftest import create_github_user
+
+
+async def create_github_member(
+    save_fixture: SaveFixture,
+    organization: Organization,
+    *,
+    is_admin: bool = False,
+    deleted: bool = False,
+    member: bool = True,
+) -> tuple[User, int]:
+    user = await create_user(save_fixture)
+    account_id = secrets.randbelow(1_000_000_000)
+    await save_fixture(
+        OAuthAccount(
+            platform=OAuthPlatform.github,
+            access_token="xxyyzz",
+            account_id=str(account_id),
+            account_email=user.email,
+            user_id=user.id,
+        )
+    )
+    if member:
+        await save_fixture(
+            UserOrganization(
+                user_id=user.id,
+                organization_id=organization.id,
+                is_admin=is_admin,
+                deleted_at=utc_now() if deleted else None,
+            )
+        )
+    return user, account_id
+
+
+def github_member(external_id: int, *, is_admin: bool = False) -> Member:
+    return Member(
+        external_id=external_id,
+        username=f"user{external_id}",
+        avatar_url="https://avatars.githubusercontent.com/u/1",
+        is_admin=is_admin,
+    )
+
+
+@pytest.mark.asyncio
+class TestSynchronizeMembers:
+    async def test_delta(
+        self,
+        session: AsyncSession,
+        mocker: MockerFixture,
+        save_fixture: SaveFixture,
+        organization: Organization,
+    ) -> None:
+        promoted, promoted_id = await create_github_member(save_fixture, organization)
+        kept, kept_id = await create_github_member(save_fixture, organization)
+        removed, _ = await create_github_member(save_fixture, organization)
+        restored, restored_id = await create_github_member(
+            save_fixture, organization, deleted=True
+        )
+        joined, joined_id = await create_github_member(
+            save_fixture, organization, member=False
+        )
+
+        mocker.patch.object(
+            github_members_service,
+            "_fetch_members",
+            return_value=[
+                github_member(promoted_id, is_admin=True),
+                github_member(kept_id),
+                github_member(restored_id),
+                github_member(joined_id),
+                # Not a Polar user
+                github_member(secrets.randbelow(1_000_000_000)),
+            ],
+        )
+        benefits_grants = mocker.patch(
+            "polar.integrations.github.service.members.subscription_service"
+            ".update_organization_members_benefits_grants"
+        )
+
+        # then
+        session.expunge_all()
+
+        await github_members_service.synchronize_members(session, organization)
+
+        # Select columns: the memberships loaded by the service may still be in
+        # the identity map, with their values from before the upsert
+        res = await session.execute(
+            sql.select(UserOrganization.user_id, UserOrganization.is_admin).where(
+                UserOrganization.organization_id == organization.id,
+                UserOrganization.deleted_at.is_(None),
+            )
+        )
+        members = dict(res.tuples().all())
+        assert members == {
+            promoted.id: True,
+            kept.id: False,
+            restored.id: False,
+            joined.id: False,
+        }
+
+        benefits_grants.assert_called_once()
+        kwargs = benefits_grants.call_args.kwargs
+        assert set(kwargs["added_user_ids"]) == {restored.id, joined.id}
+        assert kwargs["removed_user_ids"] == [removed.id]
+
+    async def test_unchanged(
+        self,
+        session: AsyncSession,
+        mocker: MockerFixture,
+        save_fixture: SaveFixture,
+        organization: Organization,
+    ) -> None:
+        _, account_id = await create_github_member(save_fixture, organization)
+
+        mocker.patch.object(
+            github_members_service,
+            "_fetch_members",
+            return_value=[github_member(account_id)],
+        )
+        enqueue_job_mock = mocker.patch(
+            "polar.subscription.service.subscription.enqueue_job"
+        )
+
+        # then
+        session.expunge_all()
+
+        await github_members_service.synchronize_members(session, organization)
+
+        enqueue_job_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_list_members_pages(respx_mock: respx.MockRouter) -> None:
+    organization = Organization(name="polarsource")
+    url = "https://api.github.com/orgs/polarsource/members"
+    user = create_github_user().model_dump(mode="json")
+
+    def _members(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        assert request.url.params["per_page"] == "100"
+        return httpx.Response(
+            200,
+            json=[{**user, "id": page}],
+            headers={"link": f'<{url}?per_page=100&page=3>; rel="last"'}
+            if page == 1
+            else {},
+        )
+
+    route = respx_mock.get(url).mock(side_effect=_members)
+
+    members = await github_members_service._list_members(
+        get_client("TOKEN"), organization, "all"
+    )
+
+    assert sorted(member.id for member in members) == [1, 2, 3]
+    assert route.call_count == 3
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+from githubkit import Paginator, Response
+from pytest_mock import MockerFixture
+
+from polar.integrations.github import types
+from polar.integrations.github.service.issue import github_issue
+from polar.integrations.github.service.paginated import github_paginated_service
+from polar.kit.hook import Hook
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from polar.repository.hooks import SyncedHook
+from tests.fixtures.vcr import read_cassette
+
+
+def github_issues(count: int) -> list[types.Issue]:
+    body = read_cassette("github/webhooks/issues.opened.json")["body"]["issue"]
+    return [
+        types.Issue(**{**body, "id": 900_000_000 + number, "number": number})
+        for number in range(1, count + 1)
+    ]
+
+
+def paginate(issues: list[types.Issue], per_page: int) -> Paginator[types.Issue]:
+    # Called with `page` and `per_page` keyword arguments by the paginator
+    async def request(**params: int) -> Response[list[types.Issue]]:
+        start = (params["page"] - 1) * params["per_page"]
+        page = issues[start : start + params["per_page"]]
+        return cast(Response[list[types.Issue]], SimpleNamespace(parsed_data=page))
+
+    return Paginator(request, per_page=per_page)
+
+
+def synced_hook() -> tuple[Hook[SyncedHook], list[SyncedHook]]:
+    calls: list[SyncedHook] = []
+
+    async def _on_synced(hook: SyncedHook) -> None:
+        calls.append(hook)
+
+    hook: Hook[SyncedHook] = Hook()
+    hook.add(_on_synced)
+    return hook, calls
+
+
+@pytest.mark.asyncio
+class TestStorePaginatedResource:
+    async def test_store_by_page(
+        self,
+        session: AsyncSession,
+        mocker: MockerFixture,
+        organization: Organization,
+        repository: Repository,
+    ) -> None:
+        issues = github_issues(5)
+        store_many = mocker.spy(github_issue, "store_many")
+        on_sync_signal, calls = synced_hook()
+
+        # then
+        session.expunge_all()
+
+        synced, errors = await github_paginated_service.store_paginated_resource(
+            session,
+            paginator=paginate(issues, 2),
+            page_size=2,
+            store_many_method=github_issue.store_many,
+            organization=organization,
+            repository=repository,
+            on_sync_signal=on_sync_signal,
+            resource_type="issue",
+        )
+
+        assert (synced, errors) == (5, 0)
+        assert store_many.call_count == 3
+        assert [len(call.records) for call in calls] == [2, 2, 1]
+        assert [call.synced for call in calls] == [2, 4, 5]
+
+        for issue in issues:
+            stored = await github_issue.get_by_external_id(session, issue.id)
+            assert stored is not None
+            assert stored.repository_id == repository.id
+
+    async def test_skip_condition(
+        self,
+        session: AsyncSession,
+        organization: Organization,
+        repository: Repository,
+    ) -> None:
+        issues = github_issues(4)
+        on_sync_signal, calls = synced_hook()
+
+        # then
+        session.expunge_all()
+
+        synced, errors = await github_paginated_service.store_paginated_resource(
+            session,
+            paginator=paginate(issues, 2),
+            page_size=2,
+            store_many_method=github_issue.store_many,
+            organization=organization,
+            repository=repository,
+            skip_condition=lambda data: data.number % 2 == 0,
+            on_sync_signal=on_sync_signal,
+            resource_type="issue",
+        )
+
+        assert (synced, errors) == (4, 0)
+        assert [call.synced for call in calls] == [2, 4]
+        assert [[record.number for record in call.records] for call in calls] == [
+            [1],
+            [3],
+        ]
+        assert await github_issue.get_by_external_id(session, issues[1].id) is None
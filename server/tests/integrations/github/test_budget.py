@@ -0,0 +1,156 @@
+import secrets
+import time
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+import pytest_asyncio
+from arq import Retry
+
+from polar.integrations.github.budget import (
+    CrawlBudgetExceeded,
+    RateLimitBudget,
+    RateLimitStatus,
+    is_paced,
+)
+from polar.integrations.github.tasks.utils import (
+    github_crawl_paced,
+    github_rate_limit_retry,
+)
+from polar.redis import redis
+
+
+@pytest_asyncio.fixture
+async def installation_id() -> AsyncIterator[int]:
+    installation_id = secrets.randbelow(1_000_000)
+    yield installation_id
+    await redis.delete(f"polar:github:rate_limit:{installation_id}")
+
+
+def rate_limited_response(
+    remaining: int, reset: int, *, limit: int = 5000, status_code: int = 200
+) -> httpx.Response:
+    return httpx.Response(
+        status_code,
+        headers={
+            "x-ratelimit-limit": str(limit),
+            "x-ratelimit-remaining": str(remaining),
+            "x-ratelimit-reset": str(reset),
+        },
+    )
+
+
+@pytest.mark.asyncio
+class TestRateLimitBudget:
+    async def test_observe(self, installation_id: int) -> None:
+        budget = RateLimitBudget(redis, reserve=100, burst=1, max_wait=0)
+        reset = int(time.time()) + 3600
+
+        assert await budget.get(installation_id) is None
+
+        await budget.observe(installation_id, rate_limited_response(4000, reset))
+        assert await budget.get(installation_id) == RateLimitStatus(5000, 4000, reset)
+
+        # Response of a previous window
+        await budget.observe(installation_id, rate_limited_response(10, reset - 3600))
+        assert await budget.get(installation_id) == RateLimitStatus(5000, 4000, reset)
+
+        # New window
+        await budget.observe(installation_id, rate_limited_response(4999, reset + 1))
+        assert await budget.get(installation_id) == RateLimitStatus(
+            5000, 4999, reset + 1
+        )
+
+    async def test_observe_without_headers(self, installation_id: int) -> None:
+        budget = RateLimitBudget(redis, reserve=100, burst=1, max_wait=0)
+
+        await budget.observe(installation_id, httpx.Response(200))
+
+        assert await budget.get(installation_id) is None
+
+    async def test_acquire_unknown(self, installation_id: int) -> None:
+        budget = RateLimitBudget(redis, reserve=100, burst=1, max_wait=0)
+
+        await budget.acquire(installation_id)
+
+    async def test_acquire_paced(self, installation_id: int) -> None:
+        budget = RateLimitBudget(redis, reserve=100, burst=3, max_wait=0)
+        reset = int(time.time()) + 3600
+        await budget.observe(installation_id, rate_limited_response(1100, reset))
+
+        # The burst is granted right away, then requests are spaced by ~3.6s
+        for _ in range(3):
+            await budget.acquire(installation_id)
+        with pytest.raises(CrawlBudgetExceeded) as e:
+            await budget.acquire(installation_id)
+        assert 0 < e.value.retry_after <= 3.6
+
+        status = await budget.get(installation_id)
+        assert status is not None
+        assert status.remaining == 1097
+
+    async def test_acquire_not_charged(self, installation_id: int) -> None:
+        budget = RateLimitBudget(redis, reserve=100, burst=3, max_wait=0)
+        reset = int(time.time()) + 3600
+        await budget.observe(installation_id, rate_limited_response(1100, reset))
+
+        for _ in range(3):
+            await budget.acquire(installation_id)
+        status = await budget.get(installation_id)
+        assert status is not None
+        assert status.remaining == 1097
+
+        # Conditional requests answered with 304 don't count against the limit
+        await budget.observe(
+            installation_id, rate_limited_response(1100, reset, status_code=304)
+        )
+        assert await budget.get(installation_id) == RateLimitStatus(5000, 1100, reset)
+
+        # Requests of other clients do
+        await budget.observe(installation_id, rate_limited_response(1050, reset))
+        assert await budget.get(installation_id) == RateLimitStatus(5000, 1050, reset)
+
+    async def test_acquire_reserve(self, installation_id: int) -> None:
+        budget = RateLimitBudget(redis, reserve=100, burst=10, max_wait=0)
+        reset = int(time.time()) + 600
+        await budget.observe(installation_id, rate_limited_response(100, reset))
+
+        with pytest.raises(CrawlBudgetExceeded) as e:
+            await budget.acquire(installation_id)
+        assert 590 < e.value.retry_after <= 600
+
+    async def test_get_schedule(self) -> None:
+        budget = RateLimitBudget(redis, reserve=1000, burst=1, max_wait=0)
+        reset = int(time.time()) + 3600
+
+        schedule = budget.get_schedule(RateLimitStatus(5000, 4600, reset), 3)
+        assert schedule is not None
+        assert schedule[0] == 0
+        assert schedule[1] == pytest.approx(1.0, abs=0.01)
+        assert schedule[2] == pytest.approx(2.0, abs=0.01)
+
+        assert budget.get_schedule(RateLimitStatus(5000, 900, reset), 3) is None
+
+    async def test_get_capacity(self) -> None:
+        budget = RateLimitBudget(redis, reserve=1000, burst=1, max_wait=0)
+        now = int(time.time())
+
+        assert budget.get_capacity(
+            RateLimitStatus(5000, 4600, now + 3600), 600
+        ) == pytest.approx(600, abs=1)
+        assert budget.get_capacity(RateLimitStatus(5000, 4600, now + 300), 600) == 3600
+        assert budget.get_capacity(RateLimitStatus(5000, 900, now + 3600), 600) == 0
+
+
+@pytest.mark.asyncio
+async def test_github_crawl_paced() -> None:
+    @github_rate_limit_retry
+    @github_crawl_paced
+    async def crawl() -> None:
+        assert is_paced()
+        raise CrawlBudgetExceeded(1, 12.5)
+
+    with pytest.raises(Retry) as e:
+        await crawl()
+    assert e.value.defer_score == 12_500
+    assert not is_paced()
@@ -0,0 +1,159 @@
+import secrets
+from collections.abc import AsyncIterator
+from typing import Any, cast
+
+import httpx
+import pytest
+import pytest_asyncio
+import respx
+from pytest_mock import MockerFixture
+
+from polar.integrations.github import types
+from polar.integrations.github.cache import GitHubResponseCache
+from polar.integrations.github.client import get_client
+from polar.integrations.github.service.issue import get_issue_url, github_issue
+from polar.integrations.github.tasks.utils import get_organization_and_repo
+from polar.models import Issue, Organization, Repository
+from polar.postgres import AsyncSession
+from polar.redis import redis
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.vcr import read_cassette
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_response_cache() -> AsyncIterator[None]:
+    async def _clear() -> None:
+        async for key in redis.scan_iter("polar:github:response:*"):
+            await redis.delete(key)
+
+    await _clear()
+    yield
+    await _clear()
+
+
+@pytest.mark.asyncio
+class TestGitHubResponseCache:
+    async def test_conditional_request(self, respx_mock: respx.MockRouter) -> None:
+        cache = GitHubResponseCache(redis, ttl=60)
+        client = get_client("TOKEN")
+        route = respx_mock.get("https://api.github.com/repos/polarsource/polar")
+        route.side_effect = [
+            httpx.Response(200, json={"name": "polar"}, headers={"etag": '"A"'}),
+            httpx.Response(304),
+            httpx.Response(304),
+        ]
+
+        fresh = await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        assert fresh.changed is True
+        assert fresh.response.parsed_data == {"name": "polar"}
+
+        # Not applied yet: served from the cache, but still changed
+        not_applied = await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        assert route.calls[1].request.headers["If-None-Match"] == '"A"'
+        assert not_applied.changed is True
+        assert not_applied.response.parsed_data == {"name": "polar"}
+
+        await cache.mark_applied(not_applied)
+
+        applied = await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        assert applied.changed is False
+        assert applied.response.parsed_data == {"name": "polar"}
+
+    async def test_keyed_by_installation(self, respx_mock: respx.MockRouter) -> None:
+        cache = GitHubResponseCache(redis, ttl=60)
+        client = get_client("TOKEN")
+        route = respx_mock.get("https://api.github.com/repos/polarsource/polar")
+        route.return_value = httpx.Response(
+            200, json={"name": "polar"}, headers={"etag": '"A"'}
+        )
+
+        await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        await cache.request(
+            client, 2, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+
+        assert "If-None-Match" not in route.calls[1].request.headers
+
+    async def test_mark_applied_outdated(self, respx_mock: respx.MockRouter) -> None:
+        cache = GitHubResponseCache(redis, ttl=60)
+        client = get_client("TOKEN")
+        route = respx_mock.get("https://api.github.com/repos/polarsource/polar")
+        route.side_effect = [
+            httpx.Response(200, json={"name": "polar"}, headers={"etag": '"A"'}),
+            httpx.Response(200, json={"name": "Polar"}, headers={"etag": '"B"'}),
+            httpx.Response(304),
+        ]
+
+        outdated = await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        await cache.mark_applied(outdated)
+
+        latest = await cache.request(
+            client, 1, "/repos/polarsource/polar", response_model=dict[str, Any]
+        )
+        assert latest.changed is True
+        assert latest.response.parsed_data == {"name": "Polar"}
+
+
+@pytest.mark.asyncio
+class TestSyncIssue:
+    async def test_not_modified(
+        self,
+        session: AsyncSession,
+        mocker: MockerFixture,
+        respx_mock: respx.MockRouter,
+        organization: Organization,
+        repository: Repository,
+        issue: Issue,
+        save_fixture: SaveFixture,
+    ) -> None:
+        organization.installation_id = secrets.randbelow(1_000_000)
+        await save_fixture(organization)
+        mocker.patch(
+            "polar.integrations.github.client.get_app_installation_client",
+            return_value=get_client("TOKEN"),
+        )
+        body = read_cassette("github/webhooks/issues.opened.json")["body"]["issue"]
+        url = get_issue_url(organization.name, repository.name, issue.number)
+        route = respx_mock.get(f"https://api.github.com{url}")
+        route.side_effect = [
+            httpx.Response(
+                200,
+                json={**body, "id": issue.external_id, "number": issue.number},
+                headers={"etag": '"A"'},
+            ),
+            httpx.Response(304),
+        ]
+        store = mocker.spy(github_issue, "store")
+
+        # then
+        session.expunge_all()
+
+        organization, repository = await get_organization_and_repo(
+            session, organization.id, repository.id
+        )
+        issue = cast(Issue, await github_issue.get(session, issue.id))
+
+        await github_issue.sync_issue(session, organization, repository, issue)
+        assert store.call_count == 1
+        assert isinstance(store.call_args.kwargs["data"], types.Issue)
+        assert issue.github_issue_etag == '"A"'
+
+        # Unchanged, without touching the database
+        assert (
+            await github_issue.has_issue_changed(organization.safe_installation_id, url)
+            is False
+        )
+        assert store.call_count == 1
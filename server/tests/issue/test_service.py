@@ -337,6 +337,53 @@ async def test_list_by_repository_type_and_status_dependencies_pledge_state(
     assert names == ["pledged_towards_disputed", "pledged_towards_created"]
 
 
+@pytest.mark.asyncio
+async def test_list_by_repository_type_and_status_pagination(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    repository: Repository,
+    organization: Organization,
+    pledging_organization: Organization,
+) -> None:
+    issues = [
+        await random_objects.create_issue(save_fixture, organization, repository)
+        for _ in range(3)
+    ]
+    # Several pledges per issue must not shrink pages or inflate the count
+    for issue in issues:
+        for _ in range(3):
+            await random_objects.create_pledge(
+                save_fixture, organization, repository, issue, pledging_organization
+            )
+
+    # then
+    session.expunge_all()
+
+    for sort_by in IssueSortBy:
+        pages: list[Issue] = []
+        for offset in (0, 2):
+            (page, count) = await issue_service.list_by_repository_type_and_status(
+                session,
+                repository_ids=[repository.id],
+                sort_by=sort_by,
+                load_pledges=True,
+                load_repository=True,
+                load_references=True,
+                limit=2,
+                offset=offset,
+            )
+            assert count == 3
+            pages.extend(page)
+
+        assert sorted(issue.id for issue in pages) == sorted(
+            issue.id for issue in issues
+        )
+        for issue in pages:
+            assert len(issue.pledges) == 3
+            assert issue.repository.organization.id == organization.id
+            assert issue.references == []
+
+
 @pytest.mark.asyncio
 async def test_list_by_github_milestone_number(
     session: AsyncSession,
@@ -400,6 +447,30 @@ async def test_list_by_github_milestone_number(
         assert names == expected
 
 
+@pytest.mark.asyncio
+async def test_list_by_repository_and_numbers(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    repository: Repository,
+    organization: Organization,
+) -> None:
+    issue = await random_objects.create_issue(save_fixture, organization, repository)
+    deleted_issue = await random_objects.create_issue(
+        save_fixture, organization, repository
+    )
+    deleted_issue.deleted_at = utc_now()
+    await save_fixture(deleted_issue)
+
+    # then
+    session.expunge_all()
+
+    issues = await issue_service.list_by_repository_and_numbers(
+        session, repository.id, [issue.number, deleted_issue.number]
+    )
+
+    assert [i.id for i in issues] == [issue.id]
+
+
 @pytest.mark.asyncio
 async def test_transfer(
     session: AsyncSession,
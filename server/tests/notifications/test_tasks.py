@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from polar.models import Notification, User
+from polar.notifications.notification import (
+    MaintainerDonationReceivedNotificationPayload,
+    NotificationType,
+)
+from polar.notifications.tasks.email import notifications_send
+from polar.postgres import AsyncSession
+from polar.worker import JobContext, PolarWorkerContext
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.email import FakeEmailSender
+
+
+@pytest.mark.asyncio
+async def test_notifications_send(
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    email_sender: FakeEmailSender,
+) -> None:
+    notification = Notification(
+        user_id=user.id,
+        type=NotificationType.maintainer_donation_received,
+        payload=MaintainerDonationReceivedNotificationPayload(
+            organization_name="polarsource",
+            donation_amount="10",
+            donation_id=uuid.uuid4(),
+        ).model_dump(mode="json"),
+    )
+    await save_fixture(notification)
+
+    # then
+    session.expunge_all()
+
+    await notifications_send(job_context, notification.id, polar_worker_context)
+
+    assert len(email_sender.sent) == 1
+    email = email_sender.sent[0]
+    assert email.to_email_addr == user.email
+    assert email.subject == "[Polar] Received $10 donation to polarsource"
+    assert email.reply_to_email_addr == "support@polar.sh"
@@ -0,0 +1,235 @@
+import uuid
+
+import pytest
+from fastapi import Request
+
+from polar.auth.models import Anonymous, AuthMethod, AuthSubject, Subject
+from polar.enums import Platforms
+from polar.kit.pagination import ListResource, Pagination
+from polar.models import Organization, Pledge, User
+from polar.organization.cache import (
+    OrganizationResponseCache,
+    name_alias,
+    organization_response_cache,
+)
+from polar.organization.hooks import OrganizationHook, organization_upserted
+from polar.pledge.hooks import PledgeHook, pledge_updated
+from polar.postgres import AsyncSession, sql
+from polar.redis import redis
+
+
+def _request(query_string: str = "", headers: dict[str, str] | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/funding/search",
+            "query_string": query_string.encode(),
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ],
+        }
+    )
+
+
+def _content(total_count: int = 0) -> ListResource[int]:
+    return ListResource(
+        items=[], pagination=Pagination(total_count=total_count, max_page=1)
+    )
+
+
+ANONYMOUS: AuthSubject[Subject] = AuthSubject(Anonymous(), set(), AuthMethod.NONE)
+
+
+@pytest.mark.asyncio
+class TestOrganizationResponseCache:
+    async def test_organization_id(self) -> None:
+        cache = OrganizationResponseCache(redis, ttl=60, alias_ttl=60)
+        organization_id = uuid.uuid4()
+
+        miss = await cache.lookup(
+            _request("b=2&a=1"), ANONYMOUS, organization_id=organization_id
+        )
+        assert miss.response is None
+        response = await cache.store(miss, organization_id, _content())
+        assert not isinstance(response, ListResource)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        # Same query parameters, in another order
+        hit = await cache.lookup(
+            _request("a=1&b=2"), ANONYMOUS, organization_id=organization_id
+        )
+        assert hit.response is not None
+        assert hit.response.status_code == 200
+        assert hit.response.headers["ETag"] == etag
+        assert hit.response.body == response.body
+
+        not_modified = await cache.lookup(
+            _request("a=1&b=2", {"If-None-Match": f"W/{etag}"}),
+            ANONYMOUS,
+            organization_id=organization_id,
+        )
+        assert not_modified.response is not None
+        assert not_modified.response.status_code == 304
+
+        other_query = await cache.lookup(
+            _request("a=2"), ANONYMOUS, organization_id=organization_id
+        )
+        assert other_query.response is None
+
+        await cache.invalidate(organization_id)
+        invalidated = await cache.lookup(
+            _request("a=1&b=2"), ANONYMOUS, organization_id=organization_id
+        )
+        assert invalidated.response is None
+
+    async def test_alias(self) -> None:
+        cache = OrganizationResponseCache(redis, ttl=60, alias_ttl=60)
+        alias = name_alias(Platforms.github, f"org-{uuid.uuid4()}")
+        organization_id = uuid.uuid4()
+
+        # Unknown alias: resolved, but not cached
+        unknown = await cache.lookup(_request(), ANONYMOUS, alias=alias)
+        assert unknown.organization_id is None
+        await cache.store(unknown, organization_id, _content())
+
+        known = await cache.lookup(_request(), ANONYMOUS, alias=alias)
+        assert known.organization_id == organization_id
+        assert known.response is None
+        await cache.store(known, organization_id, _content())
+
+        hit = await cache.lookup(_request(), ANONYMOUS, alias=alias)
+        assert hit.response is not None
+
+        # The alias now points to another organization
+        other_organization_id = uuid.uuid4()
+        await cache.invalidate(organization_id)
+        stale = await cache.lookup(_request(), ANONYMOUS, alias=alias)
+        await cache.store(stale, other_organization_id, _content(1))
+
+        resolved = await cache.lookup(_request(), ANONYMOUS, alias=alias)
+        assert resolved.organization_id == other_organization_id
+        assert resolved.response is None
+
+    async def test_not_anonymous(self, session: AsyncSession, user: User) -> None:
+        # then
+        session.expunge_all()
+
+        cache = OrganizationResponseCache(redis, ttl=60, alias_ttl=60)
+        auth_subject: AuthSubject[Subject] = AuthSubject(user, set(), AuthMethod.COOKIE)
+        organization_id = uuid.uuid4()
+
+        lookup = await cache.lookup(
+            _request(), auth_subject, organization_id=organization_id
+        )
+        assert not lookup.enabled
+        content = _content()
+        assert await cache.store(lookup, organization_id, content) is content
+
+        # Not cached for anonymous requests either
+        anonymous = await cache.lookup(
+            _request(), ANONYMOUS, organization_id=organization_id
+        )
+        assert anonymous.response is None
+
+
+async def _cache_response(organization_id: uuid.UUID) -> None:
+    lookup = await organization_response_cache.lookup(
+        _request(), ANONYMOUS, organization_id=organization_id
+    )
+    await organization_response_cache.store(lookup, organization_id, _content())
+
+
+async def _is_cached(organization_id: uuid.UUID) -> bool:
+    lookup = await organization_response_cache.lookup(
+        _request(), ANONYMOUS, organization_id=organization_id
+    )
+    return lookup.response is not None
+
+
+@pytest.mark.asyncio
+class TestInvalidateAfterCommit:
+    async def test_commit(
+        self, session: AsyncSession, organization: Organization
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        await _cache_response(organization.id)
+        await session.execute(sql.select(Organization.id))
+        assert session.in_transaction()
+
+        await organization_response_cache.invalidate_after_commit(
+            session, organization.id
+        )
+        # A request running now still computes from the committed rows
+        assert await _is_cached(organization.id)
+
+        await session.commit()
+        assert not await _is_cached(organization.id)
+
+    async def test_rollback(
+        self, session: AsyncSession, organization: Organization
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        await _cache_response(organization.id)
+        await session.execute(sql.select(Organization.id))
+
+        await organization_response_cache.invalidate_after_commit(
+            session, organization.id
+        )
+        await session.rollback()
+        await session.commit()
+
+        assert await _is_cached(organization.id)
+
+    async def test_no_transaction(
+        self, session: AsyncSession, organization: Organization
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        await _cache_response(organization.id)
+        await session.commit()
+        assert not session.in_transaction()
+
+        await organization_response_cache.invalidate_after_commit(
+            session, organization.id
+        )
+
+        assert not await _is_cached(organization.id)
+
+
+@pytest.mark.asyncio
+class TestInvalidationHooks:
+    async def test_organization_upserted(
+        self, session: AsyncSession, organization: Organization
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        await _cache_response(organization.id)
+        assert await _is_cached(organization.id)
+
+        await organization_upserted.call(OrganizationHook(session, organization))
+        await session.commit()
+
+        assert not await _is_cached(organization.id)
+
+    async def test_pledge_updated(
+        self, session: AsyncSession, organization: Organization, pledge: Pledge
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        await _cache_response(organization.id)
+        assert await _is_cached(organization.id)
+
+        await pledge_updated.call(PledgeHook(session, pledge))
+        await session.commit()
+
+        assert not await _is_cached(organization.id)
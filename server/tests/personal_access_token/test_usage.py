@@ -0,0 +1,107 @@
+import datetime
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from polar.kit.utils import utc_now
+from polar.models import PersonalAccessToken, User
+from polar.personal_access_token.tasks import personal_access_token_flush_usage
+from polar.personal_access_token.usage import UsageBuffer, usage_buffer
+from polar.postgres import AsyncSession
+from polar.redis import redis
+from polar.worker import JobContext
+from tests.fixtures.database import SaveFixture
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_usage_buffer() -> AsyncIterator[None]:
+    async def _clear() -> None:
+        async for key in redis.scan_iter("polar:personal_access_token:usage*"):
+            await redis.delete(key)
+
+    await _clear()
+    yield
+    await _clear()
+
+
+@pytest.mark.asyncio
+class TestUsageBuffer:
+    async def test_drain(self) -> None:
+        buffer = UsageBuffer(redis)
+        first_id, second_id = uuid.uuid4(), uuid.uuid4()
+        before = utc_now()
+        for id in [first_id, first_id, second_id]:
+            await buffer.record(id)
+
+        async with buffer.drain() as usage:
+            assert usage.keys() == {first_id, second_id}
+            assert usage[first_id].requests == 2
+            assert usage[second_id].requests == 1
+            assert usage[first_id].last_used_at >= before
+
+        async with buffer.drain() as usage:
+            assert usage == {}
+
+    async def test_failed_drain_is_retried(self) -> None:
+        buffer = UsageBuffer(redis)
+        id = uuid.uuid4()
+        await buffer.record(id)
+
+        with pytest.raises(RuntimeError):
+            async with buffer.drain() as usage:
+                raise RuntimeError()
+
+        # Recorded meanwhile, picked up by the next drain
+        await buffer.record(id)
+
+        async with buffer.drain() as usage:
+            assert usage[id].requests == 1
+        async with buffer.drain() as usage:
+            assert usage[id].requests == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_usage(
+    job_context: JobContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+) -> None:
+    last_used_at = utc_now() - datetime.timedelta(days=1)
+    used = PersonalAccessToken(
+        user_id=user.id,
+        comment="used",
+        expires_at=utc_now() + datetime.timedelta(days=1),
+        last_used_at=last_used_at,
+        requests_count=10,
+    )
+    unused = PersonalAccessToken(
+        user_id=user.id,
+        comment="unused",
+        expires_at=utc_now() + datetime.timedelta(days=1),
+    )
+    await save_fixture(used)
+    await save_fixture(unused)
+
+    # then
+    session.expunge_all()
+
+    for _ in range(3):
+        await usage_buffer.record(used.id)
+    # Unknown token, skipped
+    await usage_buffer.record(uuid.uuid4())
+
+    await personal_access_token_flush_usage(job_context)
+
+    used_loaded = await session.get(PersonalAccessToken, used.id)
+    assert used_loaded is not None
+    assert used_loaded.requests_count == 13
+    assert used_loaded.last_used_at is not None
+    assert used_loaded.last_used_at > last_used_at
+
+    unused_loaded = await session.get(PersonalAccessToken, unused.id)
+    assert unused_loaded is not None
+    assert unused_loaded.requests_count == 0
+    assert unused_loaded.last_used_at is None
@@ -0,0 +1,244 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.models import Issue, Organization, Repository, User
+from polar.models.pledge import PledgeState, PledgeType
+from polar.pledge.schemas import Pledger
+from polar.pledge.service import pledge as pledge_service
+from polar.pledge.summary_service import pledge_summary_service
+from polar.postgres import AsyncSession, sql
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import (
+    create_issue,
+    create_pledge,
+    create_user,
+    create_user_github_oauth,
+    create_user_pledge,
+)
+
+
+@pytest.mark.asyncio
+class TestRefresh:
+    async def test_summaries(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        organization: Organization,
+        repository: Repository,
+        pledging_organization: Organization,
+    ) -> None:
+        issue = await create_issue(save_fixture, organization, repository)
+        user = await create_user(save_fixture)
+        small = await create_user_pledge(
+            save_fixture,
+            organization,
+            repository,
+            issue,
+            pledging_user=user,
+            amount=1000,
+        )
+        large = await create_user_pledge(
+            save_fixture,
+            organization,
+            repository,
+            issue,
+            pledging_user=user,
+            amount=5000,
+        )
+        on_completion = await create_pledge(
+            save_fixture,
+            organization,
+            repository,
+            issue,
+            pledging_organization,
+            type=PledgeType.pay_on_completion,
+        )
+        await create_pledge(
+            save_fixture,
+            organization,
+            repository,
+            issue,
+            pledging_organization,
+            state=PledgeState.initiated,
+        )
+
+        # then
+        session.expunge_all()
+
+        await pledge_summary_service.refresh(session, issue.id)
+
+        summaries = (
+            await pledge_summary_service.get_by_issue_ids(session, [issue.id])
+        )[issue.id]
+        assert set(summaries) == {PledgeType.pay_upfront, PledgeType.pay_on_completion}
+
+        pay_upfront = summaries[PledgeType.pay_upfront]
+        assert pay_upfront.amount == 6000
+        assert pay_upfront.pledges_count == 2
+        assert pay_upfront.last_pledged_at == max(small.created_at, large.created_at)
+        assert (
+            pay_upfront.pledgers
+            == [
+                {
+                    "name": user.email,
+                    "github_username": None,
+                    "avatar_url": user.avatar_url,
+                }
+            ]
+            * 2
+        )
+
+        assert summaries[PledgeType.pay_on_completion].amount == on_completion.amount
+
+        updated_issue = await session.get(Issue, issue.id)
+        assert updated_issue is not None
+        assert updated_issue.pledged_amount_sum == 6000 + on_completion.amount
+
+        # A pledge leaves the active states
+        await session.execute(
+            sql.update(type(large))
+            .where(type(large).id == large.id)
+            .values(state=PledgeState.refunded)
+        )
+        await pledge_summary_service.refresh(session, issue.id)
+
+        summaries = (
+            await pledge_summary_service.get_by_issue_ids(session, [issue.id])
+        )[issue.id]
+        assert summaries[PledgeType.pay_upfront].amount == 1000
+        assert summaries[PledgeType.pay_upfront].pledges_count == 1
+
+    async def test_pledgers(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        mocker: MockerFixture,
+        organization: Organization,
+        repository: Repository,
+        issue: Issue,
+        pledging_organization: Organization,
+        user: User,
+    ) -> None:
+        mocker.patch("polar.pledge.summary_service.TOP_PLEDGERS", 3)
+
+        pledging_organization.pretty_name = "Pledging Org"
+        await save_fixture(pledging_organization)
+        github_user = await create_user(save_fixture)
+        await create_user_github_oauth(save_fixture, github_user)
+
+        pledges = [
+            await create_pledge(
+                save_fixture, organization, repository, issue, pledging_organization
+            ),
+            await create_user_pledge(
+                save_fixture, organization, repository, issue, pledging_user=user
+            ),
+            await create_user_pledge(
+                save_fixture, organization, repository, issue, pledging_user=github_user
+            ),
+        ]
+        on_behalf_of = await create_user_pledge(
+            save_fixture, organization, repository, issue, pledging_user=user
+        )
+        on_behalf_of.on_behalf_of_organization_id = pledging_organization.id
+        await save_fixture(on_behalf_of)
+        pledges.append(on_behalf_of)
+
+        # then
+        session.expunge_all()
+
+        await pledge_summary_service.refresh(session, issue.id)
+
+        expected: list[Pledger | None] = []
+        for pledge in pledges:
+            loaded = await pledge_service.get_with_loaded(session, pledge.id)
+            assert loaded is not None
+            expected.append(Pledger.from_pledge(loaded))
+        amounts = [p.amount for p in pledges]
+        expected = [
+            pledger
+            for _, pledger in sorted(
+                zip(amounts, expected), key=lambda x: x[0], reverse=True
+            )
+        ][:3]
+
+        summaries = (
+            await pledge_summary_service.get_by_issue_ids(session, [issue.id])
+        )[issue.id]
+        summary = summaries[PledgeType.pay_upfront]
+        assert summary.pledges_count == 4
+        assert [
+            Pledger.model_validate(p) if p else None for p in summary.pledgers
+        ] == expected
+
+
+@pytest.mark.asyncio
+class TestReconcile:
+    async def test_no_drift(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        organization: Organization,
+        repository: Repository,
+        issue: Issue,
+        pledging_organization: Organization,
+    ) -> None:
+        await create_pledge(
+            save_fixture, organization, repository, issue, pledging_organization
+        )
+
+        # then
+        session.expunge_all()
+
+        await pledge_summary_service.refresh(session, issue.id)
+
+        assert await pledge_summary_service.reconcile(session) == []
+
+    async def test_drift(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        organization: Organization,
+        repository: Repository,
+        issue: Issue,
+        pledging_organization: Organization,
+    ) -> None:
+        pledge = await create_pledge(
+            save_fixture, organization, repository, issue, pledging_organization
+        )
+        # Not refreshed
+        issue_without_summary = await create_issue(
+            save_fixture, organization, repository
+        )
+        await create_pledge(
+            save_fixture,
+            organization,
+            repository,
+            issue_without_summary,
+            pledging_organization,
+        )
+
+        # then
+        session.expunge_all()
+
+        await pledge_summary_service.refresh(session, issue.id)
+        # Pledger renamed since the last refresh
+        await session.execute(
+            sql.update(Organization)
+            .where(Organization.id == pledging_organization.id)
+            .values(pretty_name="Renamed")
+        )
+
+        drifted = await pledge_summary_service.reconcile(session, batch_size=1)
+        assert set(drifted) == {issue.id, issue_without_summary.id}
+
+        summaries = await pledge_summary_service.get_by_issue_ids(
+            session, [issue.id, issue_without_summary.id]
+        )
+        pay_upfront = summaries[issue.id][PledgeType.pay_upfront]
+        assert pay_upfront.amount == pledge.amount
+        assert pay_upfront.pledgers[0] is not None
+        assert pay_upfront.pledgers[0]["name"] == "Renamed"
+        assert PledgeType.pay_upfront in summaries[issue_without_summary.id]
+
+        assert await pledge_summary_service.reconcile(session) == []
@@ -866,6 +866,58 @@ class TestEnqueueBenefitsGrants:
             )
 
 
+@pytest.mark.asyncio
+class TestEnqueueMembersBenefitsGrants:
+    async def test_delta(
+        self,
+        mocker: MockerFixture,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        product: Product,
+        benefits: list[Benefit],
+        subscription_organization: Subscription,
+        organization_second_members: list[User],
+    ) -> None:
+        enqueue_job_mock = mocker.patch(
+            "polar.subscription.service.subscription.enqueue_job"
+        )
+
+        product = await add_product_benefits(
+            save_fixture,
+            product=product,
+            benefits=benefits,
+        )
+        subscription_organization.status = SubscriptionStatus.active
+        added, removed = organization_second_members[:2]
+
+        # then
+        session.expunge_all()
+
+        await subscription_service.enqueue_members_benefits_grants(
+            session,
+            subscription_organization,
+            added_user_ids=[added.id],
+            removed_user_ids=[removed.id],
+        )
+
+        benefits_count = len(benefits) + 1  # Benefits + articles
+        assert enqueue_job_mock.call_count == 2 * benefits_count
+
+        for benefit in benefits:
+            enqueue_job_mock.assert_any_call(
+                "benefit.grant",
+                user_id=added.id,
+                benefit_id=benefit.id,
+                subscription_id=subscription_organization.id,
+            )
+            enqueue_job_mock.assert_any_call(
+                "benefit.revoke",
+                user_id=removed.id,
+                benefit_id=benefit.id,
+                subscription_id=subscription_organization.id,
+            )
+
+
 @pytest.mark.asyncio
 class TestUpdateProductBenefitsGrants:
     async def test_valid(
@@ -910,50 +962,55 @@ class TestUpdateProductBenefitsGrants:
 
 
 @pytest.mark.asyncio
-class TestUpdateOrganizationBenefitsGrants:
-    async def test_valid(
+class TestUpdateOrganizationMembersBenefitsGrants:
+    async def test_no_delta(
         self,
-        session: AsyncSession,
-        save_fixture: SaveFixture,
         mocker: MockerFixture,
-        user: User,
+        session: AsyncSession,
+        subscription_organization: Subscription,
         organization_second: Organization,
-        product: Product,
-        product_second: Product,
     ) -> None:
         enqueue_job_mock = mocker.patch(
             "polar.subscription.service.subscription.enqueue_job"
         )
-        subscription_1 = await create_subscription(
-            save_fixture,
-            product=product,
-            user=user,
-            organization=organization_second,
-        )
-        subscription_2 = await create_subscription(
-            save_fixture,
-            product=product_second,
-            user=user,
-            organization=organization_second,
-        )
-        await create_subscription(save_fixture, product=product, user=user)
 
         # then
         session.expunge_all()
 
-        await subscription_service.update_organization_benefits_grants(
-            session, organization_second
+        await subscription_service.update_organization_members_benefits_grants(
+            session, organization_second, added_user_ids=[], removed_user_ids=[]
         )
 
-        assert enqueue_job_mock.call_count == 2
+        enqueue_job_mock.assert_not_called()
 
-        enqueue_job_mock.assert_any_call(
-            "subscription.subscription.enqueue_benefits_grants",
-            subscription_1.id,
+    async def test_delta(
+        self,
+        mocker: MockerFixture,
+        session: AsyncSession,
+        subscription_organization: Subscription,
+        organization_second: Organization,
+        organization_second_members: list[User],
+    ) -> None:
+        enqueue_job_mock = mocker.patch(
+            "polar.subscription.service.subscription.enqueue_job"
         )
-        enqueue_job_mock.assert_any_call(
-            "subscription.subscription.enqueue_benefits_grants",
-            subscription_2.id,
+        added = organization_second_members[0]
+
+        # then
+        session.expunge_all()
+
+        await subscription_service.update_organization_members_benefits_grants(
+            session,
+            organization_second,
+            added_user_ids=[added.id],
+            removed_user_ids=[],
+        )
+
+        enqueue_job_mock.assert_called_once_with(
+            "subscription.subscription.enqueue_members_benefits_grants",
+            subscription_organization.id,
+            added_user_ids=[added.id],
+            removed_user_ids=[],
         )
 
 
@@ -0,0 +1,76 @@
+import datetime
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from polar.redis import redis
+from polar.traffic.buffer import PageViewKey, ViewBuffer
+
+
+@pytest_asyncio.fixture
+async def view_buffer() -> AsyncIterator[ViewBuffer]:
+    async def _clear() -> None:
+        async for key in redis.scan_iter("polar:view_buffer:*"):
+            await redis.delete(key)
+
+    await _clear()
+    yield ViewBuffer(redis)
+    await _clear()
+
+
+@pytest.mark.asyncio
+class TestViewBuffer:
+    async def test_page_views(self, view_buffer: ViewBuffer) -> None:
+        article_id = uuid.uuid4()
+        date = datetime.date(2024, 2, 19)
+        for referrer in [None, None, "https://google.com/"]:
+            await view_buffer.track_page_view(
+                location_href="https://polar.sh/hello",
+                referrer=referrer,
+                article_id=article_id,
+                date=date,
+            )
+
+        async with view_buffer.drain_page_views() as page_views:
+            assert page_views == {
+                PageViewKey("https://polar.sh/hello", None, article_id, None, date): 2,
+                PageViewKey(
+                    "https://polar.sh/hello",
+                    "https://google.com/",
+                    article_id,
+                    None,
+                    date,
+                ): 1,
+            }
+
+        async with view_buffer.drain_page_views() as page_views:
+            assert page_views == {}
+
+    async def test_page_view_requires_target(self, view_buffer: ViewBuffer) -> None:
+        with pytest.raises(Exception):
+            await view_buffer.track_page_view(
+                location_href="https://polar.sh/hello",
+                date=datetime.date(2024, 2, 19),
+            )
+
+    async def test_failed_drain_is_retried(self, view_buffer: ViewBuffer) -> None:
+        article_id = uuid.uuid4()
+        await view_buffer.track_article_view(article_id)
+
+        with pytest.raises(RuntimeError):
+            async with view_buffer.drain_article_views() as article_views:
+                assert article_views == {article_id: 1}
+                # Views tracked while draining go to the next drain
+                await view_buffer.track_article_view(article_id)
+                raise RuntimeError()
+
+        async with view_buffer.drain_article_views() as article_views:
+            assert article_views == {article_id: 1}
+
+        async with view_buffer.drain_article_views() as article_views:
+            assert article_views == {article_id: 1}
+
+        async with view_buffer.drain_article_views() as article_views:
+            assert article_views == {}
@@ -3,11 +3,14 @@ import datetime
 import pytest
 
 from polar.kit.extensions.sqlalchemy import sql
+from polar.kit.pagination import PaginationParams
 from polar.models.article import Article
 from polar.models.organization import Organization
 from polar.models.traffic import Traffic
+from polar.models.traffic_rollup import TrafficRollup, TrafficRollupInterval
 from polar.postgres import AsyncSession
-from polar.traffic.schemas import TrafficStatisticsPeriod
+from polar.traffic.buffer import PageViewKey
+from polar.traffic.schemas import TrafficReferrer, TrafficStatisticsPeriod
 from polar.traffic.service import traffic_service
 
 
@@ -253,3 +256,161 @@ async def test_organization_add(
     stmt = sql.select(Traffic).order_by(Traffic.date)
     r = await session.execute(stmt)
     assert 4 == len(r.scalars().unique().all())
+
+
+def _page_view(
+    article: Article, date: datetime.date, referrer: str | None = None
+) -> PageViewKey:
+    return PageViewKey(
+        location_href="https://polar.sh/hello",
+        referrer=referrer,
+        article_id=article.id,
+        organization_id=None,
+        date=date,
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_rollups(session: AsyncSession, article: Article) -> None:
+    # then
+    session.expunge_all()
+
+    await traffic_service.add_views(
+        session,
+        {
+            _page_view(article, datetime.date(2024, 1, 10)): 3,
+            _page_view(article, datetime.date(2024, 1, 31), "https://google.com/"): 2,
+            _page_view(article, datetime.date(2024, 2, 29)): 5,
+            _page_view(article, datetime.date(2024, 3, 1)): 7,
+        },
+    )
+
+    # February ended yesterday: not rolled up yet
+    await traffic_service.refresh_rollups(
+        session, TrafficRollupInterval.month, today=datetime.date(2024, 3, 1)
+    )
+    assert await traffic_service.get_rollup_coverage(
+        session, TrafficRollupInterval.month
+    ) == datetime.date(2024, 2, 1)
+
+    await traffic_service.refresh_rollups(
+        session, TrafficRollupInterval.month, today=datetime.date(2024, 3, 2)
+    )
+    assert await traffic_service.get_rollup_coverage(
+        session, TrafficRollupInterval.month
+    ) == datetime.date(2024, 3, 1)
+
+    res = await session.execute(
+        sql.select(
+            TrafficRollup.period_start, TrafficRollup.referrer, TrafficRollup.views
+        )
+        .where(TrafficRollup.interval == TrafficRollupInterval.month)
+        .order_by(TrafficRollup.period_start, TrafficRollup.referrer)
+    )
+    assert res.tuples().all() == [
+        (datetime.date(2024, 1, 1), "https://google.com/", 2),
+        (datetime.date(2024, 1, 1), None, 3),
+        (datetime.date(2024, 2, 1), None, 5),
+    ]
+
+    await traffic_service.refresh_rollups(
+        session, TrafficRollupInterval.week, today=datetime.date(2024, 3, 2)
+    )
+    # Week of Monday 2024-02-26 is still in progress
+    assert await traffic_service.get_rollup_coverage(
+        session, TrafficRollupInterval.week
+    ) == datetime.date(2024, 2, 5)
+
+
+@pytest.mark.asyncio
+async def test_views_statistics_rollups(
+    session: AsyncSession, article: Article
+) -> None:
+    # then
+    session.expunge_all()
+
+    await traffic_service.add_views(
+        session,
+        {
+            _page_view(article, datetime.date(2024, 1, 10)): 3,
+            _page_view(article, datetime.date(2024, 2, 29)): 5,
+            _page_view(article, datetime.date(2024, 3, 1)): 7,
+        },
+    )
+    await traffic_service.refresh_rollups(
+        session, TrafficRollupInterval.month, today=datetime.date(2024, 3, 5)
+    )
+    # Late views in a rolled up period are not counted
+    await traffic_service.add_views(
+        session, {_page_view(article, datetime.date(2024, 1, 11)): 100}
+    )
+
+    monthly = await traffic_service.views_statistics(
+        session,
+        article_ids=[article.id],
+        start_date=datetime.date(2023, 12, 1),
+        end_date=datetime.date(2024, 3, 1),
+        interval="month",
+        start_of_last_period=datetime.date(2024, 3, 1),
+        group_by_article=False,
+    )
+    assert [(p.start_date, p.end_date, p.views) for p in monthly] == [
+        (datetime.date(2023, 12, 1), datetime.date(2024, 1, 1), 0),
+        (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1), 3),
+        (datetime.date(2024, 2, 1), datetime.date(2024, 3, 1), 5),
+        # Current period, from the raw traffic
+        (datetime.date(2024, 3, 1), datetime.date(2024, 4, 1), 7),
+    ]
+
+    # Not aligned on months: computed from the raw traffic
+    shifted = await traffic_service.views_statistics(
+        session,
+        article_ids=[article.id],
+        start_date=datetime.date(2023, 12, 15),
+        end_date=datetime.date(2024, 1, 15),
+        interval="month",
+        start_of_last_period=datetime.date(2024, 1, 15),
+        group_by_article=False,
+    )
+    assert [p.views for p in shifted] == [103, 0]
+
+
+@pytest.mark.asyncio
+async def test_referrers_rollups(session: AsyncSession, article: Article) -> None:
+    # then
+    session.expunge_all()
+
+    await traffic_service.add_views(
+        session,
+        {
+            _page_view(article, datetime.date(2024, 1, 10), "https://google.com/"): 1,
+            _page_view(article, datetime.date(2024, 1, 20), "https://google.com/"): 2,
+            _page_view(article, datetime.date(2024, 2, 10), "https://google.com/"): 4,
+            _page_view(article, datetime.date(2024, 2, 10), "https://x.com/"): 3,
+            _page_view(article, datetime.date(2024, 3, 3), "https://x.com/"): 8,
+            _page_view(article, datetime.date(2024, 3, 20), "https://x.com/"): 16,
+            _page_view(article, datetime.date(2024, 3, 20)): 32,
+        },
+    )
+    await traffic_service.refresh_rollups(
+        session, TrafficRollupInterval.month, today=datetime.date(2024, 3, 5)
+    )
+    # Late views in a rolled up period are not counted
+    await traffic_service.add_views(
+        session,
+        {_page_view(article, datetime.date(2024, 2, 11), "https://x.com/"): 100},
+    )
+
+    # January edge and March from raw traffic, February from the rollups
+    results, count = await traffic_service.referrers(
+        session,
+        article_ids=[article.id],
+        start_date=datetime.date(2024, 1, 15),
+        end_date=datetime.date(2024, 3, 10),
+        pagination=PaginationParams(1, 10),
+    )
+    assert count == 2
+    assert results == [
+        TrafficReferrer(referrer="https://x.com/", views=11),
+        TrafficReferrer(referrer="https://google.com/", views=6),
+    ]
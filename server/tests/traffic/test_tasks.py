@@ -0,0 +1,67 @@
+import datetime
+import uuid
+
+import pytest
+
+from polar.kit.extensions.sqlalchemy import sql
+from polar.models import Article, Organization, Traffic
+from polar.postgres import AsyncSession
+from polar.redis import redis
+from polar.traffic.buffer import view_buffer
+from polar.traffic.tasks import traffic_flush_views
+from polar.worker import JobContext
+
+
+@pytest.fixture(autouse=True)
+async def clear_view_buffer() -> None:
+    async for key in redis.scan_iter("polar:view_buffer:*"):
+        await redis.delete(key)
+
+
+@pytest.mark.asyncio
+async def test_flush_views(
+    job_context: JobContext,
+    session: AsyncSession,
+    article: Article,
+    organization: Organization,
+) -> None:
+    date = datetime.date(2024, 2, 19)
+
+    # then
+    session.expunge_all()
+
+    for _ in range(3):
+        await view_buffer.track_page_view(
+            location_href="https://polar.sh/hello", article_id=article.id, date=date
+        )
+        await view_buffer.track_article_view(article.id)
+    await view_buffer.track_page_view(
+        location_href="https://polar.sh/", organization_id=organization.id, date=date
+    )
+    # Unknown article, skipped
+    await view_buffer.track_page_view(
+        location_href="https://polar.sh/hello", article_id=uuid.uuid4(), date=date
+    )
+
+    await traffic_flush_views(job_context)
+
+    # A second round is added to the existing rows
+    await view_buffer.track_page_view(
+        location_href="https://polar.sh/hello", article_id=article.id, date=date
+    )
+    await view_buffer.track_article_view(article.id)
+
+    await traffic_flush_views(job_context)
+
+    res = await session.execute(
+        sql.select(Traffic.location_href, Traffic.views).order_by(Traffic.location_href)
+    )
+    assert res.tuples().all() == [
+        ("https://polar.sh/", 1),
+        ("https://polar.sh/hello", 4),
+    ]
+
+    web_view_count = await session.scalar(
+        sql.select(Article.web_view_count).where(Article.id == article.id)
+    )
+    assert web_view_count == 4
@@ -15,6 +15,10 @@ from polar.models import (
 from polar.models.donation import Donation
 from polar.models.pledge import PledgeType
 from polar.models.transaction import PaymentProcessor, TransactionType
+from polar.postgres import AsyncSession
+from polar.transaction.service.balance_snapshot import (
+    balance_snapshot as balance_snapshot_service,
+)
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import (
     create_donation,
@@ -170,6 +174,7 @@ async def transaction_donation_on_behalf_of_organization(
 
 @pytest_asyncio.fixture
 async def account_transactions(
+    session: AsyncSession,
     save_fixture: SaveFixture,
     account: Account,
     transaction_pledge: Pledge,
@@ -179,7 +184,7 @@ async def account_transactions(
     transaction_donation_by_organization: Donation,
     transaction_donation_on_behalf_of_organization: Donation,
 ) -> list[Transaction]:
-    return [
+    transactions = [
         await create_transaction(
             save_fixture,
             type=TransactionType.balance,
@@ -230,6 +235,8 @@ async def account_transactions(
             donation=transaction_donation_on_behalf_of_organization,
         ),
     ]
+    await balance_snapshot_service.rebuild(session, account.id)
+    return transactions
 
 
 @pytest_asyncio.fixture
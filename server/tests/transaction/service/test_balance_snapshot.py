@@ -0,0 +1,83 @@
+import pytest
+
+from polar.models import Account, Transaction
+from polar.models.transaction import TransactionType
+from polar.postgres import AsyncSession
+from polar.transaction.service.balance_snapshot import (
+    balance_snapshot as balance_snapshot_service,
+)
+from tests.fixtures.database import SaveFixture
+from tests.transaction.conftest import create_transaction
+
+
+@pytest.mark.asyncio
+class TestRecord:
+    async def test_running_sums(
+        self, session: AsyncSession, save_fixture: SaveFixture, account: Account
+    ) -> None:
+        transactions = [
+            await create_transaction(save_fixture, account=account, amount=1000),
+            await create_transaction(save_fixture, account=account, amount=2000),
+            await create_transaction(save_fixture, amount=5000),
+        ]
+
+        # then
+        session.expunge_all()
+
+        await balance_snapshot_service.record(session, *transactions)
+        assert await balance_snapshot_service.get_sums(session, account.id) == {
+            TransactionType.balance: (3000, 2700)
+        }
+
+        payout = await create_transaction(
+            save_fixture, account=account, type=TransactionType.payout, amount=-3000
+        )
+        balance = await create_transaction(save_fixture, account=account, amount=500)
+        await balance_snapshot_service.record(session, payout, balance)
+        assert await balance_snapshot_service.get_sums(session, account.id) == {
+            TransactionType.balance: (3500, 3150),
+            TransactionType.payout: (-3000, -2700),
+        }
+
+
+@pytest.mark.asyncio
+class TestReconcile:
+    async def test_no_drift(
+        self,
+        session: AsyncSession,
+        account: Account,
+        account_transactions: list[Transaction],
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        assert await balance_snapshot_service.reconcile(session) == []
+
+    async def test_drift(
+        self, session: AsyncSession, save_fixture: SaveFixture, account: Account
+    ) -> None:
+        recorded = await create_transaction(save_fixture, account=account)
+        # Written without going through the snapshot
+        await create_transaction(
+            save_fixture, account=account, type=TransactionType.payout, amount=-500
+        )
+
+        # then
+        session.expunge_all()
+
+        await balance_snapshot_service.record(session, recorded)
+
+        drifts = await balance_snapshot_service.reconcile(session)
+        assert len(drifts) == 1
+        drift = drifts[0]
+        assert drift.account_id == account.id
+        assert drift.type == TransactionType.payout
+        assert drift.snapshot_amount == 0
+        assert drift.ledger_amount == -500
+
+        await balance_snapshot_service.rebuild(session, account.id)
+        assert await balance_snapshot_service.reconcile(session) == []
+        assert await balance_snapshot_service.get_sums(session, account.id) == {
+            TransactionType.balance: (1000, 900),
+            TransactionType.payout: (-500, -450),
+        }
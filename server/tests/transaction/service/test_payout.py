@@ -11,6 +11,9 @@ from polar.integrations.stripe.service import StripeService
 from polar.models import Account, Transaction, User
 from polar.models.transaction import PaymentProcessor, TransactionType
 from polar.postgres import AsyncSession
+from polar.transaction.service.balance_snapshot import (
+    balance_snapshot as balance_snapshot_service,
+)
 from polar.transaction.service.payout import (
     InsufficientBalance,
     NotReadyAccount,
@@ -188,6 +191,7 @@ class TestCreatePayout:
 
         # then
         session.expunge_all()
+        await balance_snapshot_service.rebuild(session, account.id)
 
         payout = await payout_transaction_service.create_payout(
             session, account=account
@@ -274,6 +278,7 @@ class TestCreatePayout:
 
         # then
         session.expunge_all()
+        await balance_snapshot_service.rebuild(session, account.id)
 
         payout = await payout_transaction_service.create_payout(
             session, account=account
@@ -318,6 +323,7 @@ class TestCreatePayout:
 
         # then
         session.expunge_all()
+        await balance_snapshot_service.rebuild(session, account.id)
 
         payout = await payout_transaction_service.create_payout(
             session, account=account
@@ -441,9 +447,7 @@ class TestCreatePayoutFromStripe:
             transactions.append(transaction)
             balance_transactions.append(balance_transaction)
 
-        stripe_service_mock.list_balance_transactions.return_value = (
-            balance_transactions
-        )
+        stripe_service_mock.list_balance_transactions.return_value.__aiter__.return_value = balance_transactions
 
         stripe_payout = build_stripe_payout(
             amount=sum(transaction.amount for transaction in transactions)
@@ -515,9 +519,7 @@ class TestCreatePayoutFromStripe:
             transactions.append(transaction)
             balance_transactions.append(balance_transaction)
 
-        stripe_service_mock.list_balance_transactions.return_value = (
-            balance_transactions
-        )
+        stripe_service_mock.list_balance_transactions.return_value.__aiter__.return_value = balance_transactions
 
         stripe_payout = build_stripe_payout(
             amount=sum(transaction.account_amount for transaction in transactions),
@@ -441,9 +441,7 @@ class TestSyncStripeFees:
             ),
         ]
 
-        stripe_service_mock.list_balance_transactions.return_value = (
-            balance_transactions
-        )
+        stripe_service_mock.list_balance_transactions.return_value.__aiter__.return_value = balance_transactions
 
         fee_transaction_9 = Transaction(
             type=TransactionType.processor_fee,
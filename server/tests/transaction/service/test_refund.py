@@ -134,7 +134,7 @@ class TestCreateRefunds:
             balance_transaction=balance_transaction.id,
         )
 
-        stripe_service_mock.list_refunds.return_value = [
+        stripe_service_mock.list_refunds.return_value.__aiter__.return_value = [
             new_refund,
             handled_refund,
             failed_refund,
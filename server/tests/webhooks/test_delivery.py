@@ -0,0 +1,92 @@
+import asyncio
+import socket
+import uuid
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.webhook.delivery import DNSCache, WebhookHTTPClient
+
+ADDR_INFO = [
+    (socket.AddressFamily.AF_INET, socket.SocketKind.SOCK_STREAM, 6, "", ("1.1.1.1", 0))
+]
+
+
+@pytest.mark.asyncio
+class TestDNSCache:
+    async def test_cached(self, mocker: MockerFixture) -> None:
+        getaddrinfo_mock = mocker.patch.object(
+            asyncio.get_running_loop(), "getaddrinfo", return_value=ADDR_INFO
+        )
+        dns_cache = DNSCache(ttl=60)
+
+        assert await dns_cache.resolve("example.com") == ADDR_INFO
+        assert await dns_cache.resolve("example.com") == ADDR_INFO
+
+        getaddrinfo_mock.assert_called_once_with("example.com", 0)
+
+    async def test_expired(self, mocker: MockerFixture) -> None:
+        getaddrinfo_mock = mocker.patch.object(
+            asyncio.get_running_loop(), "getaddrinfo", return_value=ADDR_INFO
+        )
+        dns_cache = DNSCache(ttl=0)
+
+        await dns_cache.resolve("example.com")
+        await dns_cache.resolve("example.com")
+
+        assert getaddrinfo_mock.call_count == 2
+
+    async def test_failure_not_cached(self, mocker: MockerFixture) -> None:
+        getaddrinfo_mock = mocker.patch.object(
+            asyncio.get_running_loop(),
+            "getaddrinfo",
+            side_effect=[socket.gaierror(), ADDR_INFO],
+        )
+        dns_cache = DNSCache(ttl=60)
+
+        with pytest.raises(socket.gaierror):
+            await dns_cache.resolve("example.com")
+        assert await dns_cache.resolve("example.com") == ADDR_INFO
+
+        assert getaddrinfo_mock.call_count == 2
+
+
+@pytest.mark.asyncio
+class TestWebhookHTTPClient:
+    async def test_max_concurrency_per_endpoint(self) -> None:
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200)
+
+        client = WebhookHTTPClient(
+            timeout=1,
+            max_connections=10,
+            max_keepalive_connections=10,
+            keepalive_expiry=1,
+            max_concurrency_per_endpoint=2,
+            transport=httpx.MockTransport(handler),  # type: ignore[arg-type]
+        )
+        endpoint_id = uuid.uuid4()
+
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    endpoint_id, "https://example.com/hook", content="{}", headers={}
+                )
+                for _ in range(6)
+            )
+        )
+
+        assert all(r.status_code == 200 for r in responses)
+        assert max_in_flight == 2
+        assert client._endpoint_semaphores == {}
+
+        await client.aclose()
@@ -307,3 +307,43 @@ class TestListWebhookDeliveries:
         json = response.json()
         assert len(json["items"]) == 1
         assert json["items"][0]["id"] == str(webhook_delivery.id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.http_auto_expunge
+class TestGetWebhookEndpointHealth:
+    async def test_unauthenticated(
+        self, client: AsyncClient, webhook_endpoint_organization: WebhookEndpoint
+    ) -> None:
+        response = await client.get(
+            f"/api/v1/webhooks/endpoints/{webhook_endpoint_organization.id}/health"
+        )
+
+        assert response.status_code == 401
+
+    @pytest.mark.auth
+    async def test_not_admin(
+        self, client: AsyncClient, webhook_endpoint_organization: WebhookEndpoint
+    ) -> None:
+        response = await client.get(
+            f"/api/v1/webhooks/endpoints/{webhook_endpoint_organization.id}/health"
+        )
+
+        assert response.status_code == 404
+
+    @pytest.mark.auth
+    async def test_valid(
+        self,
+        client: AsyncClient,
+        webhook_endpoint_organization: WebhookEndpoint,
+        user_organization_admin: UserOrganization,
+    ) -> None:
+        response = await client.get(
+            f"/api/v1/webhooks/endpoints/{webhook_endpoint_organization.id}/health"
+        )
+
+        assert response.status_code == 200
+        json = response.json()
+        assert json["state"] == "closed"
+        assert json["success_rate"] is None
+        assert json["parked_events"] == 0
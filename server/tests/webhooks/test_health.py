@@ -0,0 +1,119 @@
+import uuid
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.config import settings
+from polar.webhook.health import (
+    CircuitState,
+    DeliveryDecision,
+    webhook_endpoint_health,
+)
+
+
+async def _open_circuit(endpoint_id: uuid.UUID) -> None:
+    for _ in range(settings.WEBHOOK_CIRCUIT_MIN_DELIVERIES):
+        await webhook_endpoint_health.record_failure(endpoint_id)
+
+
+@pytest.mark.asyncio
+class TestWebhookEndpointHealth:
+    async def test_healthy(self) -> None:
+        endpoint_id = uuid.uuid4()
+
+        await webhook_endpoint_health.record_success(endpoint_id)
+        await webhook_endpoint_health.record_failure(endpoint_id)
+
+        health = await webhook_endpoint_health.get_health(endpoint_id)
+        assert health.state == CircuitState.closed
+        assert health.success_rate == 0.5
+        assert health.window_size == 2
+        assert health.last_failure_at is not None
+        assert (
+            await webhook_endpoint_health.before_delivery(endpoint_id)
+            == DeliveryDecision.deliver
+        )
+
+    async def test_open_below_min_deliveries(self) -> None:
+        endpoint_id = uuid.uuid4()
+
+        for _ in range(settings.WEBHOOK_CIRCUIT_MIN_DELIVERIES - 1):
+            state = await webhook_endpoint_health.record_failure(endpoint_id)
+            assert state == CircuitState.closed
+
+    async def test_open(self) -> None:
+        endpoint_id = uuid.uuid4()
+
+        await _open_circuit(endpoint_id)
+
+        health = await webhook_endpoint_health.get_health(endpoint_id)
+        assert health.state == CircuitState.open
+        assert health.opened_at is not None
+        assert (
+            await webhook_endpoint_health.before_delivery(endpoint_id)
+            == DeliveryDecision.park
+        )
+        assert endpoint_id not in (
+            await webhook_endpoint_health.list_probe_candidates()
+        )
+
+    async def test_probe_success(self, mocker: MockerFixture) -> None:
+        mocker.patch.object(settings, "WEBHOOK_CIRCUIT_OPEN_SECONDS", 0)
+        endpoint_id = uuid.uuid4()
+
+        await _open_circuit(endpoint_id)
+        assert endpoint_id in await webhook_endpoint_health.list_probe_candidates()
+
+        assert (
+            await webhook_endpoint_health.before_delivery(endpoint_id)
+            == DeliveryDecision.probe
+        )
+        # Only one probe at a time
+        assert (
+            await webhook_endpoint_health.before_delivery(endpoint_id)
+            == DeliveryDecision.park
+        )
+        health = await webhook_endpoint_health.get_health(endpoint_id)
+        assert health.state == CircuitState.half_open
+
+        previous_state = await webhook_endpoint_health.record_success(endpoint_id)
+        assert previous_state == CircuitState.half_open
+
+        health = await webhook_endpoint_health.get_health(endpoint_id)
+        assert health.state == CircuitState.closed
+        assert health.success_rate == 1.0
+        assert endpoint_id not in (
+            await webhook_endpoint_health.list_probe_candidates()
+        )
+
+    async def test_probe_failure(self, mocker: MockerFixture) -> None:
+        mocker.patch.object(settings, "WEBHOOK_CIRCUIT_OPEN_SECONDS", 0)
+        endpoint_id = uuid.uuid4()
+
+        await _open_circuit(endpoint_id)
+        assert (
+            await webhook_endpoint_health.before_delivery(endpoint_id)
+            == DeliveryDecision.probe
+        )
+
+        state = await webhook_endpoint_health.record_failure(endpoint_id)
+        assert state == CircuitState.open
+        assert (
+            await webhook_endpoint_health.before_delivery(endpoint_id)
+            == DeliveryDecision.probe
+        )
+
+    async def test_park(self) -> None:
+        endpoint_id = uuid.uuid4()
+        event_ids = [uuid.uuid4() for _ in range(3)]
+
+        for event_id in event_ids:
+            await webhook_endpoint_health.park(endpoint_id, event_id)
+
+        health = await webhook_endpoint_health.get_health(endpoint_id)
+        assert health.parked_events == 3
+
+        assert await webhook_endpoint_health.pop_parked(endpoint_id, 2) == event_ids[:2]
+        assert await webhook_endpoint_health.has_parked(endpoint_id)
+        assert await webhook_endpoint_health.pop_parked(endpoint_id, 2) == event_ids[2:]
+        assert not await webhook_endpoint_health.has_parked(endpoint_id)
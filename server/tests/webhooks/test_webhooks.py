@@ -1,20 +1,31 @@
 import base64
+import uuid
 
 import httpx
 import pytest
 import standardwebhooks
 from arq import Retry
 from pytest_mock import MockerFixture
+from sqlalchemy import select
 from standardwebhooks.webhooks import Webhook as StandardWebhook
 
+from polar.config import settings
 from polar.kit.db.postgres import AsyncSession
 from polar.models.organization import Organization
 from polar.models.subscription import Subscription
 from polar.models.webhook_endpoint import WebhookEndpoint, WebhookEventType
 from polar.models.webhook_event import WebhookEvent
 from polar.subscription.service.subscription import subscription as subscription_service
+from polar.webhook.delivery import webhook_http_client
+from polar.webhook.health import CircuitState, webhook_endpoint_health
 from polar.webhook.service import webhook as webhook_service
-from polar.webhook.tasks import _webhook_event_send, allowed_url, webhook_event_send
+from polar.webhook.tasks import (
+    _webhook_event_send,
+    allowed_url,
+    webhook_endpoint_drain_parked,
+    webhook_event_send,
+)
+from polar.webhook.webhooks import WebhookSubscriptionCreatedPayload
 from polar.worker import JobContext, PolarWorkerContext
 from tests.fixtures.database import SaveFixture
 
@@ -103,6 +114,63 @@ async def test_webhook_send_not_subscribed_to_event(
     assert called is False
 
 
+@pytest.mark.asyncio
+async def test_webhook_send_multiple_endpoints(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    mocker: MockerFixture,
+    organization: Organization,
+    subscription: Subscription,
+) -> None:
+    enqueued_event_ids: list[uuid.UUID] = []
+
+    def in_process_enqueue_job(name, *args, **kwargs) -> None:  # type: ignore  # noqa: E501
+        if name == "webhook_event.send":
+            enqueued_event_ids.append(kwargs["webhook_event_id"])
+            return
+        raise Exception(f"unexpected job: {name}")
+
+    mocker.patch("polar.webhook.service.enqueue_job", new=in_process_enqueue_job)
+    model_dump_json_spy = mocker.spy(
+        WebhookSubscriptionCreatedPayload, "model_dump_json"
+    )
+
+    endpoints = [
+        WebhookEndpoint(
+            url=f"https://example.com/hook/{i}",
+            organization_id=organization.id,
+            secret="mysecret",
+            events=[WebhookEventType.subscription_created],
+        )
+        for i in range(3)
+    ]
+    for endpoint in endpoints:
+        await save_fixture(endpoint)
+
+    # then
+    session.expunge_all()
+
+    # get full subscription, with relations
+    full_sub = await subscription_service.get(session, subscription.id)
+    assert full_sub
+
+    await webhook_service.send(
+        session, organization, (WebhookEventType.subscription_created, full_sub)
+    )
+
+    model_dump_json_spy.assert_called_once()
+    assert len(enqueued_event_ids) == 3
+
+    result = await session.execute(
+        select(WebhookEvent).where(WebhookEvent.id.in_(enqueued_event_ids))
+    )
+    events = result.scalars().all()
+    assert {event.webhook_endpoint_id for event in events} == {
+        endpoint.id for endpoint in endpoints
+    }
+    assert len({event.payload for event in events}) == 1
+
+
 @pytest.mark.asyncio
 @pytest.mark.http_auto_expunge
 async def test_webhook_delivery(
@@ -112,12 +180,12 @@ async def test_webhook_delivery(
     organization: Organization,
     job_context: JobContext,
 ) -> None:
-    def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
+    async def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
         return httpx.Response(
             status_code=200,
         )
 
-    mocker.patch("httpx.post", new=httpx_post)
+    mocker.patch.object(webhook_http_client, "post", new=httpx_post)
 
     endpoint = WebhookEndpoint(
         url="https://example.com/hook",
@@ -148,12 +216,12 @@ async def test_webhook_delivery_500(
     organization: Organization,
     job_context: JobContext,
 ) -> None:
-    def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
+    async def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
         return httpx.Response(
             status_code=500,
         )
 
-    mocker.patch("httpx.post", new=httpx_post)
+    mocker.patch.object(webhook_http_client, "post", new=httpx_post)
 
     endpoint = WebhookEndpoint(
         url="https://example.com/hook",
@@ -198,7 +266,7 @@ async def test_webhook_standard_webhooks_compatible(
 ) -> None:
     called = True
 
-    def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
+    async def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
         nonlocal called
         called = True
 
@@ -209,7 +277,7 @@ async def test_webhook_standard_webhooks_compatible(
             status_code=200,
         )
 
-    mocker.patch("httpx.post", new=httpx_post)
+    mocker.patch.object(webhook_http_client, "post", new=httpx_post)
 
     endpoint = WebhookEndpoint(
         url="https://example.com/hook",
@@ -244,7 +312,7 @@ async def test_webhook_standard_webhooks_fails_unexpected_secret(
 ) -> None:
     called = True
 
-    def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
+    async def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
         nonlocal called
         called = True
 
@@ -255,7 +323,7 @@ async def test_webhook_standard_webhooks_fails_unexpected_secret(
             status_code=200,
         )
 
-    mocker.patch("httpx.post", new=httpx_post)
+    mocker.patch.object(webhook_http_client, "post", new=httpx_post)
 
     endpoint = WebhookEndpoint(
         url="https://example.com/hook",
@@ -286,9 +354,128 @@ def btoa(a: str) -> str:
 
 @pytest.mark.asyncio
 async def test_allowed_url() -> None:
-    assert allowed_url("https://example.com/webhooks")
-    assert allowed_url("https://example.com:5000/webhooks")
-    assert allowed_url("http://example.com:5000/webhooks") is False  # http
-    assert allowed_url("https://127.0.0.1:5000/webhooks") is False  # loopback
-    assert allowed_url("https://::1/webhooks") is False  # loopback
-    assert allowed_url("https://foo.invalid:5000/webhooks") is False  # does not resolve
+    assert await allowed_url("https://example.com/webhooks")
+    assert await allowed_url("https://example.com:5000/webhooks")
+    assert await allowed_url("http://example.com:5000/webhooks") is False  # http
+    assert await allowed_url("https://127.0.0.1:5000/webhooks") is False  # loopback
+    assert await allowed_url("https://::1/webhooks") is False  # loopback
+    assert (
+        await allowed_url("https://foo.invalid:5000/webhooks") is False
+    )  # does not resolve
+
+
+@pytest.mark.asyncio
+@pytest.mark.http_auto_expunge
+async def test_webhook_delivery_circuit_open(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    mocker: MockerFixture,
+    organization: Organization,
+    job_context: JobContext,
+) -> None:
+    post_mock = mocker.patch.object(webhook_http_client, "post")
+
+    endpoint = WebhookEndpoint(
+        url="https://example.com/hook",
+        organization_id=organization.id,
+        secret="mysecret",
+    )
+    await save_fixture(endpoint)
+
+    event = WebhookEvent(webhook_endpoint_id=endpoint.id, payload='{"foo":"bar"}')
+    await save_fixture(event)
+
+    for _ in range(settings.WEBHOOK_CIRCUIT_MIN_DELIVERIES):
+        await webhook_endpoint_health.record_failure(endpoint.id)
+
+    # then
+    session.expunge_all()
+
+    await _webhook_event_send(
+        session=session,
+        ctx=job_context,
+        webhook_event_id=event.id,
+    )
+
+    post_mock.assert_not_called()
+    assert await webhook_endpoint_health.pop_parked(endpoint.id, 10) == [event.id]
+
+
+@pytest.mark.asyncio
+@pytest.mark.http_auto_expunge
+async def test_webhook_delivery_probe_success(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    mocker: MockerFixture,
+    organization: Organization,
+    job_context: JobContext,
+) -> None:
+    mocker.patch.object(settings, "WEBHOOK_CIRCUIT_OPEN_SECONDS", 0)
+    enqueue_job_mock = mocker.patch("polar.webhook.tasks.enqueue_job")
+
+    async def httpx_post(*args, **kwargs) -> httpx.Response:  # type: ignore  # noqa: E501
+        return httpx.Response(status_code=200)
+
+    mocker.patch.object(webhook_http_client, "post", new=httpx_post)
+
+    endpoint = WebhookEndpoint(
+        url="https://example.com/hook",
+        organization_id=organization.id,
+        secret="mysecret",
+    )
+    await save_fixture(endpoint)
+
+    event = WebhookEvent(webhook_endpoint_id=endpoint.id, payload='{"foo":"bar"}')
+    await save_fixture(event)
+
+    for _ in range(settings.WEBHOOK_CIRCUIT_MIN_DELIVERIES):
+        await webhook_endpoint_health.record_failure(endpoint.id)
+
+    # then
+    session.expunge_all()
+
+    await _webhook_event_send(
+        session=session,
+        ctx=job_context,
+        webhook_event_id=event.id,
+    )
+
+    health = await webhook_endpoint_health.get_health(endpoint.id)
+    assert health.state == CircuitState.closed
+    enqueue_job_mock.assert_called_once_with(
+        "webhook_endpoint.drain_parked", webhook_endpoint_id=endpoint.id
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+async def test_webhook_endpoint_drain_parked(
+    mocker: MockerFixture,
+    job_context: JobContext,
+) -> None:
+    mocker.patch.object(settings, "WEBHOOK_DRAIN_BATCH_SIZE", 2)
+    enqueue_job_mock = mocker.patch("polar.webhook.tasks.enqueue_job")
+
+    endpoint_id = uuid.uuid4()
+    event_ids = [uuid.uuid4() for _ in range(3)]
+    for event_id in event_ids:
+        await webhook_endpoint_health.park(endpoint_id, event_id)
+
+    await webhook_endpoint_drain_parked(
+        job_context,
+        webhook_endpoint_id=endpoint_id,
+        polar_context=PolarWorkerContext(),
+    )
+
+    assert enqueue_job_mock.call_count == 3
+    enqueue_job_mock.assert_any_call(
+        "webhook_event.send", webhook_event_id=event_ids[0]
+    )
+    enqueue_job_mock.assert_any_call(
+        "webhook_event.send", webhook_event_id=event_ids[1]
+    )
+    enqueue_job_mock.assert_any_call(
+        "webhook_endpoint.drain_parked",
+        webhook_endpoint_id=endpoint_id,
+        _defer_by=settings.WEBHOOK_DRAIN_INTERVAL_SECONDS,
+    )
@@ -0,0 +1,82 @@
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from arq import ArqRedis
+from arq.jobs import Job, JobStatus
+
+from polar.worker import QueueName, _jobs_to_enqueue, enqueue_job, flush_enqueued_jobs
+
+
+@pytest_asyncio.fixture
+async def arq_pool() -> AsyncIterator[ArqRedis]:
+    arq_pool = ArqRedis()
+    yield arq_pool
+    await arq_pool.close(True)
+
+
+def _job_id() -> str:
+    return f"test:{uuid.uuid4().hex}"
+
+
+@pytest.mark.asyncio
+class TestFlushEnqueuedJobs:
+    async def test_no_jobs(self, arq_pool: ArqRedis) -> None:
+        await flush_enqueued_jobs(arq_pool)
+
+    async def test_bulk(self, arq_pool: ArqRedis) -> None:
+        job_ids = [_job_id() for _ in range(3)]
+        for i, job_id in enumerate(job_ids):
+            enqueue_job("test.job", i, _job_id=job_id, foo="bar")
+
+        await flush_enqueued_jobs(arq_pool)
+
+        assert _jobs_to_enqueue.get() == []
+        for i, job_id in enumerate(job_ids):
+            job = Job(job_id, arq_pool, _queue_name=QueueName.default.value)
+            assert await job.status() == JobStatus.queued
+            info = await job.info()
+            assert info is not None
+            assert info.function == "test.job"
+            assert info.args == (i,)
+            assert info.kwargs["foo"] == "bar"
+            assert "_job_id" not in info.kwargs
+            assert "_queue_name" not in info.kwargs
+
+    async def test_duplicate_job_id(self, arq_pool: ArqRedis) -> None:
+        job_id = _job_id()
+        existing_job_id = _job_id()
+        await arq_pool.enqueue_job("test.existing", _job_id=existing_job_id)
+
+        enqueue_job("test.first", _job_id=job_id)
+        enqueue_job("test.second", _job_id=job_id)
+        enqueue_job("test.new", _job_id=existing_job_id)
+
+        await flush_enqueued_jobs(arq_pool)
+
+        job_info = await Job(job_id, arq_pool).info()
+        assert job_info is not None
+        assert job_info.function == "test.first"
+
+        existing_job_info = await Job(existing_job_id, arq_pool).info()
+        assert existing_job_info is not None
+        assert existing_job_info.function == "test.existing"
+
+    async def test_defer_by_and_queue_name(self, arq_pool: ArqRedis) -> None:
+        job_id = _job_id()
+        enqueue_job(
+            "test.job",
+            _job_id=job_id,
+            _defer_by=60,
+            queue_name=QueueName.github_crawl,
+        )
+
+        await flush_enqueued_jobs(arq_pool)
+
+        score = await arq_pool.zscore(QueueName.github_crawl.value, job_id)
+        assert score is not None
+        assert await arq_pool.zscore(QueueName.default.value, job_id) is None
+
+        job = Job(job_id, arq_pool, _queue_name=QueueName.github_crawl.value)
+        assert await job.status() == JobStatus.deferred